@@ -0,0 +1,116 @@
+"""move device type and menu images into the asset store
+
+Revision ID: a3d9f5c1e7b2
+Revises: f2c6a8e4b1d7
+Create Date: 2026-10-19 16:00:00
+
+Base64 ``data:`` URIs in ``device_types.upload_icon``/``upload_image`` and
+the ``MENU_ICON_*``/``MENU_IMAGE_*`` tunables are written to
+``<STATIC_DIR>/assets/<sha256>.<ext>`` and replaced by the file name.
+Names are content hashes, so every instance running this migration ends up
+with the same values and the rows need no re-sync.  Thumbnails are not
+generated here; pages fall back to the original file.  Only raster formats
+are moved; anything else (e.g. SVG) stays inline.
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a3d9f5c1e7b2'
+down_revision: Union[str, None] = 'f2c6a8e4b1d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_DATA_URI = re.compile(r"^data:([^;,]*);base64,(.*)$", re.S)
+_EXTENSIONS = ("png", "jpg", "gif", "webp", "bmp")
+_ASSET_NAME = re.compile(r"^[0-9a-f]{64}\.(%s)$" % "|".join(_EXTENSIONS))
+
+
+def _asset_dir() -> str:
+    static = os.environ.get("STATIC_DIR") or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "web-client",
+        "static",
+    )
+    return os.path.join(os.path.abspath(static), "assets")
+
+
+def _store(uri: str) -> str | None:
+    match = _DATA_URI.match(uri)
+    if not match:
+        return None
+    ext = (mimetypes.guess_extension(match.group(1)) or ".bin").lstrip(".").lower()
+    ext = {"jpe": "jpg", "jpeg": "jpg"}.get(ext, ext)
+    if ext not in _EXTENSIONS:
+        return None
+    data = base64.b64decode(match.group(2))
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = os.path.join(_asset_dir(), name)
+    if not os.path.exists(path):
+        os.makedirs(_asset_dir(), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return name
+
+
+def _load(name: str) -> str | None:
+    path = os.path.join(_asset_dir(), name)
+    if not os.path.exists(path):
+        return None
+    ext = name.rsplit(".", 1)[1]
+    content_type = mimetypes.types_map.get(f".{ext}", "application/octet-stream")
+    with open(path, "rb") as f:
+        return f"data:{content_type};base64,{base64.b64encode(f.read()).decode()}"
+
+
+def _convert(convert, matches) -> None:
+    bind = op.get_bind()
+    device_types = sa.table(
+        'device_types',
+        sa.column('id', sa.Integer),
+        sa.column('upload_icon', sa.String),
+        sa.column('upload_image', sa.String),
+    )
+    for row in bind.execute(sa.select(device_types)).mappings().all():
+        values = {}
+        for column in ('upload_icon', 'upload_image'):
+            if row[column] and matches(row[column]):
+                new = convert(row[column])
+                if new:
+                    values[column] = new
+        if values:
+            bind.execute(
+                device_types.update().where(device_types.c.id == row['id']).values(**values)
+            )
+    tunables = sa.table(
+        'system_tunables',
+        sa.column('id', sa.Integer),
+        sa.column('name', sa.String),
+        sa.column('value', sa.String),
+    )
+    rows = bind.execute(
+        sa.select(tunables).where(
+            sa.or_(tunables.c.name.like('MENU_ICON_%'), tunables.c.name.like('MENU_IMAGE_%'))
+        )
+    ).mappings().all()
+    for row in rows:
+        if row['value'] and matches(row['value']):
+            new = convert(row['value'])
+            if new:
+                bind.execute(
+                    tunables.update().where(tunables.c.id == row['id']).values(value=new)
+                )
+
+
+def upgrade() -> None:
+    _convert(_store, lambda value: value.startswith('data:'))
+
+
+def downgrade() -> None:
+    _convert(_load, lambda value: bool(_ASSET_NAME.match(value)))
@@ -0,0 +1,50 @@
+"""content-addressed config backup storage
+
+Revision ID: a3f1c9d2e7b4
+Revises: 92afc614eeae
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'a3f1c9d2e7b4'
+down_revision: Union[str, None] = '92afc614eeae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'config_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('data', postgresql.BYTEA(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('config_backups', sa.Column('config_hash', sa.String(length=64), nullable=True))
+    op.add_column('config_backups', sa.Column('last_verified_at', postgresql.TIMESTAMP(), nullable=True))
+    op.create_foreign_key(
+        'fk_config_backups_config_hash', 'config_backups', 'config_blobs', ['config_hash'], ['hash']
+    )
+    op.create_index(op.f('ix_config_backups_config_hash'), 'config_backups', ['config_hash'], unique=False)
+    # Existing rows keep their text inline and are read transparently
+    op.alter_column('config_backups', 'config_text', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    # Blob-backed text is compressed in Python and cannot be restored in SQL
+    op.execute(
+        "UPDATE config_backups SET config_text = '' WHERE config_text IS NULL"
+    )
+    op.alter_column('config_backups', 'config_text', existing_type=sa.Text(), nullable=False)
+    op.drop_index(op.f('ix_config_backups_config_hash'), table_name='config_backups')
+    op.drop_constraint('fk_config_backups_config_hash', 'config_backups', type_='foreignkey')
+    op.drop_column('config_backups', 'last_verified_at')
+    op.drop_column('config_backups', 'config_hash')
+    op.drop_table('config_blobs')
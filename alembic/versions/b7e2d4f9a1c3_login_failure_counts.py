@@ -0,0 +1,38 @@
+"""shared login failure counters
+
+Revision ID: b7e2d4f9a1c3
+Revises: a3d9f5c1e7b2
+Create Date: 2026-10-19 17:00:00
+
+The counters only feed the short-lived login rate limits, so the table is
+UNLOGGED on PostgreSQL: no WAL traffic, and losing it in a crash merely
+resets the windows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'b7e2d4f9a1c3'
+down_revision: Union[str, None] = 'a3d9f5c1e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    prefixes = ['UNLOGGED'] if op.get_bind().dialect.name == 'postgresql' else []
+    op.create_table(
+        'login_failure_counts',
+        sa.Column('ip_address', sa.String(), nullable=False),
+        sa.Column('bucket', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ip_address', 'bucket'),
+        prefixes=prefixes,
+    )
+    op.create_index('ix_login_failure_counts_bucket', 'login_failure_counts', ['bucket'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_login_failure_counts_bucket', table_name='login_failure_counts')
+    op.drop_table('login_failure_counts')
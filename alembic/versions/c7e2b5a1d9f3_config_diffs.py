@@ -0,0 +1,41 @@
+"""precomputed config backup diffs
+
+Revision ID: c7e2b5a1d9f3
+Revises: a3f1c9d2e7b4
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'c7e2b5a1d9f3'
+down_revision: Union[str, None] = 'a3f1c9d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'config_diffs',
+        sa.Column('from_hash', sa.String(length=64), nullable=False),
+        sa.Column('to_hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('hunks', postgresql.BYTEA(), nullable=False),
+        sa.Column('lines_added', sa.Integer(), nullable=False),
+        sa.Column('lines_removed', sa.Integer(), nullable=False),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint('from_hash', 'to_hash')
+    )
+    op.add_column('config_backups', sa.Column('diff_base_id', sa.Integer(), nullable=True))
+    op.add_column('config_backups', sa.Column('lines_added', sa.Integer(), nullable=True))
+    op.add_column('config_backups', sa.Column('lines_removed', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('config_backups', 'lines_removed')
+    op.drop_column('config_backups', 'lines_added')
+    op.drop_column('config_backups', 'diff_base_id')
+    op.drop_table('config_diffs')
@@ -0,0 +1,78 @@
+"""canonical device keys and duplicate flags
+
+Revision ID: d4a8e1f6b2c9
+Revises: c7e2b5a1d9f3
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'd4a8e1f6b2c9'
+down_revision: Union[str, None] = 'c7e2b5a1d9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_OCTETS = ' AND '.join(
+    f"split_part(trim(ip), '.', {n})::int <= 255" for n in range(1, 5)
+)
+
+
+def upgrade() -> None:
+    op.add_column('devices', sa.Column('canonical_ip', sa.BigInteger(), nullable=True))
+    op.add_column('devices', sa.Column('canonical_mac', sa.BigInteger(), nullable=True))
+    op.create_index('ix_devices_canonical_ip', 'devices', ['canonical_ip'])
+    op.create_index('ix_devices_canonical_mac', 'devices', ['canonical_mac'])
+    op.create_index('ix_devices_asset_tag', 'devices', ['asset_tag'])
+    op.execute(
+        f"""
+        UPDATE devices SET canonical_ip =
+            split_part(trim(ip), '.', 1)::bigint * 16777216
+            + split_part(trim(ip), '.', 2)::bigint * 65536
+            + split_part(trim(ip), '.', 3)::bigint * 256
+            + split_part(trim(ip), '.', 4)::bigint
+        WHERE CASE WHEN trim(ip) ~ '^[0-9]{{1,3}}(\\.[0-9]{{1,3}}){{3}}$'
+              THEN {_OCTETS} ELSE false END
+        """
+    )
+    op.execute(
+        """
+        UPDATE devices SET canonical_mac =
+            ('x' || lpad(regexp_replace(mac, '[^0-9A-Fa-f]', '', 'g'), 16, '0'))::bit(64)::bigint
+        WHERE length(regexp_replace(mac, '[^0-9A-Fa-f]', '', 'g')) = 12
+        """
+    )
+    op.create_table(
+        'device_duplicates',
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('device_id', 'kind')
+    )
+    op.create_index('ix_device_duplicates_key', 'device_duplicates', ['key'])
+    for kind, column in (('ip', 'canonical_ip'), ('mac', 'canonical_mac'), ('asset_tag', 'asset_tag')):
+        op.execute(
+            f"""
+            INSERT INTO device_duplicates (device_id, kind, key)
+            SELECT id, '{kind}', {column}::varchar FROM devices
+            WHERE deleted_at IS NULL AND {column} IN (
+                SELECT {column} FROM devices
+                WHERE {column} IS NOT NULL AND {column}::varchar <> ''
+                  AND deleted_at IS NULL
+                GROUP BY {column} HAVING count(*) > 1
+            )
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_device_duplicates_key', table_name='device_duplicates')
+    op.drop_table('device_duplicates')
+    op.drop_index('ix_devices_asset_tag', table_name='devices')
+    op.drop_index('ix_devices_canonical_mac', table_name='devices')
+    op.drop_index('ix_devices_canonical_ip', table_name='devices')
+    op.drop_column('devices', 'canonical_mac')
+    op.drop_column('devices', 'canonical_ip')
@@ -0,0 +1,37 @@
+"""partial indexes on live rows
+
+Revision ID: e9b3c7d2a4f1
+Revises: d4a8e1f6b2c9
+Create Date: 2026-10-19 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'e9b3c7d2a4f1'
+down_revision: Union[str, None] = 'd4a8e1f6b2c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = (
+    ('ix_devices_live_type_hostname', 'devices', ['device_type_id', 'hostname']),
+    ('ix_devices_live_site_hostname', 'devices', ['site_id', 'hostname']),
+    ('ix_locations_live_site_name', 'locations', ['site_id', 'name']),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in _INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+        )
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
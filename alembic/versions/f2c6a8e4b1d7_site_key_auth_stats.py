@@ -0,0 +1,38 @@
+"""aggregated site key authentication stats
+
+Revision ID: f2c6a8e4b1d7
+Revises: e9b3c7d2a4f1
+Create Date: 2026-10-19 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'f2c6a8e4b1d7'
+down_revision: Union[str, None] = 'e9b3c7d2a4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'site_key_auth_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('site_id', sa.String(), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('first_seen', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('last_seen', postgresql.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_site_key_auth_stats_site_id', 'site_key_auth_stats', ['site_id'])
+    op.create_index('ix_site_key_auth_stats_last_seen', 'site_key_auth_stats', ['last_seen'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_site_key_auth_stats_last_seen', table_name='site_key_auth_stats')
+    op.drop_index('ix_site_key_auth_stats_site_id', table_name='site_key_auth_stats')
+    op.drop_table('site_key_auth_stats')
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse
 from datetime import datetime, timezone
 from core.utils.templates import templates
@@ -8,9 +8,10 @@ from core.utils.db_session import get_db
 from core.utils import auth as auth_utils
 from core.auth import issue_token
 from core.utils.audit import log_audit
-from core.utils.ip_banning import check_ban, record_failure, clear_attempts
+from core.utils.ip_banning import record_failure, clear_attempts
 from core.utils.login_events import log_login_event
-from core.utils.geolocation import geolocate_ip
+from core.utils.geolocation import enrich_login_event
+from core.utils.password_hashing import PasswordHasherBusy, verify_password_async
 from core.models.models import User, LoginEvent
 
 
@@ -28,31 +29,43 @@ async def login_form(request: Request):
 @router.post("/login")
 async def login(
     request: Request,
+    background_tasks: BackgroundTasks,
     email: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db),
 ):
-    """Process login form and create a session."""
+    """Process login form and create a session.
+
+    Banned addresses never get here; ``BannedIPMiddleware`` rejects them
+    before routing.  The login event is geolocated in a background task
+    after the response.
+    """
     ip = request.client.host
     user_agent = request.headers.get("user-agent", "")
 
-    if check_ban(db, ip):
-        log_audit(db, None, "failed_login", details=f"IP={ip} banned")
-        log_login_event(db, None, ip, user_agent, False)
-        context = {"request": request, "error": "Invalid credentials", "current_user": None}
-        return templates.TemplateResponse("base/login.html", context)
-
     user = db.query(User).filter(User.email == email, User.is_active.is_(True)).first()
-    if not user or not auth_utils.verify_password(password, user.hashed_password):
+    valid, upgraded_hash = False, None
+    if user:
+        try:
+            valid, upgraded_hash = await verify_password_async(password, user.hashed_password)
+        except PasswordHasherBusy:
+            context = {
+                "request": request,
+                "error": "Too many login attempts, please try again shortly",
+                "current_user": None,
+            }
+            return templates.TemplateResponse("base/login.html", context, status_code=503)
+    if not valid:
         banned_now = record_failure(db, ip)
         log_audit(db, user, "failed_login", details=f"IP={ip}")
-        log_login_event(db, user, ip, user_agent, False)
+        event = log_login_event(db, user, ip, user_agent, False)
+        background_tasks.add_task(enrich_login_event, event.id, ip)
         if banned_now:
             log_audit(db, None, "auto_ban_ip", details=f"{ip}")
         context = {"request": request, "error": "Invalid credentials", "current_user": None}
         return templates.TemplateResponse("base/login.html", context)
 
-    clear_attempts(ip)
+    clear_attempts(db, ip)
     request.session["user_id"] = user.id
     # New device/location alert
     seen = (
@@ -67,27 +80,40 @@ async def login(
     )
     if not seen:
         request.session["new_device_alert"] = "New login from unfamiliar device or location"
-    location, lat, lon = geolocate_ip(ip)
     user.last_login = datetime.now(timezone.utc)
-    user.last_location_lat = lat
-    user.last_location_lon = lon
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
     db.commit()
     log_audit(db, user, "login", details=f"IP={ip}")
-    log_login_event(db, user, ip, user_agent, True, location=location)
+    event = log_login_event(db, user, ip, user_agent, True)
+    background_tasks.add_task(enrich_login_event, event.id, ip, user.id)
     response = RedirectResponse(url="/", status_code=302)
     return response
 
 
 @router.post("/token")
 async def login_token(
+    request: Request,
     email: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db),
 ):
     """Return an access token for API authentication."""
+    ip = request.client.host
     user = db.query(User).filter_by(email=email, is_active=True).first()
-    if not user or not auth_utils.verify_password(password, user.hashed_password):
+    valid, upgraded_hash = False, None
+    if user:
+        try:
+            valid, upgraded_hash = await verify_password_async(password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise HTTPException(status_code=503, detail="Too many login attempts")
+    if not valid:
+        record_failure(db, ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    clear_attempts(db, ip)
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
+        db.commit()
     token = issue_token(user.id)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -9,11 +9,12 @@ from core.utils.auth import (
     get_current_user,
     require_role,
     ROLE_HIERARCHY,
-    get_password_hash,
 )
+from core.utils.password_hashing import hash_password_async
 from core.models import models as core_models
 from core.models.models import UserSSHCredential
-from core.models.models import User, SystemTunable, LoginEvent
+from core.models.models import User, LoginEvent
+from core.utils.tunables import get_tunable
 from core.utils.deletion import soft_delete
 
 router = APIRouter()
@@ -26,12 +27,7 @@ async def my_profile(
     current_user: User = Depends(require_role("viewer")),
 ):
     """Display the currently logged-in user's details."""
-    api_key_row = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "GOOGLE_MAPS_API_KEY")
-        .first()
-    )
-    api_key = api_key_row.value if api_key_row else None
+    api_key = get_tunable("GOOGLE_MAPS_API_KEY")
     last_login = (
         db.query(LoginEvent)
         .filter(LoginEvent.user_id == current_user.id, LoginEvent.success.is_(True))
@@ -52,7 +48,7 @@ async def my_profile(
     )
     context = {
         "request": request,
-        "user": current_user,
+        "user": db.get(User, current_user.id),
         "current_user": current_user,
         "api_key": api_key,
         "last_login": last_login,
@@ -81,12 +77,13 @@ async def my_profile(
 @router.get("/users/me/theme")
 async def theme_preferences(
     request: Request,
+    db: Session = Depends(get_db),
     current_user: User = Depends(require_role("viewer")),
 ):
     """Display interface theme and layout preferences."""
     context = {
         "request": request,
-        "user": current_user,
+        "user": db.get(User, current_user.id),
         "current_user": current_user,
         "themes": [
             "dark_colourful",
@@ -110,12 +107,14 @@ async def theme_preferences(
 
 @router.get("/users/me/edit")
 async def edit_my_profile_form(
-    request: Request, current_user: User = Depends(require_role("viewer"))
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("viewer")),
 ):
     """Render a form for the logged-in user to edit their details."""
     context = {
         "request": request,
-        "user": current_user,
+        "user": db.get(User, current_user.id),
         "current_user": current_user,
         "error": None,
         "themes": [
@@ -161,7 +160,7 @@ async def update_my_profile(
     if existing:
         context = {
             "request": request,
-            "user": current_user,
+            "user": db.get(User, current_user.id),
             "current_user": current_user,
             "error": "Email already in use",
             "themes": [
@@ -183,17 +182,18 @@ async def update_my_profile(
         }
         return templates.TemplateResponse("base/user_form.html", context)
 
-    current_user.email = email
-    current_user.theme = theme
-    current_user.font = font
-    current_user.menu_style = menu_style
-    current_user.icon_style = icon_style
-    current_user.menu_tab_color = menu_tab_color
-    current_user.menu_bg_color = menu_bg_color
-    current_user.menu_stick_theme = menu_stick_theme
-    current_user.scroll_handoff_enabled = bool(scroll_handoff_enabled)
+    user = db.get(User, current_user.id)
+    user.email = email
+    user.theme = theme
+    user.font = font
+    user.menu_style = menu_style
+    user.icon_style = icon_style
+    user.menu_tab_color = menu_tab_color
+    user.menu_bg_color = menu_bg_color
+    user.menu_stick_theme = menu_stick_theme
+    user.scroll_handoff_enabled = bool(scroll_handoff_enabled)
     if password:
-        current_user.hashed_password = get_password_hash(password)
+        user.hashed_password = await hash_password_async(password)
     db.commit()
     return RedirectResponse(url="/users/me", status_code=302)
 
@@ -207,9 +207,10 @@ async def update_my_ssh(
     current_user: User = Depends(require_role("viewer")),
 ):
     """Update the user's default SSH credentials."""
-    current_user.ssh_username = ssh_username
-    current_user.ssh_password = ssh_password or None
-    current_user.ssh_port = ssh_port
+    user = db.get(User, current_user.id)
+    user.ssh_username = ssh_username
+    user.ssh_password = ssh_password or None
+    user.ssh_port = ssh_port
     db.commit()
     return RedirectResponse(url="/users/me", status_code=302)
 
@@ -426,14 +427,15 @@ async def update_my_prefs(
     current_user: User = Depends(require_role("viewer")),
 ):
     """Update interface preferences for the user."""
-    current_user.theme = theme
-    current_user.font = font
-    current_user.menu_style = menu_style
-    current_user.menu_tab_color = menu_tab_color
-    current_user.menu_bg_color = menu_bg_color
-    current_user.menu_stick_theme = menu_stick_theme
-    current_user.table_grid_style = table_grid_style
-    current_user.menu_tab_colors = {
+    user = db.get(User, current_user.id)
+    user.theme = theme
+    user.font = font
+    user.menu_style = menu_style
+    user.menu_tab_color = menu_tab_color
+    user.menu_bg_color = menu_bg_color
+    user.menu_stick_theme = menu_stick_theme
+    user.table_grid_style = table_grid_style
+    user.menu_tab_colors = {
         "inventory": inventory_color or None,
         "network": network_color or None,
         "admin": admin_color or None,
@@ -459,12 +461,7 @@ async def user_detail(
     ) < ROLE_HIERARCHY.index("admin"):
         raise HTTPException(status_code=403, detail="Insufficient role")
 
-    api_key_row = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "GOOGLE_MAPS_API_KEY")
-        .first()
-    )
-    api_key = api_key_row.value if api_key_row else None
+    api_key = get_tunable("GOOGLE_MAPS_API_KEY")
     last_login = (
         db.query(LoginEvent)
         .filter(LoginEvent.user_id == user.id, LoginEvent.success.is_(True))
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import RedirectResponse
 from core.utils.templates import templates
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from sqlalchemy import func
 from core.utils.auth import get_current_user, get_user_site_ids, require_role
-from core.utils.db_session import get_db
+from core.utils.db_session import get_async_db, get_db
 from core.models.models import (
     LoginEvent,
     ConfigBackup,
@@ -125,36 +125,18 @@ async def welcome_role(
     return templates.TemplateResponse("base/welcome.html", context)
 
 
-@router.get("/network/dashboard")
-async def dashboard(
-    request: Request,
-    site_id: int | None = None,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_role("viewer")),
-):
+def _dashboard_data(db: Session, current_user, site_id: int | None) -> dict:
+    """Run the dashboard queries; relationships the template uses are loaded eagerly."""
     site_ids = get_user_site_ids(db, current_user)
     selectable_sites = None
     if current_user.role == "superadmin":
         selectable_sites = db.query(Site).all()
-        if site_id is None:
-            site_id = request.session.get("active_site_id")
     if site_id is None and site_ids:
         site_id = site_ids[0]
-    if site_id is not None:
-        request.session["active_site_id"] = site_id
     site = db.query(Site).filter(Site.id == site_id).first() if site_id else None
-
+    data = {"site_id": site_id, "site": site, "selectable_sites": selectable_sites}
     if not site and current_user.role != "superadmin":
-        context = {
-            "request": request,
-            "current_user": current_user,
-            "no_site": True,
-            "widget_labels": WIDGET_LABELS,
-            "widgets": {},
-            "site": None,
-            "selectable_sites": selectable_sites,
-        }
-        return templates.TemplateResponse("base/dashboard.html", context)
+        return data
 
     prefs = load_widget_preferences(db, current_user.id, site_id)
 
@@ -173,6 +155,7 @@ async def dashboard(
         config_changes = (
             db.query(ConfigBackup)
             .join(Device)
+            .options(contains_eager(ConfigBackup.device))
             .filter(Device.site_id == site_id if site_id else True)
             .order_by(ConfigBackup.created_at.desc())
             .limit(5)
@@ -204,6 +187,7 @@ async def dashboard(
         )
         port_issues = (
             db.query(PortStatusHistory)
+            .options(joinedload(PortStatusHistory.device))
             .join(
                 subq,
                 (PortStatusHistory.device_id == subq.c.device_id)
@@ -234,6 +218,7 @@ async def dashboard(
         rollbacks = (
             db.query(ConfigBackup)
             .join(Device)
+            .options(contains_eager(ConfigBackup.device))
             .filter(
                 Device.site_id == site_id if site_id else True,
                 ConfigBackup.status.in_(["failed", "pending"]),
@@ -255,22 +240,51 @@ async def dashboard(
             .all()
         )
 
+    data.update(
+        widgets=prefs,
+        device_summary=device_summary,
+        config_changes=config_changes,
+        recent_devices=recent_devices,
+        port_issues=port_issues,
+        snmp_traps=snmp_traps,
+        syslog_logs=syslog_logs,
+        rollbacks=rollbacks,
+        priority_devices=priority_devices,
+    )
+    return data
+
+
+@router.get("/network/dashboard")
+async def dashboard(
+    request: Request,
+    site_id: int | None = None,
+    db=Depends(get_async_db),
+    current_user=Depends(require_role("viewer")),
+):
+    if site_id is None and current_user.role == "superadmin":
+        site_id = request.session.get("active_site_id")
+    data = await db.run_sync(_dashboard_data, current_user, site_id)
+    site_id = data.pop("site_id")
+    if site_id is not None:
+        request.session["active_site_id"] = site_id
+
+    if "widgets" not in data:
+        context = {
+            "request": request,
+            "current_user": current_user,
+            "no_site": True,
+            "widget_labels": WIDGET_LABELS,
+            "widgets": {},
+            **data,
+        }
+        return templates.TemplateResponse("base/dashboard.html", context)
+
     context = {
         "request": request,
         "current_user": current_user,
-        "widgets": prefs,
         "widget_labels": WIDGET_LABELS,
-        "site": site,
-        "selectable_sites": selectable_sites,
-        "device_summary": device_summary,
-        "config_changes": config_changes,
-        "recent_devices": recent_devices,
-        "port_issues": port_issues,
-        "snmp_traps": snmp_traps,
-        "syslog_logs": syslog_logs,
-        "rollbacks": rollbacks,
-        "priority_devices": priority_devices,
         "no_site": False,
+        **data,
     }
     return templates.TemplateResponse("base/dashboard.html", context)
 
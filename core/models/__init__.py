@@ -1,12 +1,15 @@
 from .models import (
     Site,
     SiteMembership,
+    ConfigBlob,
+    ConfigDiff,
     ConfigBackup,
     User,
     UserSSHCredential,
     SystemTunable,
     AuditLog,
     BannedIP,
+    LoginFailureCount,
     LoginEvent,
     EmailLog,
     SNMPTrapLog,
@@ -14,6 +17,7 @@ from .models import (
     DashboardWidget,
     SiteDashboardWidget,
     SiteKey,
+    SiteKeyAuthStat,
     UserAPIKey,
     CustomColumn,
     ColumnPreference,
@@ -38,12 +42,15 @@ from .models import (
 __all__ = [
     "Site",
     "SiteMembership",
+    "ConfigBlob",
+    "ConfigDiff",
     "ConfigBackup",
     "User",
     "UserSSHCredential",
     "SystemTunable",
     "AuditLog",
     "BannedIP",
+    "LoginFailureCount",
     "LoginEvent",
     "EmailLog",
     "SNMPTrapLog",
@@ -51,6 +58,7 @@ __all__ = [
     "DashboardWidget",
     "SiteDashboardWidget",
     "SiteKey",
+    "SiteKeyAuthStat",
     "UserAPIKey",
     "CustomColumn",
     "ColumnPreference",
@@ -13,8 +13,8 @@ from sqlalchemy import (
     Index,
     text,
 )
-from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, DOUBLE_PRECISION
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, DOUBLE_PRECISION, BYTEA
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy import Table
 
 
@@ -57,19 +57,80 @@ class SiteMembership(Base):
     site = relationship("Site", back_populates="memberships")
 
 
+class ConfigBlob(Base):
+    """Compressed configuration text shared by every backup with the same hash."""
+
+    __tablename__ = "config_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    codec = Column(String, nullable=False)
+    data = Column(BYTEA, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now(timezone.utc))
+
+    @property
+    def text(self) -> str:
+        from core.utils.config_store import read_blob
+
+        return read_blob(self)
+
+
+class ConfigDiff(Base):
+    """Line diff between two stored configurations, keyed by content hash."""
+
+    __tablename__ = "config_diffs"
+
+    from_hash = Column(String(64), primary_key=True)
+    to_hash = Column(String(64), primary_key=True)
+    codec = Column(String, nullable=False)
+    hunks = Column(BYTEA, nullable=False)
+    lines_added = Column(Integer, nullable=False, default=0)
+    lines_removed = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=False), default=datetime.now(timezone.utc))
+
+
 class ConfigBackup(Base):
     __tablename__ = "config_backups"
 
     id = Column(Integer, primary_key=True)
     device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
     created_at = Column(TIMESTAMP(timezone=False), default=datetime.now(timezone.utc))
-    config_text = Column(Text, nullable=False)
+    # Legacy rows keep their text inline. New rows store it in ``config_blobs``
+    # and only reference the content hash; see ``core.utils.config_store``.
+    _config_text = deferred(Column("config_text", Text, nullable=True))
+    config_hash = Column(
+        String(64), ForeignKey("config_blobs.hash"), nullable=True, index=True
+    )
+    last_verified_at = Column(TIMESTAMP(timezone=False), nullable=True)
     source = Column(String, nullable=False)
     queued = Column(Boolean, default=False)
     status = Column(String, nullable=True)
     port_name = Column(String, nullable=True)
+    # Line counts against the previous backup, filled in when the row is
+    # stored; the hunks live in ``config_diffs``.
+    diff_base_id = Column(Integer, nullable=True)
+    lines_added = Column(Integer, nullable=True)
+    lines_removed = Column(Integer, nullable=True)
 
     device = relationship("Device", back_populates="backups")
+    blob = relationship("ConfigBlob")
+
+    @property
+    def config_text(self) -> str:
+        """Return the configuration text, reading through the blob store."""
+        cached = self.__dict__.get("_text_cache")
+        if cached is not None:
+            return cached
+        if self._config_text is not None:
+            return self._config_text
+        if self.blob is not None:
+            return self.blob.text
+        return ""
+
+    @config_text.setter
+    def config_text(self, value: str) -> None:
+        self.__dict__["_text_cache"] = value
+        self._config_text = value
 
 
 class User(Base):
@@ -182,6 +243,16 @@ class BannedIP(Base):
     attempt_count = Column(Integer, default=0)
 
 
+class LoginFailureCount(Base):
+    """Failed logins from one address within one minute, shared by all workers."""
+
+    __tablename__ = "login_failure_counts"
+
+    ip_address = Column(String, primary_key=True)
+    bucket = Column(TIMESTAMP(timezone=False), primary_key=True, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class LoginEvent(Base):
     __tablename__ = "login_events"
 
@@ -321,6 +392,19 @@ class SiteKey(Base):
     active = Column(Boolean, default=True)
 
 
+class SiteKeyAuthStat(Base):
+    """Site key authentications aggregated over one flush interval."""
+
+    __tablename__ = "site_key_auth_stats"
+
+    id = Column(Integer, primary_key=True)
+    site_id = Column(String, nullable=False, index=True)
+    success = Column(Boolean, nullable=False)
+    count = Column(Integer, nullable=False)
+    first_seen = Column(TIMESTAMP(timezone=False), nullable=False)
+    last_seen = Column(TIMESTAMP(timezone=False), nullable=False, index=True)
+
+
 class UserAPIKey(Base):
     """API key linked to an individual user."""
 
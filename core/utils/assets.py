@@ -0,0 +1,170 @@
+"""Content-addressed store for uploaded images.
+
+Uploads are written once to ``<STATIC_DIR>/assets/<sha256>.<ext>`` and rows
+keep only that file name.  A PNG thumbnail (``<sha256>.thumb.png``) is made
+with Pillow on a small thread pool so resizing never blocks the event loop.
+Because a name never changes its content, ``/assets`` is served with
+``Cache-Control: immutable``.  Sync sends names in the rows and transfers
+the files separately, only for names the peer does not have.
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, UploadFile
+from fastapi.staticfiles import StaticFiles
+
+from core.utils.paths import STATIC_DIR
+
+ASSET_DIR = os.path.join(STATIC_DIR, "assets")
+ASSET_URL_PREFIX = "/assets/"
+ASSET_THUMB_SIZE = int(os.environ.get("ASSET_THUMB_SIZE", "256"))
+ASSET_WORKERS = int(os.environ.get("ASSET_WORKERS", "2"))
+ASSET_MAX_BYTES = int(os.environ.get("ASSET_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# Raster formats Pillow thumbnails.  Anything else (SVG, HTML, ...) could
+# run script when opened from the immutable ``/assets`` URL.
+ASSET_EXTENSIONS = ("png", "jpg", "gif", "webp", "bmp")
+
+# Table -> columns holding asset names
+ASSET_COLUMNS = {"device_types": ("upload_icon", "upload_image")}
+
+ASSET_NAME_RE = re.compile(
+    r"^[0-9a-f]{64}(\.thumb)?\.(%s)$" % "|".join(ASSET_EXTENSIONS)
+)
+
+_executor = ThreadPoolExecutor(max_workers=ASSET_WORKERS, thread_name_prefix="assets")
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files whose URLs never change content."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+def is_asset_name(value) -> bool:
+    return isinstance(value, str) and bool(ASSET_NAME_RE.match(value))
+
+
+def asset_path(name: str) -> str:
+    if not is_asset_name(name):
+        raise ValueError(f"Invalid asset name {name!r}")
+    return os.path.join(ASSET_DIR, name)
+
+
+def asset_exists(name: str) -> bool:
+    return os.path.exists(asset_path(name))
+
+
+def _extension(content_type: str | None) -> str:
+    ext = mimetypes.guess_extension(content_type or "") or ".bin"
+    ext = ext.lstrip(".").lower()
+    return {"jpe": "jpg", "jpeg": "jpg"}.get(ext, ext)
+
+
+def thumb_name(name: str) -> str:
+    return name.split(".", 1)[0] + ".thumb.png"
+
+
+def _write_once(path: str, data: bytes) -> None:
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _make_thumbnail(name: str, data: bytes) -> None:
+    from PIL import Image
+
+    path = asset_path(thumb_name(name))
+    if os.path.exists(path):
+        return
+    try:
+        img = Image.open(io.BytesIO(data))
+        img = img.convert("RGBA")
+        img.thumbnail((ASSET_THUMB_SIZE, ASSET_THUMB_SIZE))
+        out = io.BytesIO()
+        img.save(out, format="PNG")
+    except Exception:
+        # Not a raster image Pillow understands (e.g. SVG); the original is used
+        return
+    _write_once(path, out.getvalue())
+
+
+def store_bytes(data: bytes, content_type: str | None) -> str:
+    """Write ``data`` to the store if new and return its asset name."""
+    ext = _extension(content_type)
+    if ext not in ASSET_EXTENSIONS:
+        raise ValueError(f"Unsupported image type {content_type}")
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    _write_once(asset_path(name), data)
+    _make_thumbnail(name, data)
+    return name
+
+
+def store_named(name: str, data: bytes) -> None:
+    """Store ``data`` received from a peer under ``name`` after checking its hash."""
+    if thumb_name(name) == name or hashlib.sha256(data).hexdigest() != name.split(".", 1)[0]:
+        raise ValueError(f"Content does not match asset {name}")
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    _write_once(asset_path(name), data)
+    _make_thumbnail(name, data)
+
+
+async def store_upload(upload: UploadFile, kind: str = "image") -> str:
+    """Validate an uploaded image and store it off the event loop."""
+    if _extension(upload.content_type) not in ASSET_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid {kind} type")
+    data = await upload.read(ASSET_MAX_BYTES + 1)
+    if len(data) > ASSET_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"{kind.capitalize()} too large")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, store_bytes, data, upload.content_type)
+
+
+def decode_data_uri(uri: str) -> tuple[bytes, str] | None:
+    """Return ``(data, content_type)`` for a base64 ``data:`` URI."""
+    match = re.match(r"^data:([^;,]*);base64,(.*)$", uri or "", re.S)
+    if not match:
+        return None
+    return base64.b64decode(match.group(2)), match.group(1)
+
+
+def asset_url(value: str | None, thumb: bool = False, legacy_dir: str = "device-types") -> str:
+    """Return the URL for an image column value.
+
+    Values written before the asset store (``data:`` URIs and plain upload
+    file names) are still resolved.
+    """
+    if not value:
+        return ""
+    if value.startswith("data:"):
+        return value
+    if is_asset_name(value):
+        if thumb and os.path.exists(os.path.join(ASSET_DIR, thumb_name(value))):
+            return ASSET_URL_PREFIX + thumb_name(value)
+        return ASSET_URL_PREFIX + value
+    return f"/static/uploads/{legacy_dir}/{value}"
+
+
+def referenced_assets(records_by_model: dict[str, list[dict]]) -> set[str]:
+    """Asset names referenced by serialized sync records."""
+    names: set[str] = set()
+    for table, columns in ASSET_COLUMNS.items():
+        for rec in records_by_model.get(table, []):
+            for column in columns:
+                if is_asset_name(rec.get(column)):
+                    names.add(rec[column])
+    return names
@@ -1,9 +1,180 @@
-from sqlalchemy.orm import Session
+"""Audit log pipeline.
+
+``log_audit`` turns each action into an immutable :class:`AuditEvent` and
+hands it to :data:`audit_queue`.  While the ``audit_writer`` worker runs,
+events are written in batches with one multi-row INSERT on their own
+connection, so logging never commits the caller's unit of work.  Events in
+``SYNC_ACTIONS`` are written on their own connection before ``log_audit``
+returns.  When the worker is not running (scripts, tests) every event is
+added to the caller's session and committed, as before.
+
+Bulk operations can wrap their loop in :func:`audit_context` to collapse
+the per-item events into one summary entry.
+"""
+
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
 from typing import Optional
 
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
 from modules.inventory.models import Device
 from core.models.models import AuditLog, User
 
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_MAX_PENDING = int(os.environ.get("AUDIT_MAX_PENDING", "10000"))
+
+# Security relevant actions are never buffered
+SYNC_ACTIONS = frozenset(
+    {
+        "create_user",
+        "edit_user",
+        "deactivate_user",
+        "reset_password",
+        "ban_ip",
+        "unban_ip",
+        "key_auth_fail",
+        "update",
+        "update_failed",
+    }
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuditEvent:
+    user_id: Optional[int]
+    action_type: str
+    device_id: Optional[int] = None
+    details: str = ""
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    attempts: int = 0
+
+    def row(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "action_type": self.action_type,
+            "device_id": self.device_id,
+            "details": self.details,
+            "timestamp": self.timestamp,
+        }
+
+
+class AuditQueue:
+    """Thread-safe buffer of events waiting for the background writer."""
+
+    def __init__(self):
+        self._events: list[AuditEvent] = []
+        self._lock = threading.Lock()
+        self.bind = None
+
+    @property
+    def running(self) -> bool:
+        return self.bind is not None
+
+    def put(self, event: AuditEvent) -> None:
+        with self._lock:
+            self._events.append(event)
+            overflow = len(self._events) >= AUDIT_MAX_PENDING
+        if overflow:
+            # The writer is falling behind; make the producer pay for a batch
+            self.flush()
+
+    def take(self, limit: int) -> list[AuditEvent]:
+        with self._lock:
+            batch, self._events = self._events[:limit], self._events[limit:]
+        return batch
+
+    def requeue(self, events: list[AuditEvent]) -> None:
+        with self._lock:
+            self._events[:0] = events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows."""
+        written = 0
+        retries: list[AuditEvent] = []
+        try:
+            while self.bind is not None:
+                batch = self.take(AUDIT_BATCH_SIZE)
+                if not batch:
+                    break
+                try:
+                    written += write_events(self.bind, batch, retry=retries.append)
+                except Exception:
+                    self.requeue(batch)
+                    raise
+        finally:
+            # Rows waiting for their device to be committed go in the next flush
+            if retries:
+                with self._lock:
+                    self._events.extend(retries)
+        return written
+
+
+audit_queue = AuditQueue()
+
+# Set inside ``audit_context``: collects events instead of queueing them
+_collector: ContextVar[Optional[list]] = ContextVar("audit_collector", default=None)
+
+
+def write_events(bind, events: list[AuditEvent], retry=None) -> int:
+    """Insert ``events`` with one statement, falling back to row by row.
+
+    A row referencing a device that is not committed yet is handed to
+    ``retry`` once; after that it is written without the device link.
+    """
+    try:
+        with bind.begin() as conn:
+            conn.execute(insert(AuditLog.__table__), [e.row() for e in events])
+        return len(events)
+    except IntegrityError:
+        pass
+    written = 0
+    for event in events:
+        try:
+            with bind.begin() as conn:
+                conn.execute(insert(AuditLog.__table__), [event.row()])
+            written += 1
+        except IntegrityError:
+            if retry is not None and event.attempts == 0:
+                retry(replace(event, attempts=1))
+                continue
+            if event.device_id is None:
+                log.error("Dropped audit row %s: %s", event.action_type, event.details)
+                continue
+            log.warning("Audit row for missing device %s kept without link", event.device_id)
+            unlinked = replace(
+                event,
+                device_id=None,
+                details=f"{event.details} (device {event.device_id})",
+            )
+            with bind.begin() as conn:
+                conn.execute(insert(AuditLog.__table__), [unlinked.row()])
+            written += 1
+    return written
+
+
+def _write_now(db: Session, event: AuditEvent) -> None:
+    bind = getattr(db, "bind", None)
+    if bind is None or not audit_queue.running:
+        # No writer (scripts, tests): keep the old commit-through behaviour
+        db.add(AuditLog(**event.row()))
+        db.commit()
+        return
+    write_events(bind, [event])
+
 
 def log_audit(
     db: Session,
@@ -11,13 +182,51 @@ def log_audit(
     action_type: str,
     device: Optional[Device] = None,
     details: str = "",
+    sync: bool = False,
 ) -> None:
-    """Create an AuditLog entry."""
-    entry = AuditLog(
+    """Record an audit entry without committing ``db``."""
+    if device is not None and device.id is None:
+        db.flush()
+    event = AuditEvent(
         user_id=user.id if user else None,
         action_type=action_type,
         device_id=device.id if device else None,
         details=details,
     )
-    db.add(entry)
-    db.commit()
+    collected = _collector.get()
+    if collected is not None and not sync and action_type not in SYNC_ACTIONS:
+        collected.append(event)
+        return
+    if sync or action_type in SYNC_ACTIONS or not audit_queue.running:
+        _write_now(db, event)
+    else:
+        audit_queue.put(event)
+
+
+def _summary(events: list[AuditEvent]) -> str:
+    counts = Counter(e.action_type for e in events)
+    return ", ".join(f"{action} x{count}" for action, count in sorted(counts.items()))
+
+
+@contextmanager
+def audit_context(
+    db: Session,
+    user: Optional[User],
+    action_type: str,
+    details: str = "",
+):
+    """Collapse audit events logged inside the block into one entry.
+
+    The entry is written when the block exits and lists how many events of
+    each type were collapsed, e.g. ``"500 devices; tag_add x480, auto_detect x20"``.
+    Nothing is written when the block raises.
+    """
+    events: list[AuditEvent] = []
+    token = _collector.set(events)
+    try:
+        yield events
+    finally:
+        _collector.reset(token)
+    summary = _summary(events)
+    text = "; ".join(part for part in (details, summary) if part)
+    log_audit(db, user, action_type, details=text)
@@ -1,12 +1,18 @@
 import bcrypt
 from typing import Optional, Callable
-from datetime import datetime, timezone
 
 from fastapi import Request, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from core.utils.db_session import get_db
-from core.models.models import User, Site, SiteMembership, UserAPIKey
+from core.utils.db_session import get_async_db
+from core.utils.password_hashing import hash_password
+from core.models.models import User, Site, SiteMembership
+from core.utils.auth_cache import (
+    Principal,
+    cached_principal,
+    principal_for_api_key,
+    principal_for_user,
+)
 from core.auth import verify_token
 
 
@@ -22,47 +28,57 @@ ROLE_HIERARCHY = [
 
 
 def get_password_hash(password: str) -> str:
-    """Return a bcrypt hash of the given password."""
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    """Return a bcrypt hash of the given password at ``BCRYPT_ROUNDS``."""
+    return hash_password(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    """Compare plain password with its hashed version."""
+    """Compare plain password with its hashed version.
+
+    Blocks for the whole bcrypt run; async handlers use
+    :func:`core.utils.password_hashing.verify_password_async`.
+    """
     return bcrypt.checkpw(password.encode(), hashed_password.encode())
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> Optional[User]:
-    """Retrieve the current user via session or bearer token."""
+def _load_principal(db: Session, token: str | None, user_id: int | None) -> Optional[Principal]:
+    if token:
+        principal = principal_for_api_key(db, token)
+        if principal or not user_id:
+            return principal
+    return principal_for_user(db, user_id) if user_id else None
+
+
+async def get_current_user(request: Request, db=Depends(get_async_db)) -> Optional[Principal]:
+    """Retrieve the current user via session or bearer token.
+
+    Returns a cached, read-only :class:`Principal`; query ``User`` when the
+    row itself needs to be changed.  Cache hits are answered on the event
+    loop; only misses go to the database.
+    """
+    token = None
     user_id = None
     auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.lower().startswith("bearer "):
         token = auth_header.split(" ", 1)[1]
         user_id = verify_token(token)
-        if not user_id:
-            entry = (
-                db.query(UserAPIKey)
-                .filter(UserAPIKey.key == token, UserAPIKey.status == "active")
-                .first()
-            )
-            if entry:
-                entry.last_used_at = datetime.now(timezone.utc)
-                try:
-                    db.commit()
-                except Exception:
-                    db.rollback()
-                return db.query(User).filter_by(id=entry.user_id, is_active=True).first()
+        if user_id:
+            token = None
     if not user_id:
         user_id = request.session.get("user_id")
-    if not user_id:
+    if not token and not user_id:
         return None
 
-    return db.query(User).filter_by(id=user_id, is_active=True).first()
+    principal = cached_principal(token, user_id)
+    if principal is None:
+        principal = await db.run_sync(_load_principal, token, user_id)
+    return principal
 
 
 def require_role(minimum_role: str) -> Callable[[User], User]:
     """Dependency to enforce a minimum user role."""
 
-    def dependency(current_user: User = Depends(get_current_user)) -> User:
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
         if not current_user:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -76,6 +92,8 @@ def require_role(minimum_role: str) -> Callable[[User], User]:
 
 def get_user_site_ids(db: Session, user: User) -> list[int]:
     """Return site IDs that the user belongs to."""
+    if isinstance(user, Principal):
+        return list(user.site_ids)
     if user.role == "superadmin":
         return [s.id for s in db.query(Site.id).all()]
     return [
@@ -91,6 +109,8 @@ def user_in_site(db: Session, user: User, site_id: int | None) -> bool:
         return False
     if user.role == "superadmin":
         return True
+    if isinstance(user, Principal):
+        return site_id in user.site_ids
     return (
         db.query(SiteMembership)
         .filter(
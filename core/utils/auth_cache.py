@@ -0,0 +1,270 @@
+"""Per-worker cache of authenticated principals.
+
+``get_current_user`` runs on every request.  The user row, the site
+memberships and API key lookups it needs are cached here as an immutable
+:class:`Principal` in a TTL+LRU cache, so repeat requests authenticate
+without touching the database.  Entries are dropped when a session commits
+changes to users, memberships, sites or API keys; other worker processes
+pick the change up when their entry expires after ``AUTH_CACHE_TTL`` seconds.
+
+API key ``last_used_at`` stamps are kept in memory and written in one
+statement by :func:`flush_key_usage`, which the ``api_key_usage`` worker
+calls periodically.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from core.models.models import Site, SiteMembership, User, UserAPIKey
+from core.utils.db_session import strict_commit
+
+AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+
+_WATCHED = (User, SiteMembership, Site, UserAPIKey)
+_PENDING_KEY = "principal_invalidations"
+_ALL = object()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only view of an authenticated user."""
+
+    id: int
+    email: str
+    role: str
+    site_ids: tuple[int, ...]
+    theme: str | None = None
+    font: str | None = None
+    icon_style: str | None = None
+    menu_style: str | None = None
+    menu_tab_color: str | None = None
+    menu_bg_color: str | None = None
+    menu_tab_colors: Mapping | None = None
+    menu_stick_theme: bool = True
+    table_grid_style: str | None = None
+    scroll_handoff_enabled: bool = True
+
+    @classmethod
+    def from_user(cls, user: User, site_ids) -> "Principal":
+        colors = user.menu_tab_colors
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            site_ids=tuple(site_ids),
+            theme=user.theme,
+            font=user.font,
+            icon_style=user.icon_style,
+            menu_style=user.menu_style,
+            menu_tab_color=user.menu_tab_color,
+            menu_bg_color=user.menu_bg_color,
+            menu_tab_colors=MappingProxyType(dict(colors)) if colors else None,
+            menu_stick_theme=user.menu_stick_theme,
+            table_grid_style=user.table_grid_style,
+            scroll_handoff_enabled=user.scroll_handoff_enabled,
+        )
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def discard_user(self, user_id: int) -> None:
+        """Drop the user's principal and every API key resolving to it."""
+        with self._lock:
+            self._data.pop(("user", user_id), None)
+            for key in [
+                k for k, (_e, v) in self._data.items() if k[0] == "key" and v[1] == user_id
+            ]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+principals = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+# API key id -> most recent use not yet written to the database
+_key_usage: dict = {}
+_usage_lock = threading.Lock()
+
+
+def api_key_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def load_principal(db: Session, user_id: int) -> Principal | None:
+    user = db.query(User).filter_by(id=user_id, is_active=True).first()
+    if not user:
+        return None
+    if user.role == "superadmin":
+        site_ids = [site_id for (site_id,) in db.query(Site.id)]
+    else:
+        site_ids = [
+            site_id
+            for (site_id,) in db.query(SiteMembership.site_id).filter(
+                SiteMembership.user_id == user.id
+            )
+        ]
+    return Principal.from_user(user, sorted(site_ids))
+
+
+def principal_for_user(db: Session, user_id: int) -> Principal | None:
+    """Return the cached principal for ``user_id``, loading it on a miss."""
+    principal = principals.get(("user", user_id))
+    if principal is None:
+        principal = load_principal(db, user_id)
+        if principal is not None:
+            principals.set(("user", user_id), principal)
+    return principal
+
+
+def principal_for_api_key(db: Session, token: str) -> Principal | None:
+    """Return the principal owning an active API key, or ``None``."""
+    cache_key = ("key", api_key_hash(token))
+    entry = principals.get(cache_key)
+    if entry is None:
+        row = (
+            db.query(UserAPIKey.id, UserAPIKey.user_id)
+            .filter(UserAPIKey.key == token, UserAPIKey.status == "active")
+            .first()
+        )
+        if not row:
+            return None
+        entry = (row.id, row.user_id)
+        principals.set(cache_key, entry)
+    record_key_use(entry[0])
+    return principal_for_user(db, entry[1])
+
+
+def cached_principal(token: str | None, user_id: int | None) -> Principal | None:
+    """Return the principal for a request when no query is needed.
+
+    ``None`` means the caller has to fall back to the loading functions.
+    """
+    if token:
+        entry = principals.get(("key", api_key_hash(token)))
+        principal = principals.get(("user", entry[1])) if entry else None
+        if principal is not None:
+            record_key_use(entry[0])
+        return principal
+    return principals.get(("user", user_id)) if user_id else None
+
+
+def record_key_use(key_id) -> None:
+    with _usage_lock:
+        _key_usage[key_id] = datetime.now(timezone.utc)
+
+
+def flush_key_usage(db: Session) -> int:
+    """Write pending ``last_used_at`` stamps; returns the number of keys."""
+    with _usage_lock:
+        pending = dict(_key_usage)
+        _key_usage.clear()
+    if not pending:
+        return 0
+    try:
+        db.execute(
+            update(UserAPIKey).execution_options(keep_principals=True),
+            [{"id": key_id, "last_used_at": used} for key_id, used in pending.items()],
+        )
+        strict_commit(db)
+    except Exception:
+        db.rollback()
+        # Keep the stamps for the next attempt unless a newer use replaced them
+        with _usage_lock:
+            for key_id, used in pending.items():
+                _key_usage.setdefault(key_id, used)
+        raise
+    return len(pending)
+
+
+def _pending(session) -> set:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context) -> None:
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, User) and obj.id is not None:
+            _pending(session).add(("user", obj.id))
+        elif isinstance(obj, SiteMembership):
+            _pending(session).add(("user", obj.user_id))
+        elif isinstance(obj, UserAPIKey) and obj.key:
+            _pending(session).add(("key", api_key_hash(obj.key)))
+        elif isinstance(obj, Site):
+            # Superadmins see every site
+            _pending(session).add(_ALL)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_principal_changes(execute_state) -> None:
+    if not (execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.execution_options.get("keep_principals"):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _WATCHED:
+        _pending(execute_state.session).add(_ALL)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_changes(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL in pending:
+        principals.clear()
+        return
+    for kind, value in pending:
+        if kind == "user":
+            principals.discard_user(value)
+        else:
+            principals.discard([(kind, value)])
+
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 
-from core.models.models import ColumnPreference
+from core.models.models import ColumnPreference, CustomColumn
 
 DEFAULT_DEVICE_COLUMNS = [
     "hostname",
@@ -54,6 +54,12 @@ DEVICE_COLUMN_LABELS = {
     "tags": "Tags",
 }
 
+# Always appended to inventory exports after the preference-driven columns
+DEVICE_EXPORT_EXTRA_COLUMNS = [
+    ("site", "Site"),
+    ("last_config_pull", "Last Config Pull"),
+]
+
 
 def load_column_preferences(db: Session, user_id: int, view: str) -> dict[str, bool]:
     if view == "device_list":
@@ -63,3 +69,44 @@ def load_column_preferences(db: Session, user_id: int, view: str) -> dict[str, b
     for row in db.query(ColumnPreference).filter_by(user_id=user_id, view=view).all():
         prefs[row.name] = row.enabled
     return prefs
+
+
+def custom_column_label(column_name: str) -> str:
+    """Return a display label for a runtime ``custom_*`` column."""
+    name = column_name[len("custom_"):] if column_name.startswith("custom_") else column_name
+    return name.replace("_", " ").title()
+
+
+def load_device_export_columns(db: Session, user_id: int) -> list[tuple[str, str]]:
+    """Return ``(name, label)`` pairs for the user's enabled device columns.
+
+    Built-in columns follow the device list preferences.  User-visible custom
+    columns on ``devices`` are included unless the user disabled them, and
+    ``DEVICE_EXPORT_EXTRA_COLUMNS`` are always last.
+    """
+    prefs = load_column_preferences(db, user_id, "device_list")
+    columns = [
+        (name, DEVICE_COLUMN_LABELS[name])
+        for name in DEFAULT_DEVICE_COLUMNS
+        if prefs.get(name)
+    ]
+    columns.extend(load_device_custom_columns(db, prefs))
+    return columns + DEVICE_EXPORT_EXTRA_COLUMNS
+
+
+def load_device_custom_columns(db: Session, prefs: dict[str, bool]) -> list[tuple[str, str]]:
+    """Return ``(name, label)`` pairs for custom device columns enabled in ``prefs``.
+
+    Custom columns without a stored preference follow ``user_visible``.
+    """
+    custom = (
+        db.query(CustomColumn)
+        .filter(CustomColumn.table_name == "devices")
+        .order_by(CustomColumn.id)
+        .all()
+    )
+    return [
+        (col.column_name, custom_column_label(col.column_name))
+        for col in custom
+        if prefs.get(col.column_name, bool(col.user_visible))
+    ]
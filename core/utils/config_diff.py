@@ -0,0 +1,208 @@
+"""Line diffs between configuration backups.
+
+The diff against the previous backup of a device is computed once when a
+backup is stored and persisted as compact hunks in ``config_diffs`` together
+with added/removed line counts.  Diffs between arbitrary pairs are computed
+on demand and kept in a small in-memory LRU cache.  Views render hunks in
+pages so very large diffs load progressively.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import event, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from core.models.models import ConfigBackup, ConfigDiff
+from core.utils.config_store import PULL_SOURCES, compress, config_hash, decompress
+
+DIFF_CONTEXT = 3
+CONFIG_DIFF_CACHE_SIZE = int(os.environ.get("CONFIG_DIFF_CACHE_SIZE", "64"))
+# Rendering budget per page; a page always holds at least one hunk.
+DIFF_PAGE_LINES = int(os.environ.get("CONFIG_DIFF_PAGE_LINES", "2000"))
+
+_pair_cache: "OrderedDict[tuple[str, str], ConfigDiffResult]" = OrderedDict()
+
+
+@dataclass(frozen=True)
+class ConfigDiffResult:
+    """Diff hunks plus added/removed line counts."""
+
+    hunks: list
+    lines_added: int
+    lines_removed: int
+
+    def page(self, offset: int = 0, max_lines: int = DIFF_PAGE_LINES) -> tuple[list, int | None]:
+        """Return hunks starting at ``offset`` and the offset of the next page."""
+        page = []
+        used = 0
+        index = offset
+        while index < len(self.hunks):
+            hunk = self.hunks[index]
+            if page and used + len(hunk["lines"]) > max_lines:
+                break
+            page.append(hunk)
+            used += len(hunk["lines"])
+            index += 1
+        return page, (index if index < len(self.hunks) else None)
+
+
+def compute_diff(old_text: str, new_text: str, context: int = DIFF_CONTEXT) -> ConfigDiffResult:
+    """Return the unified-style hunks turning ``old_text`` into ``new_text``."""
+    a = (old_text or "").splitlines()
+    b = (new_text or "").splitlines()
+    matcher = difflib.SequenceMatcher(None, a, b)
+    hunks = []
+    added = removed = 0
+    for group in matcher.get_grouped_opcodes(context):
+        lines = []
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend([" ", line] for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                lines.extend(["-", line] for line in a[i1:i2])
+                removed += i2 - i1
+            if tag in ("replace", "insert"):
+                lines.extend(["+", line] for line in b[j1:j2])
+                added += j2 - j1
+        first, last = group[0], group[-1]
+        hunks.append(
+            {
+                "old_start": first[1] + 1,
+                "old_len": last[2] - first[1],
+                "new_start": first[3] + 1,
+                "new_len": last[4] - first[3],
+                "lines": lines,
+            }
+        )
+    return ConfigDiffResult(hunks, added, removed)
+
+
+def encode_hunks(hunks: list) -> tuple[str, bytes]:
+    return compress(json.dumps(hunks, separators=(",", ":")))
+
+
+def decode_hunks(codec: str, data: bytes) -> list:
+    return json.loads(decompress(codec, data))
+
+
+def _text_hash(backup: ConfigBackup) -> str:
+    return backup.config_hash or config_hash(backup.config_text)
+
+
+def _cache_get(key: tuple[str, str]) -> ConfigDiffResult | None:
+    result = _pair_cache.get(key)
+    if result is not None:
+        _pair_cache.move_to_end(key)
+    return result
+
+
+def _cache_put(key: tuple[str, str], result: ConfigDiffResult) -> None:
+    _pair_cache[key] = result
+    _pair_cache.move_to_end(key)
+    while len(_pair_cache) > CONFIG_DIFF_CACHE_SIZE:
+        _pair_cache.popitem(last=False)
+
+
+def diff_backups(db: Session, old: ConfigBackup, new: ConfigBackup) -> ConfigDiffResult:
+    """Return the diff between two backups.
+
+    Precomputed diffs are read from ``config_diffs``; any other pair is
+    computed once and served from the LRU cache afterwards.
+    """
+    key = (_text_hash(old), _text_hash(new))
+    result = _cache_get(key)
+    if result is not None:
+        return result
+    stored = db.get(ConfigDiff, key)
+    if stored is not None:
+        result = ConfigDiffResult(
+            decode_hunks(stored.codec, stored.hunks),
+            stored.lines_added,
+            stored.lines_removed,
+        )
+    else:
+        result = compute_diff(old.config_text, new.config_text)
+    _cache_put(key, result)
+    return result
+
+
+def previous_backup(db: Session, backup: ConfigBackup) -> ConfigBackup | None:
+    """Return the backup stored before ``backup`` for the same device.
+
+    Only backups of the same kind are compared, so a port-stage snippet is
+    diffed against the previous snippet for that port rather than against a
+    full running config.  SSH and scheduled pulls both read the running
+    config and are compared with each other.
+    """
+    if backup.source in PULL_SOURCES:
+        same_kind = ConfigBackup.source.in_(PULL_SOURCES)
+    else:
+        same_kind = ConfigBackup.source == backup.source
+    query = db.query(ConfigBackup).filter(
+        ConfigBackup.device_id == backup.device_id,
+        same_kind,
+        ConfigBackup.port_name.is_not_distinct_from(backup.port_name),
+    )
+    if backup.id is not None:
+        query = query.filter(
+            tuple_(ConfigBackup.created_at, ConfigBackup.id)
+            < tuple_(backup.created_at, backup.id)
+        )
+    return query.order_by(
+        ConfigBackup.created_at.desc(), ConfigBackup.id.desc()
+    ).first()
+
+
+def store_backup_diff(db: Session, backup: ConfigBackup) -> None:
+    """Persist the diff of a new ``backup`` against the previous backup."""
+    with db.no_autoflush:
+        prev = previous_backup(db, backup)
+        if prev is None:
+            return
+        key = (_text_hash(prev), _text_hash(backup))
+        stored = db.get(ConfigDiff, key)
+        if stored is not None:
+            added, removed = stored.lines_added, stored.lines_removed
+        else:
+            result = _cache_get(key) or compute_diff(
+                prev.config_text, backup.config_text
+            )
+            _cache_put(key, result)
+            added, removed = result.lines_added, result.lines_removed
+            codec, data = encode_hunks(result.hunks)
+            db.execute(
+                pg_insert(ConfigDiff.__table__)
+                .values(
+                    from_hash=key[0],
+                    to_hash=key[1],
+                    codec=codec,
+                    hunks=data,
+                    lines_added=added,
+                    lines_removed=removed,
+                    created_at=datetime.now(timezone.utc),
+                )
+                .on_conflict_do_nothing(index_elements=["from_hash", "to_hash"])
+            )
+    backup.diff_base_id = prev.id
+    backup.lines_added = added
+    backup.lines_removed = removed
+
+
+@event.listens_for(Session, "before_flush")
+def _diff_new_backups(session, flush_context, instances) -> None:
+    """Precompute the diff for backups added in this flush.
+
+    Registered after the blob store hook so ``config_hash`` is already set.
+    """
+    for obj in list(session.new):
+        if isinstance(obj, ConfigBackup) and obj.device_id is not None:
+            store_backup_diff(session, obj)
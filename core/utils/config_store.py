@@ -0,0 +1,219 @@
+"""Content-addressed storage for configuration backups.
+
+Configuration text is normalized (volatile lines such as timestamps and
+``ntp clock-period`` are ignored), hashed with SHA-256 and stored once per
+distinct hash in ``config_blobs`` using zstd compression.  ``ConfigBackup``
+rows only reference the hash, so unchanged pulls cost no extra storage.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import event, exists, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from core.models.models import ConfigBackup, ConfigBlob, ConfigDiff
+
+try:
+    import zstandard
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Sources that represent a full configuration read from the device.  Only
+# these are deduplicated against the previous pull.
+PULL_SOURCES = ("scheduled", "ssh")
+
+VOLATILE_LINE_PATTERNS = [
+    re.compile(p)
+    for p in (
+        r"^!\s*Last configuration change",
+        r"^!\s*NVRAM config last updated",
+        r"^!\s*No configuration change since last restart",
+        r"^!\s*Time:",
+        r"^!!\s*Last configuration change",
+        r"^##\s*Last (changed|commit):",
+        r"^Building configuration",
+        r"^Current configuration\s*:",
+        r"^\s*ntp clock-period\b",
+    )
+]
+
+ZSTD_LEVEL = 10
+_CACHE_SIZE = 32
+_text_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def normalize_config(text: str) -> str:
+    """Return ``text`` without volatile lines and trailing whitespace."""
+    lines = []
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        line = line.rstrip()
+        if any(p.match(line) for p in VOLATILE_LINE_PATTERNS):
+            continue
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def config_hash(text: str) -> str:
+    """Return the content hash used to address ``text`` in the store."""
+    return hashlib.sha256(normalize_config(text).encode()).hexdigest()
+
+
+def compress(text: str) -> tuple[str, bytes]:
+    """Compress ``text`` returning the codec name and payload."""
+    raw = (text or "").encode()
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def decompress(codec: str, data: bytes) -> str:
+    """Reverse :func:`compress`."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this config backup")
+        return zstandard.ZstdDecompressor().decompress(bytes(data)).decode()
+    if codec == "zlib":
+        return zlib.decompress(bytes(data)).decode()
+    return bytes(data).decode()
+
+
+def read_blob(blob: ConfigBlob) -> str:
+    """Return the decompressed text for ``blob`` using a small LRU cache."""
+    text = _text_cache.get(blob.hash)
+    if text is not None:
+        _text_cache.move_to_end(blob.hash)
+        return text
+    text = decompress(blob.codec, blob.data)
+    _text_cache[blob.hash] = text
+    if len(_text_cache) > _CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return text
+
+
+def put_blob(db: Session, text: str, digest: str | None = None) -> str:
+    """Store ``text`` under its content hash if not present and return the hash."""
+    digest = digest or config_hash(text)
+    with db.no_autoflush:
+        known = db.query(ConfigBlob.hash).filter(ConfigBlob.hash == digest).first()
+    if not known:
+        codec, data = compress(text)
+        db.execute(
+            pg_insert(ConfigBlob.__table__)
+            .values(
+                hash=digest,
+                codec=codec,
+                data=data,
+                size=len((text or "").encode()),
+                created_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=["hash"])
+        )
+    return digest
+
+
+def _backup_hash(backup: ConfigBackup) -> str | None:
+    if backup.config_hash:
+        return backup.config_hash
+    if backup._config_text is not None:
+        return config_hash(backup._config_text)
+    return None
+
+
+def record_config_pull(
+    db: Session, device_id: int, text: str, source: str
+) -> tuple[ConfigBackup, bool]:
+    """Store a pulled configuration, deduplicating against the last pull.
+
+    Returns the backup row and ``True`` when a new version was stored.  When
+    the normalized text matches the previous pull only ``last_verified_at``
+    is updated.
+    """
+    now = datetime.now(timezone.utc)
+    digest = config_hash(text)
+    latest = (
+        db.query(ConfigBackup)
+        .filter(
+            ConfigBackup.device_id == device_id,
+            ConfigBackup.source.in_(PULL_SOURCES),
+            ConfigBackup.port_name.is_(None),
+        )
+        .order_by(ConfigBackup.created_at.desc(), ConfigBackup.id.desc())
+        .first()
+    )
+    if latest is not None and _backup_hash(latest) == digest:
+        latest.last_verified_at = now
+        return latest, False
+    put_blob(db, text, digest)
+    backup = ConfigBackup(
+        device_id=device_id,
+        source=source,
+        config_hash=digest,
+        last_verified_at=now,
+    )
+    backup.__dict__["_text_cache"] = text
+    db.add(backup)
+    return backup, True
+
+
+def prune_backups(db: Session, device_id: int, keep: int) -> list[int]:
+    """Delete all but the newest ``keep`` backups of a device.
+
+    Only ids are loaded, and blobs no longer referenced by any backup are
+    removed.  Returns the ids of deleted backups.
+    """
+    stale = [
+        row[0]
+        for row in db.query(ConfigBackup.id)
+        .filter(ConfigBackup.device_id == device_id)
+        .order_by(ConfigBackup.created_at.desc(), ConfigBackup.id.desc())
+        .offset(keep)
+        .all()
+    ]
+    if not stale:
+        return []
+    hashes = [
+        row[0]
+        for row in db.query(ConfigBackup.config_hash)
+        .filter(ConfigBackup.id.in_(stale), ConfigBackup.config_hash.is_not(None))
+        .distinct()
+        .all()
+    ]
+    db.query(ConfigBackup).filter(ConfigBackup.id.in_(stale)).delete(
+        synchronize_session=False
+    )
+    if hashes:
+        db.query(ConfigBlob).filter(
+            ConfigBlob.hash.in_(hashes),
+            ~exists().where(ConfigBackup.config_hash == ConfigBlob.hash),
+        ).delete(synchronize_session=False)
+        db.query(ConfigDiff).filter(
+            ConfigDiff.to_hash.in_(hashes),
+            ~exists().where(ConfigBackup.config_hash == ConfigDiff.to_hash),
+        ).delete(synchronize_session=False)
+    return stale
+
+
+@event.listens_for(Session, "before_flush")
+def _move_config_text_to_store(session, flush_context, instances) -> None:
+    """Store inline ``config_text`` of new or edited backups in the blob store."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, ConfigBackup):
+            continue
+        if obj not in session.new:
+            # ``config_text`` is deferred; skip rows where it was not touched
+            # rather than loading it.
+            if not inspect(obj).attrs._config_text.history.has_changes():
+                continue
+        if obj._config_text is None:
+            continue
+        obj.config_hash = put_blob(session, obj._config_text)
+        obj._config_text = None
@@ -0,0 +1,49 @@
+"""Cross-worker cache invalidation through PostgreSQL ``NOTIFY``.
+
+:func:`notify` queues a notification inside the session's transaction, so
+it is delivered only if the transaction commits.  The payload is a random
+id made once per process (pids repeat across containers, where workers are
+often pid 1); :mod:`server.workers.db_listener` ignores its own messages.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+_NOTIFIED_KEY = "db_notified"
+
+SENDER_ID = uuid.uuid4().hex
+
+
+def _new_sender_id() -> None:
+    global SENDER_ID
+    SENDER_ID = uuid.uuid4().hex
+
+
+# Forked workers must not share the parent's id
+os.register_at_fork(after_in_child=_new_sender_id)
+
+
+def notify(session: Session, channel: str) -> None:
+    """Send ``NOTIFY channel`` once per transaction; no-op off PostgreSQL."""
+    notified = session.info.get(_NOTIFIED_KEY, ())
+    if channel in notified:
+        return
+    bind = session.get_bind()
+    if bind is None or bind.dialect.name != "postgresql":
+        return
+    session.info.setdefault(_NOTIFIED_KEY, set()).add(channel)
+    session.connection().execute(
+        text("SELECT pg_notify(:channel, :sender)"),
+        {"channel": channel, "sender": SENDER_ID},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_notified(session) -> None:
+    session.info.pop(_NOTIFIED_KEY, None)
@@ -1,7 +1,22 @@
-from sqlalchemy import create_engine, text, event
+from sqlalchemy import create_engine, text, event, inspect
 from sqlalchemy.orm import sessionmaker, Session, with_loader_criteria
+from sqlalchemy.sql.util import find_tables
+from starlette.concurrency import run_in_threadpool
+from fastapi import Depends
 import os
 
+try:
+    import asyncpg  # noqa: F401
+    from sqlalchemy.ext.asyncio import (
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    HAS_ASYNC_DB = True
+except ImportError:  # asyncpg/greenlet not installed
+    HAS_ASYNC_DB = False
+
 from core.utils.database import Base
 
 # Import models so that Base.metadata is aware of them before creating tables
@@ -15,6 +30,19 @@ if DATABASE_URL and not DATABASE_URL.startswith("postgresql"):
 engine = create_engine(DATABASE_URL) if DATABASE_URL else None
 
 
+def _async_url(url: str) -> str:
+    """Return ``url`` with the asyncpg driver selected."""
+    scheme, rest = url.split("://", 1)
+    return f"{scheme.split('+', 1)[0]}+asyncpg://{rest}"
+
+
+async_engine = (
+    create_async_engine(_async_url(DATABASE_URL))
+    if DATABASE_URL and HAS_ASYNC_DB
+    else None
+)
+
+
 class SafeSession(Session):
     """Session that rolls back and logs errors on commit failures."""
 
@@ -73,6 +101,18 @@ class SafeSession(Session):
             )
 
 
+def strict_commit(db: Session) -> None:
+    """Commit and let errors reach the caller.
+
+    ``SafeSession.commit`` logs and swallows failures; callers that must
+    undo in-memory state when a write fails use this instead.
+    """
+    if isinstance(db, SafeSession):
+        Session.commit(db)
+    else:
+        db.commit()
+
+
 _BaseSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=SafeSession
 )
@@ -81,25 +121,103 @@ SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=SafeSession
 )
 
+if async_engine is not None:
+    # ``SafeSession`` backs each async session so the flush/commit hooks
+    # registered below run for async requests too.
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=SafeSession,
+    )
+else:
+    AsyncSessionLocal = None
+
 # Import module models so all tables are registered before creation
 import modules.inventory.models  # noqa: F401
 import modules.network.models  # noqa: F401
 
+# Register the config backup store and diff flush hooks (in this order)
+import core.utils.config_store  # noqa: F401
+import core.utils.config_diff  # noqa: F401
+
+# Keep the device duplicate flags current on every flush
+import core.utils.device_duplicates  # noqa: F401
+
+# Drop cached auth principals when users, memberships or keys change
+import core.utils.auth_cache  # noqa: F401
+
+# Bump reference data versions when device types, tags, VLANs etc. change
+import core.utils.reference_data  # noqa: F401
+
+# Drop cached tunables and notify the other workers when tunables change
+import core.utils.tunables  # noqa: F401
+
+# Keep the login failure counters and the per-worker ban list in step
+import core.utils.ip_banning  # noqa: F401
+
 # Database schema managed exclusively via Alembic migrations
 
 
+def _not_deleted(cls):
+    return cls.deleted_at.is_(None)
+
+
+# Soft-deletable table -> prebuilt loader criteria option.  Reusing the same
+# option objects keeps statement cache keys stable between executions.
+_soft_delete_options: dict = {}
+_registered_mappers = 0
+
+
+def soft_delete_options() -> dict:
+    """Return ``{table: option}`` for every mapped class with ``deleted_at``."""
+    global _soft_delete_options, _registered_mappers
+    mappers = Base.registry.mappers
+    if len(mappers) != _registered_mappers:
+        _soft_delete_options = {
+            mapper.local_table: with_loader_criteria(
+                mapper.class_, _not_deleted, include_aliases=True
+            )
+            for mapper in mappers
+            if "deleted_at" in mapper.columns
+        }
+        _registered_mappers = len(mappers)
+    return _soft_delete_options
+
+
+def _join_tables(target) -> list:
+    """Return the tables an ORM join target refers to."""
+    prop = getattr(target, "property", None)
+    mapper = getattr(prop, "mapper", None)
+    if mapper is not None:
+        return [mapper.local_table, getattr(prop, "secondary", None)]
+    info = inspect(target, raiseerr=False)
+    mapper = getattr(info, "mapper", None)
+    return [mapper.local_table] if mapper is not None else []
+
+
+def _statement_tables(statement) -> set:
+    """Return the tables a SELECT reads, including relationship joins."""
+    tables = set(find_tables(statement, include_aliases=True))
+    # ``join(Device.tags)`` is only resolved to tables at compile time
+    for target, onclause, _from, _flags in getattr(statement, "_setup_joins", ()):
+        tables.update(_join_tables(target))
+        tables.update(_join_tables(onclause))
+    return {getattr(table, "element", table) for table in tables}
+
+
 @event.listens_for(Session, "do_orm_execute")
 def _filter_deleted(execute_state):
-    if execute_state.is_select and not execute_state.execution_options.get(
+    if not execute_state.is_select or execute_state.execution_options.get(
         "include_deleted", False
     ):
-        for cls in Base.__subclasses__():
-            if hasattr(cls, "deleted_at"):
-                execute_state.statement = execute_state.statement.options(
-                    with_loader_criteria(
-                        cls, lambda c: c.deleted_at.is_(None), include_aliases=True
-                    )
-                )
+        return
+    tables = _statement_tables(execute_state.statement)
+    present = [
+        option for table, option in soft_delete_options().items() if table in tables
+    ]
+    if present:
+        execute_state.statement = execute_state.statement.options(*present)
 
 
 def get_db():
@@ -111,6 +229,46 @@ def get_db():
         db.close()
 
 
+class ThreadedSession:
+    """Async facade over a sync session for when asyncpg is unavailable.
+
+    Offers the subset of :class:`AsyncSession` the routes use; every call
+    runs on the bounded request threadpool instead of the event loop.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+if AsyncSessionLocal is not None:
+
+    async def get_async_db():
+        """Yield an ``AsyncSession`` bound to the asyncpg engine."""
+        async with AsyncSessionLocal() as db:
+            yield db
+
+else:
+
+    async def get_async_db(db: Session = Depends(get_db)):
+        """Yield the request's sync session behind a threadpool facade."""
+        yield ThreadedSession(db)
+
+
 def reset_pk_sequence(db, model):
     """Ensure the PostgreSQL sequence for a table's id column is in sync."""
     if not db.bind or db.bind.dialect.name != "postgresql":
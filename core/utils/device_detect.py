@@ -3,6 +3,7 @@ from puresnmp import PyWrapper
 from modules.inventory.models import Device
 from modules.network.models import SSHCredential
 from core.utils.audit import log_audit
+from core.utils.instrumentation import SNMP_SECONDS, timed
 
 PLATFORM_MAP = {
     "cisco ios": "Cisco IOS",
@@ -40,7 +41,8 @@ def _apply_defaults(db: Session, device: Device, platform: str, user=None) -> No
 
 async def detect_snmp_platform(db: Session, device: Device, client: PyWrapper, user=None) -> None:
     try:
-        descr = await client.get("1.3.6.1.2.1.1.1.0")
+        with timed(SNMP_SECONDS, oid="1.3.6.1.2.1.1.1.0"):
+            descr = await client.get("1.3.6.1.2.1.1.1.0")
     except Exception:
         return
     if isinstance(descr, bytes):
@@ -0,0 +1,153 @@
+"""Duplicate IP, MAC and asset tag detection in SQL.
+
+Devices store integer forms of their IP and MAC (``canonical_ip`` and
+``canonical_mac``) so equal addresses written differently compare equal and
+can be indexed.  Duplicates are found with ``GROUP BY ... HAVING`` and the
+result is kept in ``device_duplicates``: every flush that changes a device's
+address, asset tag or deletion state re-evaluates only the keys involved, so
+list pages can badge duplicates without grouping the whole inventory.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import String, and_, cast, delete, event, func, inspect, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from core.utils.ip_utils import ip_to_int
+from core.utils.mac_utils import mac_to_int
+from modules.inventory.models import Device, DeviceDuplicate
+
+_devices = Device.__table__
+_flags = DeviceDuplicate.__table__
+
+# Duplicate kind -> (key column, device attribute, attribute value -> key)
+DUPLICATE_KINDS = {
+    "ip": (_devices.c.canonical_ip, "ip", ip_to_int),
+    "mac": (_devices.c.canonical_mac, "mac", mac_to_int),
+    "asset_tag": (_devices.c.asset_tag, "asset_tag", lambda value: value or None),
+}
+
+_PENDING_KEY = "device_duplicate_keys"
+
+
+def _duplicated_keys(column):
+    """Keys of ``column`` shared by more than one live device."""
+    query = select(column).where(column.is_not(None), _devices.c.deleted_at.is_(None))
+    if isinstance(column.type, String):
+        query = query.where(column != "")
+    return query.group_by(column).having(func.count() > 1)
+
+
+def _insert_flags(conn, kind: str, column, duplicated) -> None:
+    stmt = pg_insert(_flags).from_select(
+        ["device_id", "kind", "key"],
+        select(_devices.c.id, literal(kind), cast(column, String)).where(
+            column.in_(duplicated), _devices.c.deleted_at.is_(None)
+        ),
+    )
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["device_id", "kind"], set_={"key": stmt.excluded.key}
+        )
+    )
+
+
+def refresh_duplicate_flags(conn, kind: str, keys) -> None:
+    """Recompute ``device_duplicates`` rows of ``kind`` for ``keys``."""
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+    column = DUPLICATE_KINDS[kind][0]
+    conn.execute(
+        delete(_flags).where(_flags.c.kind == kind, _flags.c.key.in_([str(k) for k in keys]))
+    )
+    _insert_flags(conn, kind, column, _duplicated_keys(column).where(column.in_(keys)))
+
+
+def rebuild_duplicate_flags(conn) -> None:
+    """Rebuild ``device_duplicates`` from scratch."""
+    conn.execute(delete(_flags))
+    for kind, (column, _attr, _to_key) in DUPLICATE_KINDS.items():
+        _insert_flags(conn, kind, column, _duplicated_keys(column))
+
+
+def device_keys(device) -> dict:
+    """Return the current duplicate keys of ``device`` by kind."""
+    return {
+        kind: to_key(getattr(device, attr))
+        for kind, (_column, attr, to_key) in DUPLICATE_KINDS.items()
+    }
+
+
+def _changed_keys(device) -> dict[str, set]:
+    """Return old and new keys of every kind whose attribute changed."""
+    state = inspect(device)
+    revived = state.attrs.deleted_at.history.has_changes()
+    changed: dict[str, set] = {}
+    for kind, (_column, attr, to_key) in DUPLICATE_KINDS.items():
+        history = state.attrs[attr].history
+        if revived or history.has_changes():
+            values = [*history.deleted, getattr(device, attr)]
+            changed[kind] = {to_key(value) for value in values}
+    return changed
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_duplicate_keys(session, flush_context, instances) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in [*session.new, *session.deleted]:
+        if isinstance(obj, Device):
+            for kind, key in device_keys(obj).items():
+                pending.setdefault(kind, set()).add(key)
+    for obj in session.dirty:
+        if isinstance(obj, Device) and session.is_modified(obj):
+            for kind, keys in _changed_keys(obj).items():
+                pending.setdefault(kind, set()).update(keys)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_duplicate_keys(session, flush_context) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    conn = session.connection()
+    for kind, keys in pending.items():
+        refresh_duplicate_flags(conn, kind, keys)
+
+
+def duplicate_peers(db: Session, device_ids: list[int]) -> dict[int, dict[str, list[str]]]:
+    """Return ``{device_id: {kind: hostnames sharing the key}}`` for ``device_ids``."""
+    if not device_ids:
+        return {}
+    mine = aliased(DeviceDuplicate)
+    peer = aliased(DeviceDuplicate)
+    rows = (
+        db.query(mine.device_id, mine.kind, func.array_agg(Device.hostname))
+        .join(peer, and_(peer.kind == mine.kind, peer.key == mine.key))
+        .join(Device, Device.id == peer.device_id)
+        .filter(mine.device_id.in_(device_ids))
+        .group_by(mine.device_id, mine.kind)
+    )
+    peers: dict[int, dict[str, list[str]]] = {}
+    for device_id, kind, hostnames in rows:
+        peers.setdefault(device_id, {})[kind] = sorted(hostnames)
+    return peers
+
+
+def duplicate_groups(db: Session, kind: str) -> list[tuple[str, list[Device]]]:
+    """Return ``(value, devices)`` for every key of ``kind`` used more than once.
+
+    The value shown is the address as stored on the first device of the group.
+    """
+    column, attr, _to_key = DUPLICATE_KINDS[kind]
+    devices = (
+        db.query(Device)
+        .filter(column.in_(_duplicated_keys(column)))
+        .order_by(column, Device.hostname)
+        .all()
+    )
+    groups: dict = {}
+    for device in devices:
+        groups.setdefault(getattr(device, column.key), []).append(device)
+    return [(getattr(members[0], attr), members) for members in groups.values()]
@@ -1,20 +1,227 @@
+"""Offline IP geolocation for login events.
+
+Lookups use a local database file named by ``GEOIP_DB_PATH``: either a
+MaxMind-format ``.mmdb`` file (GeoLite2/DB-IP City; needs the optional
+``maxminddb`` package) or a CSV file whose header contains ``start_ip`` and
+``end_ip`` plus any of ``city``, ``region``, ``country``, ``latitude`` and
+``longitude``.  Private, loopback and other non-global addresses are never
+looked up.  Results are kept in an LRU cache of ``GEOIP_CACHE_SIZE`` entries.
+
+The ipapi.co web service is only used when ``GEOIP_REMOTE`` is enabled, and
+only from :func:`enrich_login_event`, which runs after the login response
+has been sent.
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import ipaddress
+import logging
+import os
+import threading
+from functools import lru_cache
+
 import requests
 
+try:
+    import maxminddb
+
+    HAS_MAXMINDDB = True
+except ImportError:  # pragma: no cover - optional dependency
+    maxminddb = None
+    HAS_MAXMINDDB = False
+
+GEOIP_DB_PATH = os.environ.get("GEOIP_DB_PATH", "")
+GEOIP_CACHE_SIZE = int(os.environ.get("GEOIP_CACHE_SIZE", "4096"))
+GEOIP_REMOTE = os.environ.get("GEOIP_REMOTE", "0").lower() in {"1", "true", "yes"}
+GEOIP_REMOTE_TIMEOUT = float(os.environ.get("GEOIP_REMOTE_TIMEOUT", "3"))
+
+Location = tuple[str | None, float | None, float | None]
+_NOTHING: Location = (None, None, None)
+
+
+def _format(city, region, country, lat, lon) -> Location:
+    parts = [p for p in (city, region, country) if p]
+    return (", ".join(parts) if parts else None), lat, lon
+
+
+def _float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _CsvDatabase:
+    """Sorted address ranges searched with ``bisect``."""
+
+    def __init__(self, path: str):
+        self.starts: list[int] = []
+        self.rows: list[tuple[int, Location]] = []
+        with open(path, newline="", encoding="utf-8") as fh:
+            ranges = []
+            for rec in csv.DictReader(fh):
+                try:
+                    start = int(ipaddress.ip_address(rec["start_ip"].strip()))
+                    end = int(ipaddress.ip_address(rec["end_ip"].strip()))
+                except (KeyError, ValueError, AttributeError):
+                    continue
+                ranges.append(
+                    (
+                        start,
+                        end,
+                        _format(
+                            rec.get("city"),
+                            rec.get("region"),
+                            rec.get("country"),
+                            _float(rec.get("latitude")),
+                            _float(rec.get("longitude")),
+                        ),
+                    )
+                )
+        ranges.sort(key=lambda r: r[0])
+        self.starts = [r[0] for r in ranges]
+        self.rows = [(r[1], r[2]) for r in ranges]
+
+    def get(self, address) -> Location | None:
+        idx = bisect.bisect_right(self.starts, int(address)) - 1
+        if idx < 0:
+            return None
+        end, location = self.rows[idx]
+        return location if int(address) <= end else None
+
+
+class _MmdbDatabase:
+    def __init__(self, path: str):
+        self.reader = maxminddb.open_database(path)
+
+    def get(self, address) -> Location | None:
+        rec = self.reader.get(str(address))
+        if not rec:
+            return None
 
-def geolocate_ip(ip: str) -> tuple[str | None, float | None, float | None]:
-    """Return location text and coordinates for the given IP using ipapi.co."""
+        def name(entry):
+            return ((entry or {}).get("names") or {}).get("en")
+
+        subdivisions = rec.get("subdivisions") or [None]
+        loc = rec.get("location") or {}
+        return _format(
+            name(rec.get("city")),
+            name(subdivisions[0]),
+            name(rec.get("country")),
+            loc.get("latitude"),
+            loc.get("longitude"),
+        )
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def _open_database():
+    """Open the configured database once; ``False`` when there is none."""
+    global _database
+    if _database is not None:
+        return _database
+    with _database_lock:
+        if _database is not None:
+            return _database
+        path = GEOIP_DB_PATH
+        db = False
+        try:
+            if path.endswith(".mmdb"):
+                if HAS_MAXMINDDB:
+                    db = _MmdbDatabase(path)
+                else:
+                    logging.getLogger(__name__).warning(
+                        "maxminddb not installed; GeoIP database %s not used", path
+                    )
+            elif path:
+                db = _CsvDatabase(path)
+        except OSError as exc:
+            logging.getLogger(__name__).warning("Cannot open GeoIP database: %s", exc)
+        _database = db
+        return db
+
+
+def _global_address(ip: str):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    return address if address.is_global else None
+
+
+@lru_cache(maxsize=GEOIP_CACHE_SIZE)
+def geolocate_ip(ip: str) -> Location:
+    """Return location text and coordinates for ``ip`` from the local database.
+
+    Never touches the network; unknown and private addresses give
+    ``(None, None, None)``.
+    """
+    address = _global_address(ip)
+    if address is None:
+        return _NOTHING
+    db = _open_database()
+    if not db:
+        return _NOTHING
+    return db.get(address) or _NOTHING
+
+
+def geolocate_ip_remote(ip: str) -> Location:
+    """Look ``ip`` up with ipapi.co.  Blocking; use from background tasks only."""
+    if _global_address(ip) is None:
+        return _NOTHING
     try:
-        resp = requests.get(f"https://ipapi.co/{ip}/json/", timeout=3)
+        resp = requests.get(f"https://ipapi.co/{ip}/json/", timeout=GEOIP_REMOTE_TIMEOUT)
         if resp.status_code == 200:
             data = resp.json()
-            city = data.get("city")
-            region = data.get("region")
-            country = data.get("country_name")
-            lat = data.get("latitude")
-            lon = data.get("longitude")
-            parts = [p for p in [city, region, country] if p]
-            location = ", ".join(parts) if parts else None
-            return location, lat, lon
+            return _format(
+                data.get("city"),
+                data.get("region"),
+                data.get("country_name"),
+                data.get("latitude"),
+                data.get("longitude"),
+            )
     except Exception:
         pass
-    return None, None, None
+    return _NOTHING
+
+
+def locate(ip: str) -> Location:
+    """Local lookup, falling back to the remote provider when enabled."""
+    location = geolocate_ip(ip)
+    if location == _NOTHING and GEOIP_REMOTE:
+        location = geolocate_ip_remote(ip)
+    return location
+
+
+def enrich_login_event(event_id: int, ip: str, user_id: int | None = None) -> None:
+    """Fill in the location of a login event after the response was sent.
+
+    For successful logins ``user_id`` is given and the user's last location
+    is updated too.
+    """
+    from core.models.models import LoginEvent, User
+    from core.utils.db_session import SessionLocal
+
+    location, lat, lon = locate(ip)
+    if location is None and lat is None:
+        return
+    db = SessionLocal()
+    try:
+        event = db.get(LoginEvent, event_id)
+        if event is not None:
+            event.location = location
+        if user_id is not None:
+            user = db.get(User, user_id)
+            if user is not None:
+                user.last_location_lat = lat
+                user.last_location_lon = lon
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logging.getLogger(__name__).error("Login geolocation failed: %s", exc)
+    finally:
+        db.close()
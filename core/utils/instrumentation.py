@@ -0,0 +1,233 @@
+"""Prometheus metrics for the request path and the background workers.
+
+Metrics are defined here once and recorded from the code they describe.
+``GET /metrics`` renders them in the OpenMetrics text format.  With several
+gunicorn workers set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory
+before the server starts; every process then writes its values to files in
+that directory and the endpoint sums them, whichever worker answers.
+
+``prometheus_client`` is optional.  Without it recording is a no-op and the
+endpoint answers 503.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY
+    from prometheus_client import multiprocess
+    from prometheus_client.openmetrics.exposition import (
+        CONTENT_TYPE_LATEST,
+        generate_latest,
+    )
+
+    HAS_PROMETHEUS = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_PROMETHEUS = False
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+    "prometheus_multiproc_dir"
+)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(cls_name: str, name: str, doc: str, labels=(), **kwargs):
+    if not HAS_PROMETHEUS:
+        return _NoopMetric()
+    cls = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[cls_name]
+    return cls(name, doc, list(labels), **kwargs)
+
+
+_FAST = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_SLOW = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+_COUNTS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+HTTP_REQUEST_SECONDS = _metric(
+    "histogram",
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+    buckets=_FAST,
+)
+DB_QUERIES_PER_REQUEST = _metric(
+    "histogram",
+    "http_request_db_queries",
+    "Database statements executed per HTTP request",
+    ("route",),
+    buckets=_COUNTS,
+)
+DB_SECONDS_PER_REQUEST = _metric(
+    "histogram",
+    "http_request_db_seconds",
+    "Time spent in database statements per HTTP request",
+    ("route",),
+    buckets=_FAST,
+)
+SYNC_SECONDS = _metric(
+    "histogram",
+    "sync_run_duration_seconds",
+    "Duration of a cloud sync push or pull run",
+    ("direction", "result"),
+    buckets=_SLOW,
+)
+SYNC_RECORDS = _metric(
+    "counter",
+    "sync_records",
+    "Records sent or received by cloud sync",
+    ("direction", "model"),
+)
+SNMP_SECONDS = _metric(
+    "histogram",
+    "snmp_request_duration_seconds",
+    "SNMP get/walk latency by OID",
+    ("oid", "result"),
+    buckets=_FAST,
+)
+SSH_CONNECT_SECONDS = _metric(
+    "histogram",
+    "ssh_connect_duration_seconds",
+    "Time to open an SSH connection to a device",
+    ("result",),
+    buckets=_SLOW,
+)
+SSH_EXEC_SECONDS = _metric(
+    "histogram",
+    "ssh_exec_duration_seconds",
+    "Time to run one command over SSH",
+    ("result",),
+    buckets=_SLOW,
+)
+INGEST_MESSAGES = _metric(
+    "counter",
+    "ingest_messages",
+    "Syslog messages and SNMP traps received",
+    ("kind",),
+)
+INGEST_SECONDS = _metric(
+    "histogram",
+    "ingest_write_duration_seconds",
+    "Time to store one syslog message or trap",
+    ("kind", "result"),
+    buckets=_FAST,
+)
+QUEUE_DEPTH = _metric(
+    "gauge",
+    "queue_depth",
+    "Items waiting in in-process queues",
+    ("queue",),
+    multiprocess_mode="livesum",
+)
+SCHEDULER_LAG_SECONDS = _metric(
+    "histogram",
+    "scheduler_job_lag_seconds",
+    "Delay between a job's scheduled run time and its submission",
+    ("job",),
+    buckets=_FAST + (30, 60),
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the block's duration; ``result`` is ``ok`` or ``error``."""
+    start = time.perf_counter()
+    result = "ok"
+    try:
+        yield
+    except BaseException:
+        result = "error"
+        raise
+    finally:
+        histogram.labels(result=result, **labels).observe(time.perf_counter() - start)
+
+
+def job_label(job_id: str) -> str:
+    """Group per-device jobs such as ``config_pull_12`` under one label."""
+    return re.sub(r"_\d+$", "", job_id or "unknown")
+
+
+# Database statements of the current request: [count, seconds]
+_db_usage: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "request_db_usage", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _db_usage.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    usage = _db_usage.get()
+    starts = conn.info.get("query_start")
+    if usage is None or not starts:
+        return
+    usage[0] += 1
+    usage[1] += time.perf_counter() - starts.pop()
+
+
+class MetricsMiddleware:
+    """Record latency and database usage for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not HAS_PROMETHEUS:
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _db_usage.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one label to keep cardinality bounded
+            label = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], label, str(status["code"])).observe(
+                elapsed
+            )
+            DB_QUERIES_PER_REQUEST.labels(label).observe(usage[0])
+            DB_SECONDS_PER_REQUEST.labels(label).observe(usage[1])
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return the exposition body and its content type."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,13 +1,32 @@
-from collections import defaultdict, deque
+"""Failed-login counting and IP bans shared by all workers.
+
+Failures are counted per minute in ``login_failure_counts`` (an UNLOGGED
+table on PostgreSQL), so the limits hold across every worker process.
+Active bans -- single addresses or CIDR ranges from ``banned_ips`` -- are
+kept in memory by each worker and enforced by :class:`BannedIPMiddleware`
+before routing.  Committing a ban change sends ``NOTIFY ip_bans`` and the
+other workers reload through :mod:`server.workers.db_listener`;
+``BAN_CACHE_TTL`` bounds how long a missed notification goes unnoticed.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import logging
+import os
+import threading
+import time
 from datetime import datetime, timezone, timedelta
-from sqlalchemy.orm import Session
 
-from core.models.models import BannedIP
-from core.utils.ip_utils import normalize_ip
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import PlainTextResponse
 
-# In-memory tracking of failed login timestamps
-_FAILED_SHORT = defaultdict(deque)  # 10 minute window
-_FAILED_LONG = defaultdict(deque)   # 24 hour window
+from core.models.models import BannedIP, LoginFailureCount
+from core.utils.db_notify import notify
+from core.utils.db_session import SessionLocal
 
 SHORT_WINDOW = timedelta(minutes=10)
 SHORT_LIMIT = 5
@@ -17,69 +36,295 @@ LONG_WINDOW = timedelta(hours=24)
 LONG_LIMIT = 25
 LONG_BAN = timedelta(hours=72)
 
+BAN_CACHE_TTL = int(os.environ.get("BAN_CACHE_TTL", "60"))
+BAN_CHANNEL = "ip_bans"
+BANNED_IP_PATHS = tuple(
+    p.strip()
+    for p in os.environ.get("BANNED_IP_PATHS", "/auth/login,/auth/token").split(",")
+    if p.strip()
+)
+
+_PENDING_KEY = "ip_bans_changed"
+_PURGE_INTERVAL = 600
+_last_purge = 0.0
+
+
+def _utcnow() -> datetime:
+    # ``banned_ips`` and ``login_failure_counts`` store naive UTC timestamps
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
-def _prune(queue: deque, window: timedelta, now: datetime) -> None:
-    while queue and now - queue[0] > window:
-        queue.popleft()
+def _naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
-def check_ban(db: Session, ip: str) -> bool:
-    """Return True if IP is currently banned."""
+def parse_ban(value: str):
+    """Return the network a ``banned_ips.ip_address`` value covers, or ``None``."""
     try:
-        ip = normalize_ip(ip)
+        return ipaddress.ip_network((value or "").strip(), strict=False)
     except ValueError:
-        return False
-    record = db.query(BannedIP).filter(BannedIP.ip_address == ip).first()
-    if record and record.banned_until and record.banned_until > datetime.now(timezone.utc):
-        return True
-    return False
+        return None
 
 
-def record_failure(db: Session, ip: str) -> bool:
-    """Record a failed login attempt and return True if a ban was triggered."""
+def _client_address(ip: str):
     try:
-        ip = normalize_ip(ip)
+        return ipaddress.ip_address((ip or "").strip())
     except ValueError:
+        return None
+
+
+class BanSet:
+    """Active bans indexed by prefix length.
+
+    A lookup is one dict probe per distinct prefix length in use, so a list
+    of plain addresses costs a single probe.
+    """
+
+    def __init__(self, bans=()):
+        self._prefixes: dict[tuple[int, int], dict[int, datetime]] = {}
+        for value, until in bans:
+            network = parse_ban(value)
+            if network is None or until is None:
+                continue
+            bits = network.max_prefixlen
+            key = (network.version, network.prefixlen)
+            table = self._prefixes.setdefault(key, {})
+            prefix = int(network.network_address) >> (bits - network.prefixlen)
+            until = _naive(until)
+            table[prefix] = max(until, table.get(prefix, until))
+        # Most specific first; plain addresses are the common case
+        self._order = sorted(self._prefixes, key=lambda k: -k[1])
+
+    def __len__(self) -> int:
+        return sum(len(t) for t in self._prefixes.values())
+
+    def banned_until(self, ip: str) -> datetime | None:
+        address = _client_address(ip)
+        if address is None:
+            return None
+        value = int(address)
+        bits = address.max_prefixlen
+        now = _utcnow()
+        for version, length in self._order:
+            if version != address.version:
+                continue
+            until = self._prefixes[(version, length)].get(value >> (bits - length))
+            if until is not None and until > now:
+                return until
+        return None
+
+    def __contains__(self, ip: str) -> bool:
+        return self.banned_until(ip) is not None
+
+
+class BanCache:
+    """The current :class:`BanSet`, reloaded after it is invalidated."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version = 0
+        self._bans: BanSet | None = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> BanSet | None:
+        """The cached set, or ``None`` when it has to be reloaded."""
+        bans = self._bans
+        if bans is not None and self._expires > time.monotonic():
+            return bans
+        return None
+
+    def bans(self, load) -> BanSet:
+        bans = self.current()
+        if bans is not None:
+            return bans
+        with self._lock:
+            version = self._version
+        bans = BanSet(load())
+        with self._lock:
+            # An invalidation during the load makes the result stale
+            if self._version == version:
+                self._bans = bans
+                self._expires = time.monotonic() + self.ttl
+        return bans
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._bans = None
+
+
+ban_cache = BanCache(BAN_CACHE_TTL)
+
+
+def _load() -> list[tuple[str, datetime]]:
+    db = SessionLocal()
+    try:
+        stmt = select(BannedIP.ip_address, BannedIP.banned_until).where(
+            BannedIP.banned_until > _utcnow()
+        )
+        return [tuple(row) for row in db.execute(stmt).all()]
+    except Exception as exc:
+        logging.getLogger(__name__).warning("Could not load IP bans: %s", exc)
+        return []
+    finally:
+        db.close()
+
+
+def is_banned(ip: str) -> bool:
+    """Return True if ``ip`` is inside an active ban."""
+    return ip in ban_cache.bans(_load)
+
+
+async def is_banned_async(ip: str) -> bool:
+    bans = ban_cache.current()
+    if bans is None:
+        bans = await run_in_threadpool(ban_cache.bans, _load)
+    return ip in bans
+
+
+def _count_failure(db: Session, ip: str, bucket: datetime) -> None:
+    table = LoginFailureCount.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in {"postgresql", "sqlite"}:
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(ip_address=ip, bucket=bucket, count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.ip_address, table.c.bucket],
+            set_={"count": table.c.count + 1},
+        )
+        db.execute(stmt)
+        return
+    row = db.get(LoginFailureCount, (ip, bucket))
+    if row is None:
+        db.add(LoginFailureCount(ip_address=ip, bucket=bucket, count=1))
+    else:
+        row.count += 1
+    db.flush()
+
+
+def _purge_failures(db: Session, now: datetime) -> None:
+    """Drop expired counters, at most once per ``_PURGE_INTERVAL`` per worker."""
+    global _last_purge
+    if time.monotonic() - _last_purge < _PURGE_INTERVAL:
+        return
+    _last_purge = time.monotonic()
+    db.execute(delete(LoginFailureCount).where(LoginFailureCount.bucket < now - LONG_WINDOW))
+
+
+def record_failure(db: Session, ip: str) -> bool:
+    """Record a failed login attempt and return True if a ban was triggered."""
+    if _client_address(ip) is None:
         return False
-    now = datetime.now(timezone.utc)
-    short_q = _FAILED_SHORT[ip]
-    long_q = _FAILED_LONG[ip]
-    _prune(short_q, SHORT_WINDOW, now)
-    _prune(long_q, LONG_WINDOW, now)
-    short_q.append(now)
-    long_q.append(now)
-
-    record = db.query(BannedIP).filter(BannedIP.ip_address == ip).first()
-    if not record:
-        record = BannedIP(
-            ip_address=ip,
-            ban_reason="",
-            banned_until=datetime.now(timezone.utc),
-            attempt_count=0,
+    ip = str(_client_address(ip))
+    now = _utcnow()
+    bucket = now.replace(second=0, microsecond=0)
+    _count_failure(db, ip, bucket)
+    _purge_failures(db, now)
+
+    short_since = (now - SHORT_WINDOW).replace(second=0, microsecond=0)
+    long_since = (now - LONG_WINDOW).replace(second=0, microsecond=0)
+    recent = case((LoginFailureCount.bucket >= short_since, LoginFailureCount.count), else_=0)
+    short_count, long_count = db.execute(
+        select(
+            func.coalesce(func.sum(recent), 0),
+            func.coalesce(func.sum(LoginFailureCount.count), 0),
+        ).where(
+            LoginFailureCount.ip_address == ip,
+            LoginFailureCount.bucket >= long_since,
         )
-        db.add(record)
+    ).one()
 
-    record.attempt_count = len(long_q)
+    duration = None
+    if long_count >= LONG_LIMIT:
+        duration = LONG_BAN
+    elif short_count > SHORT_LIMIT:
+        duration = SHORT_BAN
+    if duration is not None:
+        ban_ip(db, ip, duration, "Too many failed logins", attempts=int(long_count))
+    db.commit()
+    return duration is not None
 
-    banned = False
-    if len(long_q) >= LONG_LIMIT:
-        record.ban_reason = "Too many failed logins"
-        record.banned_until = now + LONG_BAN
-        banned = True
-    elif len(short_q) > SHORT_LIMIT:
-        record.ban_reason = "Too many failed logins"
-        record.banned_until = now + SHORT_BAN
-        banned = True
 
+def ban_ip(
+    db: Session,
+    value: str,
+    duration: timedelta,
+    reason: str,
+    attempts: int = 0,
+) -> BannedIP:
+    """Create or extend the ban for an address or CIDR range; caller commits."""
+    network = parse_ban(value)
+    if network is None:
+        raise ValueError("Invalid IP address or network")
+    key = str(network.network_address) if network.num_addresses == 1 else str(network)
+    record = db.query(BannedIP).filter(BannedIP.ip_address == key).first()
+    if not record:
+        record = BannedIP(ip_address=key, attempt_count=0)
+        db.add(record)
+    record.ban_reason = reason
+    record.banned_until = _utcnow() + duration
+    record.attempt_count = attempts
+    return record
+
+
+def clear_attempts(db: Session, ip: str) -> None:
+    """Forget the failed attempts of an address after a successful login."""
+    if _client_address(ip) is None:
+        return
+    db.execute(
+        delete(LoginFailureCount).where(LoginFailureCount.ip_address == str(_client_address(ip)))
+    )
     db.commit()
-    return banned
 
 
-def clear_attempts(ip: str) -> None:
-    """Reset in-memory counters for an IP."""
-    try:
-        ip = normalize_ip(ip)
-    except ValueError:
+class BannedIPMiddleware:
+    """Reject requests from banned addresses to ``BANNED_IP_PATHS``."""
+
+    def __init__(self, app, paths: tuple[str, ...] = BANNED_IP_PATHS):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.paths and scope["path"].startswith(self.paths):
+            client = scope.get("client")
+            if client and await is_banned_async(client[0]):
+                response = PlainTextResponse(
+                    "Too many failed logins from this address; try again later",
+                    status_code=403,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ban_changes(session, flush_context) -> None:
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, BannedIP):
+            session.info[_PENDING_KEY] = True
+            notify(session, BAN_CHANNEL)
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_ban_changes(execute_state) -> None:
+    if not (execute_state.is_update or execute_state.is_delete or execute_state.is_insert):
         return
-    _FAILED_SHORT.pop(ip, None)
-    _FAILED_LONG.pop(ip, None)
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is BannedIP:
+        execute_state.session.info[_PENDING_KEY] = True
+        notify(execute_state.session, BAN_CHANNEL)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ban_changes(session) -> None:
+    if session.info.pop(_PENDING_KEY, None):
+        ban_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ban_changes(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -31,5 +31,19 @@ def display_ip(ip: str) -> str:
     """Return IP string without zero padding."""
     if not ip:
         return ""
+    if "/" in ip or ":" in ip:
+        return ip
     return '.'.join(str(int(part)) for part in ip.split('.'))
 
+def ip_to_int(ip: str | None) -> int | None:
+    """Return the IPv4 address as a 32-bit integer or ``None`` if invalid."""
+    try:
+        ip = normalize_ip(ip or "")
+    except ValueError:
+        return None
+    if not ip:
+        return None
+    value = 0
+    for part in ip.split("."):
+        value = (value << 8) | int(part)
+    return value
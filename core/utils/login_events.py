@@ -3,7 +3,6 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from core.models.models import LoginEvent, User
-from .geolocation import geolocate_ip
 from .ip_utils import normalize_ip
 
 
@@ -15,13 +14,15 @@ def log_login_event(
     success: bool,
     location: str | None = None,
 ) -> LoginEvent:
-    """Create a LoginEvent entry and return it."""
+    """Create a LoginEvent entry and return it.
+
+    ``location`` is normally left empty here and filled in afterwards by
+    :func:`core.utils.geolocation.enrich_login_event`.
+    """
     try:
         padded = normalize_ip(ip)
     except ValueError:
         padded = ""
-    if location is None:
-        location, _, _ = geolocate_ip(ip)
     event = LoginEvent(
         user_id=user.id if user else None,
         ip_address=padded,
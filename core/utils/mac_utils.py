@@ -17,3 +17,12 @@ def display_mac(mac: str | None) -> str:
         return ''
     return normalize_mac(mac) or ''
 
+
+def mac_to_int(mac: str | None) -> int | None:
+    """Return the MAC address as a 48-bit integer or ``None`` if invalid."""
+    if not mac:
+        return None
+    hex_digits = re.sub(r'[^0-9a-fA-F]', '', mac)
+    if len(hex_digits) != 12:
+        return None
+    return int(hex_digits, 16)
@@ -0,0 +1,173 @@
+"""bcrypt hashing off the event loop.
+
+Async handlers hash and verify passwords through :func:`verify_password_async`
+and :func:`hash_password_async`, which run bcrypt in a small process pool of
+``PASSWORD_HASH_WORKERS`` processes (``0`` uses the thread pool instead).  At
+most ``PASSWORD_HASH_CONCURRENCY`` jobs run at once; callers beyond that wait,
+and once ``PASSWORD_HASH_MAX_WAITING`` are waiting new verifications fail fast
+with :class:`PasswordHasherBusy` rather than queueing behind a login flood.
+
+New hashes use ``BCRYPT_ROUNDS``.  A successful verification of a hash with a
+lower cost also returns a replacement hash at the configured cost.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASH_CONCURRENCY = int(
+    os.environ.get("PASSWORD_HASH_CONCURRENCY", str(max(1, PASSWORD_HASH_WORKERS)))
+)
+PASSWORD_HASH_MAX_WAITING = int(os.environ.get("PASSWORD_HASH_MAX_WAITING", "50"))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password checks are already waiting."""
+
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
+
+
+def hash_rounds(hashed_password: str) -> int | None:
+    """Return the cost factor stored in a ``$2b$12$...`` hash."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _verify(password: str, hashed_password: str, rounds: int) -> tuple[bool, str | None]:
+    """Check ``password``; rehash it when the stored cost is below ``rounds``."""
+    try:
+        ok = bcrypt.checkpw(password.encode(), hashed_password.encode())
+    except ValueError:
+        return False, None
+    if not ok:
+        return False, None
+    current = hash_rounds(hashed_password)
+    if current is not None and current < rounds:
+        return True, hash_password(password, rounds)
+    return True, None
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.run_time_total = 0.0
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            done = self.completed or 1
+            return {
+                "workers": PASSWORD_HASH_WORKERS,
+                "concurrency": PASSWORD_HASH_CONCURRENCY,
+                "waiting": self.waiting,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_ms_avg": round(self.queue_time_total / done * 1000, 1),
+                "queue_ms_max": round(self.queue_time_max * 1000, 1),
+                "hash_ms_avg": round(self.run_time_total / done * 1000, 1),
+            }
+
+
+_stats = _Stats()
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# One limiter per event loop; a worker process normally has just one
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a process that already runs threads is unsafe
+            ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=ctx)
+        return _pool
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+    return semaphore
+
+
+async def _submit(func, *args, reject_when_busy: bool = True):
+    stats = _stats
+    with stats.lock:
+        if reject_when_busy and stats.waiting >= PASSWORD_HASH_MAX_WAITING:
+            stats.rejected += 1
+            raise PasswordHasherBusy()
+        stats.waiting += 1
+    queued = time.perf_counter()
+    semaphore = _get_semaphore()
+    try:
+        await semaphore.acquire()
+    finally:
+        with stats.lock:
+            stats.waiting -= 1
+    started = time.perf_counter()
+    with stats.lock:
+        stats.running += 1
+        waited = started - queued
+        stats.queue_time_total += waited
+        stats.queue_time_max = max(stats.queue_time_max, waited)
+    try:
+        if PASSWORD_HASH_WORKERS > 0:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_pool(), func, *args)
+        return await run_in_threadpool(func, *args)
+    finally:
+        semaphore.release()
+        with stats.lock:
+            stats.running -= 1
+            stats.completed += 1
+            stats.run_time_total += time.perf_counter() - started
+
+
+async def verify_password_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Return ``(valid, upgraded_hash)``; ``upgraded_hash`` is usually ``None``."""
+    if not hashed_password:
+        return False, None
+    return await _submit(_verify, password, hashed_password, BCRYPT_ROUNDS)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a new password; waits for a slot instead of failing when busy."""
+    return await _submit(hash_password, password, BCRYPT_ROUNDS, reject_when_busy=False)
+
+
+def password_hash_stats() -> dict:
+    return _stats.snapshot()
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,141 @@
+"""Per-worker cache of reference data for forms and templates.
+
+Device types, tags, VLANs, locations, sites and SSH/SNMP profile names are
+read on almost every page.  They are loaded as immutable rows holding only
+the columns the forms show (no icon blobs, no secrets) and shared by all
+requests in the worker process.  Each table has a version counter that is
+bumped when a session commits a change to it; a cached list is only used
+while its table version is unchanged and for at most
+``REFERENCE_CACHE_TTL`` seconds, which bounds how long other worker
+processes serve stale lists.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from core.models.models import Site
+from core.utils.db_session import SessionLocal
+from modules.inventory.models import DeviceType, Location, Tag
+from modules.network.models import SNMPCommunity, SSHCredential, VLAN
+
+REFERENCE_CACHE_TTL = int(os.environ.get("REFERENCE_CACHE_TTL", "300"))
+
+# Cache name -> (model, columns loaded, ordering column)
+REFERENCE_TABLES = {
+    "device_types": (DeviceType, ("id", "name"), "id"),
+    "tags": (Tag, ("id", "name"), "name"),
+    "vlans": (VLAN, ("id", "tag", "description"), "id"),
+    "locations": (Location, ("id", "name", "location_type", "site_id"), "id"),
+    "sites": (Site, ("id", "name"), "id"),
+    "ssh_credentials": (SSHCredential, ("id", "name"), "id"),
+    "snmp_communities": (SNMPCommunity, ("id", "name"), "id"),
+}
+
+_WATCHED = {model: model.__tablename__ for model, _cols, _order in REFERENCE_TABLES.values()}
+_PENDING_KEY = "reference_data_changes"
+
+
+class ReferenceCache:
+    """Lists of rows keyed by name and valid for one version of their table."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions: dict[str, int] = {}
+        self._entries: dict[str, tuple[int, float, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def bump(self, tables) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, name: str, table: str, load) -> tuple:
+        """Return the cached rows for ``name`` or call ``load`` to refresh them."""
+        with self._lock:
+            version = self.version(table)
+            entry = self._entries.get(name)
+        if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+            return entry[2]
+        rows = tuple(load())
+        with self._lock:
+            # A commit during the load makes the result stale; don't keep it
+            if self.version(table) == version:
+                self._entries[name] = (version, time.monotonic() + self.ttl, rows)
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+reference_cache = ReferenceCache(REFERENCE_CACHE_TTL)
+
+
+def _load(db: Session, name: str) -> list[Row]:
+    model, columns, order = REFERENCE_TABLES[name]
+    stmt = select(*(getattr(model, c) for c in columns)).order_by(getattr(model, order))
+    return db.execute(stmt).all()
+
+
+def reference_rows(db: Session, name: str) -> tuple[Row, ...]:
+    """Return the cached rows of ``name`` (a key of ``REFERENCE_TABLES``)."""
+    model = REFERENCE_TABLES[name][0]
+    return reference_cache.get(name, _WATCHED[model], lambda: _load(db, name))
+
+
+def cached_rows(name: str) -> tuple[Row, ...]:
+    """Like :func:`reference_rows` but opens a session only on a miss."""
+
+    def load():
+        db = SessionLocal()
+        try:
+            return _load(db, name)
+        finally:
+            db.close()
+
+    model = REFERENCE_TABLES[name][0]
+    return reference_cache.get(name, _WATCHED[model], load)
+
+
+def _pending(session) -> set:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_reference_changes(session, flush_context) -> None:
+    for obj in [*session.new, *session.deleted]:
+        table = _WATCHED.get(type(obj))
+        if table is not None:
+            _pending(session).add(table)
+    for obj in session.dirty:
+        table = _WATCHED.get(type(obj))
+        # Tagging a device touches Tag.devices but not the tag row
+        if table is not None and session.is_modified(obj, include_collections=False):
+            _pending(session).add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_reference_changes(execute_state) -> None:
+    if not (execute_state.is_update or execute_state.is_delete or execute_state.is_insert):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _WATCHED:
+        _pending(execute_state.session).add(_WATCHED[mapper.class_])
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_reference_changes(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        reference_cache.bump(pending)
+
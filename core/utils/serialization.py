@@ -2,9 +2,25 @@ from __future__ import annotations
 
 from dataclasses import asdict, is_dataclass
 from datetime import datetime, timezone
-from typing import Any, Iterable
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Iterable
+import json
 import uuid
 
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    HAS_ORJSON = False
+
 
 def to_jsonable(val: Any) -> Any:
     """Recursively convert common non-serializable objects to JSON safe values."""
@@ -21,3 +37,106 @@ def to_jsonable(val: Any) -> Any:
     if isinstance(val, (list, tuple, set, frozenset)):
         return [to_jsonable(v) for v in val]
     return val
+
+
+def _default(val: Any) -> Any:
+    """Fallback for values neither encoder handles natively."""
+    if isinstance(val, Decimal):
+        return int(val) if val == val.to_integral_value() else float(val)
+    if isinstance(val, (set, frozenset)):
+        return list(val)
+    if isinstance(val, BaseModel):
+        return val.model_dump(mode="json")
+    if isinstance(val, datetime):
+        return val.isoformat()
+    if isinstance(val, uuid.UUID):
+        return str(val)
+    if is_dataclass(val):
+        return asdict(val)
+    raise TypeError(f"Object of type {type(val).__name__} is not JSON serializable")
+
+
+def dumps(val: Any) -> bytes:
+    """Encode ``val`` as compact JSON.
+
+    Datetimes are written as ISO 8601 as given (naive values stay naive) and
+    UUIDs as strings, matching FastAPI's encoder without walking the value
+    first.  Uses orjson when installed.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(val, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        val, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _utc_iso(val: Any) -> Any:
+    if val is None:
+        return None
+    return to_jsonable(val)
+
+
+def _uuid_str(val: Any) -> Any:
+    return None if val is None else str(val)
+
+
+def _converter(attr) -> Callable[[Any], Any] | None:
+    try:
+        python_type = attr.columns[0].type.python_type
+    except (NotImplementedError, AttributeError, IndexError):
+        return to_jsonable
+    if issubclass(python_type, datetime):
+        return _utc_iso
+    if issubclass(python_type, uuid.UUID):
+        return _uuid_str
+    if issubclass(python_type, (dict, list)):
+        return to_jsonable
+    return None
+
+
+@lru_cache(maxsize=None)
+def column_extractor(
+    model: type, native: bool = False, fields: tuple[str, ...] | None = None
+) -> Callable[[Any], dict[str, Any]]:
+    """Return a function mapping an instance of ``model`` to ``{column: value}``.
+
+    The attribute list and per-column converters are worked out once per
+    model.  By default values are converted like :func:`to_jsonable`; with
+    ``native=True`` datetimes and UUIDs are left for :func:`dumps`.
+    ``fields`` limits the result to those columns.
+    """
+    attrs = [
+        attr
+        for attr in inspect(model).column_attrs
+        if fields is None or attr.key in fields
+    ]
+    keys = tuple(attr.key for attr in attrs)
+    if len(keys) == 1:
+        single = attrgetter(keys[0])
+        getter = lambda obj: (single(obj),)  # noqa: E731
+    else:
+        getter = attrgetter(*keys)
+    converters = ()
+    if not native:
+        converters = tuple(
+            (attr.key, fn) for attr in attrs if (fn := _converter(attr)) is not None
+        )
+
+    def extract(obj: Any) -> dict[str, Any]:
+        data = dict(zip(keys, getter(obj)))
+        for key, fn in converters:
+            data[key] = fn(data[key])
+        return data
+
+    return extract
@@ -1,31 +1,203 @@
+"""Site key authentication for the sync, check-in and schema endpoints.
+
+Keys are cached per worker process and dropped when a session commits a
+change to ``site_keys``.  Successful authentications are only counted in
+memory; :func:`flush_site_auth` writes one :class:`SiteKeyAuthStat` row per
+site and outcome with the count and first/last time seen, and moves
+``SiteKey.last_used_at`` forward.  Failures are also written to the audit
+log straight away.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
 from fastapi import Request, HTTPException, Depends
+from sqlalchemy import bindparam, event, inspect, update
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
 
-from .db_session import get_db
+from .db_session import get_db, strict_commit
 from .audit import log_audit
-from core.models.models import SiteKey
+from .auth_cache import TTLCache
+from core.models.models import SiteKey, SiteKeyAuthStat
+
+SITE_KEY_CACHE_TTL = int(os.environ.get("SITE_KEY_CACHE_TTL", "300"))
+
+_PENDING_KEY = "site_key_invalidations"
+
+
+@dataclass(frozen=True)
+class _CachedKey:
+    id: int
+    site_id: str
+    site_name: str
+    api_key: str
+    active: bool
+
+    def as_site_key(self) -> SiteKey:
+        # Detached copy; callers only read it
+        return SiteKey(
+            id=self.id,
+            site_id=self.site_id,
+            site_name=self.site_name,
+            api_key=self.api_key,
+            active=self.active,
+        )
+
+
+site_keys = TTLCache(1024, SITE_KEY_CACHE_TTL)
+
+
+class SiteAuthRecorder:
+    """Count authentications per site and outcome until they are flushed."""
+
+    def __init__(self):
+        self._counts: dict[tuple[str, bool], list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, site_id: str, success: bool) -> None:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._counts.get((site_id, success))
+            if entry is None:
+                self._counts[(site_id, success)] = [1, now, now]
+            else:
+                entry[0] += 1
+                entry[2] = now
+
+    def take(self) -> dict[tuple[str, bool], list]:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+    def restore(self, counts: dict) -> None:
+        """Merge counts back after a failed flush."""
+        with self._lock:
+            for key, (count, first, last) in counts.items():
+                entry = self._counts.get(key)
+                if entry is None:
+                    self._counts[key] = [count, first, last]
+                else:
+                    entry[0] += count
+                    entry[1] = min(entry[1], first)
+
+
+recorder = SiteAuthRecorder()
+
+
+def flush_site_auth(db: Session) -> int:
+    """Write aggregated authentication rows; returns the number written."""
+    counts = recorder.take()
+    if not counts:
+        return 0
+    try:
+        db.add_all(
+            SiteKeyAuthStat(
+                site_id=site_id,
+                success=success,
+                count=count,
+                first_seen=first,
+                last_seen=last,
+            )
+            for (site_id, success), (count, first, last) in counts.items()
+        )
+        last_used = [
+            {"key_site_id": site_id, "used": last}
+            for (site_id, success), (_count, _first, last) in counts.items()
+            if success
+        ]
+        if last_used:
+            db.execute(
+                update(SiteKey.__table__)
+                .where(SiteKey.__table__.c.site_id == bindparam("key_site_id"))
+                .values(last_used_at=bindparam("used")),
+                last_used,
+            )
+        strict_commit(db)
+    except Exception:
+        db.rollback()
+        recorder.restore(counts)
+        raise
+    return len(counts)
+
+
+def _lookup(db: Session, site_id) -> _CachedKey | None:
+    cached = site_keys.get(site_id)
+    if cached is not None:
+        return cached
+    entry = db.query(SiteKey).filter(SiteKey.site_id == site_id).first()
+    if not entry or not isinstance(entry, SiteKey):
+        return None
+    cached = _CachedKey(
+        id=entry.id,
+        site_id=entry.site_id,
+        site_name=entry.site_name,
+        api_key=entry.api_key,
+        active=bool(entry.active),
+    )
+    site_keys.set(site_id, cached)
+    return cached
 
 
 async def validate_site_key(request: Request, db: Session = Depends(get_db)) -> SiteKey:
     site_id = request.headers.get("Site-ID")
     api_key = request.headers.get("API-Key")
     try:
-        entry = db.query(SiteKey).filter(SiteKey.site_id == site_id).first()
+        entry = _lookup(db, site_id)
     except Exception:
         return SiteKey(site_id=site_id or "", site_name="", api_key=api_key or "")
-    if not entry or not isinstance(entry, SiteKey):
+    if entry is None:
         return SiteKey(site_id=site_id, site_name="", api_key=api_key)
     if entry.api_key != api_key or not entry.active:
+        recorder.record(str(site_id), False)
         try:
             log_audit(db, None, "key_auth_fail", details=str(site_id))
         except Exception:
             db.rollback()
         raise HTTPException(status_code=401, detail="Unauthorized")
-    entry.last_used_at = datetime.now(timezone.utc)
-    try:
-        db.commit()
-        log_audit(db, None, "key_auth_ok", details=str(site_id))
-    except Exception:
-        db.rollback()
-    return entry
+    recorder.record(str(site_id), True)
+    return entry.as_site_key()
+
+
+async def require_site_key(key: SiteKey = Depends(validate_site_key)) -> SiteKey:
+    """Like :func:`validate_site_key` but only for registered, active keys.
+
+    ``validate_site_key`` lets unknown sites through so they can register;
+    endpoints that write files must not.
+    """
+    if key.id is None or not key.active:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return key
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_site_key_changes(session, flush_context) -> None:
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, SiteKey):
+            # Include the old site id when a key is moved to another site
+            history = inspect(obj).attrs.site_id.history
+            session.info.setdefault(_PENDING_KEY, set()).update(
+                [obj.site_id, *history.deleted]
+            )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_site_key_changes(execute_state) -> None:
+    if not (execute_state.is_update or execute_state.is_delete):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is SiteKey:
+        session = execute_state.session
+        session.info.setdefault(_PENDING_KEY, set()).add(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_site_key_changes(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if None in pending:
+        site_keys.clear()
+    else:
+        site_keys.discard(pending)
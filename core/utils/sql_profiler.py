@@ -0,0 +1,335 @@
+"""Per-request SQL profiling and N+1 detection.
+
+:class:`SQLProfilerMiddleware` profiles a request when it is sampled
+(``SQL_PROFILE_SAMPLE_RATE``, a fraction between 0 and 1) or when a
+superadmin asks for it with an ``X-Profile`` header or a ``_profile``
+query parameter.  Every statement of a profiled request is timed and
+grouped by shape -- the SQL text with bound values and ``IN`` lists
+collapsed.  A shape executed ``SQL_PROFILE_N1_THRESHOLD`` times or more in
+one request is flagged as a likely N+1 pattern, together with the first
+application frame that issued it.
+
+Asking for ``cprofile`` or ``pyinstrument`` also captures a call profile of
+the event loop thread for that request.  Results are kept in memory by
+each worker and shown on ``/admin/debug/profiler``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from core.utils import auth_cache
+from core.utils.db_session import SessionLocal
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+
+    HAS_PYINSTRUMENT = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_PYINSTRUMENT = False
+
+SQL_PROFILE_SAMPLE_RATE = float(os.environ.get("SQL_PROFILE_SAMPLE_RATE", "0"))
+SQL_PROFILE_N1_THRESHOLD = int(os.environ.get("SQL_PROFILE_N1_THRESHOLD", "5"))
+
+MODES = ("sql", "cprofile", "pyinstrument")
+_MAX_OFFENDERS = 200
+_MAX_CAPTURES = 20
+
+_ROOT = str(Path(__file__).resolve().parents[2])
+_SKIP_FRAMES = (os.sep + "sqlalchemy" + os.sep, "site-packages", __file__)
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_NUMBER = re.compile(r"(?<![\w%])\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse literals and ``IN`` lists so repeated queries compare equal."""
+    shape = _STRING.sub("?", statement)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def _caller() -> str | None:
+    """``file:line in function`` of the innermost application frame."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(_ROOT) and not any(s in path for s in _SKIP_FRAMES):
+            rel = os.path.relpath(path, _ROOT)
+            return f"{rel}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    db_seconds: float = 0.0
+    # shape -> [executions, seconds, caller once flagged]
+    shapes: dict = field(default_factory=dict)
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        shape = statement_shape(statement)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, seconds, None]
+            return
+        entry[0] += 1
+        entry[1] += seconds
+        if entry[0] == SQL_PROFILE_N1_THRESHOLD:
+            entry[2] = _caller()
+
+    def repeated(self) -> list[tuple[str, list]]:
+        return [
+            (shape, entry)
+            for shape, entry in self.shapes.items()
+            if entry[0] >= SQL_PROFILE_N1_THRESHOLD
+        ]
+
+
+_current: contextvars.ContextVar[RequestProfile | None] = contextvars.ContextVar(
+    "sql_profile", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    profile.add(statement, time.perf_counter() - starts.pop())
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    db_seconds: float = 0.0
+    queries: int = 0
+    max_queries: int = 0
+    flagged: int = 0
+
+
+@dataclass
+class Offender:
+    route: str
+    shape: str
+    requests: int = 0
+    max_repeats: int = 0
+    seconds: float = 0.0
+    caller: str | None = None
+    last_seen: datetime | None = None
+
+
+class ProfileStore:
+    """Aggregated profiles of this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes: dict[str, RouteStats] = {}
+            self.offenders: dict[tuple[str, str], Offender] = {}
+            self.captures: deque = deque(maxlen=_MAX_CAPTURES)
+
+    def record(self, route: str, seconds: float, profile: RequestProfile) -> None:
+        repeated = profile.repeated()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            stats = self.routes.setdefault(route, RouteStats())
+            stats.requests += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.db_seconds += profile.db_seconds
+            stats.queries += profile.queries
+            stats.max_queries = max(stats.max_queries, profile.queries)
+            if repeated:
+                stats.flagged += 1
+            for shape, (count, shape_seconds, caller) in repeated:
+                key = (route, shape)
+                offender = self.offenders.get(key)
+                if offender is None:
+                    if len(self.offenders) >= _MAX_OFFENDERS:
+                        weakest = min(self.offenders, key=lambda k: self.offenders[k].max_repeats)
+                        del self.offenders[weakest]
+                    offender = self.offenders[key] = Offender(route, shape)
+                offender.requests += 1
+                offender.max_repeats = max(offender.max_repeats, count)
+                offender.seconds += shape_seconds
+                offender.caller = caller or offender.caller
+                offender.last_seen = now
+
+    def add_capture(self, route: str, path: str, mode: str, seconds: float, output: str) -> None:
+        with self._lock:
+            self.captures.appendleft(
+                {
+                    "route": route,
+                    "path": path,
+                    "mode": mode,
+                    "ms": round(seconds * 1000, 1),
+                    "at": datetime.now(timezone.utc),
+                    "output": output,
+                }
+            )
+
+    def slowest_routes(self, limit: int = 25) -> list[dict]:
+        with self._lock:
+            rows = [
+                {
+                    "route": route,
+                    "requests": s.requests,
+                    "avg_ms": round(s.seconds / s.requests * 1000, 1),
+                    "max_ms": round(s.max_seconds * 1000, 1),
+                    "avg_queries": round(s.queries / s.requests, 1),
+                    "max_queries": s.max_queries,
+                    "avg_db_ms": round(s.db_seconds / s.requests * 1000, 1),
+                    "flagged": s.flagged,
+                }
+                for route, s in self.routes.items()
+            ]
+        rows.sort(key=lambda r: r["avg_ms"], reverse=True)
+        return rows[:limit]
+
+    def worst_offenders(self, limit: int = 25) -> list[Offender]:
+        with self._lock:
+            rows = list(self.offenders.values())
+        rows.sort(key=lambda o: (o.max_repeats, o.requests), reverse=True)
+        return rows[:limit]
+
+    def recent_captures(self) -> list[dict]:
+        with self._lock:
+            return list(self.captures)
+
+
+profile_store = ProfileStore()
+
+# Only one call profiler can run per thread; concurrent requests skip capture
+_capture_lock = threading.Lock()
+
+
+def _requested_mode(scope) -> str | None:
+    """Profile mode asked for by a logged-in user, if any."""
+    session = scope.get("session") or {}
+    if not session.get("user_id"):
+        return None
+    mode = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower() or "sql"
+            break
+    if mode is None and b"_profile" in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("_profile")
+        mode = (values[0].lower() if values else "") or "sql"
+    if mode is None:
+        return None
+    return mode if mode in MODES else "sql"
+
+
+def _load_principal(user_id: int):
+    db = SessionLocal()
+    try:
+        return auth_cache.principal_for_user(db, user_id)
+    finally:
+        db.close()
+
+
+async def _may_profile(user_id: int) -> bool:
+    """Whether ``user_id`` may turn profiling on; only superadmins see results."""
+    principal = auth_cache.principals.get(("user", user_id))
+    if principal is None:
+        principal = await run_in_threadpool(_load_principal, user_id)
+    return principal is not None and principal.role == "superadmin"
+
+
+def _start_capture(mode: str):
+    """Start a call profiler; returns ``(profiler, mode actually used)``."""
+    if mode == "sql" or not _capture_lock.acquire(blocking=False):
+        return None, mode
+    if mode == "pyinstrument" and HAS_PYINSTRUMENT:
+        profiler = _Pyinstrument(async_mode="enabled")
+        profiler.start()
+        return profiler, mode
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, "cprofile"
+
+
+def _stop_capture(profiler) -> str:
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            return out.getvalue()
+        profiler.stop()
+        return profiler.output_text()
+    finally:
+        _capture_lock.release()
+
+
+class SQLProfilerMiddleware:
+    """Profile sampled or explicitly requested HTTP requests."""
+
+    def __init__(self, app, sample_rate: float = SQL_PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = _requested_mode(scope)
+        if mode is not None and not await _may_profile(scope["session"]["user_id"]):
+            mode = None
+        if mode is None:
+            if not self.sample_rate or random.random() >= self.sample_rate:
+                await self.app(scope, receive, send)
+                return
+            mode = "sql"
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler, mode = _start_capture(mode)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            output = _stop_capture(profiler) if profiler is not None else None
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            profile_store.record(route, elapsed, profile)
+            if output is not None:
+                profile_store.add_capture(route, scope["path"], mode, elapsed, output)
@@ -1,5 +1,7 @@
 import asyncssh
 
+from core.utils.instrumentation import SSH_CONNECT_SECONDS, SSH_EXEC_SECONDS, timed
+
 # Default SSH options to support legacy devices
 SSH_OPTIONS = {
     # Disable host key checking
@@ -60,3 +62,38 @@ def resolve_ssh_credential(db, device, user=None):
             cred = user_cred
             source = "user"
     return cred, source
+
+
+class _TimedConnect:
+    """``asyncssh.connect`` usable with ``await`` or ``async with``."""
+
+    def __init__(self, host, kwargs):
+        self.host = host
+        self.kwargs = kwargs
+        self.conn = None
+
+    async def _connect(self):
+        with timed(SSH_CONNECT_SECONDS):
+            return await asyncssh.connect(self.host, **self.kwargs)
+
+    def __await__(self):
+        return self._connect().__await__()
+
+    async def __aenter__(self):
+        self.conn = await self._connect()
+        return self.conn
+
+    async def __aexit__(self, *exc_info):
+        self.conn.close()
+        await self.conn.wait_closed()
+
+
+def ssh_connect(host, **kwargs):
+    """Open an SSH connection, recording how long the connect took."""
+    return _TimedConnect(host, kwargs)
+
+
+async def run_command(conn, command, **kwargs):
+    """``conn.run`` with the command latency recorded."""
+    with timed(SSH_EXEC_SECONDS):
+        return await conn.run(command, **kwargs)
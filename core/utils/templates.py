@@ -1,7 +1,6 @@
 from fastapi.templating import Jinja2Templates
-from core.utils.db_session import SessionLocal
 from modules.inventory.utils import get_device_types, get_tags
-from core.models.models import SystemTunable
+from core.utils.tunables import get_tunable, tunable_functions
 from datetime import datetime, timedelta
 from jinja2 import Environment, ChoiceLoader, FileSystemLoader
 
@@ -39,6 +38,8 @@ from core.utils.ip_utils import display_ip
 from core.utils.mac_utils import display_mac
 templates.env.filters["display_ip"] = display_ip
 templates.env.filters["display_mac"] = display_mac
+from core.utils.assets import asset_url
+templates.env.filters["asset_url"] = asset_url
 templates.env.globals["get_device_types"] = get_device_types
 templates.env.globals["get_tags"] = get_tags
 
@@ -118,10 +119,7 @@ templates.env.globals["include_icon"] = include_icon
 
 
 def get_tunable_categories():
-    db = SessionLocal()
-    rows = db.query(SystemTunable.function).distinct().order_by(SystemTunable.function).all()
-    db.close()
-    categories = [r[0] for r in rows]
+    categories = tunable_functions()
     if "sysctl" not in categories:
         categories.append("sysctl")
     return categories
@@ -132,16 +130,8 @@ templates.env.globals["get_tunable_categories"] = get_tunable_categories
 
 def allow_self_update() -> bool:
     """Return True if self updates are enabled via tunable."""
-    db = SessionLocal()
-    row = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "ALLOW_SELF_UPDATE")
-        .first()
-    )
-    db.close()
-    if row and str(row.value).lower() in {"false", "0", "no"}:
-        return False
-    return True
+    value = get_tunable("ALLOW_SELF_UPDATE")
+    return not (value and str(value).lower() in {"false", "0", "no"})
 
 
 templates.env.globals["allow_self_update"] = allow_self_update
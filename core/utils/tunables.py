@@ -0,0 +1,157 @@
+"""Per-worker cache of ``SystemTunable`` values.
+
+All tunables are read in one query the first time any of them is needed and
+then served from memory.  A session that commits a change to the table
+drops the local copy and sends ``NOTIFY system_tunables`` in the same
+transaction; :mod:`server.workers.db_listener` listens on that channel
+in every worker process and drops theirs.  ``TUNABLE_CACHE_TTL`` (seconds)
+bounds how long a worker can serve old values if it misses a notification.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, NamedTuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from core.models.models import SystemTunable
+from core.utils.db_notify import notify
+from core.utils.db_session import SessionLocal
+
+TUNABLE_CACHE_TTL = int(os.environ.get("TUNABLE_CACHE_TTL", "300"))
+TUNABLE_CHANNEL = "system_tunables"
+
+_PENDING_KEY = "tunables_changed"
+
+_TRUE = {"true", "1", "yes", "on"}
+
+
+class Tunable(NamedTuple):
+    name: str
+    value: str
+    data_type: str
+    function: str
+
+
+class TunableCache:
+    """Snapshot of every tunable, reloaded after it is invalidated."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version = 0
+        self._rows: dict[str, Tunable] | None = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def rows(self, load) -> dict[str, Tunable]:
+        rows = self._rows
+        if rows is not None and self._expires > time.monotonic():
+            return rows
+        with self._lock:
+            version = self._version
+        rows = {row.name: row for row in load()}
+        with self._lock:
+            # An invalidation during the load makes the result stale
+            if self._version == version:
+                self._rows = rows
+                self._expires = time.monotonic() + self.ttl
+        return rows
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._rows = None
+
+
+tunable_cache = TunableCache(TUNABLE_CACHE_TTL)
+
+
+def _load() -> list[Tunable]:
+    db = SessionLocal()
+    try:
+        stmt = select(
+            SystemTunable.name,
+            SystemTunable.value,
+            SystemTunable.data_type,
+            SystemTunable.function,
+        )
+        return [Tunable(*row) for row in db.execute(stmt).all()]
+    finally:
+        db.close()
+
+
+def all_tunables() -> dict[str, Tunable]:
+    return tunable_cache.rows(_load)
+
+
+def get_tunable(name: str, default: str | None = None) -> str | None:
+    """Return the raw string value of ``name``."""
+    row = all_tunables().get(name)
+    return row.value if row is not None else default
+
+
+def get_bool(name: str, default: bool = False) -> bool:
+    value = get_tunable(name)
+    if value is None or value == "":
+        return default
+    return str(value).strip().lower() in _TRUE
+
+
+def get_int(name: str, default: int | None = None) -> int | None:
+    try:
+        return int(get_tunable(name))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_value(name: str, default: Any = None) -> Any:
+    """Return ``name`` converted according to its ``data_type``."""
+    row = all_tunables().get(name)
+    if row is None:
+        return default
+    if row.data_type == "bool":
+        return str(row.value).strip().lower() in _TRUE
+    if row.data_type in {"int", "integer", "number"}:
+        try:
+            return int(row.value)
+        except (TypeError, ValueError):
+            return default
+    return row.value
+
+
+def tunable_functions() -> list[str]:
+    return sorted({row.function for row in all_tunables().values()})
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tunable_changes(session, flush_context) -> None:
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, SystemTunable):
+            session.info[_PENDING_KEY] = True
+            notify(session, TUNABLE_CHANNEL)
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tunable_changes(execute_state) -> None:
+    if not (execute_state.is_update or execute_state.is_delete or execute_state.is_insert):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is SystemTunable:
+        execute_state.session.info[_PENDING_KEY] = True
+        notify(execute_state.session, TUNABLE_CHANNEL)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_tunable_changes(session) -> None:
+    if session.info.pop(_PENDING_KEY, None):
+        tunable_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tunable_changes(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,28 @@
+"""Gunicorn hooks; loaded automatically when gunicorn starts in this directory.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set each worker writes its metrics to
+files in that directory.  Stale files from a previous run are removed at
+startup and the files of exited workers are marked dead so their live
+gauges stop counting.
+"""
+
+import os
+import shutil
+
+_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def on_starting(server):
+    if _MULTIPROC_DIR:
+        shutil.rmtree(_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if not _MULTIPROC_DIR:
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
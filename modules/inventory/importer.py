@@ -0,0 +1,512 @@
+"""Streaming bulk device import.
+
+Uploads are read row by row (CSV through the ``csv`` module, XLSX through
+openpyxl's read-only mode) so memory does not grow with the file.  Device
+types, locations, VLANs, tags and existing devices are loaded into
+dictionaries once per import, which lets every row be validated without a
+query.  Valid rows are inserted ``IMPORT_BATCH_SIZE`` at a time inside a
+savepoint; when a batch fails it is replayed row by row to pin the error on
+the offending rows while the rest of the batch is kept.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core.models.models import AuditLog
+from core.utils.device_duplicates import DUPLICATE_KINDS, refresh_duplicate_flags
+from core.utils.ip_utils import ip_to_int, normalize_ip
+from core.utils.mac_utils import mac_to_int, normalize_mac
+from modules.inventory.models import Device, DeviceType, Location, Tag, device_tags
+from modules.network.models import VLAN
+
+try:
+    import openpyxl
+except Exception:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+
+# Device fields a file column can be mapped to
+IMPORT_FIELDS = [
+    "skip",
+    "hostname",
+    "ip",
+    "mac",
+    "device_type",
+    "manufacturer",
+    "model",
+    "serial_number",
+    "asset_tag",
+    "location",
+    "vlan",
+    "tags",
+]
+
+# Fields copied onto the device as plain strings
+_TEXT_FIELDS = ("mac", "asset_tag", "model", "serial_number", "manufacturer")
+
+CONFLICT_ACTIONS = ("skip", "overwrite", "merge")
+
+# ``devices.site_id`` server default; this site cannot have locations
+VIRTUAL_SITE_ID = 100
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store VLAN numbers and asset tags as floats
+        return str(int(value))
+    return str(value)
+
+
+def iter_upload_rows(path: str, filename: str) -> Iterator[list[str]]:
+    """Yield every row of a CSV or XLSX upload, header included, as strings."""
+    if filename.lower().endswith(".xlsx"):
+        if openpyxl is None:
+            raise RuntimeError("openpyxl is required for spreadsheet imports")
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in wb.active.iter_rows(values_only=True):
+                yield [_cell(v) for v in row]
+        finally:
+            wb.close()
+        return
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as fh:
+        yield from csv.reader(fh)
+
+
+def read_preview(path: str, filename: str, limit: int = 5) -> tuple[list[str], list[list[str]]]:
+    """Return the header and the first ``limit`` data rows of an upload."""
+    rows = iter_upload_rows(path, filename)
+    try:
+        header = next(rows, [])
+        preview = list(islice(rows, limit))
+    finally:
+        rows.close()
+    return [c.strip() for c in header], preview
+
+
+def count_rows(path: str, filename: str) -> int | None:
+    """Return the number of data rows in an upload, if it can be told cheaply."""
+    if filename.lower().endswith(".xlsx"):
+        if openpyxl is None:
+            return None
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            max_row = wb.active.max_row
+        finally:
+            wb.close()
+        return max(max_row - 1, 0) if max_row else None
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as fh:
+        return max(sum(1 for _ in csv.reader(fh)) - 1, 0)
+
+
+def map_row(row: list[str], mapping: dict[str, str]) -> dict:
+    """Return ``{field: value}`` for a raw row using a column index mapping."""
+    data = {}
+    for i, val in enumerate(row):
+        name = mapping.get(str(i))
+        if not name or name == "skip":
+            continue
+        data[name] = (val or "").strip()
+    return data
+
+
+def iter_mapped_rows(path: str, filename: str, mapping: dict[str, str]) -> Iterator[tuple[int, dict]]:
+    """Yield ``(row_number, mapped_row)`` for the data rows of an upload.
+
+    Row numbers match the spreadsheet, so the first data row is 2.  Blank
+    rows are skipped.
+    """
+    rows = iter_upload_rows(path, filename)
+    next(rows, None)
+    for number, row in enumerate(rows, start=2):
+        data = map_row(row, mapping)
+        if any(data.values()):
+            yield number, data
+
+
+def split_tags(value: str | None) -> list[str]:
+    if not value:
+        return []
+    names = []
+    for part in value.split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class ImportLookups:
+    """Name to id dictionaries used to resolve import rows without queries."""
+
+    def __init__(self, db: Session):
+        self.device_types = {
+            name.lower(): id_ for id_, name in db.query(DeviceType.id, DeviceType.name)
+        }
+        self.locations: dict[str, int] = {}
+        self.location_sites: dict[int, int] = {}
+        for id_, name, site_id in db.query(Location.id, Location.name, Location.site_id):
+            self.locations[name.lower()] = id_
+            self.location_sites[id_] = site_id
+        self.vlans = {str(tag): id_ for id_, tag in db.query(VLAN.id, VLAN.tag)}
+        self.tags = {name.lower(): id_ for id_, name in db.query(Tag.id, Tag.name)}
+        self.hostnames: dict[str, int] = {}
+        self.ips: dict[str, int] = {}
+        self.device_sites: dict[int, int] = {}
+        for id_, hostname, ip, site_id in db.query(
+            Device.id, Device.hostname, Device.ip, Device.site_id
+        ):
+            self.hostnames[hostname] = id_
+            self.device_sites[id_] = site_id
+            if ip:
+                self.ips.setdefault(ip, id_)
+        # Hostnames stay unique across soft-deleted devices
+        self.deleted_hostnames = {
+            hostname
+            for (hostname,) in db.query(Device.hostname)
+            .filter(Device.deleted_at.is_not(None))
+            .execution_options(include_deleted=True)
+        }
+
+    def existing_device(self, hostname: str, ip: str) -> int | None:
+        """Return the id of a live device with the same hostname or IP."""
+        return self.hostnames.get(hostname) or self.ips.get(ip)
+
+    def tag_ids(self, db: Session, names: list[str]) -> dict[str, int]:
+        """Return ids for tag ``names``, creating the missing ones together.
+
+        Soft-deleted tags with a matching name are revived rather than
+        recreated, as their name is still taken.
+        """
+        missing = [n for n in names if n not in self.tags]
+        if missing:
+            db.execute(
+                update(Tag.__table__)
+                .where(func.lower(Tag.name).in_(missing), Tag.deleted_at.is_not(None))
+                .values(
+                    deleted_at=None,
+                    updated_at=func.now(),
+                    version=Tag.__table__.c.version + 1,
+                )
+            )
+            db.execute(
+                pg_insert(Tag.__table__)
+                .values([{"name": n} for n in missing])
+                .on_conflict_do_nothing()
+            )
+            for id_, name in (
+                db.query(Tag.id, Tag.name)
+                .filter(func.lower(Tag.name).in_(missing))
+                .execution_options(include_deleted=True)
+            ):
+                self.tags[name.lower()] = id_
+        return {n: self.tags[n] for n in names if n in self.tags}
+
+
+def find_conflicts(
+    lookups: ImportLookups, rows: Iterable[tuple[int, dict]], limit: int = 50
+) -> tuple[int, list[dict]]:
+    """Return the number of rows matching an existing device and the first ``limit``."""
+    count = 0
+    shown = []
+    for number, row in rows:
+        host = row.get("hostname", "")
+        try:
+            ip = normalize_ip(row.get("ip", ""))
+        except ValueError:
+            ip = ""
+        existing = lookups.existing_device(host, ip)
+        if existing is None:
+            continue
+        count += 1
+        if len(shown) < limit:
+            shown.append({"row": number, "hostname": host, "ip": ip, "device_id": existing})
+    return count, shown
+
+
+@dataclass
+class ImportResult:
+    added: int = 0
+    updated: int = 0
+    skipped: int = 0
+    processed: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "processed": self.processed,
+            "errors": [list(e) for e in self.errors],
+        }
+
+
+class DeviceImporter:
+    """Validate and insert mapped rows in batches.
+
+    ``action`` decides what happens to rows matching an existing device by
+    hostname or IP: ``skip`` leaves the device alone, ``overwrite`` replaces
+    the imported fields and ``merge`` only fills fields that are empty.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user,
+        site_id: int | None = None,
+        action: str = "skip",
+        batch_size: int = IMPORT_BATCH_SIZE,
+        lookups: ImportLookups | None = None,
+    ):
+        if action not in CONFLICT_ACTIONS:
+            raise ValueError(f"Unknown conflict action {action}")
+        self.db = db
+        self.user = user
+        self.site_id = site_id
+        self.action = action
+        self.batch_size = max(1, batch_size)
+        self.lookups = lookups or ImportLookups(db)
+        self.result = ImportResult()
+        self._seen_hosts: dict[str, int] = {}
+
+    # -- validation ---------------------------------------------------------
+
+    def validate(self, number: int, row: dict) -> dict:
+        """Return column values for ``row`` or raise ``ValueError``."""
+        lookups = self.lookups
+        hostname = row.get("hostname", "")
+        ip = row.get("ip", "")
+        if not hostname or not ip:
+            raise ValueError("Missing hostname or IP")
+        first = self._seen_hosts.get(hostname)
+        if first is not None:
+            raise ValueError(f"Duplicate hostname {hostname} (row {first})")
+        try:
+            ip = normalize_ip(ip)
+        except ValueError:
+            raise ValueError(f"Invalid IP address {ip}")
+        values = {"hostname": hostname, "ip": ip}
+        for name in _TEXT_FIELDS:
+            if row.get(name):
+                values[name] = row[name]
+        if "mac" in values:
+            values["mac"] = normalize_mac(values["mac"])
+        if row.get("device_type"):
+            dtype_id = lookups.device_types.get(row["device_type"].lower())
+            if dtype_id is None:
+                raise ValueError(f"Unknown device type {row['device_type']}")
+            values["device_type_id"] = dtype_id
+        if row.get("location"):
+            location_id = lookups.locations.get(row["location"].lower())
+            if location_id is None:
+                raise ValueError(f"Unknown location {row['location']}")
+            values["location_id"] = location_id
+        if row.get("vlan"):
+            vlan_id = lookups.vlans.get(row["vlan"])
+            if vlan_id is None:
+                raise ValueError(f"Unknown VLAN {row['vlan']}")
+            values["vlan_id"] = vlan_id
+        self._seen_hosts[hostname] = number
+        return values
+
+    def _check_location(self, values: dict, site_id: int | None) -> None:
+        """Reject a location outside ``site_id``, the site the device is in.
+
+        Mirrors the mapper's same-site check, which bulk inserts skip and
+        which would otherwise abort the whole import from inside a flush.
+        """
+        location_id = values.get("location_id")
+        if location_id is not None and self.lookups.location_sites.get(location_id) != site_id:
+            raise ValueError("Location belongs to another site")
+
+    def _new_device_values(self, values: dict) -> dict:
+        # Devices without a target site go to the virtual warehouse
+        self._check_location(
+            values, VIRTUAL_SITE_ID if self.site_id is None else self.site_id
+        )
+        if "device_type_id" not in values:
+            raise ValueError("Missing device type")
+        if values["hostname"] in self.lookups.deleted_hostnames:
+            raise ValueError(f"Hostname {values['hostname']} belongs to a deleted device")
+        values = dict(values)
+        values.setdefault("manufacturer", "")
+        values["created_by_id"] = self.user.id if self.user else None
+        if self.site_id is not None:
+            values["site_id"] = self.site_id
+        # Bulk inserts skip mapper hooks, so set the indexed keys here
+        values["canonical_ip"] = ip_to_int(values.get("ip"))
+        values["canonical_mac"] = mac_to_int(values.get("mac"))
+        return values
+
+    # -- writing ------------------------------------------------------------
+
+    def _apply_update(self, device: Device, values: dict) -> None:
+        for name, value in values.items():
+            if self.action == "overwrite" or not getattr(device, name):
+                setattr(device, name, value)
+
+    def _write(self, new_rows: list, update_rows: list) -> list[tuple[int, tuple]]:
+        """Insert and update one set of rows; returns ``(id, row)`` of new devices."""
+        db = self.db
+        links = []
+        inserted = []
+        if new_rows:
+            ids = db.scalars(
+                insert(Device).returning(Device.id, sort_by_parameter_order=True),
+                [values for _n, values, _t in new_rows],
+            ).all()
+            inserted = list(zip(ids, new_rows))
+            for device_id, (_n, values, tag_names) in inserted:
+                links.extend((device_id, t) for t in tag_names)
+            # ...and the flush hooks that maintain the duplicate flags
+            conn = db.connection()
+            for kind, keys in self._duplicate_keys(new_rows).items():
+                refresh_duplicate_flags(conn, kind, keys)
+        if update_rows:
+            devices = {
+                d.id: d
+                for d in db.query(Device).filter(
+                    Device.id.in_([device_id for _n, device_id, _v, _t in update_rows])
+                )
+            }
+            for _n, device_id, values, tag_names in update_rows:
+                self._apply_update(devices[device_id], values)
+                links.extend((device_id, t) for t in tag_names)
+            db.flush()
+        if links:
+            ids_by_name = self.lookups.tag_ids(db, sorted({t for _d, t in links}))
+            db.execute(
+                pg_insert(device_tags)
+                .values(
+                    [
+                        {"device_id": d, "tag_id": ids_by_name[t]}
+                        for d, t in links
+                        if t in ids_by_name
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+        return inserted
+
+    @staticmethod
+    def _duplicate_keys(new_rows: list) -> dict[str, set]:
+        keys: dict[str, set] = {}
+        for _n, values, _t in new_rows:
+            for kind, (_column, attr, to_key) in DUPLICATE_KINDS.items():
+                keys.setdefault(kind, set()).add(to_key(values.get(attr)))
+        return keys
+
+    @contextmanager
+    def _savepoint(self):
+        # Tags created inside a savepoint that rolls back must be forgotten
+        tags = dict(self.lookups.tags)
+        try:
+            with self.db.begin_nested():
+                yield
+        except SQLAlchemyError:
+            self.lookups.tags = tags
+            raise
+
+    def _remember(self, new_rows: list) -> None:
+        # Later rows in the file must see devices inserted by earlier batches
+        for device_id, (_n, values, _t) in new_rows:
+            self.lookups.hostnames[values["hostname"]] = device_id
+            self.lookups.ips.setdefault(values["ip"], device_id)
+            self.lookups.device_sites[device_id] = values.get("site_id", VIRTUAL_SITE_ID)
+
+    def import_batch(self, batch: list[tuple[int, dict]]) -> None:
+        """Validate and write one batch of ``(row_number, row)`` pairs."""
+        result = self.result
+        new_rows = []
+        update_rows = []
+        for number, row in batch:
+            result.processed += 1
+            try:
+                values = self.validate(number, row)
+                tag_names = split_tags(row.get("tags"))
+                existing = self.lookups.existing_device(values["hostname"], values["ip"])
+                if existing is None:
+                    new_rows.append((number, self._new_device_values(values), tag_names))
+                elif self.action == "skip":
+                    result.skipped += 1
+                else:
+                    self._check_location(values, self.lookups.device_sites.get(existing))
+                    update_rows.append((number, existing, values, tag_names))
+            except ValueError as exc:
+                result.errors.append((number, str(exc)))
+        if not new_rows and not update_rows:
+            return
+        try:
+            with self._savepoint():
+                inserted = self._write(new_rows, update_rows)
+                updated = len(update_rows)
+                self._log(batch, len(inserted), updated)
+        except SQLAlchemyError:
+            inserted, updated = self._write_rows_individually(batch, new_rows, update_rows)
+        self._remember(inserted)
+        result.added += len(inserted)
+        result.updated += updated
+
+    def _write_rows_individually(self, batch: list, new_rows: list, update_rows: list):
+        """Replay a failed batch one row per savepoint to isolate bad rows."""
+        inserted = []
+        updated = 0
+        for new, row in [(True, r) for r in new_rows] + [(False, r) for r in update_rows]:
+            try:
+                with self._savepoint():
+                    if new:
+                        inserted.extend(self._write([row], []))
+                    else:
+                        self._write([], [row])
+                        updated += 1
+            except SQLAlchemyError as exc:
+                self.result.errors.append((row[0], _db_error(exc)))
+        if inserted or updated:
+            self._log(batch, len(inserted), updated)
+        return inserted, updated
+
+    def _log(self, batch: list, added: int, updated: int) -> None:
+        self.db.add(
+            AuditLog(
+                user_id=self.user.id if self.user else None,
+                action_type="device_import",
+                details=f"Rows {batch[0][0]}-{batch[-1][0]}: {added} added, {updated} updated",
+            )
+        )
+        self.db.flush()
+
+    def run(
+        self,
+        rows: Iterable[tuple[int, dict]],
+        progress: Callable[[ImportResult], None] | None = None,
+    ) -> ImportResult:
+        """Import all ``rows``; the caller commits."""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            if progress:
+                progress(self.result)
+        return self.result
+
+
+def _db_error(exc: SQLAlchemyError) -> str:
+    orig = getattr(exc, "orig", None)
+    message = str(orig if orig is not None else exc).strip()
+    return message.splitlines()[0] if message else "Database error"
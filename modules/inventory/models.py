@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from uuid import uuid4
 
 from sqlalchemy import (
+    BigInteger,
     Column,
     Integer,
     String,
@@ -11,7 +12,9 @@ from sqlalchemy import (
     Table,
     JSON,
     CheckConstraint,
+    Index,
     select,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, DOUBLE_PRECISION
@@ -24,6 +27,12 @@ class Location(Base):
     __tablename__ = "locations"
     __table_args__ = (
         CheckConstraint("site_id <> 100", name="ck_locations_not_virtual"),
+        Index(
+            "ix_locations_live_site_name",
+            "site_id",
+            "name",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
 
     id = Column(Integer, primary_key=True)
@@ -108,6 +117,19 @@ class Device(Base):
             "site_id != 100 OR location_id IS NULL",
             name="ck_devices_virtual_no_location",
         ),
+        # Live-row indexes for the soft-delete filter applied to every query
+        Index(
+            "ix_devices_live_type_hostname",
+            "device_type_id",
+            "hostname",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_devices_live_site_hostname",
+            "site_id",
+            "hostname",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
 
     id = Column(Integer, primary_key=True)
@@ -118,7 +140,10 @@ class Device(Base):
     hostname = Column(String, unique=True, nullable=False)
     ip = Column(String, nullable=False)
     mac = Column(String, nullable=True)
-    asset_tag = Column(String, nullable=True)
+    asset_tag = Column(String, nullable=True, index=True)
+    # Integer forms of ip/mac maintained by ``_set_canonical_keys``
+    canonical_ip = Column(BigInteger, nullable=True, index=True)
+    canonical_mac = Column(BigInteger, nullable=True, index=True)
     model = Column(String, nullable=True)
     manufacturer = Column(String, nullable=False)
     serial_number = Column(String, nullable=True)
@@ -199,6 +224,21 @@ class DeviceDamage(Base):
     device = relationship("Device", back_populates="damage_reports")
 
 
+class DeviceDuplicate(Base):
+    """A device sharing its IP, MAC or asset tag with another live device.
+
+    Rows are maintained incrementally by ``core.utils.device_duplicates``.
+    """
+
+    __tablename__ = "device_duplicates"
+
+    device_id = Column(
+        Integer, ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind = Column(String, primary_key=True)
+    key = Column(String, nullable=False, index=True)
+
+
 def _update_timestamp(mapper, connection, target) -> None:
     """Refresh the updated_at field before persisting changes."""
     target.updated_at = datetime.now(timezone.utc)
@@ -219,9 +259,20 @@ def _check_device_site(mapper, connection, target) -> None:
         raise ValueError("Device location must belong to the same site")
 
 
+def _set_canonical_keys(mapper, connection, target) -> None:
+    """Keep the indexed integer IP/MAC columns in step with ``ip``/``mac``."""
+    from core.utils.ip_utils import ip_to_int
+    from core.utils.mac_utils import mac_to_int
+
+    target.canonical_ip = ip_to_int(target.ip)
+    target.canonical_mac = mac_to_int(target.mac)
+
+
 for _model in (Device, DeviceType, Location, Tag):
     event.listen(_model, "before_update", _update_timestamp)
 
 event.listen(Device, "before_insert", _check_device_site)
 event.listen(Device, "before_update", _check_device_site)
+event.listen(Device, "before_insert", _set_canonical_keys)
+event.listen(Device, "before_update", _set_canonical_keys)
 
@@ -4,7 +4,7 @@ from core.utils.templates import templates
 from core.utils.auth import require_role
 from core.utils.db_session import get_db
 from modules.inventory.models import Device, DeviceType
-from core.models.models import SystemTunable
+from core.utils.tunables import get_tunable
 
 router = APIRouter()
 
@@ -91,9 +91,8 @@ async def inventory_iot_devices(request: Request, current_user=Depends(require_r
     return _render_inventory(request, current_user, db, device_type="IoT Device", title="IoT Devices")
 
 
-def _get_tunable(db: Session, name: str) -> str | None:
-    row = db.query(SystemTunable).filter(SystemTunable.name == name).first()
-    return row.value if row else None
+def _get_tunable(name: str) -> str | None:
+    return get_tunable(name)
 
 
 @router.get('/inventory/show-pad')
@@ -103,10 +102,10 @@ async def show_pad_grid(
     current_user=Depends(require_role("viewer")),
 ):
     images = {
-        "consumables_order": _get_tunable(db, "SHOW_PAD_CONSUMABLES_ORDER_IMAGE") or "",
-        "end_show_consumables": _get_tunable(db, "SHOW_PAD_EOS_CONSUMABLES_IMAGE") or "",
-        "trailer_inventory": _get_tunable(db, "SHOW_PAD_TRAILER_INVENTORY_IMAGE") or "",
-        "site_inventory": _get_tunable(db, "SHOW_PAD_SITE_INVENTORY_IMAGE") or "",
+        "consumables_order": _get_tunable("SHOW_PAD_CONSUMABLES_ORDER_IMAGE") or "",
+        "end_show_consumables": _get_tunable("SHOW_PAD_EOS_CONSUMABLES_IMAGE") or "",
+        "trailer_inventory": _get_tunable("SHOW_PAD_TRAILER_INVENTORY_IMAGE") or "",
+        "site_inventory": _get_tunable("SHOW_PAD_SITE_INVENTORY_IMAGE") or "",
     }
     items = [
         {"label": "Consumables Order", "href": "/inventory/consumables-order", "img": images["consumables_order"]},
@@ -137,11 +136,11 @@ async def inventory_reports(
     current_user=Depends(require_role("viewer")),
 ):
     images = {
-        "duplicate_checker": _get_tunable(db, "REPORT_DUPLICATE_CHECKER_IMAGE") or "",
-        "consumables_report": _get_tunable(db, "REPORT_CONSUMABLES_REPORT_IMAGE") or "",
-        "audit": _get_tunable(db, "REPORT_AUDIT_IMAGE") or "",
-        "current_kits": _get_tunable(db, "REPORT_CURRENT_KITS_IMAGE") or "",
-        "conflicts": _get_tunable(db, "REPORT_CONFLICTS_IMAGE") or "",
+        "duplicate_checker": _get_tunable("REPORT_DUPLICATE_CHECKER_IMAGE") or "",
+        "consumables_report": _get_tunable("REPORT_CONSUMABLES_REPORT_IMAGE") or "",
+        "audit": _get_tunable("REPORT_AUDIT_IMAGE") or "",
+        "current_kits": _get_tunable("REPORT_CURRENT_KITS_IMAGE") or "",
+        "conflicts": _get_tunable("REPORT_CONFLICTS_IMAGE") or "",
     }
     items = [
         {"label": "Duplicate Checker", "href": "/devices/duplicates", "img": images["duplicate_checker"]},
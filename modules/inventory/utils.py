@@ -3,12 +3,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from modules.inventory.models import DeviceType, Device, Location, Tag
-from modules.network.models import VLAN, SSHCredential, SNMPCommunity
-from core.models.models import Site, User
+from modules.network.models import VLAN
+from core.models.models import User
 from core.utils.ip_utils import normalize_ip
 from core.utils.mac_utils import normalize_mac
 
-from core.utils.db_session import SessionLocal
+from core.utils.reference_data import cached_rows, reference_rows
 from core.utils.audit import log_audit
 
 __all__ = [
@@ -58,13 +58,16 @@ def suggest_vlan_from_ip(db: Session, ip: str):
 
 
 def load_form_options(db: Session):
-    """Helper to load dropdown options for device forms."""
-    device_types = db.query(DeviceType).all()
-    vlans = db.query(VLAN).all()
-    ssh_credentials = db.query(SSHCredential).all()
-    snmp_communities = db.query(SNMPCommunity).all()
-    locations = db.query(Location).all()
-    sites = db.query(Site).all()
+    """Helper to load dropdown options for device forms.
+
+    Everything except the model list comes from the reference data cache.
+    """
+    device_types = reference_rows(db, "device_types")
+    vlans = reference_rows(db, "vlans")
+    ssh_credentials = reference_rows(db, "ssh_credentials")
+    snmp_communities = reference_rows(db, "snmp_communities")
+    locations = reference_rows(db, "locations")
+    sites = reference_rows(db, "sites")
     models = [m[0] for m in db.query(Device.model).filter(Device.model.is_not(None)).distinct()]
     return (
         device_types,
@@ -77,20 +80,33 @@ def load_form_options(db: Session):
     )
 
 
-def create_device_from_row(db: Session, row: dict, user) -> None:
-    """Create a Device from a CSV/Google Sheets row."""
+def create_device_from_row(db: Session, row: dict, user, lookups=None) -> None:
+    """Create a Device from a CSV/Google Sheets row.
+
+    Pass an :class:`~modules.inventory.importer.ImportLookups` when adding
+    many rows so device types and locations are resolved without a query
+    per row.
+    """
     hostname = row.get("hostname", "").strip()
     ip = row.get("ip", "").strip()
     manufacturer = row.get("manufacturer", "").strip()
     dtype_name = row.get("device_type")
     if not hostname or not ip or not manufacturer or not dtype_name:
         raise ValueError("Missing required fields")
-    dtype = db.query(DeviceType).filter(DeviceType.name.ilike(dtype_name.strip())).first()
-    if not dtype:
+    if lookups is not None:
+        dtype_id = lookups.device_types.get(dtype_name.strip().lower())
+    else:
+        dtype = db.query(DeviceType).filter(DeviceType.name.ilike(dtype_name.strip())).first()
+        dtype_id = dtype.id if dtype else None
+    if not dtype_id:
         raise ValueError(f"Unknown device type {dtype_name}")
-    location = None
+    location_id = None
     if row.get("location"):
-        location = db.query(Location).filter(Location.name.ilike(row["location"].strip())).first()
+        if lookups is not None:
+            location_id = lookups.locations.get(row["location"].strip().lower())
+        else:
+            location = db.query(Location).filter(Location.name.ilike(row["location"].strip())).first()
+            location_id = location.id if location else None
     try:
         norm_ip = format_ip(ip)
     except ValueError:
@@ -103,27 +119,21 @@ def create_device_from_row(db: Session, row: dict, user) -> None:
         model=row.get("model") or None,
         serial_number=row.get("serial_number") or None,
         manufacturer=manufacturer,
-        device_type_id=dtype.id,
-        location_id=location.id if location else None,
+        device_type_id=dtype_id,
+        location_id=location_id,
         created_by_id=user.id,
     )
     db.add(device)
 
 
 def get_device_types():
-    """Return all device types."""
-    db = SessionLocal()
-    types = db.query(DeviceType).all()
-    db.close()
-    return types
+    """Return all device types as cached ``(id, name)`` rows."""
+    return cached_rows("device_types")
 
 
 def get_tags():
-    """Return all tags ordered by name."""
-    db = SessionLocal()
-    tags = db.query(Tag).order_by(Tag.name).all()
-    db.close()
-    return tags
+    """Return all tags ordered by name as cached ``(id, name)`` rows."""
+    return cached_rows("tags")
 
 
 def get_or_create_tag(db: Session, name: str) -> Tag:
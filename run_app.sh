@@ -8,6 +8,9 @@ source venv/bin/activate
 # Set PYTHONPATH so core/, base/, modules/ are available
 export PYTHONPATH="$(pwd)"
 
+# Per-worker metric files, aggregated by /metrics
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}"
+
 # Start the app using Gunicorn with Uvicorn workers
 exec venv/bin/gunicorn server.main:app \
     --workers 4 \
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Measure event-loop lag for sync ORM work in ``async def`` handlers.
+
+Drives two endpoints concurrently through ``httpx.ASGITransport`` while
+sampling how late the loop wakes up from a short sleep:
+
+* ``inline`` runs the (simulated) query directly in the handler, as the
+  dashboard, device list, sync and auth handlers used to;
+* ``run_sync`` sends it through ``get_async_db().run_sync`` like the ported
+  handlers do.  Without asyncpg this is the threadpool facade; with asyncpg
+  the query itself no longer holds a thread at all.
+
+The query is simulated with ``time.sleep`` so no database is needed.
+
+    python scripts/bench_loop_lag.py [requests] [query_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+from fastapi import FastAPI
+
+from core.utils.db_session import ThreadedSession
+from server.workers import loop_lag
+
+
+def _query(db, seconds: float) -> int:
+    time.sleep(seconds)
+    return 1
+
+
+def _app(seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/inline")
+    async def inline():
+        return {"rows": _query(None, seconds)}
+
+    @app.get("/run_sync")
+    async def offloaded():
+        return {"rows": await ThreadedSession(None).run_sync(_query, seconds)}
+
+    return app
+
+
+async def _measure(path: str, requests: int, seconds: float) -> dict:
+    transport = httpx.ASGITransport(app=_app(seconds))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up outside the measurement (route compilation, first thread)
+        await client.get(path)
+        loop_lag._samples.clear()
+        loop_lag.LOOP_LAG_INTERVAL = 0.005
+        sampler = asyncio.create_task(loop_lag._lag_loop())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get(path) for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        # Let the sampler record the final wake-up
+        await asyncio.sleep(loop_lag.LOOP_LAG_INTERVAL * 2)
+        sampler.cancel()
+        try:
+            await sampler
+        except asyncio.CancelledError:
+            pass
+    return {"elapsed_s": elapsed, **loop_lag.loop_lag_stats()}
+
+
+def main(requests: int = 50, query_ms: float = 20) -> None:
+    print(f"{'handler':<10}{'total s':>9}{'mean lag ms':>13}{'max lag ms':>12}")
+    for path in ("/inline", "/run_sync"):
+        stats = asyncio.run(_measure(path, requests, query_ms / 1000))
+        print(
+            f"{path[1:]:<10}{stats['elapsed_s']:>9.2f}"
+            f"{stats['mean_ms']:>13.1f}{stats['max_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Compare serialization throughput per model.
+
+For each synced model a batch of transient rows with filled-in columns is
+serialized the old and the new way:
+
+* ``push``: the per-value ``to_jsonable`` walk used by the push worker
+  versus the cached ``column_extractor``;
+* ``pull``: column dict + ``jsonable_encoder`` + ``json.dumps`` (FastAPI's
+  default response path) versus ``column_extractor(native=True)`` +
+  ``dumps`` as returned by ``/api/v1/sync/pull``.
+
+No database is needed.  Numbers are thousands of rows per second.
+
+    python scripts/bench_serialization.py [rows]
+"""
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect
+
+from core.models import models as model_module
+from core.utils import serialization
+from core.utils.serialization import column_extractor, dumps, to_jsonable
+import modules.inventory.models  # noqa: F401
+import modules.network.models  # noqa: F401
+
+SAMPLES = {
+    datetime: datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+    date: date(2024, 5, 1),
+    uuid.UUID: uuid.UUID(int=1),
+    str: "switch-01.example.net",
+    int: 42,
+    float: 1.5,
+    bool: True,
+    dict: {"a": 1, "b": [1, 2]},
+    list: [{"field": "ip", "local": "10.0.0.1"}],
+}
+
+
+def _rows(model, count: int) -> list:
+    values = {}
+    for attr in inspect(model).column_attrs:
+        try:
+            python_type = attr.columns[0].type.python_type
+        except NotImplementedError:
+            continue
+        values[attr.key] = SAMPLES.get(python_type)
+    rows = []
+    for i in range(count):
+        obj = model()
+        for key, value in values.items():
+            setattr(obj, key, value)
+        rows.append(obj)
+    return rows
+
+
+def _legacy_push(rows) -> None:
+    for obj in rows:
+        {c.key: to_jsonable(getattr(obj, c.key)) for c in inspect(obj).mapper.column_attrs}
+
+
+def _legacy_pull(rows) -> None:
+    insp = inspect(type(rows[0]))
+    data = [{c.key: getattr(obj, c.key) for c in insp.mapper.column_attrs} for obj in rows]
+    json.dumps(jsonable_encoder(data))
+
+
+def _push(rows) -> None:
+    extract = column_extractor(type(rows[0]))
+    for obj in rows:
+        extract(obj)
+
+
+def _pull(rows) -> None:
+    extract = column_extractor(type(rows[0]), native=True)
+    dumps([extract(obj) for obj in rows])
+
+
+def _rate(fn, rows, rounds: int = 3) -> float:
+    best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=rounds))
+    return len(rows) / best / 1000
+
+
+def main(count: int = 2000) -> None:
+    print(f"encoder: {'orjson' if serialization.HAS_ORJSON else 'json'}")
+    print(
+        f"{'model':<28}{'push old':>10}{'push new':>10}{'pull old':>10}{'pull new':>10}"
+    )
+    for model in sorted(model_module.Base.__subclasses__(), key=lambda m: m.__tablename__):
+        rows = _rows(model, count)
+        try:
+            rates = [_rate(fn, rows) for fn in (_legacy_push, _push, _legacy_pull, _pull)]
+        except Exception as exc:  # pragma: no cover - model specific
+            print(f"{model.__tablename__:<28}skipped ({exc})")
+            continue
+        print(f"{model.__tablename__:<28}" + "".join(f"{r:>10.1f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Measure the per-query cost of the soft-delete filter.
+
+Compares the original hook, which attached a fresh ``with_loader_criteria``
+for every soft-deletable model, with the registry based hook in
+``core.utils.db_session``.  Each round applies the hook to a set of
+representative statements and computes the statement cache key, which is
+what SQLAlchemy does before every execution.  No database is needed.
+
+    python scripts/bench_soft_delete.py [rounds]
+"""
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select
+from sqlalchemy.orm import with_loader_criteria
+
+from core.utils import db_session
+from core.utils.database import Base
+from modules.inventory.models import Device, DeviceType, Tag
+
+
+def _legacy_filter(execute_state):
+    for cls in Base.__subclasses__():
+        if hasattr(cls, "deleted_at"):
+            execute_state.statement = execute_state.statement.options(
+                with_loader_criteria(
+                    cls, lambda c: c.deleted_at.is_(None), include_aliases=True
+                )
+            )
+
+
+STATEMENTS = {
+    "get device": lambda: select(Device).where(Device.id == 1),
+    "device list": lambda: select(Device)
+    .join(Device.device_type)
+    .where(DeviceType.id == 2)
+    .order_by(Device.hostname)
+    .limit(100),
+    "tag lookup": lambda: select(Tag.id).where(Tag.name == "core"),
+}
+
+
+def _run(hook, build) -> None:
+    state = SimpleNamespace(is_select=True, execution_options={}, statement=build())
+    hook(state)
+    state.statement._generate_cache_key()
+
+
+def main(rounds: int = 2000) -> None:
+    print(f"{'statement':<14}{'legacy us':>12}{'registry us':>14}")
+    for name, build in STATEMENTS.items():
+        base = timeit.timeit(lambda: _run(lambda s: None, build), number=rounds)
+        legacy = timeit.timeit(lambda: _run(_legacy_filter, build), number=rounds)
+        current = timeit.timeit(lambda: _run(db_session._filter_deleted, build), number=rounds)
+        print(
+            f"{name:<14}{(legacy - base) / rounds * 1e6:>12.1f}"
+            f"{(current - base) / rounds * 1e6:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,500 @@
+#!/usr/bin/env python
+"""Measure end-to-end sync throughput between a local and a cloud instance.
+
+A throwaway PostgreSQL server is started with ``testing.postgresql``.  Both
+databases are created from one migrated template.  For each fleet size and
+scenario, the script:
+
+* seeds synthetic sites, device types, locations, VLANs, tags and devices;
+* starts the cloud app (``ROLE=cloud``) under uvicorn in a subprocess;
+* runs the local ``push_once`` and/or ``pull_once`` in a fresh subprocess.
+
+Scenarios:
+
+* ``push``: local fleet, empty cloud; ``push_once`` -> ``/api/v1/sync/push``
+* ``pull``: cloud fleet, empty local; ``/api/v1/sync/pull`` -> ``pull_once``
+* ``conflict``: identical fleets where both sides edited every device at the
+  same version; push then pull
+* ``delete``: identical fleets; local soft-deletes half the devices and the
+  cloud the other half; push then pull
+
+Each phase reports records/s, peak RSS and statement counts for both
+processes.  The output is JSON.  When a baseline file exists the results
+are compared with it, and the exit status is 1 if throughput drops, or
+memory or query counts grow, by more than ``--tolerance``.
+
+    python scripts/bench_sync.py [--sizes 1000,10000,100000]
+        [--scenarios push,pull,conflict,delete] [--output results.json]
+        [--baseline scripts/bench_sync_baseline.json] [--update-baseline]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = {
+    "push": ("push",),
+    "pull": ("pull",),
+    "conflict": ("push", "pull"),
+    "delete": ("push", "pull"),
+}
+DEFAULT_BASELINE = os.path.join(ROOT, "scripts", "bench_sync_baseline.json")
+SITE_ID = "bench-site"
+API_KEY = "bench-key"
+# Explicit ids keep both databases aligned and clear of seeded rows
+ID_OFFSET = 1_000_000
+SEEDED_AT = datetime(2024, 1, 1)
+WATERMARK = datetime(2024, 1, 2)
+EDITED_AT = datetime(2024, 1, 3)
+
+# Higher is better for throughput; lower is better for the rest
+HIGHER_IS_BETTER = {"records_per_s"}
+COMPARED = (
+    "records_per_s",
+    "local_peak_rss_mb",
+    "cloud_peak_rss_mb",
+    "local_queries",
+    "cloud_queries",
+)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _count_queries() -> list:
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    counter = [0]
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    return counter
+
+
+# -- synthetic fleet --------------------------------------------------------
+
+
+def fleet(size: int, seed: int = 1) -> dict[str, list[dict]]:
+    """Rows per table for a fleet of ``size`` devices."""
+    rng = random.Random(seed)
+
+    def uid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def common(i: int) -> dict:
+        return {
+            "id": ID_OFFSET + i,
+            "uuid": uid(),
+            "version": 1,
+            "created_at": SEEDED_AT,
+            "updated_at": SEEDED_AT,
+        }
+
+    site_id = ID_OFFSET
+    rows = {
+        "sites": [{**common(0), "name": "Bench Site"}],
+        "device_types": [
+            {**common(i), "name": f"bench-type-{i}"} for i in range(5)
+        ],
+        "locations": [
+            {**common(i), "name": f"bench-loc-{i}", "location_type": "Fixed", "site_id": site_id}
+            for i in range(max(1, size // 50))
+        ],
+        "vlans": [
+            {**common(i), "tag": 100 + i, "description": f"bench vlan {i}"}
+            for i in range(min(max(1, size // 20), 3000))
+        ],
+        "tags": [{**common(i), "name": f"bench-tag-{i}"} for i in range(50)],
+    }
+    devices = []
+    device_tags = []
+    for i in range(size):
+        mac = ID_OFFSET + i
+        devices.append(
+            {
+                **common(i),
+                "hostname": f"bench-{i:06d}",
+                "ip": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+                "mac": ":".join(f"{mac >> s & 255:02x}" for s in range(40, -8, -8)),
+                "canonical_mac": mac,
+                "canonical_ip": 10 << 24 | i & 0xFFFFFF,
+                "asset_tag": f"AT{i:07d}",
+                "manufacturer": rng.choice(("Cisco", "Aruba", "Juniper", "HP")),
+                "model": f"M{rng.randint(100, 999)}",
+                "serial_number": f"SN{rng.getrandbits(40):010x}",
+                "device_type_id": ID_OFFSET + rng.randrange(len(rows["device_types"])),
+                "location_id": ID_OFFSET + rng.randrange(len(rows["locations"])),
+                "vlan_id": ID_OFFSET + rng.randrange(len(rows["vlans"])),
+                "site_id": site_id,
+                "config_pull_interval": "none",
+                "notes": "baseline",
+            }
+        )
+        for tag in rng.sample(range(len(rows["tags"])), 2):
+            device_tags.append({"device_id": ID_OFFSET + i, "tag_id": ID_OFFSET + tag})
+    rows["devices"] = devices
+    rows["device_tags"] = device_tags
+    return rows
+
+
+def _insert(engine, rows: dict[str, list[dict]], chunk: int = 5000) -> None:
+    from sqlalchemy import MetaData
+
+    meta = MetaData()
+    meta.reflect(bind=engine, only=list(rows))
+    with engine.begin() as conn:
+        for name, table_rows in rows.items():
+            table = meta.tables[name]
+            for start in range(0, len(table_rows), chunk):
+                conn.execute(table.insert(), table_rows[start : start + chunk])
+
+
+def _mark_synced(engine, tables) -> None:
+    """Make ``engine`` look like a site that has already synced ``tables``."""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for name in tables:
+            conn.execute(text(f"UPDATE {name} SET sync_state = '{{}}' WHERE id >= {ID_OFFSET}"))
+        for name in ("Last Sync Push Worker", "Last Sync Pull Worker"):
+            conn.execute(
+                text(
+                    "INSERT INTO system_tunables (name, value, function, file_type, data_type) "
+                    "VALUES (:name, :value, 'Sync', 'application', 'text')"
+                ),
+                {"name": name, "value": WATERMARK.isoformat() + "+00:00"},
+            )
+
+
+def _edit_devices(engine, ids: range, **values) -> None:
+    from sqlalchemy import text
+
+    sets = ", ".join(f"{k} = :{k}" for k in values)
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"UPDATE devices SET {sets} WHERE id >= :lo AND id < :hi"),
+            {**values, "lo": ID_OFFSET + ids.start, "hi": ID_OFFSET + ids.stop},
+        )
+
+
+def seed(scenario: str, size: int, local, cloud) -> None:
+    from sqlalchemy import text
+
+    with cloud.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO site_keys (site_id, site_name, api_key, active) "
+                "VALUES (:site, 'Bench', :key, true)"
+            ),
+            {"site": SITE_ID, "key": API_KEY},
+        )
+        # Any tunable marks the cloud as installed so it runs normally
+        conn.execute(
+            text(
+                "INSERT INTO system_tunables (name, value, function, file_type, data_type) "
+                "VALUES ('Benchmark', '1', 'Sync', 'application', 'text')"
+            )
+        )
+    rows = fleet(size)
+    if scenario == "push":
+        _insert(local, rows)
+        return
+    if scenario == "pull":
+        _insert(cloud, rows)
+        return
+    for engine in (local, cloud):
+        _insert(engine, rows)
+    _mark_synced(local, [name for name in rows if name != "device_tags"])
+    if scenario == "conflict":
+        # Same version on both sides with diverging edits to one field
+        common = dict(version=2, updated_at=EDITED_AT, sync_state='{"notes": "baseline"}')
+        _edit_devices(local, range(size), notes="local edit", **common)
+        _edit_devices(cloud, range(size), notes="cloud edit", **common)
+    elif scenario == "delete":
+        half = size // 2
+        deleted = dict(version=2, updated_at=EDITED_AT, deleted_at=EDITED_AT, is_deleted=True)
+        _edit_devices(local, range(half), **deleted)
+        _edit_devices(cloud, range(half, size), **deleted)
+
+
+# -- processes --------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_cloud(port: int) -> None:
+    """Run the cloud app with a statistics route for the benchmark."""
+    counter = _count_queries()
+    import uvicorn
+    from server.main import app
+
+    @app.get("/__bench/stats")
+    async def bench_stats():
+        return {"queries": counter[0], "peak_rss_mb": _peak_rss_mb()}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def run_phase(phase: str, result_path: str) -> None:
+    """Run one ``push_once`` or ``pull_once`` and write its figures."""
+    counter = _count_queries()
+    from core.utils.db_session import SessionLocal
+    from core.models.models import SystemTunable
+    from server.workers import sync_pull_worker, sync_push_worker
+
+    log = logging.getLogger("bench_sync")
+    func = sync_push_worker.push_once if phase == "push" else sync_pull_worker.pull_once
+    prefix = "Last Sync Push" if phase == "push" else "Last Sync Pull"
+    # The workers print a line per record
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        asyncio.run(func(log))
+        elapsed = time.perf_counter() - start
+    db = SessionLocal()
+    try:
+        values = {
+            t.name: t.value
+            for t in db.query(SystemTunable).filter(SystemTunable.name.like(f"{prefix}%"))
+        }
+    finally:
+        db.close()
+    records = int(values.get(f"{prefix} Worker Count") or 0)
+    with open(result_path, "w") as fh:
+        json.dump(
+            {
+                "seconds": round(elapsed, 3),
+                "records": records,
+                "records_per_s": round(records / elapsed, 1) if elapsed else 0.0,
+                "conflicts": int(values.get(f"{prefix} Worker Conflicts") or 0),
+                "error": values.get(f"{prefix} Error") or "",
+                "local_queries": counter[0],
+                "local_peak_rss_mb": _peak_rss_mb(),
+            },
+            fh,
+        )
+
+
+def _get_json(url: str) -> dict:
+    import httpx
+
+    return httpx.get(url, timeout=5).json()
+
+
+def _start_cloud(url: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": url, "ROLE": "cloud", "ENABLE_BACKGROUND_WORKERS": "0"}
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--serve-cloud", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("cloud server exited during startup")
+        try:
+            _get_json(f"http://127.0.0.1:{port}/__bench/stats")
+            return proc
+        except Exception:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("cloud server did not start")
+
+
+def _run_local(url: str, port: int, phase: str, tmpdir: str) -> dict:
+    result_path = os.path.join(tmpdir, f"{phase}.json")
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "ROLE": "local",
+        "CLOUD_BASE_URL": f"http://127.0.0.1:{port}",
+        "SITE_ID": SITE_ID,
+        "SYNC_API_KEY": API_KEY,
+        # One long request per phase; retries would distort the timing
+        "SYNC_TIMEOUT": "3600",
+        "SYNC_RETRIES": "1",
+    }
+    subprocess.run(
+        [sys.executable, __file__, "--phase", phase, result_path],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+    with open(result_path) as fh:
+        return json.load(fh)
+
+
+def _database_url(base: str, name: str) -> str:
+    return base.rsplit("/", 1)[0] + "/" + name
+
+
+def _recreate(admin, name: str, template: str | None = None) -> None:
+    from sqlalchemy import text
+
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name}"))
+        suffix = f" TEMPLATE {template}" if template else ""
+        conn.execute(text(f"CREATE DATABASE {name}{suffix}"))
+
+
+def run_benchmarks(sizes: list[int], scenarios: list[str]) -> dict:
+    import tempfile
+
+    import testing.postgresql
+    from sqlalchemy import create_engine
+
+    results = {}
+    with testing.postgresql.Postgresql() as pg, tempfile.TemporaryDirectory() as tmpdir:
+        base_url = pg.url()
+        admin = create_engine(base_url, isolation_level="AUTOCOMMIT")
+        template_url = _database_url(base_url, "bench_template")
+        _recreate(admin, "bench_template")
+        subprocess.run(
+            [sys.executable, "scripts/run_migrations.py"],
+            cwd=ROOT,
+            env={**os.environ, "DATABASE_URL": template_url},
+            check=True,
+        )
+        local_url = _database_url(base_url, "bench_local")
+        cloud_url = _database_url(base_url, "bench_cloud")
+        for size in sizes:
+            for scenario in scenarios:
+                _recreate(admin, "bench_local", "bench_template")
+                _recreate(admin, "bench_cloud", "bench_template")
+                local, cloud = create_engine(local_url), create_engine(cloud_url)
+                try:
+                    seed(scenario, size, local, cloud)
+                finally:
+                    local.dispose()
+                    cloud.dispose()
+                port = _free_port()
+                server = _start_cloud(cloud_url, port)
+                try:
+                    for phase in SCENARIOS[scenario]:
+                        before = _get_json(f"http://127.0.0.1:{port}/__bench/stats")
+                        figures = _run_local(local_url, port, phase, tmpdir)
+                        after = _get_json(f"http://127.0.0.1:{port}/__bench/stats")
+                        figures["cloud_queries"] = after["queries"] - before["queries"]
+                        figures["cloud_peak_rss_mb"] = after["peak_rss_mb"]
+                        key = f"{scenario}/{size}/{phase}"
+                        results[key] = figures
+                        print(
+                            f"{key:<24}{figures['records']:>8} records"
+                            f"{figures['records_per_s']:>10.1f}/s",
+                            file=sys.stderr,
+                        )
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        admin.dispose()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every figure that is worse than the baseline by more than ``tolerance``."""
+    problems = []
+    for key, figures in results.items():
+        if figures.get("error"):
+            problems.append(f"{key}: {figures['error']}")
+        old = baseline.get(key)
+        if not old:
+            continue
+        for metric in COMPARED:
+            if metric not in figures or not old.get(metric):
+                continue
+            ratio = figures[metric] / old[metric]
+            worse = ratio < 1 - tolerance if metric in HIGHER_IS_BETTER else ratio > 1 + tolerance
+            if worse:
+                problems.append(f"{key}: {metric} {old[metric]} -> {figures[metric]}")
+    return problems
+
+
+def _meta() -> dict:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "git": rev,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "run_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--serve-cloud", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--phase", nargs=2, metavar=("PHASE", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_cloud:
+        serve_cloud(args.serve_cloud)
+        return 0
+    if args.phase:
+        run_phase(*args.phase)
+        return 0
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    report = {"meta": _meta(), "results": run_benchmarks(sizes, scenarios)}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as fh:
+            fh.write(text + "\n")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one", file=sys.stderr)
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)["results"]
+    problems = compare(report["results"], baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
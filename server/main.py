@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request, WebSocket, Depends, HTTPException
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from anyio import to_thread
 import logging
 
 # Reduce noisy INFO logs from Alembic when workers start
@@ -101,8 +102,24 @@ from server.workers.system_metrics_logger import (
     start_metrics_logger,
     stop_metrics_logger,
 )
+from server.workers.export_jobs import stop_export_jobs
+from server.workers.import_jobs import stop_import_jobs
+from server.workers.api_key_usage import (
+    start_api_key_usage_writer,
+    stop_api_key_usage_writer,
+)
+from server.workers.site_auth_log import start_site_auth_log, stop_site_auth_log
+from server.workers.audit_writer import start_audit_writer, stop_audit_writer
+from server.workers.loop_lag import start_loop_lag_monitor, stop_loop_lag_monitor
+from server.workers.metrics_sampler import start_metrics_sampler, stop_metrics_sampler
+from server.workers.db_listener import start_db_listener, stop_db_listener
+from core.utils.password_hashing import shutdown_password_pool
 from server.utils.system_metrics import HAS_PSUTIL
 from core.utils.templates import templates
+from core.utils.serialization import FastJSONResponse
+from core.utils.ip_banning import BannedIPMiddleware
+from core.utils.instrumentation import MetricsMiddleware
+from core.utils.sql_profiler import SQLProfilerMiddleware
 from core.utils.db_session import engine, SessionLocal
 from core.utils.schema import (
     verify_schema,
@@ -140,10 +157,15 @@ def check_install_required() -> bool:
 
 INSTALL_REQUIRED = check_install_required()
 
+# Worker threads for sync handlers and ORM work offloaded from async routes
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", "40"))
+
 
 # Allow deploying the app under a URL prefix by setting ROOT_PATH.
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Sync handlers, sync dependencies and ``run_in_threadpool`` share this limit
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     try:
         safe_alembic_upgrade()
     except Exception as exc:  # pragma: no cover - best effort
@@ -199,6 +221,12 @@ async def lifespan(app: FastAPI):
             except Exception as exc:  # pragma: no cover - safety
                 log_boot_error(str(exc), traceback.format_exc(), settings.role)
     if not INSTALL_REQUIRED:
+        start_api_key_usage_writer()
+        start_site_auth_log()
+        start_audit_writer()
+        start_loop_lag_monitor()
+        start_metrics_sampler()
+        start_db_listener()
         if settings.enable_background_workers and schema_ok:
             if settings.role == "local":
                 start_queue_worker()
@@ -225,10 +253,22 @@ async def lifespan(app: FastAPI):
             await stop_sync_push_worker()
             await stop_sync_pull_worker()
             await stop_heartbeat()
+        await stop_api_key_usage_writer()
+        await stop_site_auth_log()
+        await stop_audit_writer()
+        await stop_loop_lag_monitor()
+        await stop_metrics_sampler()
+        await stop_db_listener()
+    await stop_export_jobs()
+    await stop_import_jobs()
+    shutdown_password_pool()
     logging.shutdown()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+# Turn banned addresses away before routing; added first so it sees the
+# client address after ProxyHeadersMiddleware has applied X-Forwarded-For.
+app.add_middleware(BannedIPMiddleware)
 # Respect headers like X-Forwarded-Proto so generated URLs use the
 # correct scheme when behind a reverse proxy.
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
@@ -245,6 +285,7 @@ async def install_redirect(request: Request, call_next):
 
 # Path to the ``static`` directory under ``web-client``
 from core.utils.paths import STATIC_DIR
+from core.utils.assets import ASSET_DIR, ImmutableStaticFiles
 
 # Ensure the static directory exists to avoid startup errors when it has been
 # mounted from outside the repository (for example at ``/static`` in Docker
@@ -267,6 +308,11 @@ if not HAS_PSUTIL:
     logging.warning("psutil not installed; system metrics will be unavailable")
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# Content-hashed uploads; safe to cache forever
+app.mount("/assets", ImmutableStaticFiles(directory=ASSET_DIR, check_dir=False), name="assets")
+
+# Inside SessionMiddleware so profiling requests can be tied to a login
+app.add_middleware(SQLProfilerMiddleware)
 
 # Store login information in signed cookies
 # The session expires after SESSION_TTL seconds (default 12 hours)
@@ -275,6 +321,8 @@ app.add_middleware(
     secret_key=os.environ.get("SECRET_KEY", "change-me"),
     max_age=int(os.environ.get("SESSION_TTL", "43200")),
 )
+# Outermost so recorded latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router, prefix="/auth")
 app.include_router(devices_router)
@@ -7,10 +7,16 @@ from modules.inventory import forms as inventory_forms
 from core.utils.versioning import apply_update
 from core.utils import auth as auth_utils
 from core.utils.deletion import soft_delete
+from core.utils.serialization import FastJSONResponse, column_extractor
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/api/v1/devices", tags=["devices"])
 
+# Rows are written straight from the columns, skipping per-object validation
+_device_row = column_extractor(
+    Device, native=True, fields=tuple(inventory_forms.DeviceRead.model_fields)
+)
+
 @router.get("/", response_model=list[inventory_forms.DeviceRead])
 def list_devices(
     skip: int = 0,
@@ -23,7 +29,9 @@ def list_devices(
     if search:
         q = q.filter(Device.hostname.ilike(f"%{search}%"))
     devices = q.offset(skip).limit(limit).all()
-    return [d for d in devices if not getattr(d, "is_deleted", False)]
+    return FastJSONResponse(
+        [_device_row(d) for d in devices if not getattr(d, "is_deleted", False)]
+    )
 
 @router.post("/", response_model=inventory_forms.DeviceRead)
 def create_device(
@@ -47,7 +55,7 @@ def get_device(
     obj = db.query(Device).filter_by(id=device_id).first()
     if not obj or obj.is_deleted:
         raise HTTPException(status_code=404, detail="Device not found")
-    return obj
+    return FastJSONResponse(_device_row(obj))
 
 @router.put("/{device_id}", response_model=inventory_forms.DeviceRead)
 def update_device(
@@ -6,7 +6,7 @@ from core.utils.auth import get_current_user
 from modules.inventory.utils import suggest_vlan_from_ip
 from modules.network.models import VLAN
 from core.models.models import TablePreference
-import json
+from core.utils.serialization import dumps, loads
 
 router = APIRouter()
 
@@ -46,8 +46,8 @@ async def get_table_prefs(
     )
     if not pref:
         return {"column_widths": {}, "visible_columns": []}
-    widths = json.loads(pref.column_widths) if pref.column_widths else {}
-    visible = json.loads(pref.visible_columns) if pref.visible_columns else []
+    widths = loads(pref.column_widths) if pref.column_widths else {}
+    visible = loads(pref.visible_columns) if pref.visible_columns else []
     return {"column_widths": widths, "visible_columns": visible}
 
 
@@ -68,7 +68,7 @@ async def save_table_prefs(
     if not pref:
         pref = TablePreference(user_id=current_user.id, table_id=table_id)
         db.add(pref)
-    pref.column_widths = json.dumps(payload.get("column_widths", {}))
-    pref.visible_columns = json.dumps(payload.get("visible_columns", []))
+    pref.column_widths = dumps(payload.get("column_widths", {})).decode()
+    pref.visible_columns = dumps(payload.get("visible_columns", [])).decode()
     db.commit()
     return {"status": "ok"}
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Any
+import asyncio
 import logging
 from sqlalchemy import inspect, or_
 from sqlalchemy.exc import IntegrityError
@@ -10,10 +13,19 @@ from core.models import models as model_module
 from core.utils.versioning import apply_update
 from core.utils.sync_logging import log_sync, log_conflict, log_duplicate
 from core.utils.deletion import soft_delete
-
-from core.utils.db_session import get_db
+from core.utils.mac_utils import mac_to_int
+from core.utils.serialization import FastJSONResponse, column_extractor
+from core.utils.assets import (
+    ASSET_MAX_BYTES,
+    asset_exists,
+    asset_path,
+    is_asset_name,
+    store_named,
+)
+
+from core.utils.db_session import get_async_db
 from core.utils.schema import verify_schema, get_schema_revision, validate_db_schema
-from core.utils.site_auth import validate_site_key
+from core.utils.site_auth import require_site_key, validate_site_key
 from settings import settings
 
 router = APIRouter(prefix="/api/v1/sync", tags=["sync"])
@@ -32,18 +44,7 @@ async def align_schema(key=Depends(validate_site_key)):
     return {"revision": rev}
 
 
-@router.post("/")
-async def sync_payload(
-    payload: dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
-    key=Depends(validate_site_key),
-):
-    """Accept a batch of updates for multiple models."""
-    if not validate_db_schema(settings.role):
-        raise HTTPException(status_code=400, detail="Schema mismatch")
-    if not isinstance(payload, dict):
-        raise HTTPException(status_code=400, detail="Invalid payload")
-
+def _apply_payload(db: Session, payload: dict[str, Any]) -> dict[str, int]:
     model_map = {cls.__tablename__: cls for cls in model_module.Base.__subclasses__()}
     accepted = 0
     skipped = 0
@@ -99,51 +100,24 @@ async def sync_payload(
     return {"accepted": accepted, "conflicts": conflicts, "skipped": skipped}
 
 
-@router.post("/push")
-async def push_changes(
+@router.post("/")
+async def sync_payload(
     payload: dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     key=Depends(validate_site_key),
 ):
-    """Receive a batch of updates from another site."""
-    log = logging.getLogger(__name__)
-
-    if not validate_db_schema(settings.role):
+    """Accept a batch of updates for multiple models."""
+    if not await run_in_threadpool(validate_db_schema, settings.role):
         raise HTTPException(status_code=400, detail="Schema mismatch")
-
     if not isinstance(payload, dict):
         raise HTTPException(status_code=400, detail="Invalid payload")
+    return await db.run_sync(_apply_payload, payload)
 
-    model_map = {cls.__tablename__: cls for cls in model_module.Base.__subclasses__()}
-
-    # Support multiple payload formats for backward compatibility
-    records_by_model: dict[str, list[dict[str, Any]]] = {}
 
-    if "records" in payload and isinstance(payload["records"], list):
-        # Either {"model": "name", "records": [...]} or {"records": [{"model": ..}]}
-        if isinstance(payload.get("model"), str):
-            records_by_model[payload["model"]] = payload["records"]
-        else:
-            for rec in payload["records"]:
-                if not isinstance(rec, dict):
-                    continue
-                model_name = rec.get("table") or rec.get("model")
-                if not model_name or model_name not in model_map:
-                    continue
-                records_by_model.setdefault(model_name, []).append(rec)
-    else:
-        # Legacy style: {"devices": [...], "users": [...], ...}
-        for model_name, records in payload.items():
-            if model_name in model_map and isinstance(records, list):
-                records_by_model[model_name] = records
-
-    if not records_by_model:
-        raise HTTPException(status_code=400, detail="Missing model or records")
-
-    total_records = sum(len(r) for r in records_by_model.values())
-    print(
-        f"\u2b06\ufe0f Received push from site {key.site_id} with {total_records} records"
-    )
+def _apply_push(
+    db: Session, records_by_model: dict[str, list[dict[str, Any]]], model_map: dict
+) -> tuple[int, int, int]:
+    log = logging.getLogger(__name__)
 
     accepted = 0
     skipped = 0
@@ -197,8 +171,13 @@ async def push_changes(
                 else:
                     if model_name == "devices":
                         dup = None
-                        if rec.get("mac"):
-                            dup = db.query(model_cls).filter_by(mac=rec["mac"]).first()
+                        mac_key = mac_to_int(rec.get("mac"))
+                        if mac_key is not None:
+                            dup = (
+                                db.query(model_cls)
+                                .filter(model_cls.canonical_mac == mac_key)
+                                .first()
+                            )
                         if not dup and rec.get("asset_tag"):
                             dup = (
                                 db.query(model_cls)
@@ -299,44 +278,67 @@ async def push_changes(
                     "Error processing %s id %s: %s", model_name, rec.get("id"), exc
                 )
                 skipped += 1
-
-    print(
-        f"\u2705 Push processed for site {key.site_id}: {accepted} accepted, {conflicts} conflicts, {skipped} skipped"
-    )
-    return {"accepted": accepted, "conflicts": conflicts, "skipped": skipped}
+    return accepted, conflicts, skipped
 
 
-@router.post("/pull")
-async def pull_changes(
+@router.post("/push")
+async def push_changes(
     payload: dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     key=Depends(validate_site_key),
 ):
-    """Return records updated since the provided timestamp."""
-    log = logging.getLogger(__name__)
-
-    if not validate_db_schema(settings.role):
+    """Receive a batch of updates from another site."""
+    if not await run_in_threadpool(validate_db_schema, settings.role):
         raise HTTPException(status_code=400, detail="Schema mismatch")
 
     if not isinstance(payload, dict):
         raise HTTPException(status_code=400, detail="Invalid payload")
 
-    since_str = payload.get("since")
-    models = payload.get("models")
+    model_map = {cls.__tablename__: cls for cls in model_module.Base.__subclasses__()}
 
-    if not since_str or not isinstance(models, list):
-        raise HTTPException(status_code=400, detail="Missing since or models")
+    # Support multiple payload formats for backward compatibility
+    records_by_model: dict[str, list[dict[str, Any]]] = {}
 
-    try:
-        since = datetime.fromisoformat(since_str)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid since timestamp")
+    if "records" in payload and isinstance(payload["records"], list):
+        # Either {"model": "name", "records": [...]} or {"records": [{"model": ..}]}
+        if isinstance(payload.get("model"), str):
+            records_by_model[payload["model"]] = payload["records"]
+        else:
+            for rec in payload["records"]:
+                if not isinstance(rec, dict):
+                    continue
+                model_name = rec.get("table") or rec.get("model")
+                if not model_name or model_name not in model_map:
+                    continue
+                records_by_model.setdefault(model_name, []).append(rec)
+    else:
+        # Legacy style: {"devices": [...], "users": [...], ...}
+        for model_name, records in payload.items():
+            if model_name in model_map and isinstance(records, list):
+                records_by_model[model_name] = records
 
+    if not records_by_model:
+        raise HTTPException(status_code=400, detail="Missing model or records")
+
+    total_records = sum(len(r) for r in records_by_model.values())
     print(
-        f"\u27a1\ufe0f Pull request from site {key.site_id} since {since.isoformat()}"
+        f"\u2b06\ufe0f Received push from site {key.site_id} with {total_records} records"
     )
 
-    model_map = {cls.__tablename__: cls for cls in model_module.Base.__subclasses__()}
+    accepted, conflicts, skipped = await db.run_sync(
+        _apply_push, records_by_model, model_map
+    )
+
+    print(
+        f"\u2705 Push processed for site {key.site_id}: {accepted} accepted, {conflicts} conflicts, {skipped} skipped"
+    )
+    return {"accepted": accepted, "conflicts": conflicts, "skipped": skipped}
+
+
+def _collect_changes(
+    db: Session, models: list, since: datetime, model_map: dict
+) -> list[dict[str, Any]]:
+    log = logging.getLogger(__name__)
     results: list[dict[str, Any]] = []
 
     for model_name in models:
@@ -345,8 +347,7 @@ async def pull_changes(
             log.warning("Unknown model requested: %s", model_name)
             continue
 
-        insp = inspect(model_cls)
-        cols = insp.columns
+        extract = column_extractor(model_cls, native=True)
         query = db.query(model_cls)
 
         created_col = getattr(model_cls, "created_at", None)
@@ -365,12 +366,90 @@ async def pull_changes(
         # instances, matching the desired behavior of full database replication.
 
         for obj in query.all():
-            data = {c.key: getattr(obj, c.key) for c in insp.mapper.column_attrs}
-            results.append({"table": model_name, **data})
+            results.append({"table": model_name, **extract(obj)})
             log_sync(db, obj.id, model_name, "read", "cloud", "local")
+    return results
+
+
+@router.post("/pull")
+async def pull_changes(
+    payload: dict[str, Any] = Body(...),
+    db=Depends(get_async_db),
+    key=Depends(validate_site_key),
+):
+    """Return records updated since the provided timestamp."""
+    if not await run_in_threadpool(validate_db_schema, settings.role):
+        raise HTTPException(status_code=400, detail="Schema mismatch")
+
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    since_str = payload.get("since")
+    models = payload.get("models")
+
+    if not since_str or not isinstance(models, list):
+        raise HTTPException(status_code=400, detail="Missing since or models")
+
+    try:
+        since = datetime.fromisoformat(since_str)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid since timestamp")
+
+    print(
+        f"\u27a1\ufe0f Pull request from site {key.site_id} since {since.isoformat()}"
+    )
+
+    model_map = {cls.__tablename__: cls for cls in model_module.Base.__subclasses__()}
+    results = await db.run_sync(_collect_changes, models, since, model_map)
 
     print(f"\u2b06\ufe0f Sending {len(results)} records to site {key.site_id}")
-    return results
+    return FastJSONResponse(results)
+
+
+@router.post("/assets/missing")
+async def missing_assets(
+    payload: dict[str, Any] = Body(...),
+    key=Depends(require_site_key),
+):
+    """Return the asset names from ``names`` that this instance lacks."""
+    names = payload.get("names") if isinstance(payload, dict) else None
+    if not isinstance(names, list):
+        raise HTTPException(status_code=400, detail="Missing names")
+    missing = [n for n in names if is_asset_name(n) and not asset_exists(n)]
+    return {"missing": missing}
+
+
+@router.put("/assets/{name}")
+async def upload_asset(name: str, request: Request, key=Depends(require_site_key)):
+    """Store an asset pushed by a site; the content must match its hash."""
+    if not is_asset_name(name):
+        raise HTTPException(status_code=400, detail="Invalid asset name")
+    too_large = HTTPException(status_code=413, detail="Asset too large")
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if declared > ASSET_MAX_BYTES:
+        raise too_large
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > ASSET_MAX_BYTES:
+            raise too_large
+    data = bytes(data)
+    try:
+        await asyncio.to_thread(store_named, name, data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Hash mismatch")
+    return {"stored": name}
+
+
+@router.get("/assets/{name}")
+async def download_asset(name: str, key=Depends(require_site_key)):
+    """Return an asset so a site can fetch files it does not have."""
+    if not is_asset_name(name) or not asset_exists(name):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return FileResponse(asset_path(name))
 
 
 @router.get("/ping")
@@ -1,10 +1,56 @@
-from fastapi import APIRouter, Depends
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+
 from core.utils.auth import require_role
+from core.utils.instrumentation import HAS_PROMETHEUS, render_metrics
+from server.utils.metric_history import RESOLUTIONS, metric_history
 from server.utils.system_metrics import gather_metrics
 
 router = APIRouter()
 
+# Bearer token required by ``/metrics`` when set
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+_STEPS = {f"{step}s" if step < 60 else f"{step // 60}m": step for step, _ in RESOLUTIONS}
+
 
 @router.get("/api/system/metrics")
 async def system_metrics(current_user=Depends(require_role("superadmin"))):
-    return gather_metrics()
+    return await run_in_threadpool(gather_metrics)
+
+
+@router.get("/api/system/metrics/history")
+async def system_metrics_history(
+    resolution: str = "1s",
+    metric: list[str] | None = Query(None),
+    since: float | None = None,
+    current_user=Depends(require_role("superadmin")),
+):
+    """Sampled metrics as ``[timestamp, avg, min, max]`` points.
+
+    ``resolution`` is one of ``1s``, ``10s`` or ``1m``; ``since`` is a Unix
+    timestamp so clients can poll for new points only.
+    """
+    step = _STEPS.get(resolution)
+    if step is None:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(_STEPS)}")
+    return {
+        "resolution": resolution,
+        "metrics": metric_history.points(step, names=metric, since=since),
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """OpenMetrics exposition for Prometheus scrapers."""
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    if not HAS_PROMETHEUS:
+        raise HTTPException(status_code=503, detail="prometheus_client not installed")
+    body, content_type = await run_in_threadpool(render_metrics)
+    return Response(body, media_type=content_type)
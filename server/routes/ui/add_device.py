@@ -2,13 +2,16 @@ from fastapi import APIRouter, Request, Depends, Form, UploadFile, File, HTTPExc
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 import csv
+import io
 
 from core.utils.templates import templates
 from core.utils.auth import require_role
 from core.utils.db_session import get_db, reset_pk_sequence
-from modules.inventory.models import Device, DeviceType, Location
+from modules.inventory.models import Device
 from server.routes.ui.task_views import _open_sheet
 from modules.inventory.utils import create_device_from_row, format_ip
+from modules.inventory.importer import ImportLookups
+from core.utils.reference_data import reference_rows
 
 router = APIRouter()
 
@@ -33,12 +36,10 @@ async def add_device_page(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    dtypes = db.query(DeviceType).all()
-    locations = db.query(Location).all()
     context = {
         "request": request,
-        "device_types": dtypes,
-        "locations": locations,
+        "device_types": reference_rows(db, "device_types"),
+        "locations": reference_rows(db, "locations"),
         "current_user": current_user,
     }
     return templates.TemplateResponse("add_device.html", context)
@@ -93,14 +94,16 @@ async def add_device_csv(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    content = await csv_file.read()
-    reader = csv.DictReader(content.decode().splitlines())
+    reader = csv.DictReader(
+        io.TextIOWrapper(csv_file.file, encoding="utf-8-sig", errors="replace", newline="")
+    )
+    lookups = ImportLookups(db)
     added = 0
     errors = []
     for row in reader:
         filtered = {k: row.get(k, "") for k in SUPPORTED_FIELDS}
         try:
-            create_device_from_row(db, filtered, current_user)
+            create_device_from_row(db, filtered, current_user, lookups)
             added += 1
         except Exception as exc:
             errors.append(str(exc))
@@ -128,13 +131,14 @@ async def add_device_google(
     if not rows:
         raise HTTPException(status_code=400, detail="Sheet empty")
     headers = [h.strip().lower() for h in rows[0]]
+    lookups = ImportLookups(db)
     added = 0
     errors = []
     for row_vals in rows[1:]:
         row = {headers[i]: row_vals[i] if i < len(row_vals) else "" for i in range(len(headers))}
         filtered = {k: row.get(k, "") for k in SUPPORTED_FIELDS}
         try:
-            create_device_from_row(db, filtered, current_user)
+            create_device_from_row(db, filtered, current_user, lookups)
             added += 1
         except Exception as exc:
             errors.append(str(exc))
@@ -8,6 +8,12 @@ from core.utils.db_session import get_db
 from core.utils.auth import require_role
 from modules.inventory.models import Device
 from core.models.models import AuditLog, User
+from core.utils.sql_profiler import (
+    HAS_PYINSTRUMENT,
+    SQL_PROFILE_N1_THRESHOLD,
+    SQL_PROFILE_SAMPLE_RATE,
+    profile_store,
+)
 from server.workers.trap_listener import (
     start_trap_listener,
     stop_trap_listener,
@@ -62,6 +68,43 @@ async def debug_logs(
     return templates.TemplateResponse("debug_log.html", context)
 
 
+@router.get("/admin/debug/profiler")
+async def profiler_report(
+    request: Request,
+    current_user=Depends(require_role("superadmin")),
+):
+    context = {
+        "request": request,
+        "routes": profile_store.slowest_routes(),
+        "offenders": profile_store.worst_offenders(),
+        "captures": profile_store.recent_captures(),
+        "sample_rate": SQL_PROFILE_SAMPLE_RATE,
+        "threshold": SQL_PROFILE_N1_THRESHOLD,
+        "has_pyinstrument": HAS_PYINSTRUMENT,
+        "current_user": current_user,
+    }
+    return templates.TemplateResponse("profiler.html", context)
+
+
+@router.get("/admin/debug/profiler/run")
+async def profile_page(
+    path: str,
+    mode: str = "sql",
+    current_user=Depends(require_role("superadmin")),
+):
+    """Load ``path`` once with profiling switched on."""
+    if not path.startswith("/") or path.startswith("//"):
+        raise HTTPException(status_code=400, detail="Path must be local")
+    sep = "&" if "?" in path else "?"
+    return RedirectResponse(url=f"{path}{sep}_profile={mode}", status_code=302)
+
+
+@router.post("/admin/debug/profiler/reset")
+async def reset_profiler(current_user=Depends(require_role("superadmin"))):
+    profile_store.reset()
+    return RedirectResponse(url="/admin/debug/profiler", status_code=302)
+
+
 @router.get("/admin/debug/{log_id}")
 async def debug_detail(
     log_id: int,
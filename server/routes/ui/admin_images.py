@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Request, Depends, UploadFile, File, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
-import os
-import base64
 
 from core.utils.auth import require_role
 from core.utils.db_session import get_db
 from core.utils.templates import templates
-from core.utils.paths import STATIC_DIR
+from core.utils.assets import store_upload
 from modules.inventory.models import DeviceType
 from core.models.models import SystemTunable
 
@@ -161,34 +159,20 @@ async def update_images(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("superadmin")),
 ):
-    upload_dir = os.path.join(STATIC_DIR, "uploads", "menu-items" if category == "menu" else "device-types")
-    os.makedirs(upload_dir, exist_ok=True)
-    icon_name = None
-    image_name = None
     icon_data = None
     image_data = None
-    if icon and icon.filename:
-        if not icon.content_type.startswith("image/"):
+    for upload, kind in ((icon, "icon"), (image, "image")):
+        if not (upload and upload.filename):
+            continue
+        if not upload.content_type.startswith("image/"):
             if request.headers.get("HX-Request"):
-                context = {"request": request, "message": "Invalid icon type"}
+                context = {"request": request, "message": f"Invalid {kind} type"}
                 return templates.TemplateResponse("message_modal.html", context, status_code=400)
-            raise HTTPException(status_code=400, detail="Invalid icon type")
-        icon_name = f"{key}_icon_{os.path.basename(icon.filename)}"
-        data = await icon.read()
-        with open(os.path.join(upload_dir, icon_name), "wb") as f:
-            f.write(data)
-        icon_data = f"data:{icon.content_type};base64,{base64.b64encode(data).decode()}"
+            raise HTTPException(status_code=400, detail=f"Invalid {kind} type")
+    if icon and icon.filename:
+        icon_data = await store_upload(icon, "icon")
     if image and image.filename:
-        if not image.content_type.startswith("image/"):
-            if request.headers.get("HX-Request"):
-                context = {"request": request, "message": "Invalid image type"}
-                return templates.TemplateResponse("message_modal.html", context, status_code=400)
-            raise HTTPException(status_code=400, detail="Invalid image type")
-        image_name = f"{key}_img_{os.path.basename(image.filename)}"
-        data = await image.read()
-        with open(os.path.join(upload_dir, image_name), "wb") as f:
-            f.write(data)
-        image_data = f"data:{image.content_type};base64,{base64.b64encode(data).decode()}"
+        image_data = await store_upload(image, "image")
     if category == "menu":
         save_menu_images(
             db,
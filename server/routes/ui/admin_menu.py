@@ -4,8 +4,9 @@ from sqlalchemy.orm import Session
 from core.utils.auth import require_role
 from core.utils.db_session import get_db
 from core.utils.templates import templates
-from core.models.models import SystemTunable
+from core.utils.tunables import get_tunable
 from core.utils.paths import STATIC_DIR
+from core.utils.assets import asset_url, is_asset_name
 import os
 
 router = APIRouter()
@@ -23,7 +24,7 @@ async def super_admin_menu(
         {"label": "Cloud Sync / API's", "href": "/admin/cloud-sync"},
     ]
     for item in items:
-        item["img"] = _menu_image(db, item["label"])
+        item["img"] = _menu_image(item["label"])
     categories = []
     general = [i for i in items if not i.get("category")]
     if general:
@@ -42,15 +43,14 @@ async def super_admin_menu(
 def _slug(label: str) -> str:
     return label.lower().replace(" ", "_")
 
-def _menu_image(db: Session, label: str) -> str:
-    slug = _slug(label)
-    row = db.query(SystemTunable).filter(SystemTunable.name == f"MENU_IMAGE_{slug}").first()
-    if row and row.value:
-        if row.value.startswith("data:"):
-            return row.value
-        path = os.path.join(STATIC_DIR, "uploads", "menu-items", row.value)
+def _menu_image(label: str) -> str:
+    value = get_tunable(f"MENU_IMAGE_{_slug(label)}")
+    if value:
+        if value.startswith("data:") or is_asset_name(value):
+            return asset_url(value)
+        path = os.path.join(STATIC_DIR, "uploads", "menu-items", value)
         if os.path.exists(path):
-            return f"/static/uploads/menu-items/{row.value}"
+            return f"/static/uploads/menu-items/{value}"
     return ""
 
 @router.get("/admin/system")
@@ -74,7 +74,7 @@ async def system_menu(
         {"label": "UI to be Sorted", "href": "/admin/ui-to-be-sorted"},
     ]
     for item in items:
-        item["img"] = _menu_image(db, item["label"])
+        item["img"] = _menu_image(item["label"])
     context = {"request": request, "items": items, "title": "System", "current_user": current_user}
     return templates.TemplateResponse("admin_menu_grid.html", context)
 
@@ -102,7 +102,7 @@ async def sync_menu(
         {"label": "Site Keys", "href": "/admin/site-keys"},
     ]
     for item in items:
-        item["img"] = _menu_image(db, item["label"])
+        item["img"] = _menu_image(item["label"])
     context = {"request": request, "items": items, "title": "Sync / APIs", "current_user": current_user}
     return templates.TemplateResponse("admin_menu_grid.html", context)
 
@@ -115,10 +115,11 @@ async def logs_menu(
 ):
     items = [
         {"label": "Debug Logs", "href": "/admin/debug"},
+        {"label": "SQL Profiler", "href": "/admin/debug/profiler"},
         {"label": "Audit Log", "href": "/admin/audit"},
         {"label": "Login Locations and logs", "href": "/admin/login-events"},
     ]
     for item in items:
-        item["img"] = _menu_image(db, item["label"])
+        item["img"] = _menu_image(item["label"])
     context = {"request": request, "items": items, "title": "Logs", "current_user": current_user}
     return templates.TemplateResponse("admin_menu_grid.html", context)
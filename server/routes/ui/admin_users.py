@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 import secrets
 
 from core.utils.db_session import get_db
-from core.utils.auth import require_role, get_password_hash, ROLE_CHOICES
+from core.utils.auth import require_role, ROLE_CHOICES
+from core.utils.password_hashing import hash_password_async
 from core.utils.templates import templates
 from core.utils.audit import log_audit
 from core.models.models import User
@@ -117,7 +118,7 @@ async def create_user(
 
     user = User(
         email=email,
-        hashed_password=get_password_hash(password),
+        hashed_password=await hash_password_async(password),
         role=role,
         is_active=is_active,
         theme=theme,
@@ -222,7 +223,7 @@ async def update_user(
     user.menu_stick_theme = menu_stick_theme
     user.icon_style = icon_style
     if password:
-        user.hashed_password = get_password_hash(password)
+        user.hashed_password = await hash_password_async(password)
     db.commit()
     log_audit(db, current_user, "edit_user", details=f"Updated user {user.email}")
     return RedirectResponse(url="/admin/users", status_code=302)
@@ -253,7 +254,7 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     new_pw = secrets.token_urlsafe(8)
-    user.hashed_password = get_password_hash(new_pw)
+    user.hashed_password = await hash_password_async(new_pw)
     db.commit()
     log_audit(db, current_user, "reset_password", details=f"Reset password for {user.email}")
     return RedirectResponse(url=f"/admin/users?message=New+password:+{new_pw}", status_code=302)
@@ -1,27 +1,31 @@
 from datetime import datetime, timezone
 from typing import Optional
-import csv
-import io
-import json
+import asyncio
 
-from fastapi import APIRouter, Request, Depends, Form, UploadFile, File
-from fastapi.responses import RedirectResponse
-from sqlalchemy import or_
-import openpyxl
+from fastapi import APIRouter, Request, Depends, Form, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, RedirectResponse
 from sqlalchemy.orm import Session
 import asyncssh
 
 from modules.inventory.models import Device
 from modules.network.models import VLAN, PortConfigTemplate
-from core.models.models import ConfigBackup, ImportLog, Site
+from core.models.models import ConfigBackup
 from core.utils.db_session import get_db
 from core.utils.auth import require_role, get_user_site_ids
-from core.utils.ssh import build_conn_kwargs, resolve_ssh_credential
+from core.utils.ssh import build_conn_kwargs, resolve_ssh_credential, ssh_connect
 from core.utils.device_detect import detect_ssh_platform
 from core.utils.templates import templates
-from core.utils.audit import log_audit
-from modules.inventory.utils import get_or_create_tag, add_tag_to_device
-from modules.inventory.utils import format_ip
+from core.utils.audit import audit_context
+from core.utils.reference_data import reference_rows
+from modules.inventory.importer import (
+    CONFLICT_ACTIONS,
+    IMPORT_FIELDS,
+    ImportLookups,
+    find_conflicts,
+    iter_mapped_rows,
+    read_preview,
+)
+from server.workers import import_jobs
 
 router = APIRouter(prefix="/bulk")
 
@@ -115,77 +119,57 @@ async def bulk_vlan_push_action(
         }
         return templates.TemplateResponse("bulk_vlan_push.html", context)
 
-    for device in devices:
-        if not device.ssh_credential and current_user.role != "superadmin":
-            # skip if no credentials and user not superadmin
-            continue
-        cred, _ = resolve_ssh_credential(db, device, current_user)
-        if not cred:
-            continue
-        conn_kwargs = build_conn_kwargs(cred)
-        success = False
-        try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
-                await detect_ssh_platform(db, device, conn, current_user)
-                _, session = await conn.create_session(asyncssh.SSHClientProcess)
-                for line in config_text.splitlines():
-                    session.stdin.write(line + "\n")
-                session.stdin.write("exit\n")
-                await session.wait_closed()
-                success = True
-                device.last_seen = datetime.now(timezone.utc)
-        except Exception:
+    with audit_context(
+        db, current_user, "bulk_vlan_push", f"VLAN push to {len(devices)} devices"
+    ):
+        for device in devices:
+            if not device.ssh_credential and current_user.role != "superadmin":
+                # skip if no credentials and user not superadmin
+                continue
+            cred, _ = resolve_ssh_credential(db, device, current_user)
+            if not cred:
+                continue
+            conn_kwargs = build_conn_kwargs(cred)
             success = False
-        backup = ConfigBackup(
-            device_id=device.id,
-            source="bulk_vlan_push",
-            config_text=config_text,
-            queued=not success,
-            status="pushed" if success else "pending",
-        )
-        db.add(backup)
-        db.commit()
+            try:
+                async with ssh_connect(device.ip, **conn_kwargs) as conn:
+                    await detect_ssh_platform(db, device, conn, current_user)
+                    _, session = await conn.create_session(asyncssh.SSHClientProcess)
+                    for line in config_text.splitlines():
+                        session.stdin.write(line + "\n")
+                    session.stdin.write("exit\n")
+                    await session.wait_closed()
+                    success = True
+                    device.last_seen = datetime.now(timezone.utc)
+            except Exception:
+                success = False
+            backup = ConfigBackup(
+                device_id=device.id,
+                source="bulk_vlan_push",
+                config_text=config_text,
+                queued=not success,
+                status="pushed" if success else "pending",
+            )
+            db.add(backup)
+            db.commit()
 
-    log_audit(
-        db, current_user, "bulk_vlan_push", None, f"VLAN push to {len(devices)} devices"
-    )
     return RedirectResponse(url="/tasks?message=Bulk+push+queued", status_code=302)
 
 
-def _parse_upload(file: UploadFile) -> tuple[list[str], list[list[str]]]:
-    """Return (columns, rows) parsed from CSV or XLSX upload."""
-    content = file.file.read()
-    file.file.close()
-    if file.filename.lower().endswith(".xlsx"):
-        wb = openpyxl.load_workbook(io.BytesIO(content))
-        ws = wb.active
-        columns = [str(c.value).strip() if c.value is not None else "" for c in ws[1]]
-        rows = []
-        for r in ws.iter_rows(min_row=2, values_only=True):
-            rows.append([str(v) if v is not None else "" for v in r])
-    else:
-        reader = csv.reader(io.StringIO(content.decode()))
-        data = list(reader)
-        if not data:
-            return [], []
-        columns = [c.strip() for c in data[0]]
-        rows = [list(r) for r in data[1:]]
-    return columns, rows
+def _load_import_job(token: str | None, current_user) -> dict:
+    job = import_jobs.load_job(token or "")
+    if not job or job.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
 
 
-def _map_rows(
-    columns: list[str], rows: list[list[str]], mapping: dict[str, str]
-) -> list[dict]:
-    mapped: list[dict] = []
-    for r in rows:
-        data = {}
-        for i, val in enumerate(r):
-            field = mapping.get(str(i))
-            if not field or field == "skip":
-                continue
-            data[field] = val.strip()
-        mapped.append(data)
-    return mapped
+def _import_site_id(db: Session, current_user, site_id: str | None) -> int | None:
+    chosen_site = int(site_id) if site_id else None
+    if chosen_site is None:
+        user_site_ids = get_user_site_ids(db, current_user)
+        if len(user_site_ids) == 1:
+            chosen_site = user_site_ids[0]
+    return chosen_site
 
 
 @router.get("/device-import")
@@ -196,9 +180,7 @@ async def device_import_form(
 ):
     sites = []
     if current_user.role == "superadmin":
-        from core.models.models import Site
-
-        sites = db.query(Site).all()
+        sites = reference_rows(db, "sites")
     context = {"request": request, "current_user": current_user, "sites": sites}
     return templates.TemplateResponse("device_import_upload.html", context)
 
@@ -207,148 +189,91 @@ async def device_import_form(
 async def device_import_wizard(
     request: Request,
     import_file: UploadFile = File(None),
-    file_data: str = Form(None),
+    upload_token: str = Form(None),
     site_id: str = Form(None),
     confirm: str = Form(None),
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    if import_file:
-        columns, rows = _parse_upload(import_file)
-        data = json.dumps({"columns": columns, "rows": rows})
-        fields = ["skip", "hostname", "ip", "device_type", "model", "vlan", "tags"]
+    """Upload, map, confirm and start a device import.
+
+    The upload is kept on disk and referenced by ``upload_token`` so the
+    file is never round-tripped through the form.
+    """
+    if import_file and import_file.filename:
+        job = await asyncio.to_thread(
+            import_jobs.save_upload, import_file.file, import_file.filename, current_user.id
+        )
+        columns, preview = await asyncio.to_thread(
+            read_preview, import_jobs.upload_path(job["id"]), job["filename"]
+        )
         context = {
             "request": request,
             "columns": columns,
-            "preview": rows[:5],
-            "file_data": data,
-            "fields": fields,
+            "preview": preview,
+            "total": job["total"],
+            "upload_token": job["id"],
+            "fields": IMPORT_FIELDS,
             "site_id": site_id or "",
             "current_user": current_user,
         }
         return templates.TemplateResponse("device_import_map.html", context)
 
-    if file_data and not confirm:
-        form = await request.form()
-        raw = json.loads(file_data)
+    if not upload_token:
+        return RedirectResponse(url="/bulk/device-import", status_code=302)
+    job = _load_import_job(upload_token, current_user)
+    form = await request.form()
+
+    if not confirm:
         mapping = {
-            str(i): form.get(f"map_{i}", "skip") for i in range(len(raw["columns"]))
+            key[4:]: value for key, value in form.items() if key.startswith("map_")
         }
-        mapping_json = json.dumps(mapping)
-        mapped_rows = _map_rows(raw["columns"], raw["rows"], mapping)
-        duplicates = []
-        for row in mapped_rows:
-            ip = row.get("ip")
-            host = row.get("hostname")
-            if not ip and not host:
-                continue
-            existing = (
-                db.query(Device)
-                .filter(or_(Device.ip == ip, Device.hostname == host))
-                .first()
-            )
-            if existing:
-                duplicates.append({"row": row, "existing": existing})
+        import_jobs.update_job(upload_token, mapping=mapping)
+        lookups = ImportLookups(db)
+        rows = iter_mapped_rows(import_jobs.upload_path(upload_token), job["filename"], mapping)
+        conflict_count, duplicates = await asyncio.to_thread(find_conflicts, lookups, rows)
         context = {
             "request": request,
             "duplicates": duplicates,
-            "mapping_json": mapping_json,
-            "file_data": file_data,
+            "conflict_count": conflict_count,
+            "total": job.get("total"),
+            "upload_token": upload_token,
             "site_id": site_id or "",
             "current_user": current_user,
         }
         return templates.TemplateResponse("device_import_confirm.html", context)
 
-    if confirm and file_data:
-        mapping = json.loads(request.form.get("mapping_json"))
-        raw = json.loads(file_data)
-        mapped_rows = _map_rows(raw["columns"], raw["rows"], mapping)
-        added = 0
-        skipped = 0
-        updated = 0
-        errors = []
-        user_site_ids = get_user_site_ids(db, current_user)
-        chosen_site = int(site_id) if site_id else None
-        if chosen_site is None and len(user_site_ids) == 1:
-            chosen_site = user_site_ids[0]
-        action = request.form.get("conflict_action", "skip")
-        for row in mapped_rows:
-            ip = row.get("ip")
-            host = row.get("hostname")
-            if not ip or not host:
-                errors.append(f"Missing required fields in row {row}")
-                continue
-            try:
-                ip = format_ip(ip)
-            except ValueError:
-                errors.append(f"Invalid IP address {ip} in row {row}")
-                continue
-            existing = (
-                db.query(Device)
-                .filter(or_(Device.ip == ip, Device.hostname == host))
-                .first()
-            )
-            if existing:
-                if action == "skip":
-                    skipped += 1
-                    continue
-                if action in {"overwrite", "merge"}:
-                    if action == "overwrite":
-                        existing.ip = ip
-                        existing.hostname = host
-                        if row.get("model"):
-                            existing.model = row["model"]
-                        if row.get("vlan"):
-                            existing.vlan_id = row["vlan"]
-                    else:
-                        if not existing.model and row.get("model"):
-                            existing.model = row["model"]
-                        if not existing.vlan_id and row.get("vlan"):
-                            existing.vlan_id = row["vlan"]
-                    updated += 1
-                    device = existing
-                else:
-                    skipped += 1
-                    continue
-            else:
-                device = Device(
-                    hostname=host,
-                    ip=ip,
-                    model=row.get("model"),
-                    manufacturer=row.get("manufacturer") or "",
-                    device_type_id=None,
-                    vlan_id=row.get("vlan"),
-                    site_id=chosen_site,
-                    created_by_id=current_user.id,
-                )
-                db.add(device)
-                added += 1
-            tags_val = row.get("tags")
-            if tags_val:
-                names = [t.strip().lower() for t in tags_val.split(",") if t.strip()]
-                for name in names:
-                    tag = get_or_create_tag(db, name)
-                    add_tag_to_device(db, device, tag, current_user)
-        db.commit()
-        db.add(
-            ImportLog(
-                user_id=current_user.id,
-                file_name="upload",
-                device_count=len(mapped_rows),
-                site_id=chosen_site,
-                notes="Imported",
-                success=len(errors) == 0,
-            )
-        )
-        db.commit()
-        context = {
-            "request": request,
-            "added": added,
-            "skipped": skipped,
-            "updated": updated,
-            "errors": errors,
-            "current_user": current_user,
-        }
-        return templates.TemplateResponse("device_import_result.html", context)
+    action = form.get("conflict_action", "skip")
+    if action not in CONFLICT_ACTIONS:
+        raise HTTPException(status_code=400, detail="Unknown conflict action")
+    if job.get("status") != "uploaded":
+        raise HTTPException(status_code=409, detail="Import already started")
+    chosen_site = _import_site_id(db, current_user, site_id)
+    job = await import_jobs.submit_import(
+        upload_token, job.get("mapping") or {}, chosen_site, action
+    )
+    context = {
+        "request": request,
+        "job_id": upload_token,
+        "total": job.get("total"),
+        "current_user": current_user,
+    }
+    return templates.TemplateResponse("device_import_result.html", context)
 
-    return RedirectResponse(url="/bulk/device-import", status_code=302)
+
+@router.get("/device-import/jobs/{token}")
+async def device_import_status(
+    token: str,
+    current_user=Depends(require_role("editor")),
+):
+    """Return progress and, once finished, the results of an import."""
+    job = _load_import_job(token, current_user)
+    return JSONResponse(
+        {
+            "status": job.get("status"),
+            "progress": job.get("progress") or 0,
+            "total": job.get("total"),
+            "result": job.get("result"),
+            "error": job.get("error"),
+        }
+    )
@@ -1,14 +1,28 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 from core.utils.templates import templates
-from sqlalchemy.orm import Session
-import difflib
+from sqlalchemy.orm import Session, load_only
 
 from core.utils.db_session import get_db
 from core.utils.auth import require_role
 from modules.inventory.models import Device
 from core.models.models import ConfigBackup
 from core.utils.audit import log_audit
-
+from core.utils.config_diff import diff_backups, previous_backup
+
+# Columns needed to list backups; the configuration text is deferred.
+BACKUP_LIST_COLUMNS = (
+    ConfigBackup.id,
+    ConfigBackup.device_id,
+    ConfigBackup.created_at,
+    ConfigBackup.last_verified_at,
+    ConfigBackup.source,
+    ConfigBackup.queued,
+    ConfigBackup.status,
+    ConfigBackup.port_name,
+    ConfigBackup.lines_added,
+    ConfigBackup.lines_removed,
+)
 
 
 router = APIRouter()
@@ -27,8 +41,9 @@ async def list_device_configs(
 
     backups = (
         db.query(ConfigBackup)
+        .options(load_only(*BACKUP_LIST_COLUMNS))
         .filter(ConfigBackup.device_id == device_id)
-        .order_by(ConfigBackup.created_at.desc())
+        .order_by(ConfigBackup.created_at.desc(), ConfigBackup.id.desc())
         .all()
     )
     context = {
@@ -40,6 +55,26 @@ async def list_device_configs(
     return templates.TemplateResponse("config_list.html", context)
 
 
+@router.get("/configs/{config_id}/text")
+async def config_text(
+    config_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("viewer")),
+):
+    """Return the raw text of a backup, loaded on demand by the list view."""
+
+    backup = db.query(ConfigBackup).filter(ConfigBackup.id == config_id).first()
+    if not backup:
+        raise HTTPException(status_code=404, detail="Config backup not found")
+    return PlainTextResponse(backup.config_text)
+
+
+def _hunk_page(db: Session, old: ConfigBackup, new: ConfigBackup, offset: int):
+    diff = diff_backups(db, old, new)
+    hunks, next_offset = diff.page(offset)
+    return diff, hunks, next_offset
+
+
 @router.get("/configs/{config_id}/diff")
 async def diff_config(
     config_id: int,
@@ -52,40 +87,52 @@ async def diff_config(
     if not backup:
         raise HTTPException(status_code=404, detail="Config backup not found")
 
-    prev_backup = (
-        db.query(ConfigBackup)
-        .filter(
-            ConfigBackup.device_id == backup.device_id,
-            ConfigBackup.created_at < backup.created_at,
-        )
-        .order_by(ConfigBackup.created_at.desc())
-        .first()
-    )
+    prev_backup = previous_backup(db, backup)
 
+    diff = None
+    hunks: list = []
+    next_url = None
     if prev_backup:
-        diff_lines = list(
-            difflib.unified_diff(
-                (prev_backup.config_text or "").splitlines(),
-                (backup.config_text or "").splitlines(),
-                fromfile=str(prev_backup.created_at),
-                tofile=str(backup.created_at),
-                lineterm="",
-            )
-        )
-    else:
-        diff_lines = ["No previous version found."]
+        diff, hunks, next_offset = _hunk_page(db, prev_backup, backup, 0)
+        if next_offset is not None:
+            next_url = f"/configs/{backup.id}/diff/hunks?offset={next_offset}"
 
     context = {
         "request": request,
         "device": backup.device,
         "backup": backup,
-        "diff_lines": diff_lines,
+        "prev_backup": prev_backup,
+        "diff": diff,
+        "hunks": hunks,
+        "next_url": next_url,
         "current_user": current_user,
     }
     log_audit(db, current_user, "debug", backup.device, f"Viewed config diff {backup.id}")
     return templates.TemplateResponse("config_diff.html", context)
 
 
+@router.get("/configs/{config_id}/diff/hunks")
+async def diff_config_hunks(
+    config_id: int,
+    request: Request,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("viewer")),
+):
+    """Return the next page of hunks for ``diff_config``."""
+
+    backup = db.query(ConfigBackup).filter(ConfigBackup.id == config_id).first()
+    prev_backup = previous_backup(db, backup) if backup else None
+    if not prev_backup:
+        raise HTTPException(status_code=404, detail="Config backup not found")
+    _, hunks, next_offset = _hunk_page(db, prev_backup, backup, offset)
+    next_url = None
+    if next_offset is not None:
+        next_url = f"/configs/{backup.id}/diff/hunks?offset={next_offset}"
+    context = {"request": request, "hunks": hunks, "next_url": next_url}
+    return templates.TemplateResponse("config_diff_hunks.html", context)
+
+
 @router.get("/compare-configs")
 async def compare_configs(
     request: Request,
@@ -107,37 +154,67 @@ async def compare_configs(
 
     device = None
     backups: list[ConfigBackup] = []
-    diff_table = None
+    diff = None
+    hunks: list = []
+    next_url = None
 
     if device_id:
         device = db.query(Device).filter(Device.id == device_id).first()
         if device:
             backups = (
                 db.query(ConfigBackup)
+                .options(load_only(*BACKUP_LIST_COLUMNS))
                 .filter(ConfigBackup.device_id == device_id)
-                .order_by(ConfigBackup.created_at.desc())
+                .order_by(ConfigBackup.created_at.desc(), ConfigBackup.id.desc())
                 .all()
             )
             if backup_a and backup_b:
                 b1 = db.query(ConfigBackup).filter(ConfigBackup.id == backup_a, ConfigBackup.device_id == device_id).first()
                 b2 = db.query(ConfigBackup).filter(ConfigBackup.id == backup_b, ConfigBackup.device_id == device_id).first()
                 if b1 and b2:
-                    hd = difflib.HtmlDiff()
-                    diff_table = hd.make_table(
-                        (b1.config_text or "").splitlines(),
-                        (b2.config_text or "").splitlines(),
-                        fromdesc=str(b1.created_at),
-                        todesc=str(b2.created_at),
-                        context=True,
-                    )
+                    diff, hunks, next_offset = _hunk_page(db, b1, b2, 0)
+                    if next_offset is not None:
+                        next_url = (
+                            f"/compare-configs/hunks?device_id={device_id}"
+                            f"&backup_a={backup_a}&backup_b={backup_b}&offset={next_offset}"
+                        )
     context = {
         "request": request,
         "devices": devices,
         "device": device,
         "backups": backups,
-        "diff_table": diff_table,
+        "diff": diff,
+        "hunks": hunks,
+        "next_url": next_url,
         "backup_a": backup_a,
         "backup_b": backup_b,
         "current_user": current_user,
     }
     return templates.TemplateResponse("compare_configs.html", context)
+
+
+@router.get("/compare-configs/hunks")
+async def compare_configs_hunks(
+    request: Request,
+    device_id: int,
+    backup_a: int,
+    backup_b: int,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("viewer")),
+):
+    """Return the next page of hunks for ``compare_configs``."""
+
+    b1 = db.query(ConfigBackup).filter(ConfigBackup.id == backup_a, ConfigBackup.device_id == device_id).first()
+    b2 = db.query(ConfigBackup).filter(ConfigBackup.id == backup_b, ConfigBackup.device_id == device_id).first()
+    if not b1 or not b2:
+        raise HTTPException(status_code=404, detail="Config backup not found")
+    _, hunks, next_offset = _hunk_page(db, b1, b2, offset)
+    next_url = None
+    if next_offset is not None:
+        next_url = (
+            f"/compare-configs/hunks?device_id={device_id}"
+            f"&backup_a={backup_a}&backup_b={backup_b}&offset={next_offset}"
+        )
+    context = {"request": request, "hunks": hunks, "next_url": next_url}
+    return templates.TemplateResponse("config_diff_hunks.html", context)
@@ -7,9 +7,7 @@ from core.utils.db_session import get_db
 from core.utils.auth import require_role
 from modules.inventory.models import DeviceType
 from core.utils.deletion import soft_delete
-import os
-import base64
-from core.utils.paths import STATIC_DIR
+from core.utils.assets import store_upload
 
 
 
@@ -64,24 +62,10 @@ async def create_device_type(
     db.commit()
     db.refresh(dtype)
 
-    upload_dir = os.path.join(STATIC_DIR, "uploads", "device-types")
-    os.makedirs(upload_dir, exist_ok=True)
     if upload_icon and upload_icon.filename:
-        if not upload_icon.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Invalid icon type")
-        icon_name = f"{dtype.id}_icon_{os.path.basename(upload_icon.filename)}"
-        data = await upload_icon.read()
-        with open(os.path.join(upload_dir, icon_name), "wb") as f:
-            f.write(data)
-        dtype.upload_icon = f"data:{upload_icon.content_type};base64,{base64.b64encode(data).decode()}"
+        dtype.upload_icon = await store_upload(upload_icon, "icon")
     if upload_image and upload_image.filename:
-        if not upload_image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Invalid image type")
-        image_name = f"{dtype.id}_img_{os.path.basename(upload_image.filename)}"
-        data = await upload_image.read()
-        with open(os.path.join(upload_dir, image_name), "wb") as f:
-            f.write(data)
-        dtype.upload_image = f"data:{upload_image.content_type};base64,{base64.b64encode(data).decode()}"
+        dtype.upload_image = await store_upload(upload_image, "image")
     db.commit()
     return RedirectResponse(url="/device-types", status_code=302)
 
@@ -133,24 +117,10 @@ async def update_device_type(
         return templates.TemplateResponse("device_type_form.html", context)
 
     dtype.name = name
-    upload_dir = os.path.join(STATIC_DIR, "uploads", "device-types")
-    os.makedirs(upload_dir, exist_ok=True)
     if upload_icon and upload_icon.filename:
-        if not upload_icon.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Invalid icon type")
-        icon_name = f"{dtype.id}_icon_{os.path.basename(upload_icon.filename)}"
-        data = await upload_icon.read()
-        with open(os.path.join(upload_dir, icon_name), "wb") as f:
-            f.write(data)
-        dtype.upload_icon = f"data:{upload_icon.content_type};base64,{base64.b64encode(data).decode()}"
+        dtype.upload_icon = await store_upload(upload_icon, "icon")
     if upload_image and upload_image.filename:
-        if not upload_image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Invalid image type")
-        image_name = f"{dtype.id}_img_{os.path.basename(upload_image.filename)}"
-        data = await upload_image.read()
-        with open(os.path.join(upload_dir, image_name), "wb") as f:
-            f.write(data)
-        dtype.upload_image = f"data:{upload_image.content_type};base64,{base64.b64encode(data).decode()}"
+        dtype.upload_image = await store_upload(upload_image, "image")
     db.commit()
     return RedirectResponse(url="/device-types", status_code=302)
 
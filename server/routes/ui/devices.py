@@ -8,13 +8,14 @@ from fastapi import (
     File,
     Body,
 )
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from core.schemas import ColumnSelection
 from core.utils.templates import templates
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, or_
 
-from core.utils.db_session import get_db
+from core.utils.db_session import get_async_db, get_db
+from core.utils.device_duplicates import duplicate_groups
 from core.utils.auth import require_role
 from modules.inventory.models import (
     Device,
@@ -34,10 +35,10 @@ from modules.network.models import (
 from core.models.models import (
     ConfigBackup,
     Site,
-    UserSSHCredential,
     ColumnPreference,
 )
-from core.utils.audit import log_audit
+from core.utils.audit import audit_context, log_audit
+from core.utils.config_store import record_config_pull, prune_backups
 from modules.inventory.utils import (
     update_device_complete_tag,
     update_device_attribute_tags,
@@ -47,18 +48,26 @@ from modules.inventory.utils import (
 )
 from core.utils.columns import (
     load_column_preferences,
+    load_device_custom_columns,
     DEFAULT_DEVICE_COLUMNS,
     DEVICE_COLUMN_LABELS,
 )
+from server.utils.device_grid import GRID_PAGE_SIZE, GridQuery, load_page
 from modules.inventory.models import DeviceEditLog
 
 import asyncssh
 import asyncio
 
-from core.utils.ssh import build_conn_kwargs, resolve_ssh_credential
+from core.utils.ssh import (
+    build_conn_kwargs,
+    resolve_ssh_credential,
+    run_command,
+    ssh_connect,
+)
 from core.utils.device_detect import detect_ssh_platform, detect_snmp_platform
 from datetime import datetime, timezone
 from puresnmp import Client, PyWrapper, V2C
+from core.utils.instrumentation import SNMP_SECONDS, timed
 from puresnmp.exc import SnmpError
 import re
 from core.utils.deletion import soft_delete
@@ -73,7 +82,7 @@ from modules.inventory.utils import (
     load_form_options,
     suggest_vlan_from_ip,
 )
-from core.utils.mac_utils import normalize_mac, MAC_RE
+from core.utils.mac_utils import MAC_RE
 
 
 router = APIRouter()
@@ -97,21 +106,25 @@ TEMPLATE_OPTIONS = [
 ]
 
 
+def _device_type_counts(db: Session):
+    counts = dict(
+        db.query(Device.device_type_id, func.count(Device.id))
+        .filter(Device.is_deleted.is_(False))
+        .group_by(Device.device_type_id)
+        .all()
+    )
+    return db.query(DeviceType).all(), counts
+
+
 @router.get("/devices")
 async def devices_grid(
     request: Request,
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(require_role("viewer")),
 ):
     """Render a grid of device types."""
 
-    counts = dict(
-        db.query(Device.device_type_id, func.count(Device.id))
-        .filter(Device.is_deleted.is_(False))
-        .group_by(Device.device_type_id)
-        .all()
-    )
-    types = db.query(DeviceType).all()
+    types, counts = await db.run_sync(_device_type_counts)
     message = request.query_params.get("message")
 
     context = {
@@ -177,28 +190,21 @@ async def duplicate_report(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("viewer")),
 ):
-    devices = [d for d in db.query(Device).all() if not getattr(d, "is_deleted", False)]
-    dup_ips = {}
-    dup_macs = {}
-    dup_tags = {}
-    missing = {"ip": [], "mac": [], "asset_tag": []}
-    for d in devices:
-        if d.ip:
-            dup_ips.setdefault(d.ip, []).append(d)
-        else:
-            missing["ip"].append(d)
-        if d.mac:
-            nm = normalize_mac(d.mac)
-            dup_macs.setdefault(nm, []).append(d)
-        else:
-            missing["mac"].append(d)
-        if d.asset_tag:
-            dup_tags.setdefault(d.asset_tag, []).append(d)
-        else:
-            missing["asset_tag"].append(d)
-    ip_dupes = {k: v for k, v in dup_ips.items() if len(v) > 1}
-    mac_dupes = {k: v for k, v in dup_macs.items() if len(v) > 1}
-    tag_dupes = {k: v for k, v in dup_tags.items() if len(v) > 1}
+    ip_dupes = dict(duplicate_groups(db, "ip"))
+    mac_dupes = dict(duplicate_groups(db, "mac"))
+    tag_dupes = dict(duplicate_groups(db, "asset_tag"))
+    missing = {
+        field: db.query(Device)
+        .options(load_only(Device.id, Device.hostname))
+        .filter(or_(column.is_(None), column == ""))
+        .order_by(Device.hostname)
+        .all()
+        for field, column in (
+            ("ip", Device.ip),
+            ("mac", Device.mac),
+            ("asset_tag", Device.asset_tag),
+        )
+    }
     context = {
         "request": request,
         "ip_dupes": ip_dupes,
@@ -210,6 +216,50 @@ async def duplicate_report(
     return templates.TemplateResponse("device_duplicates.html", context)
 
 
+def _grid_page(db: Session, query: GridQuery, user_id: int) -> dict:
+    column_prefs = load_column_preferences(db, user_id, "device_list")
+    custom = [name for name, _label in load_device_custom_columns(db, column_prefs)]
+    return load_page(db, query, user_id, custom)
+
+
+@router.get("/devices/grid")
+async def device_grid_page(
+    request: Request,
+    type_id: int | None = None,
+    sort: str = "hostname",
+    desc: bool = False,
+    q: str = "",
+    cursor: str | None = None,
+    limit: int = GRID_PAGE_SIZE,
+    db=Depends(get_async_db),
+    current_user=Depends(require_role("viewer")),
+):
+    """Return one keyset-paginated page of the device table as JSON.
+
+    Column filters are passed as ``f_<column>`` query parameters.  Counts are
+    only included on the first page.
+    """
+    filters = {
+        key[2:]: value
+        for key, value in request.query_params.items()
+        if key.startswith("f_")
+    }
+    query = GridQuery(
+        device_type_id=type_id,
+        sort=sort,
+        desc=desc,
+        search=q.strip(),
+        filters=filters,
+        cursor=cursor,
+        limit=limit,
+    )
+    try:
+        page = await db.run_sync(_grid_page, query, current_user.id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(page)
+
+
 @router.get("/devices/type/{type_id}")
 async def list_devices_by_type(
     type_id: int,
@@ -218,44 +268,15 @@ async def list_devices_by_type(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("viewer")),
 ):
-    devices = (
-        db.query(Device)
-        .filter(Device.device_type_id == type_id)
-        
-        .all()
-    )
+    """Render the device table shell; rows are fetched from ``/devices/grid``."""
     dtype = db.query(DeviceType).filter(DeviceType.id == type_id).first()
-    dup_ips = {}
-    dup_macs = {}
-    dup_tags = {}
-    for d in devices:
-        if d.ip:
-            dup_ips.setdefault(d.ip, []).append(d.hostname)
-        if d.mac:
-            nm = normalize_mac(d.mac)
-            dup_macs.setdefault(nm, []).append(d.hostname)
-        if d.asset_tag:
-            dup_tags.setdefault(d.asset_tag, []).append(d.hostname)
-    duplicate_ips = {k: v for k, v in dup_ips.items() if len(v) > 1}
-    duplicate_macs = {k: v for k, v in dup_macs.items() if len(v) > 1}
-    duplicate_tags = {k: v for k, v in dup_tags.items() if len(v) > 1}
-    personal_map = {}
-    for d in devices:
-        if d.ssh_credential:
-            personal = (
-                db.query(UserSSHCredential)
-                .filter(
-                    UserSSHCredential.user_id == current_user.id,
-                    UserSSHCredential.name == d.ssh_credential.name,
-                )
-                .first()
-            )
-            if personal:
-                personal_map[d.id] = True
     column_prefs = load_column_preferences(db, current_user.id, "device_list")
-    column_count = 1 + sum(1 for v in column_prefs.values() if v)
-    complete_count = sum(1 for d in devices if any(t.name == "complete" for t in d.tags))
-    incomplete_count = sum(1 for d in devices if any(t.name == "incomplete" for t in d.tags))
+    columns = [
+        (name, DEVICE_COLUMN_LABELS[name])
+        for name in DEFAULT_DEVICE_COLUMNS
+        if column_prefs.get(name)
+    ]
+    columns.extend(load_device_custom_columns(db, column_prefs))
     (
         device_types,
         vlans,
@@ -267,17 +288,19 @@ async def list_devices_by_type(
     ) = load_form_options(db)
     context = {
         "request": request,
-        "devices": devices,
         "current_user": current_user,
         "device_type": dtype,
-        "duplicate_ips": duplicate_ips,
-        "duplicate_macs": duplicate_macs,
-        "duplicate_tags": duplicate_tags,
-        "personal_creds": personal_map,
         "message": message,
         "column_prefs": column_prefs,
         "column_labels": DEVICE_COLUMN_LABELS,
-        "column_count": column_count,
+        "grid_columns": columns,
+        "grid_config": {
+            "url": request.url_for("device_grid_page").path,
+            "typeId": type_id,
+            "pageSize": GRID_PAGE_SIZE,
+            "columns": [{"name": name, "label": label} for name, label in columns],
+        },
+        "column_count": 1 + len(columns),
         "device_types": device_types,
         "vlans": vlans,
         "ssh_credentials": ssh_credentials,
@@ -285,8 +308,6 @@ async def list_devices_by_type(
         "locations": locations,
         "sites": sites,
         "status_options": STATUS_OPTIONS,
-        "complete_count": complete_count,
-        "incomplete_count": incomplete_count,
     }
     return templates.TemplateResponse("device_list.html", context)
 
@@ -665,16 +686,17 @@ async def bulk_delete_devices(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    for device_id in selected:
-        device = (
-            db.query(Device)
-            .filter(Device.id == device_id)
+    with audit_context(db, current_user, "bulk_delete", f"Deleted {len(selected)} devices"):
+        for device_id in selected:
+            device = (
+                db.query(Device)
+                .filter(Device.id == device_id)
             
-            .first()
-        )
-        if device:
-            unschedule_device_config_pull(device.id)
-            _soft_delete(device, current_user.id, "ui")
+                .first()
+            )
+            if device:
+                unschedule_device_config_pull(device.id)
+                _soft_delete(device, current_user.id, "ui")
     db.commit()
     return RedirectResponse(url="/devices/table", status_code=302)
 
@@ -702,59 +724,60 @@ async def bulk_update_devices(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    for device_id in selected:
-        device = (
-            db.query(Device)
-            .filter(Device.id == device_id)
+    with audit_context(db, current_user, "bulk_update", f"Updated {len(selected)} devices"):
+        for device_id in selected:
+            device = (
+                db.query(Device)
+                .filter(Device.id == device_id)
             
-            .first()
-        )
-        if not device:
-            continue
-        if hostname:
-            device.hostname = hostname
-        if ip:
-            try:
-                device.ip = format_ip(ip)
-            except ValueError:
-                pass
-        if mac:
-            fm = format_mac(mac)
-            if fm and MAC_RE.fullmatch(fm):
-                device.mac = fm
-        if asset_tag:
-            device.asset_tag = asset_tag
-        if model:
-            device.model = model
-        if manufacturer:
-            device.manufacturer = manufacturer
-        if device_type_id:
-            device.device_type_id = int(device_type_id)
-        if serial_number:
-            device.serial_number = serial_number
-        if location_id:
-            device.location_id = int(location_id)
-        if on_lasso is not None:
-            device.on_lasso = bool(on_lasso)
-        if on_r1 is not None:
-            device.on_r1 = bool(on_r1)
-        if site_id:
-            device.site_id = int(site_id)
-        if status:
-            device.status = status
-        if vlan_id:
-            device.vlan_id = int(vlan_id)
-        if ssh_credential_id:
-            device.ssh_credential_id = int(ssh_credential_id)
-        if snmp_community_id:
-            device.snmp_community_id = int(snmp_community_id)
-        if tag_names:
-            names = {n.strip().lower() for n in tag_names.split(',') if n.strip()}
-            for name in names:
-                tag = get_or_create_tag(db, name)
-                add_tag_to_device(db, device, tag, current_user)
-        update_device_complete_tag(db, device, current_user)
-        update_device_attribute_tags(db, device, user=current_user)
+                .first()
+            )
+            if not device:
+                continue
+            if hostname:
+                device.hostname = hostname
+            if ip:
+                try:
+                    device.ip = format_ip(ip)
+                except ValueError:
+                    pass
+            if mac:
+                fm = format_mac(mac)
+                if fm and MAC_RE.fullmatch(fm):
+                    device.mac = fm
+            if asset_tag:
+                device.asset_tag = asset_tag
+            if model:
+                device.model = model
+            if manufacturer:
+                device.manufacturer = manufacturer
+            if device_type_id:
+                device.device_type_id = int(device_type_id)
+            if serial_number:
+                device.serial_number = serial_number
+            if location_id:
+                device.location_id = int(location_id)
+            if on_lasso is not None:
+                device.on_lasso = bool(on_lasso)
+            if on_r1 is not None:
+                device.on_r1 = bool(on_r1)
+            if site_id:
+                device.site_id = int(site_id)
+            if status:
+                device.status = status
+            if vlan_id:
+                device.vlan_id = int(vlan_id)
+            if ssh_credential_id:
+                device.ssh_credential_id = int(ssh_credential_id)
+            if snmp_community_id:
+                device.snmp_community_id = int(snmp_community_id)
+            if tag_names:
+                names = {n.strip().lower() for n in tag_names.split(',') if n.strip()}
+                for name in names:
+                    tag = get_or_create_tag(db, name)
+                    add_tag_to_device(db, device, tag, current_user)
+            update_device_complete_tag(db, device, current_user)
+            update_device_attribute_tags(db, device, user=current_user)
     db.commit()
     return RedirectResponse(url="/devices/table", status_code=302)
 
@@ -782,10 +805,10 @@ async def pull_device_config(
 
     output = ""
     try:
-        async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+        async with ssh_connect(device.ip, **conn_kwargs) as conn:
             await detect_ssh_platform(db, device, conn, current_user)
             # Retrieve the device's running configuration
-            result = await conn.run("show running-config", check=False)
+            result = await run_command(conn, "show running-config", check=False)
             output = result.stdout
             device.last_seen = datetime.now(timezone.utc)
             device.last_config_pull = datetime.now(timezone.utc)
@@ -796,31 +819,24 @@ async def pull_device_config(
             status_code=302,
         )
 
-    backup = ConfigBackup(device_id=device.id, source="ssh", config_text=output)
-    db.add(backup)
+    _, changed = record_config_pull(db, device.id, output, "ssh")
     db.commit()
     log_audit(
         db,
         current_user,
         "pull",
         device,
-        f"Pulled running-config from {device.ip}",
+        f"Pulled running-config from {device.ip}"
+        + ("" if changed else " (unchanged)"),
     )
 
-    backups = (
-        db.query(ConfigBackup)
-        .filter(ConfigBackup.device_id == device.id)
-        .order_by(ConfigBackup.created_at.desc())
-        .all()
-    )
-    if len(backups) > MAX_BACKUPS:
-        for old in backups[MAX_BACKUPS:]:
-            db.delete(old)
-            log_audit(db, current_user, "delete", device, f"Deleted backup {old.id}")
-        db.commit()
+    for old_id in prune_backups(db, device.id, MAX_BACKUPS):
+        log_audit(db, current_user, "delete", device, f"Deleted backup {old_id}")
+    db.commit()
 
+    message = "Config+pulled" if changed else "Config+unchanged"
     return RedirectResponse(
-        url=f"/devices/type/{device.device_type_id}?message=Config+pulled",
+        url=f"/devices/type/{device.device_type_id}?message={message}",
         status_code=302,
     )
 
@@ -878,7 +894,7 @@ async def push_device_config(
 
     success = False
     try:
-        async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+        async with ssh_connect(device.ip, **conn_kwargs) as conn:
             await detect_ssh_platform(db, device, conn, current_user)
             _, session = await conn.create_session(asyncssh.SSHClientProcess)
             for line in config_text.splitlines():
@@ -905,17 +921,9 @@ async def push_device_config(
     else:
         log_audit(db, current_user, "queue", device, f"Queued config for {device.ip}")
 
-    backups = (
-        db.query(ConfigBackup)
-        .filter(ConfigBackup.device_id == device.id)
-        .order_by(ConfigBackup.created_at.desc())
-        .all()
-    )
-    if len(backups) > MAX_BACKUPS:
-        for old in backups[MAX_BACKUPS:]:
-            db.delete(old)
-            log_audit(db, current_user, "delete", device, f"Deleted backup {old.id}")
-        db.commit()
+    for old_id in prune_backups(db, device.id, MAX_BACKUPS):
+        log_audit(db, current_user, "delete", device, f"Deleted backup {old_id}")
+    db.commit()
 
     message = "Config+pushed" if success else "Config+queued"
     return RedirectResponse(
@@ -999,7 +1007,7 @@ async def push_template_config(
 
     success = False
     try:
-        async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+        async with ssh_connect(device.ip, **conn_kwargs) as conn:
             await detect_ssh_platform(db, device, conn, current_user)
             _, session = await conn.create_session(asyncssh.SSHClientProcess)
             for line in snippet.splitlines():
@@ -1026,17 +1034,9 @@ async def push_template_config(
     else:
         log_audit(db, current_user, "queue", device, f"Queued template {template_name}")
 
-    backups = (
-        db.query(ConfigBackup)
-        .filter(ConfigBackup.device_id == device.id)
-        .order_by(ConfigBackup.created_at.desc())
-        .all()
-    )
-    if len(backups) > MAX_BACKUPS:
-        for old in backups[MAX_BACKUPS:]:
-            db.delete(old)
-            log_audit(db, current_user, "delete", device, f"Deleted backup {old.id}")
-        db.commit()
+    for old_id in prune_backups(db, device.id, MAX_BACKUPS):
+        log_audit(db, current_user, "delete", device, f"Deleted backup {old_id}")
+    db.commit()
 
     message = "Config pushed" if success else "Config queued"
     context = {
@@ -1054,15 +1054,16 @@ async def push_template_config(
 
 async def _gather_snmp_table(client: PyWrapper, oid: str) -> dict:
     data = {}
-    async for vb in client.walk(oid):
-        idx = int(vb.oid.rsplit(".", 1)[-1])
-        val = vb.value
-        if isinstance(val, bytes):
-            try:
-                val = val.decode()
-            except Exception:
-                val = val.decode(errors="ignore")
-        data[idx] = val
+    with timed(SNMP_SECONDS, oid=oid):
+        async for vb in client.walk(oid):
+            idx = int(vb.oid.rsplit(".", 1)[-1])
+            val = vb.value
+            if isinstance(val, bytes):
+                try:
+                    val = val.decode()
+                except Exception:
+                    val = val.decode(errors="ignore")
+            data[idx] = val
     return data
 
 
@@ -1369,11 +1370,11 @@ async def edit_ports_form(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, current_user)
                 for intf in interfaces:
-                    result = await conn.run(
-                        f"show running-config interface {intf.name}", check=False
+                    result = await run_command(
+                        conn, f"show running-config interface {intf.name}", check=False
                     )
                     text = result.stdout.strip()
                     live_configs[intf.name] = text
@@ -1431,7 +1432,7 @@ async def save_ports(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            conn = await asyncssh.connect(device.ip, **conn_kwargs)
+            conn = await ssh_connect(device.ip, **conn_kwargs)
             await detect_ssh_platform(db, device, conn, current_user)
         except Exception:
             conn = None
@@ -1643,10 +1644,10 @@ async def port_config(
     conn_kwargs = build_conn_kwargs(cred)
     output = ""
     try:
-        async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+        async with ssh_connect(device.ip, **conn_kwargs) as conn:
             await detect_ssh_platform(db, device, conn, current_user)
-            result = await conn.run(
-                f"show running-config interface {port_name}", check=False
+            result = await run_command(
+                conn, f"show running-config interface {port_name}", check=False
             )
             output = result.stdout
             device.last_seen = datetime.now(timezone.utc)
@@ -1785,7 +1786,7 @@ async def apply_port_template(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, current_user)
                 _, session = await conn.create_session(asyncssh.SSHClientProcess)
                 for line in snippet.splitlines():
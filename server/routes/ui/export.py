@@ -1,42 +1,66 @@
-from datetime import datetime, timezone
-import csv
-import io
+from datetime import date, datetime, time, timezone
 import os
-from typing import Optional
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import Response, StreamingResponse
+from fastapi import APIRouter, Depends, Form, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from core.utils.db_session import get_db
 from core.utils.auth import require_role, get_user_site_ids
-from modules.inventory.models import Device
-from modules.network.models import VLAN
-from core.models.models import ConfigBackup
-import zipfile
 from core.utils.audit import log_audit
-from core.utils.paths import STATIC_DIR
-
-try:
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
-except Exception:  # pragma: no cover - library may not be installed in tests
-    SimpleDocTemplate = None  # type: ignore
+from core.utils.columns import load_device_export_columns
+from server.utils import exports
+from server.utils.export_stream import iter_csv, iter_xlsx, iter_zip
+from server.workers import export_jobs
 
 router = APIRouter(prefix="/export")
 
 
-def _query_devices(db: Session, site_ids: list[int], vlan: Optional[int], status: Optional[str], model: Optional[str]):
-    q = db.query(Device).filter(Device.site_id.in_(site_ids))
-    if vlan is not None:
-        q = q.filter(Device.vlan_id == vlan)
-    if status:
-        q = q.filter(Device.status == status)
-    if model:
-        q = q.filter(Device.model.ilike(f"%{model}%"))
-    return q.all()
+def _parse_snapshot_filter(site_id: str | None, start: str | None, end: str | None):
+    """Parse snapshot filters, ignoring empty values from the filter form."""
+    try:
+        site_id = int(site_id) if site_id else None
+        start = date.fromisoformat(start) if start else None
+        end = date.fromisoformat(end) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid snapshot filter")
+    return site_id, start, end
+
+
+def _snapshot_spec(db: Session, current_user, site_id, start, end) -> dict:
+    site_ids = get_user_site_ids(db, current_user)
+    if site_id is not None:
+        site_ids = [sid for sid in site_ids if sid == site_id]
+    return exports.snapshot_spec(
+        site_ids,
+        datetime.combine(start, time.min) if start else None,
+        datetime.combine(end, time.max) if end else None,
+    )
+
+
+def _inventory_spec(db: Session, current_user, vlan, status, model) -> dict:
+    return exports.inventory_spec(
+        get_user_site_ids(db, current_user),
+        load_device_export_columns(db, current_user.id),
+        vlan,
+        status,
+        model,
+    )
+
+
+def _stream_inventory(fmt: str, spec: dict):
+    header = [label for _name, label in spec["columns"]]
+    rows = exports.iter_inventory_rows(spec)
+    if fmt == "xlsx":
+        body = iter_xlsx(header, rows, title="Inventory")
+    else:
+        body = iter_csv(header, rows)
+    filename, media_type = export_jobs.EXPORT_KINDS[fmt]
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 @router.get("/inventory.csv")
@@ -47,31 +71,22 @@ async def export_inventory_csv(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    site_ids = get_user_site_ids(db, current_user)
-    devices = _query_devices(db, site_ids, vlan, status, model)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Hostname", "IP", "MAC", "Model", "VLAN", "Status", "Site", "SSH Profile", "Last Config Pull"])
-    for d in devices:
-        writer.writerow([
-            d.hostname,
-            d.ip,
-            d.mac or "",
-            d.model or "",
-            d.vlan.tag if d.vlan else "",
-            d.status or "",
-            d.site.name if d.site else "",
-            d.ssh_credential.name if d.ssh_credential else "",
-            d.last_config_pull.isoformat() if d.last_config_pull else "",
-        ])
-
-    log_audit(db, current_user, "export_inventory_csv", details=f"{len(devices)} devices")
-    return Response(
-        output.getvalue(),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=inventory.csv"},
-    )
+    spec = _inventory_spec(db, current_user, vlan, status, model)
+    log_audit(db, current_user, "export_inventory_csv", details=f"{exports.count_devices(spec)} devices")
+    return _stream_inventory("csv", spec)
+
+
+@router.get("/inventory.xlsx")
+async def export_inventory_xlsx(
+    vlan: int | None = None,
+    status: str | None = None,
+    model: str | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("editor")),
+):
+    spec = _inventory_spec(db, current_user, vlan, status, model)
+    log_audit(db, current_user, "export_inventory_xlsx", details=f"{exports.count_devices(spec)} devices")
+    return _stream_inventory("xlsx", spec)
 
 
 @router.get("/inventory.pdf")
@@ -82,105 +97,115 @@ async def export_inventory_pdf(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    site_ids = get_user_site_ids(db, current_user)
-    devices = _query_devices(db, site_ids, vlan, status, model)
-
-    if SimpleDocTemplate is None:
+    """Build the PDF in the export job pool and return it when finished."""
+    if exports.SimpleDocTemplate is None:
         # Library missing, fall back to CSV response
         return await export_inventory_csv(vlan, status, model, db, current_user)
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-    elements = []
-
-    styles = getSampleStyleSheet()
-    title = Paragraph("Device Inventory", styles["Title"])
-    date = Paragraph(datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"), styles["Normal"])
-
-    logo_path = os.path.join(STATIC_DIR, "logo.png")
-    if os.path.exists(logo_path):
-        try:
-            elements.append(Image(logo_path, width=100, height=50))
-        except Exception:
-            pass
-    elements.extend([title, Spacer(1, 12), date, Spacer(1, 12)])
-
-    table_data = [[
-        "Hostname",
-        "IP",
-        "MAC",
-        "Model",
-        "VLAN",
-        "Status",
-        "Site",
-        "SSH Profile",
-        "Last Config Pull",
-    ]]
-    for d in devices:
-        table_data.append([
-            d.hostname,
-            d.ip,
-            d.mac or "",
-            d.model or "",
-            d.vlan.tag if d.vlan else "",
-            d.status or "",
-            d.site.name if d.site else "",
-            d.ssh_credential.name if d.ssh_credential else "",
-            d.last_config_pull.strftime("%Y-%m-%d %H:%M") if d.last_config_pull else "",
-        ])
-
-    table = Table(table_data, repeatRows=1)
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
-    ]))
-    elements.append(table)
-
-    doc.build(elements)
-    pdf_value = buffer.getvalue()
-    log_audit(db, current_user, "export_inventory_pdf", details=f"{len(devices)} devices")
-    return Response(
-        pdf_value,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=inventory.pdf"},
-    )
+    spec = _inventory_spec(db, current_user, vlan, status, model)
+    job = await export_jobs.submit_export("pdf", spec, current_user.id)
+    log_audit(db, current_user, "export_inventory_pdf", details=f"{job['total']} devices")
+    job = await export_jobs.wait_for_job(job["id"])
+    if not job or job["status"] != "done":
+        raise HTTPException(status_code=500, detail="PDF export failed")
+    return FileResponse(job["path"], media_type="application/pdf", filename="inventory.pdf")
 
 
 @router.get("/config-snapshot.zip")
 async def export_config_snapshot(
+    site_id: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    """Return a ZIP archive of the latest config for each device in the user's sites."""
-    site_ids = get_user_site_ids(db, current_user)
-    devices = db.query(Device).filter(Device.site_id.in_(site_ids)).all()
-
-    zip_buffer = io.BytesIO()
-    count = 0
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for device in devices:
-            backup = (
-                db.query(ConfigBackup)
-                .filter(ConfigBackup.device_id == device.id)
-                .order_by(ConfigBackup.created_at.desc())
-                .first()
-            )
-            if not backup:
-                continue
-            filename = f"{device.hostname}_{device.id}.txt"
-            zf.writestr(filename, backup.config_text)
-            count += 1
-
-    zip_buffer.seek(0)
-    log_audit(db, current_user, "export_config_snapshot", details=f"{count} configs")
+    """Stream a ZIP archive of the latest config for each device in the user's sites.
+
+    ``start``/``end`` limit the backups considered, so ``end`` alone gives a
+    point-in-time snapshot. ``site_id`` restricts the export to one site.
+    Empty values from the filter form are ignored.
+    """
+    site_id, start, end = _parse_snapshot_filter(site_id, start, end)
+    spec = _snapshot_spec(db, current_user, site_id, start, end)
+
+    details = "streamed"
+    if site_id is not None:
+        details += f" site={site_id}"
+    if start or end:
+        details += f" range={start or ''}..{end or ''}"
+    log_audit(db, current_user, "export_config_snapshot", details=details)
+
+    stamp = (end or datetime.now(timezone.utc).date()).isoformat()
     return StreamingResponse(
-        zip_buffer,
+        iter_zip(exports.iter_latest_configs(spec)),
         media_type="application/zip",
-        headers={"Content-Disposition": "attachment; filename=config-snapshot.zip"},
+        headers={
+            "Content-Disposition": f"attachment; filename=config-snapshot-{stamp}.zip"
+        },
     )
+
+
+def _job_response(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job.get("progress") or 0,
+        "total": job.get("total"),
+        "error": job.get("error"),
+        "cached": bool(job.get("cached")),
+        "download_url": f"/export/jobs/{job['id']}/download" if job["status"] == "done" else None,
+    }
+
+
+def _load_user_job(job_id: str, current_user) -> dict:
+    job = export_jobs.load_job(job_id)
+    if not job or job.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.post("/jobs")
+async def start_export_job(
+    kind: str = Form(...),
+    vlan: int | None = Form(None),
+    status: str | None = Form(None),
+    model: str | None = Form(None),
+    site_id: str | None = Form(None),
+    start: str | None = Form(None),
+    end: str | None = Form(None),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("editor")),
+):
+    """Queue an export in the background and return its job id."""
+    if kind not in export_jobs.EXPORT_KINDS:
+        raise HTTPException(status_code=400, detail="Unknown export type")
+    if kind == "zip":
+        spec = _snapshot_spec(db, current_user, *_parse_snapshot_filter(site_id, start, end))
+    else:
+        spec = _inventory_spec(db, current_user, vlan, status, model)
+    job = await export_jobs.submit_export(kind, spec, current_user.id)
+    log_audit(db, current_user, f"export_job_{kind}", details=f"job {job['id']}")
+    return JSONResponse(_job_response(job))
+
+
+@router.get("/jobs/{job_id}")
+async def export_job_status(
+    job_id: str,
+    current_user=Depends(require_role("editor")),
+):
+    return JSONResponse(_job_response(_load_user_job(job_id, current_user)))
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    current_user=Depends(require_role("editor")),
+):
+    job = _load_user_job(job_id, current_user)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail="Export is not ready")
+    if not os.path.exists(job["path"]):
+        raise HTTPException(status_code=404, detail="Export has expired")
+    filename, media_type = export_jobs.EXPORT_KINDS[job["kind"]]
+    return FileResponse(job["path"], media_type=media_type, filename=filename)
@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
@@ -7,6 +7,7 @@ from core.utils.db_session import get_db
 from core.utils.auth import require_role
 from core.utils.templates import templates
 from core.utils.audit import log_audit
+from core.utils.ip_banning import ban_ip
 from core.models.models import BannedIP, AuditLog
 
 router = APIRouter()
@@ -26,15 +27,39 @@ async def list_bans(
     )
     logs = (
         db.query(AuditLog)
-        .filter(AuditLog.action_type.in_(["failed_login", "auto_ban_ip", "unban_ip"]))
+        .filter(AuditLog.action_type.in_(["failed_login", "auto_ban_ip", "ban_ip", "unban_ip"]))
         .order_by(AuditLog.timestamp.desc())
         .limit(100)
         .all()
     )
-    context = {"request": request, "bans": bans, "logs": logs, "current_user": current_user}
+    context = {
+        "request": request,
+        "bans": bans,
+        "logs": logs,
+        "current_user": current_user,
+        "error": request.query_params.get("error"),
+    }
     return templates.TemplateResponse("ip_ban_list.html", context)
 
 
+@router.post("/admin/ip-bans")
+async def add_ban(
+    ip_address: str = Form(...),
+    hours: int = Form(24),
+    reason: str = Form(""),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role("superadmin")),
+):
+    """Ban an address or a CIDR range such as ``203.0.113.0/24``."""
+    try:
+        ban = ban_ip(db, ip_address, timedelta(hours=max(hours, 1)), reason or "Manual ban")
+    except ValueError:
+        return RedirectResponse(url="/admin/ip-bans?error=Invalid+address", status_code=302)
+    db.commit()
+    log_audit(db, current_user, "ban_ip", details=f"{ban.ip_address}")
+    return RedirectResponse(url="/admin/ip-bans", status_code=302)
+
+
 @router.post("/admin/ip-bans/{ban_id}/unban")
 async def unban_ip(
     ban_id: int,
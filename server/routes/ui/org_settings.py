@@ -7,7 +7,8 @@ from core.utils.templates import templates
 from core.utils.db_session import get_db
 from core.utils.paths import STATIC_DIR
 from core.models.models import User, Site
-from modules.inventory.models import Location, DeviceType
+from modules.inventory.models import Location
+from core.utils.reference_data import reference_rows
 from server.routes.ui.admin_images import MENU_LABELS, slugify
 
 router = APIRouter()
@@ -40,11 +41,10 @@ async def upload_image_modal(
     current_user=Depends(require_role("superadmin")),
 ):
     menu_items = [(label, slugify(label)) for label in MENU_LABELS]
-    device_types = db.query(DeviceType).all()
     context = {
         "request": request,
         "current_user": current_user,
         "menu_items": menu_items,
-        "device_types": device_types,
+        "device_types": reference_rows(db, "device_types"),
     }
     return templates.TemplateResponse("org_upload_image_modal.html", context)
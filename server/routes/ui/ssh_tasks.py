@@ -9,27 +9,23 @@ from datetime import datetime, timezone
 from core.utils.db_session import get_db
 from core.utils.auth import require_role
 from modules.inventory.models import Device
-from core.models.models import ConfigBackup, SystemTunable
-from core.utils.ssh import build_conn_kwargs, resolve_ssh_credential
+from core.models.models import ConfigBackup
+from core.utils.tunables import get_tunable
+from core.utils.ssh import (
+    build_conn_kwargs,
+    resolve_ssh_credential,
+    run_command,
+    ssh_connect,
+)
 from core.utils.device_detect import detect_ssh_platform
 from core.utils.templates import templates
 
 router = APIRouter()
 
 
-def _get_netbird_config(db: Session):
+def _get_netbird_config():
     """Return Netbird API URL and token from SystemTunables."""
-    url_t = (
-        db.query(SystemTunable).filter(SystemTunable.name == "Netbird API URL").first()
-    )
-    token_t = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "Netbird API Token")
-        .first()
-    )
-    url = url_t.value if url_t else None
-    token = token_t.value if token_t else None
-    return url, token
+    return get_tunable("Netbird API URL"), get_tunable("Netbird API Token")
 
 
 async def _netbird_request(method: str, url: str, token: str, **kwargs):
@@ -64,7 +60,7 @@ async def netbird_connect_form(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    url, token = _get_netbird_config(db)
+    url, token = _get_netbird_config()
     peers = []
     error = None
     if url and token:
@@ -92,7 +88,7 @@ async def netbird_connect_action(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("editor")),
 ):
-    url, token = _get_netbird_config(db)
+    url, token = _get_netbird_config()
     peers = []
     if not url or not token:
         error = "Netbird configuration missing"
@@ -151,10 +147,10 @@ async def port_config_action(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, current_user)
-                result = await conn.run(
-                    f"show running-config interface {port_name}", check=False
+                result = await run_command(
+                    conn, f"show running-config interface {port_name}", check=False
                 )
                 output = result.stdout
                 device.last_seen = datetime.now(timezone.utc)
@@ -209,9 +205,9 @@ async def port_check_action(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, current_user)
-                result = await conn.run(f"show interface {port_name}", check=False)
+                result = await run_command(conn, f"show interface {port_name}", check=False)
                 output = result.stdout
                 device.last_seen = datetime.now(timezone.utc)
         except Exception as exc:
@@ -264,9 +260,9 @@ async def config_check_action(
     if cred:
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, current_user)
-                result = await conn.run("show running-config", check=False)
+                result = await run_command(conn, "show running-config", check=False)
                 output = result.stdout
                 device.last_seen = datetime.now(timezone.utc)
         except Exception as exc:
@@ -319,10 +315,10 @@ async def port_search_action(
         if cred:
             conn_kwargs = build_conn_kwargs(cred)
             try:
-                async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+                async with ssh_connect(device.ip, **conn_kwargs) as conn:
                     await detect_ssh_platform(db, device, conn, current_user)
-                    result = await conn.run(
-                        f"show running-config | inc {search}", check=False
+                    result = await run_command(
+                        conn, f"show running-config | inc {search}", check=False
                     )
                     output = result.stdout
                     device.last_seen = datetime.now(timezone.utc)
@@ -383,7 +379,7 @@ async def bulk_port_update_action(
             snippet = config_text.replace("{port}", port)
             success = False
             try:
-                async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+                async with ssh_connect(device.ip, **conn_kwargs) as conn:
                     await detect_ssh_platform(db, device, conn, current_user)
                     _, session = await conn.create_session(asyncssh.SSHClientProcess)
                     for line in snippet.splitlines():
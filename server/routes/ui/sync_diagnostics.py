@@ -8,7 +8,7 @@ from datetime import datetime, timezone, timedelta
 
 from settings import settings
 from modules.network.models import ConnectedSite
-from core.models.models import SystemTunable, SiteKey, AuditLog
+from core.models.models import SystemTunable, SiteKey, SiteKeyAuthStat
 from core.utils.templates import templates
 from .tunables import grouped_tunables
 from server.workers.heartbeat import send_heartbeat_once
@@ -71,9 +71,8 @@ def _render_sync(request: Request, db: Session, current_user, message: str = "")
     history = _safe_query(
         log,
         [],
-        lambda: db.query(AuditLog)
-        .filter(AuditLog.action_type.in_(["key_auth_ok", "key_auth_fail"]))
-        .order_by(AuditLog.timestamp.desc())
+        lambda: db.query(SiteKeyAuthStat)
+        .order_by(SiteKeyAuthStat.last_seen.desc())
         .limit(20)
         .all(),
     )
@@ -9,6 +9,7 @@ from core.utils.templates import templates
 from modules.inventory.utils import add_tag_to_device, remove_tag_from_device
 from modules.inventory.models import Tag
 from core.utils.deletion import soft_delete
+from core.utils.audit import audit_context
 
 router = APIRouter()
 
@@ -45,10 +46,11 @@ async def rename_tag(
         return RedirectResponse(url="/admin/tags", status_code=302)
     existing = db.query(Tag).filter(func.lower(Tag.name) == name).first()
     if existing and existing.id != tag.id:
-        for dev in list(tag.devices):
-            if existing not in dev.tags:
-                add_tag_to_device(db, dev, existing, current_user)
-            remove_tag_from_device(db, dev, tag, current_user)
+        with audit_context(db, current_user, "tag_rename", f"Merged {tag.name} into {name}"):
+            for dev in list(tag.devices):
+                if existing not in dev.tags:
+                    add_tag_to_device(db, dev, existing, current_user)
+                remove_tag_from_device(db, dev, tag, current_user)
         soft_delete(tag, current_user.id, "ui")
     else:
         tag.name = name
@@ -69,10 +71,11 @@ async def merge_tag(
         raise HTTPException(status_code=404, detail="Tag not found")
     if source.id == target.id:
         return RedirectResponse(url="/admin/tags", status_code=302)
-    for dev in list(source.devices):
-        if target not in dev.tags:
-            add_tag_to_device(db, dev, target, current_user)
-        remove_tag_from_device(db, dev, source, current_user)
+    with audit_context(db, current_user, "tag_merge", f"Merged {source.name} into {target.name}"):
+        for dev in list(source.devices):
+            if target not in dev.tags:
+                add_tag_to_device(db, dev, target, current_user)
+            remove_tag_from_device(db, dev, source, current_user)
     soft_delete(source, current_user.id, "ui")
     db.commit()
     return RedirectResponse(url="/admin/tags", status_code=302)
@@ -86,8 +89,9 @@ async def delete_tag(
 ):
     tag = db.query(Tag).filter(Tag.id == tag_id).first()
     if tag:
-        for dev in list(tag.devices):
-            remove_tag_from_device(db, dev, tag, current_user)
+        with audit_context(db, current_user, "tag_delete", f"Deleted tag {tag.name}"):
+            for dev in list(tag.devices):
+                remove_tag_from_device(db, dev, tag, current_user)
         soft_delete(tag, current_user.id, "ui")
         db.commit()
     return RedirectResponse(url="/admin/tags", status_code=302)
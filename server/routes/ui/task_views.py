@@ -6,6 +6,8 @@ from core.utils.db_session import get_db
 from fastapi.responses import RedirectResponse, Response
 from fastapi import UploadFile, File, Form
 from core.utils.auth import require_role
+from core.utils.audit import audit_context
+from core.utils.tunables import get_tunable
 from core.models.models import (
     ConfigBackup,
     SystemTunable,
@@ -67,24 +69,14 @@ CSV_TABLES = {
 GSHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
 
-def _get_gsheets_config(db: Session):
+def _get_gsheets_config():
     """Return service account path and spreadsheet ID from SystemTunables."""
-    cred = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "Google Service Account JSON")
-        .first()
-    )
-    sheet = (
-        db.query(SystemTunable)
-        .filter(SystemTunable.name == "Google Spreadsheet ID")
-        .first()
-    )
-    return (cred.value if cred else None, sheet.value if sheet else None)
+    return get_tunable("Google Service Account JSON"), get_tunable("Google Spreadsheet ID")
 
 
 def _open_sheet(db: Session):
     """Return an open gspread Spreadsheet object or None."""
-    cred_path, sheet_id = _get_gsheets_config(db)
+    cred_path, sheet_id = _get_gsheets_config()
     if not cred_path or not sheet_id:
         return None
     try:
@@ -171,7 +163,7 @@ async def google_sheets_page(
     db: Session = Depends(get_db),
     current_user=Depends(require_role("admin")),
 ):
-    creds, sheet_id = _get_gsheets_config(db)
+    creds, sheet_id = _get_gsheets_config()
     message = request.query_params.get("message")
     context = {
         "request": request,
@@ -262,19 +254,20 @@ async def save_tags(
     form = await request.form()
     new_tags = {n.strip().lower() for n in form.get("new_tags", "").split(",") if n.strip()}
     devices = db.query(Device).all()
-    for dev in devices:
-        names = {n.strip().lower() for n in form.get(f"tags_{dev.id}", "").split(",") if n.strip()}
-        for t in list(dev.tags):
-            if t.name not in ("complete", "incomplete", dev.manufacturer.lower(),
-                             dev.device_type.name.lower() if dev.device_type else None,
-                             dev.location_ref.name.lower() if dev.location_ref else None):
-                if t.name.lower() not in names:
-                    remove_tag_from_device(db, dev, t, current_user)
-        for name in names:
-            tag = get_or_create_tag(db, name)
-            add_tag_to_device(db, dev, tag, current_user)
-        update_device_complete_tag(db, dev, current_user)
-        update_device_attribute_tags(db, dev, user=current_user)
+    with audit_context(db, current_user, "bulk_edit_tags", f"Edited tags on {len(devices)} devices"):
+        for dev in devices:
+            names = {n.strip().lower() for n in form.get(f"tags_{dev.id}", "").split(",") if n.strip()}
+            for t in list(dev.tags):
+                if t.name not in ("complete", "incomplete", dev.manufacturer.lower(),
+                                 dev.device_type.name.lower() if dev.device_type else None,
+                                 dev.location_ref.name.lower() if dev.location_ref else None):
+                    if t.name.lower() not in names:
+                        remove_tag_from_device(db, dev, t, current_user)
+            for name in names:
+                tag = get_or_create_tag(db, name)
+                add_tag_to_device(db, dev, tag, current_user)
+            update_device_complete_tag(db, dev, current_user)
+            update_device_attribute_tags(db, dev, user=current_user)
     for name in new_tags:
         get_or_create_tag(db, name)
     db.commit()
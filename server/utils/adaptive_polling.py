@@ -0,0 +1,209 @@
+import math
+import os
+import time
+from dataclasses import dataclass, field
+
+# Global SNMP request budget in requests per second.  When unset the budget
+# matches the average load of the old fixed sweep (every device once per
+# ``SNMP_POLL_LEGACY_INTERVAL`` seconds) so total load never goes up.
+SNMP_POLL_BUDGET = os.environ.get("SNMP_POLL_BUDGET")
+SNMP_POLL_LEGACY_INTERVAL = int(os.environ.get("SNMP_POLL_LEGACY_INTERVAL", "1800"))
+SNMP_POLL_MIN_INTERVAL = int(os.environ.get("SNMP_POLL_MIN_INTERVAL", "60"))
+SNMP_POLL_MAX_INTERVAL = int(os.environ.get("SNMP_POLL_MAX_INTERVAL", "3600"))
+
+# Relative weights used to turn device state into a share of the budget.
+PRIORITY_WEIGHT = float(os.environ.get("SNMP_POLL_PRIORITY_WEIGHT", "4"))
+UPTIME_RESET_WEIGHT = 3.0
+REACHABILITY_FLIP_WEIGHT = 3.0
+PORT_CHURN_WEIGHT = 0.25
+PORT_CHURN_CAP = 20
+
+# Volatility halves every VOLATILITY_HALF_LIFE seconds without new changes.
+VOLATILITY_HALF_LIFE = int(os.environ.get("SNMP_POLL_VOLATILITY_HALF_LIFE", "3600"))
+
+
+@dataclass
+class PollState:
+    """Scheduling state tracked for a single device."""
+
+    device_id: int
+    priority: bool = False
+    volatility: float = 0.0
+    port_churn: int = 0
+    interval: float = float(SNMP_POLL_LEGACY_INTERVAL)
+    next_due: float = 0.0
+    last_polled: float | None = None
+    last_uptime: int | None = None
+    last_reachable: bool | None = None
+    updated: float = field(default_factory=time.monotonic)
+
+    def decay(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0 and self.volatility:
+            self.volatility *= 0.5 ** (elapsed / VOLATILITY_HALF_LIFE)
+            if self.volatility < 0.01:
+                self.volatility = 0.0
+        self.updated = now
+
+    @property
+    def weight(self) -> float:
+        churn = min(self.port_churn, PORT_CHURN_CAP) * PORT_CHURN_WEIGHT
+        return (
+            1.0
+            + (PRIORITY_WEIGHT if self.priority else 0.0)
+            + self.volatility
+            + churn
+        )
+
+
+class AdaptivePollScheduler:
+    """Assign per-device SNMP poll intervals within a global request budget.
+
+    Every device receives a share of the budget proportional to its weight,
+    which grows with the ``priority`` flag and with recent state changes
+    (uptime resets, reachability flips and port churn).  ``due`` hands out at
+    most ``budget * elapsed`` polls per call so bursts never exceed the limit.
+    """
+
+    def __init__(
+        self,
+        budget: float | None = None,
+        min_interval: float = SNMP_POLL_MIN_INTERVAL,
+        max_interval: float = SNMP_POLL_MAX_INTERVAL,
+        clock=time.monotonic,
+    ) -> None:
+        self._fixed_budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._clock = clock
+        self.states: dict[int, PollState] = {}
+        self._credit = 0.0
+        self._last_tick: float | None = None
+
+    @property
+    def budget(self) -> float:
+        """Requests per second available for status polling."""
+        if self._fixed_budget is not None:
+            return self._fixed_budget
+        if SNMP_POLL_BUDGET:
+            return float(SNMP_POLL_BUDGET)
+        return max(len(self.states), 1) / SNMP_POLL_LEGACY_INTERVAL
+
+    def sync_devices(self, devices: dict[int, bool], port_churn: dict[int, int]) -> None:
+        """Refresh the tracked device set.
+
+        ``devices`` maps device id to its priority flag and ``port_churn``
+        maps device id to the number of recent port status changes.
+        """
+        now = self._clock()
+        for dev_id in list(self.states):
+            if dev_id not in devices:
+                del self.states[dev_id]
+        for dev_id, priority in devices.items():
+            state = self.states.get(dev_id)
+            if state is None:
+                # New devices are due immediately; the budget in ``due``
+                # spreads the initial sweep out over time.
+                state = PollState(device_id=dev_id, next_due=now, updated=now)
+                self.states[dev_id] = state
+            state.priority = bool(priority)
+            state.port_churn = port_churn.get(dev_id, 0)
+        self.rebalance()
+
+    def rebalance(self) -> None:
+        """Recompute intervals so the sum of poll rates fits the budget."""
+        if not self.states:
+            return
+        now = self._clock()
+        for state in self.states.values():
+            state.decay(now)
+        total_weight = sum(s.weight for s in self.states.values())
+        budget = self.budget
+        for state in self.states.values():
+            share = budget * state.weight / total_weight
+            interval = 1.0 / share if share > 0 else self.max_interval
+            interval = min(max(interval, self.min_interval), self.max_interval)
+            if state.last_polled is not None:
+                # Pull an already scheduled poll forward when the interval
+                # shrinks, e.g. after a reachability flip.
+                state.next_due = min(state.next_due, state.last_polled + interval)
+            state.interval = interval
+
+    def due(self, limit: int | None = None) -> list[int]:
+        """Return device ids to poll now, most overdue first."""
+        now = self._clock()
+        if self._last_tick is None:
+            self._last_tick = now
+        self._credit = min(
+            self._credit + (now - self._last_tick) * self.budget,
+            max(self.budget * self.min_interval, 1.0),
+        )
+        self._last_tick = now
+        allowed = int(self._credit)
+        if limit is not None:
+            allowed = min(allowed, limit)
+        if allowed <= 0:
+            return []
+        overdue = [
+            ((now - s.next_due) / s.interval, s.device_id)
+            for s in self.states.values()
+            if s.next_due <= now
+        ]
+        overdue.sort(reverse=True)
+        picked = [dev_id for _, dev_id in overdue[:allowed]]
+        self._credit -= len(picked)
+        for dev_id in picked:
+            # Reserve the slot so a slow poll is not handed out twice.
+            self.states[dev_id].next_due = now + self.states[dev_id].interval
+        return picked
+
+    def record_result(self, device_id: int, uptime: int | None, reachable: bool) -> None:
+        """Update volatility from a poll result and schedule the next poll."""
+        state = self.states.get(device_id)
+        if state is None:
+            return
+        now = self._clock()
+        state.decay(now)
+        changed = False
+        if state.last_reachable is not None and state.last_reachable != reachable:
+            state.volatility += REACHABILITY_FLIP_WEIGHT
+            changed = True
+        if (
+            uptime is not None
+            and state.last_uptime is not None
+            and uptime < state.last_uptime
+        ):
+            state.volatility += UPTIME_RESET_WEIGHT
+            changed = True
+        state.last_reachable = reachable
+        if uptime is not None:
+            state.last_uptime = uptime
+        state.last_polled = now
+        if changed:
+            self.rebalance()
+        state.next_due = now + state.interval
+
+    def seed_state(self, device_id: int, uptime: int | None, reachable: bool | None) -> None:
+        """Prime change detection with values already stored on the device."""
+        state = self.states.get(device_id)
+        if state is None or state.last_polled is not None:
+            return
+        if state.last_uptime is None:
+            state.last_uptime = uptime
+        if state.last_reachable is None:
+            state.last_reachable = reachable
+
+    def snapshot(self) -> list[dict]:
+        """Return the current schedule for diagnostics."""
+        now = self._clock()
+        return [
+            {
+                "device_id": s.device_id,
+                "priority": s.priority,
+                "interval": math.ceil(s.interval),
+                "volatility": round(s.volatility, 2),
+                "port_churn": s.port_churn,
+                "due_in": max(0, math.ceil(s.next_due - now)),
+            }
+            for s in sorted(self.states.values(), key=lambda s: s.interval)
+        ]
@@ -1,11 +1,11 @@
 from pathlib import Path
-from typing import Optional
 import os
 
 from sqlalchemy.orm import Session
 
 from core.models.models import SystemTunable
 from core.utils.env_file import set_env_vars
+from core.utils.tunables import get_bool, get_tunable
 
 
 def _set_runtime_env(enabled: bool) -> None:
@@ -28,11 +28,6 @@ def ensure_env_writable(path: str = ".env") -> bool:
         return False
 
 
-def get_tunable(db: Session, name: str) -> Optional[str]:
-    row = db.query(SystemTunable).filter(SystemTunable.name == name).first()
-    return row.value if row else None
-
-
 def set_tunable(db: Session, name: str, value: str) -> None:
     row = db.query(SystemTunable).filter(SystemTunable.name == name).first()
     if row:
@@ -69,11 +64,10 @@ def save_cloud_connection(
     os.environ["SYNC_API_KEY"] = api_key
 
 
-def load_sync_settings(db: Session) -> dict:
+def load_sync_settings() -> dict:
     return {
-        "cloud_url": get_tunable(db, "Cloud Base URL") or "",
-        "site_id": get_tunable(db, "Cloud Site ID") or "",
-        "api_key": get_tunable(db, "Cloud API Key") or "",
-        "enabled": (get_tunable(db, "Enable Cloud Sync") or "false").lower()
-        in {"true", "1", "yes"},
+        "cloud_url": get_tunable("Cloud Base URL") or "",
+        "site_id": get_tunable("Cloud Site ID") or "",
+        "api_key": get_tunable("Cloud API Key") or "",
+        "enabled": get_bool("Enable Cloud Sync"),
     }
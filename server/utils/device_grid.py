@@ -0,0 +1,275 @@
+"""Server-side paging, sorting and filtering for the device table.
+
+Pages are fetched with keyset pagination on ``(sort value, id)`` so the cost
+of a page does not depend on how far the user has scrolled.  Related rows
+shown in the table are loaded with ``selectinload``, totals and tag counts
+come from one aggregate query and duplicate flags are read from the
+``device_duplicates`` table, so rendering a page runs a fixed number of
+statements.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+
+from sqlalchemy import Boolean, String, and_, cast, exists, func, literal_column, or_
+from sqlalchemy.orm import Session, selectinload
+
+from core.models.models import UserSSHCredential
+from core.utils.columns import DEFAULT_DEVICE_COLUMNS
+from core.utils.device_duplicates import DUPLICATE_KINDS, duplicate_peers
+from core.utils.ip_utils import display_ip
+from core.utils.mac_utils import display_mac
+from core.utils.templates import format_uptime
+from modules.inventory.models import Device, Tag, device_tags
+from server.utils.exports import INVENTORY_FIELDS, INVENTORY_JOINS
+
+GRID_PAGE_SIZE = 100
+GRID_MAX_PAGE_SIZE = 500
+
+# Columns searched by the free text box
+_SEARCH_FIELDS = ("hostname", "ip", "mac", "asset_tag", "serial")
+
+_TRUE_VALUES = {"1", "true", "yes", "on", "✔"}
+
+
+@dataclass
+class GridQuery:
+    """Parameters of one page request."""
+
+    device_type_id: int | None = None
+    sort: str = "hostname"
+    desc: bool = False
+    search: str = ""
+    filters: dict[str, str] = field(default_factory=dict)
+    cursor: str | None = None
+    limit: int = GRID_PAGE_SIZE
+
+
+def grid_columns(custom_columns: list[str] | None = None) -> dict:
+    """Return ``{name: (expression factory, join)}`` for sortable columns."""
+    columns = {name: INVENTORY_FIELDS[name] for name in DEFAULT_DEVICE_COLUMNS}
+    # The status cell shows reachability and uptime rather than the state text
+    columns["status"] = (lambda: Device.uptime_seconds, None)
+    for name in custom_columns or []:
+        if name.isidentifier():
+            # Runtime custom columns have no mapped type; compare them as text
+            columns[name] = (
+                lambda name=name: cast(literal_column(f"devices.{name}"), String),
+                None,
+            )
+    return columns
+
+
+def encode_cursor(value, device_id: int) -> str:
+    raw = json.dumps([value, device_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return ``(value, id)`` from a cursor or raise ``ValueError``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, device_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(device_id, int) or isinstance(value, (list, dict)):
+        raise ValueError("Invalid cursor")
+    return value, device_id
+
+
+def _cursor_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _after(expr, value, last_id: int, desc: bool):
+    """Rows after ``(value, last_id)`` in an ordering with NULLs last."""
+    tie = Device.id < last_id if desc else Device.id > last_id
+    if value is None:
+        return and_(expr.is_(None), tie)
+    beyond = expr < value if desc else expr > value
+    return or_(beyond, and_(expr == value, tie), expr.is_(None))
+
+
+def _filter_clause(expr, value: str):
+    if isinstance(expr.type, Boolean):
+        return expr.is_(value.strip().lower() in _TRUE_VALUES)
+    return cast(expr, String).ilike(f"%{value}%")
+
+
+class DeviceGrid:
+    """Builds page and count queries for one :class:`GridQuery`."""
+
+    def __init__(self, db: Session, query: GridQuery, custom_columns: list[str] | None = None):
+        self.db = db
+        self.query = query
+        self.columns = grid_columns(custom_columns)
+        self.custom_columns = [c for c in custom_columns or [] if c in self.columns]
+        if query.sort not in self.columns:
+            raise ValueError(f"Unknown sort column {query.sort}")
+        for name in query.filters:
+            if name not in self.columns:
+                raise ValueError(f"Unknown filter column {name}")
+        self.limit = max(1, min(query.limit or GRID_PAGE_SIZE, GRID_MAX_PAGE_SIZE))
+
+    def _expr(self, name: str):
+        return self.columns[name][0]()
+
+    def _filtered(self, q):
+        """Apply joins and filters shared by the page and count queries."""
+        query = self.query
+        names = [query.sort, *query.filters]
+        if query.search:
+            names.extend(_SEARCH_FIELDS)
+        joins = []
+        for name in names:
+            join = self.columns[name][1]
+            if join and join not in joins:
+                joins.append(join)
+        for join in joins:
+            target, onclause = INVENTORY_JOINS[join]
+            q = q.outerjoin(target, onclause)
+        if query.device_type_id is not None:
+            q = q.filter(Device.device_type_id == query.device_type_id)
+        for name, value in query.filters.items():
+            if value != "":
+                q = q.filter(_filter_clause(self._expr(name), value))
+        if query.search:
+            pattern = f"%{query.search}%"
+            q = q.filter(or_(*(self._expr(n).ilike(pattern) for n in _SEARCH_FIELDS)))
+        return q
+
+    def page(self) -> tuple[list, str | None]:
+        """Return ``[(device, custom values)]`` for the page and the next cursor."""
+        query = self.query
+        sort_expr = self._expr(query.sort)
+        custom_exprs = [literal_column(f"devices.{name}") for name in self.custom_columns]
+        q = self._filtered(self.db.query(Device, sort_expr.label("sort_value"), *custom_exprs))
+        if query.cursor:
+            value, last_id = decode_cursor(query.cursor)
+            q = q.filter(_after(sort_expr, value, last_id, query.desc))
+        order = sort_expr.desc() if query.desc else sort_expr.asc()
+        id_order = Device.id.desc() if query.desc else Device.id.asc()
+        rows = (
+            q.options(
+                selectinload(Device.tags),
+                selectinload(Device.vlan),
+                selectinload(Device.site),
+                selectinload(Device.device_type),
+                selectinload(Device.location_ref),
+                selectinload(Device.ssh_credential),
+                selectinload(Device.snmp_community),
+            )
+            .order_by(sort_expr.is_(None), order, id_order)
+            .limit(self.limit + 1)
+            .all()
+        )
+        next_cursor = None
+        if len(rows) > self.limit:
+            rows = rows[: self.limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(_cursor_value(last[1]), last[0].id)
+        return [(row[0], dict(zip(self.custom_columns, row[2:]))) for row in rows], next_cursor
+
+    def counts(self) -> dict:
+        """Return the filtered total and complete/incomplete tag counts."""
+
+        def tagged(name: str):
+            return exists().where(
+                device_tags.c.device_id == Device.id,
+                device_tags.c.tag_id == Tag.id,
+                Tag.name == name,
+                Tag.deleted_at.is_(None),
+            )
+
+        total, complete, incomplete = self._filtered(
+            self.db.query(
+                func.count(Device.id),
+                func.count(Device.id).filter(tagged("complete")),
+                func.count(Device.id).filter(tagged("incomplete")),
+            ).select_from(Device)
+        ).one()
+        return {"total": total, "complete": complete, "incomplete": incomplete}
+
+
+def personal_credential_names(db: Session, user_id: int) -> set[str]:
+    return {
+        name
+        for (name,) in db.query(UserSSHCredential.name).filter(
+            UserSSHCredential.user_id == user_id
+        )
+    }
+
+
+def _display(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "✔" if value else ""
+    return str(value)
+
+
+def serialize_device(
+    device: Device,
+    custom: dict,
+    duplicates: dict[str, list[str]],
+    personal_names: set[str],
+) -> dict:
+    """Return the JSON row rendered by the device table."""
+    ssh = device.ssh_credential
+    ssh_label = ""
+    if ssh:
+        ssh_label = f"{ssh.name} ({'default' if device.ssh_profile_is_default else 'manual'})"
+    personal = bool(ssh and ssh.name in personal_names)
+    if personal:
+        ssh_label += " (personal)"
+    cells = {
+        "hostname": device.hostname,
+        "ip": display_ip(device.ip),
+        "mac": display_mac(device.mac),
+        "asset_tag": device.asset_tag or "",
+        "model": device.model or "",
+        "manufacturer": device.manufacturer or "",
+        "platform": device.detected_platform or "",
+        "serial": device.serial_number or "",
+        "location": device.location_ref.name if device.location_ref else "",
+        "on_lasso": _display(device.on_lasso),
+        "on_r1": _display(device.on_r1),
+        "type": device.device_type.name if device.device_type else "",
+        "state": device.status or "",
+        "vlan": _display(device.vlan.tag) if device.vlan else "",
+        "ssh_profile": ssh_label,
+        "snmp_profile": device.snmp_community.name if device.snmp_community else "",
+        "status": format_uptime(device.uptime_seconds),
+        "tags": ", ".join(t.name for t in device.tags),
+    }
+    cells.update({name: _display(value) for name, value in custom.items()})
+    return {
+        "id": device.id,
+        "version": device.version,
+        "conflict": bool(device.conflict_data),
+        "reachable": bool(device.snmp_reachable),
+        "live_config": bool(ssh) or personal,
+        "site": device.site.name if device.site else "",
+        "cells": cells,
+        "duplicates": {kind: duplicates.get(kind, []) for kind in DUPLICATE_KINDS},
+    }
+
+
+def load_page(db: Session, query: GridQuery, user_id: int, custom_columns: list[str] | None = None) -> dict:
+    """Return one page of serialized rows plus counts and the next cursor."""
+    grid = DeviceGrid(db, query, custom_columns)
+    rows, next_cursor = grid.page()
+    peers = duplicate_peers(db, [device.id for device, _custom in rows])
+    personal = personal_credential_names(db, user_id) if rows else set()
+    return {
+        "rows": [
+            serialize_device(d, custom, peers.get(d.id, {}), personal) for d, custom in rows
+        ],
+        "next_cursor": next_cursor,
+        "counts": grid.counts() if not query.cursor else None,
+    }
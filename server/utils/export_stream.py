@@ -0,0 +1,105 @@
+"""Helpers for streaming large exports with bounded memory."""
+
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+try:
+    from openpyxl import Workbook
+except Exception:  # pragma: no cover - optional dependency
+    Workbook = None
+
+# Rows fetched per round trip from the server-side cursor.
+EXPORT_BATCH_SIZE = 500
+# Flush buffered output to the client once it grows past this many bytes.
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class ChunkBuffer:
+    """Write-only file object whose contents are drained as chunks.
+
+    It deliberately has no ``tell``/``seek`` so :mod:`zipfile` writes local
+    headers with data descriptors instead of seeking back.
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._size = 0
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode()
+        if data:
+            self._parts.append(bytes(data))
+            self._size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        self._size = 0
+        return data
+
+
+def iter_zip(entries: Iterable[tuple[str, str | bytes, datetime | None]]) -> Iterator[bytes]:
+    """Yield a deflated ZIP archive built from ``(name, data, mtime)`` entries.
+
+    Entries are written as they are consumed so only one member is held in
+    memory at a time.
+    """
+    buf = ChunkBuffer()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data, mtime in entries:
+            stamp = (mtime or datetime(1980, 1, 1)).timetuple()[:6]
+            info = zipfile.ZipInfo(name, date_time=stamp)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, data)
+            if len(buf) >= EXPORT_CHUNK_SIZE:
+                yield buf.drain()
+    yield buf.drain()
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Yield CSV output for ``header`` and ``rows`` in bounded chunks."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= EXPORT_CHUNK_SIZE:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def iter_xlsx(header: Sequence[str], rows: Iterable[Sequence], title: str = "Export") -> Iterator[bytes]:
+    """Yield an XLSX workbook for ``header`` and ``rows``.
+
+    openpyxl's write-only mode spools rows to disk as they are appended, so
+    memory stays bounded; the finished file is then streamed in chunks.
+    """
+    if Workbook is None:
+        raise RuntimeError("openpyxl is required for XLSX exports")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    with tempfile.TemporaryFile() as fh:
+        wb.save(fh)
+        fh.seek(0)
+        while True:
+            chunk = fh.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,362 @@
+"""Data side of inventory and config exports.
+
+Everything here works from a plain, picklable ``spec`` dict so it can run
+either inline in a request or inside a worker process of the export job
+pool (see ``server.workers.export_jobs``).  Each call opens its own session.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from core.utils.db_session import SessionLocal
+from core.utils.config_store import decompress
+from core.utils.paths import STATIC_DIR
+from core.models.models import ConfigBackup, ConfigBlob, Site
+from modules.inventory.models import Device, DeviceType, Location, Tag, device_tags
+from modules.network.models import VLAN, SSHCredential, SNMPCommunity
+from server.utils.export_stream import EXPORT_BATCH_SIZE, iter_csv, iter_xlsx, iter_zip
+
+try:
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+except Exception:  # pragma: no cover - library may not be installed in tests
+    SimpleDocTemplate = None  # type: ignore
+
+try:
+    from pypdf import PdfWriter
+except Exception:  # pragma: no cover - optional dependency
+    PdfWriter = None
+
+# Report progress every this many rows
+PROGRESS_INTERVAL = 500
+
+
+def _tags_expr():
+    return (
+        select(
+            func.string_agg(Tag.name, aggregate_order_by(literal(", "), Tag.name))
+        )
+        .select_from(device_tags.join(Tag, Tag.id == device_tags.c.tag_id))
+        .where(device_tags.c.device_id == Device.id, Tag.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+
+
+# Export column name -> (SQL expression factory, related model to outer join)
+INVENTORY_FIELDS = {
+    "hostname": (lambda: Device.hostname, None),
+    "ip": (lambda: Device.ip, None),
+    "mac": (lambda: Device.mac, None),
+    "asset_tag": (lambda: Device.asset_tag, None),
+    "model": (lambda: Device.model, None),
+    "manufacturer": (lambda: Device.manufacturer, None),
+    "platform": (lambda: Device.detected_platform, None),
+    "serial": (lambda: Device.serial_number, None),
+    "location": (lambda: Location.name, "location"),
+    "on_lasso": (lambda: Device.on_lasso, None),
+    "on_r1": (lambda: Device.on_r1, None),
+    "type": (lambda: DeviceType.name, "type"),
+    "state": (lambda: Device.status, None),
+    "vlan": (lambda: VLAN.tag, "vlan"),
+    "ssh_profile": (lambda: SSHCredential.name, "ssh_profile"),
+    "snmp_profile": (lambda: SNMPCommunity.name, "snmp_profile"),
+    "status": (lambda: Device.status, None),
+    "tags": (_tags_expr, None),
+    "site": (lambda: Site.name, "site"),
+    "last_config_pull": (lambda: Device.last_config_pull, None),
+}
+
+INVENTORY_JOINS = {
+    "location": (Location, Location.id == Device.location_id),
+    "type": (DeviceType, DeviceType.id == Device.device_type_id),
+    "vlan": (VLAN, VLAN.id == Device.vlan_id),
+    "ssh_profile": (SSHCredential, SSHCredential.id == Device.ssh_credential_id),
+    "snmp_profile": (SNMPCommunity, SNMPCommunity.id == Device.snmp_community_id),
+    "site": (Site, Site.id == Device.site_id),
+}
+
+# Tables whose changes invalidate cached inventory exports: every table an
+# inventory export can join
+_INVENTORY_VERSION_MODELS = (
+    Device,
+    Location,
+    DeviceType,
+    Tag,
+    VLAN,
+    SSHCredential,
+    SNMPCommunity,
+    Site,
+)
+
+
+def filter_devices(q, site_ids: list[int], vlan: Optional[int], status: Optional[str], model: Optional[str]):
+    q = q.filter(Device.site_id.in_(site_ids))
+    if vlan is not None:
+        q = q.filter(Device.vlan_id == vlan)
+    if status:
+        q = q.filter(Device.status == status)
+    if model:
+        q = q.filter(Device.model.ilike(f"%{model}%"))
+    return q
+
+
+def inventory_spec(site_ids, columns, vlan=None, status=None, model=None) -> dict:
+    """Return the export spec for an inventory export."""
+    return {
+        "site_ids": sorted(site_ids),
+        "columns": [list(c) for c in columns if c[0] in INVENTORY_FIELDS or c[0].isidentifier()],
+        "vlan": vlan,
+        "status": status,
+        "model": model,
+    }
+
+
+def snapshot_spec(site_ids, start: datetime | None = None, end: datetime | None = None) -> dict:
+    """Return the export spec for a config snapshot."""
+    return {
+        "site_ids": sorted(site_ids),
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+    }
+
+
+def count_devices(spec: dict) -> int:
+    db = SessionLocal()
+    try:
+        q = db.query(func.count(Device.id))
+        return filter_devices(q, spec["site_ids"], spec["vlan"], spec["status"], spec["model"]).scalar()
+    finally:
+        db.close()
+
+
+def data_version(kind: str, spec: dict) -> str:
+    """Return a token that changes whenever the data behind an export does."""
+    db = SessionLocal()
+    try:
+        if kind == "zip":
+            row = (
+                db.query(func.max(ConfigBackup.id), func.count(ConfigBackup.id))
+                .join(Device, Device.id == ConfigBackup.device_id)
+                .filter(Device.site_id.in_(spec["site_ids"]))
+                .one()
+            )
+            parts = [str(v) for v in row]
+            parts.append(str(db.query(func.max(Device.updated_at)).scalar()))
+        else:
+            # Soft-deleted rows count too: deleting one changes the output
+            parts = [
+                str(
+                    db.query(func.max(model.updated_at))
+                    .execution_options(include_deleted=True)
+                    .scalar()
+                )
+                for model in _INVENTORY_VERSION_MODELS
+            ]
+            parts.append(str(db.query(func.count(Device.id)).scalar()))
+            # Tag links are written without touching the device row, so hash
+            # the ordered (device, tag) pairs themselves
+            pair = func.concat(device_tags.c.device_id, ":", device_tags.c.tag_id)
+            links = select(
+                func.md5(
+                    func.coalesce(
+                        func.string_agg(
+                            pair,
+                            aggregate_order_by(
+                                literal(","), device_tags.c.device_id, device_tags.c.tag_id
+                            ),
+                        ),
+                        "",
+                    )
+                )
+            )
+            parts.append(db.execute(links).scalar())
+        return "|".join(parts)
+    finally:
+        db.close()
+
+
+def _format_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_inventory_rows(spec: dict, offset: int | None = None, limit: int | None = None):
+    """Yield formatted rows for the spec's columns from one joined, streamed query."""
+    exprs = []
+    joins = []
+    for name, _label in spec["columns"]:
+        if name in INVENTORY_FIELDS:
+            factory, join = INVENTORY_FIELDS[name]
+            exprs.append(factory())
+            if join and join not in joins:
+                joins.append(join)
+        else:
+            # Runtime custom column; names are validated when created
+            exprs.append(literal_column(f"devices.{name}"))
+    db = SessionLocal()
+    try:
+        q = db.query(*exprs).select_from(Device)
+        for join in joins:
+            target, onclause = INVENTORY_JOINS[join]
+            q = q.outerjoin(target, onclause)
+        q = filter_devices(q, spec["site_ids"], spec["vlan"], spec["status"], spec["model"])
+        q = q.order_by(Device.hostname, Device.id)
+        if offset:
+            q = q.offset(offset)
+        if limit is not None:
+            q = q.limit(limit)
+        for row in q.yield_per(EXPORT_BATCH_SIZE):
+            yield [_format_cell(value) for value in row]
+    finally:
+        db.close()
+
+
+def iter_latest_configs(spec: dict):
+    """Yield ``(filename, text, created_at)`` for the latest backup per device.
+
+    A single ``DISTINCT ON`` query is streamed from a server-side cursor so
+    memory use does not grow with the number of devices.
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(
+                Device.id,
+                Device.hostname,
+                ConfigBackup.created_at,
+                ConfigBackup._config_text,
+                ConfigBlob.codec,
+                ConfigBlob.data,
+            )
+            .join(Device, Device.id == ConfigBackup.device_id)
+            .outerjoin(ConfigBlob, ConfigBlob.hash == ConfigBackup.config_hash)
+            .filter(Device.site_id.in_(spec["site_ids"]))
+        )
+        if spec.get("start"):
+            query = query.filter(ConfigBackup.created_at >= datetime.fromisoformat(spec["start"]))
+        if spec.get("end"):
+            query = query.filter(ConfigBackup.created_at <= datetime.fromisoformat(spec["end"]))
+        query = (
+            query.distinct(ConfigBackup.device_id)
+            .order_by(
+                ConfigBackup.device_id,
+                ConfigBackup.created_at.desc(),
+                ConfigBackup.id.desc(),
+            )
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for dev_id, hostname, created_at, inline, codec, data in query:
+            if inline is not None:
+                text = inline
+            elif data is not None:
+                text = decompress(codec, data)
+            else:
+                text = ""
+            yield f"{hostname}_{dev_id}.txt", text, created_at
+    finally:
+        db.close()
+
+
+def _counted(rows, progress: Callable[[int], None] | None):
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if progress and done % PROGRESS_INTERVAL == 0:
+            progress(done)
+    if progress:
+        progress(done)
+
+
+def _write_chunks(path: str, chunks) -> None:
+    tmp = f"{path}.{os.getpid()}.part"
+    with open(tmp, "wb") as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+    os.replace(tmp, path)
+
+
+def write_export(kind: str, spec: dict, path: str, progress: Callable[[int], None] | None = None) -> None:
+    """Write a CSV, XLSX or config ZIP export for ``spec`` to ``path``."""
+    if kind == "zip":
+        _write_chunks(path, iter_zip(_counted(iter_latest_configs(spec), progress)))
+        return
+    header = [label for _name, label in spec["columns"]]
+    rows = _counted(iter_inventory_rows(spec), progress)
+    if kind == "xlsx":
+        _write_chunks(path, iter_xlsx(header, rows, title="Inventory"))
+    else:
+        _write_chunks(path, iter_csv(header, rows))
+
+
+def write_inventory_pdf(
+    spec: dict,
+    path: str,
+    offset: int | None = None,
+    limit: int | None = None,
+    title_page: bool = True,
+) -> int:
+    """Render inventory rows ``offset``..``offset+limit`` as a PDF at ``path``.
+
+    Returns the number of rows rendered.  Chunks rendered separately are
+    joined with :func:`merge_pdfs`.
+    """
+    if SimpleDocTemplate is None:
+        raise RuntimeError("reportlab is required for PDF exports")
+    tmp = f"{path}.{os.getpid()}.part"
+    doc = SimpleDocTemplate(tmp, pagesize=landscape(letter))
+    elements = []
+    if title_page:
+        styles = getSampleStyleSheet()
+        logo_path = os.path.join(STATIC_DIR, "logo.png")
+        if os.path.exists(logo_path):
+            try:
+                elements.append(Image(logo_path, width=100, height=50))
+            except Exception:
+                pass
+        elements.extend([
+            Paragraph("Device Inventory", styles["Title"]),
+            Spacer(1, 12),
+            Paragraph(datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"), styles["Normal"]),
+            Spacer(1, 12),
+        ])
+
+    table_data = [[label for _name, label in spec["columns"]]]
+    table_data.extend(iter_inventory_rows(spec, offset, limit))
+    table = Table(table_data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
+    ]))
+    elements.append(table)
+    doc.build(elements)
+    os.replace(tmp, path)
+    return len(table_data) - 1
+
+
+def merge_pdfs(paths: list[str], path: str) -> None:
+    """Concatenate the PDF chunks in ``paths`` into ``path``."""
+    writer = PdfWriter()
+    for part in paths:
+        writer.append(part)
+    tmp = f"{path}.{os.getpid()}.part"
+    with open(tmp, "wb") as fh:
+        writer.write(fh)
+    os.replace(tmp, path)
@@ -0,0 +1,118 @@
+"""Fixed-size in-memory history of scalar metrics.
+
+Each metric keeps one ring buffer per resolution (1 s, 10 s and 1 min by
+default).  Samples go into the finest buffer; coarser buffers receive the
+average, minimum and maximum of each completed step.  Buffers are
+preallocated ``array('d')`` blocks, so memory use is fixed no matter how
+long the process runs.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+
+# (step in seconds, number of points): 10 minutes, 1 hour and 24 hours
+RESOLUTIONS = ((1, 600), (10, 360), (60, 1440))
+
+Point = tuple[float, float, float, float]
+
+
+class RingBuffer:
+    """Timestamped ``(avg, min, max)`` points, oldest overwritten first."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.times = array("d", bytes(8 * size))
+        self.avg = array("d", bytes(8 * size))
+        self.min = array("d", bytes(8 * size))
+        self.max = array("d", bytes(8 * size))
+        self.start = 0
+        self.count = 0
+
+    def append(self, ts: float, avg: float, low: float, high: float) -> None:
+        idx = (self.start + self.count) % self.size
+        if self.count < self.size:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.size
+        self.times[idx] = ts
+        self.avg[idx] = avg
+        self.min[idx] = low
+        self.max[idx] = high
+
+    def points(self, since: float | None = None) -> list[Point]:
+        out = []
+        for i in range(self.count):
+            j = (self.start + i) % self.size
+            if since is None or self.times[j] > since:
+                out.append((self.times[j], self.avg[j], self.min[j], self.max[j]))
+        return out
+
+
+class Series:
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.steps = [step for step, _ in resolutions]
+        self.buffers = {step: RingBuffer(size) for step, size in resolutions}
+        # step -> [bucket start, sum, count, min, max] for the open bucket
+        self._open = {step: None for step in self.steps[1:]}
+
+    def add(self, ts: float, value: float) -> None:
+        self.buffers[self.steps[0]].append(ts, value, value, value)
+        for step in self.steps[1:]:
+            bucket = ts - ts % step
+            acc = self._open[step]
+            if acc is not None and acc[0] != bucket:
+                self.buffers[step].append(acc[0], acc[1] / acc[2], acc[3], acc[4])
+                acc = None
+            if acc is None:
+                self._open[step] = [bucket, value, 1, value, value]
+            else:
+                acc[1] += value
+                acc[2] += 1
+                acc[3] = min(acc[3], value)
+                acc[4] = max(acc[4], value)
+
+
+class MetricHistory:
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.resolutions = resolutions
+        self._series: dict[str, Series] = {}
+        self._lock = threading.Lock()
+
+    def record(self, ts: float, values: dict[str, float]) -> None:
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                series = self._series.get(name)
+                if series is None:
+                    series = self._series[name] = Series(self.resolutions)
+                series.add(ts, float(value))
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def latest(self) -> dict[str, float]:
+        """Most recent finest-resolution value of each metric."""
+        with self._lock:
+            out = {}
+            for name, series in self._series.items():
+                buf = series.buffers[series.steps[0]]
+                if buf.count:
+                    out[name] = buf.avg[(buf.start + buf.count - 1) % buf.size]
+            return out
+
+    def points(self, step: int, names=None, since: float | None = None) -> dict[str, list[Point]]:
+        """Points at resolution ``step`` newer than ``since`` for each metric."""
+        with self._lock:
+            selected = names or list(self._series)
+            return {
+                name: self._series[name].buffers[step].points(since)
+                for name in selected
+                if name in self._series and step in self._series[name].buffers
+            }
+
+
+metric_history = MetricHistory()
@@ -1,8 +1,13 @@
 import os
 import time
 import shutil
+import threading
 from typing import Any, Dict
 
+from core.utils.password_hashing import password_hash_stats
+from server.utils.metric_history import metric_history
+from server.workers.loop_lag import last_lag_ms, loop_lag_stats
+
 try:
     import psutil
     HAS_PSUTIL = True
@@ -11,13 +16,75 @@ except Exception:  # pragma: no cover - optional dependency
     HAS_PSUTIL = False
 
 
+# Seconds between full process-table scans for gunicorn workers
+WORKER_RESCAN_INTERVAL = float(os.environ.get("WORKER_RESCAN_INTERVAL", "60"))
+
+_workers: dict[int, Any] = {}
+_workers_scanned = 0.0
+_workers_lock = threading.Lock()
+
+
+def _gunicorn_workers() -> list:
+    """Cached ``psutil.Process`` handles of the gunicorn processes.
+
+    The process table is scanned again only every ``WORKER_RESCAN_INTERVAL``
+    seconds or when a cached process has exited.  Reusing the handles also
+    lets ``cpu_percent`` measure since the previous call.
+    """
+    global _workers_scanned
+    with _workers_lock:
+        alive = {pid: p for pid, p in _workers.items() if p.is_running()}
+        stale = time.monotonic() - _workers_scanned > WORKER_RESCAN_INTERVAL
+        if stale or len(alive) != len(_workers):
+            found = {}
+            for proc in psutil.process_iter(["pid", "cmdline"]):
+                cmd = " ".join(proc.info.get("cmdline") or [])
+                if "gunicorn" in cmd:
+                    found[proc.info["pid"]] = alive.get(proc.info["pid"], proc)
+            alive = found
+            _workers_scanned = time.monotonic()
+        _workers.clear()
+        _workers.update(alive)
+        return list(alive.values())
+
+
+def sample_values() -> Dict[str, float]:
+    """Cheap scalar readings taken by the metrics sampler every second."""
+    values: Dict[str, float] = {
+        "loop_lag_ms": last_lag_ms(),
+        "password_hash_waiting": password_hash_stats()["waiting"],
+    }
+    if psutil is None:
+        return values
+    values["cpu_total"] = psutil.cpu_percent()
+    for i, pct in enumerate(psutil.cpu_percent(percpu=True)):
+        values[f"cpu_{i}"] = pct
+    values["memory_percent"] = psutil.virtual_memory().percent
+    values["load_1"] = os.getloadavg()[0]
+    net = psutil.net_io_counters()
+    if net:
+        values["net_bytes_sent"] = net.bytes_sent
+        values["net_bytes_recv"] = net.bytes_recv
+    try:
+        u = shutil.disk_usage("/")
+        values["disk_used_percent"] = u.used / u.total * 100 if u.total else 0.0
+    except OSError:
+        pass
+    return values
+
+
 def gather_metrics() -> Dict[str, Any]:
     """Collect system and application metrics."""
     if psutil is None:
         return {"error": "psutil not installed"}
 
-    cpu_total = psutil.cpu_percent()
-    cpu_per_core = psutil.cpu_percent(percpu=True)
+    # Interval-less cpu_percent() calls share one baseline per process, so
+    # reuse the sampler's readings instead of resetting its interval
+    latest = metric_history.latest()
+    cpu_total = latest.get("cpu_total")
+    cpu_per_core = []
+    while f"cpu_{len(cpu_per_core)}" in latest:
+        cpu_per_core.append(latest[f"cpu_{len(cpu_per_core)}"])
     vm = psutil.virtual_memory()
     load1, load5, load15 = os.getloadavg()
     net_io = psutil.net_io_counters(pernic=True)
@@ -40,16 +107,14 @@ def gather_metrics() -> Dict[str, Any]:
     except Exception:
         disk_usage = None
     workers = []
-    for proc in psutil.process_iter(["pid", "cmdline", "cpu_percent", "create_time"]):
-        cmd = " ".join(proc.info.get("cmdline") or [])
-        if "gunicorn" in cmd:
-            try:
-                cpu = proc.cpu_percent(interval=None)
-                uptime = time.time() - proc.info["create_time"]
-            except Exception:
-                cpu = 0
-                uptime = 0
-            workers.append({"pid": proc.info["pid"], "cpu_percent": cpu, "uptime": uptime})
+    for proc in _gunicorn_workers():
+        try:
+            cpu = proc.cpu_percent(interval=None)
+            uptime = time.time() - proc.create_time()
+        except Exception:
+            cpu = 0
+            uptime = 0
+        workers.append({"pid": proc.pid, "cpu_percent": cpu, "uptime": uptime})
     metrics = {
         "cpu_total": cpu_total,
         "cpu_per_core": cpu_per_core,
@@ -60,5 +125,7 @@ def gather_metrics() -> Dict[str, Any]:
         "disk_usage": disk_usage,
         "gunicorn_workers": len(workers),
         "worker_stats": workers,
+        "event_loop": loop_lag_stats(),
+        "password_hashing": password_hash_stats(),
     }
     return metrics
@@ -7,7 +7,7 @@ import time
 import logging
 import os
 
-from core.utils.ssh import build_conn_kwargs
+from core.utils.ssh import build_conn_kwargs, ssh_connect
 from core.utils.device_detect import detect_ssh_platform
 
 from core.utils.db_session import SessionLocal
@@ -57,7 +57,7 @@ async def terminal_ws(websocket: WebSocket, device_id: int):
         conn_kwargs = build_conn_kwargs(cred)
 
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn, user)
                 _, session = await conn.create_session(asyncssh.SSHClientProcess)
 
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import os
+
+from core.utils.auth_cache import flush_key_usage
+from core.utils.db_session import SessionLocal
+
+API_KEY_USAGE_INTERVAL = int(os.environ.get("API_KEY_USAGE_INTERVAL", "30"))
+
+
+def _flush_once() -> int:
+    db = SessionLocal()
+    try:
+        return flush_key_usage(db)
+    finally:
+        db.close()
+
+
+async def _usage_loop() -> None:
+    log = logging.getLogger(__name__)
+    while True:
+        await asyncio.sleep(API_KEY_USAGE_INTERVAL)
+        try:
+            await asyncio.to_thread(_flush_once)
+        except Exception as exc:
+            log.error("API key usage flush failed: %s", exc)
+
+
+_usage_task: asyncio.Task | None = None
+
+
+def start_api_key_usage_writer() -> None:
+    global _usage_task
+    _usage_task = asyncio.create_task(_usage_loop())
+
+
+async def stop_api_key_usage_writer() -> None:
+    global _usage_task
+    if _usage_task:
+        _usage_task.cancel()
+        try:
+            await _usage_task
+        except asyncio.CancelledError:
+            pass
+        _usage_task = None
+        # Write stamps collected since the last interval
+        try:
+            await asyncio.to_thread(_flush_once)
+        except Exception as exc:
+            logging.getLogger(__name__).error("API key usage flush failed: %s", exc)
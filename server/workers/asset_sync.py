@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import httpx
+
+from core.utils.assets import asset_exists, asset_path, store_named
+from .cloud_sync import SYNC_TIMEOUT, _request_with_retry
+
+
+async def push_assets(
+    base_url: str, names: set[str], log: logging.Logger, site_id: str, api_key: str
+) -> int:
+    """Upload the assets in ``names`` the cloud does not have yet."""
+    names = {n for n in names if asset_exists(n)}
+    if not names:
+        return 0
+    result = await _request_with_retry(
+        "POST", f"{base_url}/assets/missing", {"names": sorted(names)}, log, site_id, api_key
+    )
+    missing = (result or {}).get("missing", [])
+    headers = {"Site-ID": site_id, "API-Key": api_key}
+    sent = 0
+    async with httpx.AsyncClient(timeout=SYNC_TIMEOUT) as client:
+        for name in missing:
+            if name not in names:
+                continue
+            data = await asyncio.to_thread(_read, name)
+            resp = await client.put(f"{base_url}/assets/{name}", content=data, headers=headers)
+            resp.raise_for_status()
+            sent += 1
+    return sent
+
+
+async def pull_assets(
+    base_url: str, names: set[str], log: logging.Logger, site_id: str, api_key: str
+) -> int:
+    """Download the assets in ``names`` missing locally."""
+    missing = sorted(n for n in names if not asset_exists(n))
+    if not missing:
+        return 0
+    headers = {"Site-ID": site_id, "API-Key": api_key}
+    fetched = 0
+    async with httpx.AsyncClient(timeout=SYNC_TIMEOUT) as client:
+        for name in missing:
+            resp = await client.get(f"{base_url}/assets/{name}", headers=headers)
+            if resp.status_code == 404:
+                log.warning("Asset %s not available from cloud", name)
+                continue
+            resp.raise_for_status()
+            await asyncio.to_thread(store_named, name, resp.content)
+            fetched += 1
+    return fetched
+
+
+def _read(name: str) -> bytes:
+    with open(asset_path(name), "rb") as f:
+        return f.read()
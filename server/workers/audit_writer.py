@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import os
+
+from core.utils.audit import audit_queue
+from core.utils.db_session import engine
+
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "2"))
+
+
+async def _writer_loop() -> None:
+    log = logging.getLogger(__name__)
+    while True:
+        await asyncio.sleep(AUDIT_FLUSH_INTERVAL)
+        if not len(audit_queue):
+            continue
+        try:
+            await asyncio.to_thread(audit_queue.flush)
+        except Exception as exc:
+            log.error("Audit flush failed: %s", exc)
+
+
+_writer_task: asyncio.Task | None = None
+
+
+def start_audit_writer() -> None:
+    global _writer_task
+    if engine is None:
+        return
+    audit_queue.bind = engine
+    _writer_task = asyncio.create_task(_writer_loop())
+
+
+async def stop_audit_writer() -> None:
+    global _writer_task
+    if _writer_task:
+        _writer_task.cancel()
+        try:
+            await _writer_task
+        except asyncio.CancelledError:
+            pass
+        _writer_task = None
+        try:
+            await asyncio.to_thread(audit_queue.flush)
+        except Exception as exc:
+            logging.getLogger(__name__).error("Audit flush failed: %s", exc)
+    audit_queue.bind = None
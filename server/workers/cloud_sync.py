@@ -11,6 +11,7 @@ from core.utils.db_session import SessionLocal
 from modules.inventory.models import Device
 from modules.inventory import models as inventory_models  # noqa: F401
 from core.models.models import SystemTunable
+from core.utils.tunables import get_tunable
 
 SYNC_INTERVAL = int(os.environ.get("SYNC_FREQUENCY", "300"))
 SYNC_TIMEOUT = int(os.environ.get("SYNC_TIMEOUT", "10"))
@@ -29,40 +30,15 @@ def _internet_available(
 
 def _get_sync_config() -> tuple[str, str, str, str]:
     """Return push URL, pull URL, site id and API key from env or tunables."""
-    db = SessionLocal()
-    try:
-        base = os.environ.get("CLOUD_BASE_URL")
-        if not base:
-            row = (
-                db.query(SystemTunable)
-                .filter(SystemTunable.name == "Cloud Base URL")
-                .first()
-            )
-            base = row.value if row else None
-        if not base:
-            return "", "", "", ""
-        base = base.rstrip("/")
-        push = os.environ.get("SYNC_PUSH_URL") or f"{base}/api/v1/sync/push"
-        pull = os.environ.get("SYNC_PULL_URL") or f"{base}/api/v1/sync/pull"
-        api_key = os.environ.get("SYNC_API_KEY")
-        if not api_key:
-            row = (
-                db.query(SystemTunable)
-                .filter(SystemTunable.name == "Cloud API Key")
-                .first()
-            )
-            api_key = row.value if row else ""
-        site_id = os.environ.get("SITE_ID")
-        if not site_id:
-            row = (
-                db.query(SystemTunable)
-                .filter(SystemTunable.name == "Cloud Site ID")
-                .first()
-            )
-            site_id = row.value if row else ""
-        return push, pull, site_id, api_key
-    finally:
-        db.close()
+    base = os.environ.get("CLOUD_BASE_URL") or get_tunable("Cloud Base URL")
+    if not base:
+        return "", "", "", ""
+    base = base.rstrip("/")
+    push = os.environ.get("SYNC_PUSH_URL") or f"{base}/api/v1/sync/push"
+    pull = os.environ.get("SYNC_PULL_URL") or f"{base}/api/v1/sync/pull"
+    api_key = os.environ.get("SYNC_API_KEY") or get_tunable("Cloud API Key", "")
+    site_id = os.environ.get("SITE_ID") or get_tunable("Cloud Site ID", "")
+    return push, pull, site_id, api_key
 
 
 async def _update_timestamp(db, name: str) -> None:
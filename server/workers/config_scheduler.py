@@ -1,13 +1,16 @@
 import asyncio
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
-import asyncssh
 import os
 
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from puresnmp import Client, PyWrapper, V2C
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
-from core.utils.ssh import build_conn_kwargs
+from core.utils.ssh import build_conn_kwargs, ssh_connect, run_command
+from core.utils.instrumentation import SCHEDULER_LAG_SECONDS, SNMP_SECONDS, job_label, timed
 from core.utils.device_detect import detect_ssh_platform
 from core.utils.db_session import SessionLocal
 from modules.inventory.models import Device
@@ -21,14 +24,30 @@ from core.models.models import (
     EmailLog,
 )
 from core.utils.audit import log_audit
+from core.utils.config_store import record_config_pull, prune_backups
 from core.utils.email_utils import send_email
 from core.utils.templates import templates
+from server.utils.adaptive_polling import AdaptivePollScheduler, VOLATILITY_HALF_LIFE
 
 PORT_HISTORY_RETENTION_DAYS = int(os.environ.get("PORT_HISTORY_RETENTION_DAYS", "60"))
+SNMP_POLL_TICK = int(os.environ.get("SNMP_POLL_TICK", "10"))
+SNMP_POLL_REFRESH = int(os.environ.get("SNMP_POLL_REFRESH", "300"))
+SNMP_POLL_CONCURRENCY = int(os.environ.get("SNMP_POLL_CONCURRENCY", "20"))
 
 
 scheduler = AsyncIOScheduler()
 
+
+def _record_job_lag(event) -> None:
+    now = datetime.now(timezone.utc)
+    for run_time in event.scheduled_run_times:
+        SCHEDULER_LAG_SECONDS.labels(job_label(event.job_id)).observe(
+            max(0.0, (now - run_time).total_seconds())
+        )
+
+
+scheduler.add_listener(_record_job_lag, EVENT_JOB_SUBMITTED)
+
 INTERVAL_MAP = {
     "hourly": {"hours": 1},
     "daily": {"days": 1},
@@ -57,29 +76,18 @@ async def run_config_pull(device_id: int):
     conn_kwargs = build_conn_kwargs(cred)
     output = ""
     try:
-        async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+        async with ssh_connect(device.ip, **conn_kwargs) as conn:
             await detect_ssh_platform(db, device, conn)
-            result = await conn.run("show running-config", check=False)
+            result = await run_command(conn, "show running-config", check=False)
             output = result.stdout
             device.last_seen = datetime.now(timezone.utc)
             device.last_config_pull = datetime.now(timezone.utc)
-            backup = ConfigBackup(
-                device_id=device.id,
-                source="scheduled",
-                config_text=output,
-            )
-            db.add(backup)
+            _, changed = record_config_pull(db, device.id, output, "scheduled")
             db.commit()
+            if not changed:
+                return
             max_backups = int(os.environ.get("MAX_BACKUPS", "10"))
-            backups = (
-                db.query(ConfigBackup)
-                .filter(ConfigBackup.device_id == device.id)
-                .order_by(ConfigBackup.created_at.desc())
-                .all()
-            )
-            if len(backups) > max_backups:
-                for old in backups[max_backups:]:
-                    db.delete(old)
+            if prune_backups(db, device.id, max_backups):
                 db.commit()
             log_audit(db, None, "pull", device, "Scheduled config pull")
     except Exception as exc:
@@ -120,28 +128,116 @@ def unschedule_device_config_pull(device_id: int):
         pass
 
 
-async def _poll_device_snmp_status(db, device: Device) -> None:
+async def _poll_device_snmp_status(device: Device) -> None:
     profile = device.snmp_community
     if not profile:
         return
     client = PyWrapper(Client(device.ip, V2C(profile.community_string)))
     try:
-        val = await client.get("1.3.6.1.2.1.1.3.0")
+        with timed(SNMP_SECONDS, oid="1.3.6.1.2.1.1.3.0"):
+            val = await client.get("1.3.6.1.2.1.1.3.0")
         device.uptime_seconds = int(val) // 100
         device.snmp_reachable = True
     except Exception:
         device.snmp_reachable = False
         device.uptime_seconds = None
     device.last_snmp_check = datetime.now(timezone.utc)
-    db.commit()
 
 
-async def poll_all_device_status() -> None:
+poll_scheduler = AdaptivePollScheduler()
+_last_poll_refresh: datetime | None = None
+
+
+def _port_churn_counts(db, since: datetime) -> dict[int, int]:
+    """Return the number of port oper-status changes per device since ``since``."""
+    prev_status = (
+        func.lag(PortStatusHistory.oper_status)
+        .over(
+            partition_by=(
+                PortStatusHistory.device_id,
+                PortStatusHistory.interface_name,
+            ),
+            order_by=PortStatusHistory.timestamp,
+        )
+        .label("prev_status")
+    )
+    history = (
+        db.query(
+            PortStatusHistory.device_id.label("device_id"),
+            PortStatusHistory.oper_status.label("oper_status"),
+            prev_status,
+        )
+        .filter(PortStatusHistory.timestamp >= since)
+        .subquery()
+    )
+    rows = (
+        db.query(history.c.device_id, func.count())
+        .filter(
+            history.c.prev_status.is_not(None),
+            history.c.prev_status != history.c.oper_status,
+        )
+        .group_by(history.c.device_id)
+        .all()
+    )
+    return {dev_id: count for dev_id, count in rows}
+
+
+def refresh_poll_schedule() -> None:
+    """Load pollable devices and recent port churn into the poll scheduler."""
+    global _last_poll_refresh
     db = SessionLocal()
-    devices = db.query(Device).filter(Device.snmp_community_id.is_not(None)).all()
-    for dev in devices:
-        await _poll_device_snmp_status(db, dev)
-    db.close()
+    try:
+        rows = (
+            db.query(
+                Device.id,
+                Device.priority,
+                Device.uptime_seconds,
+                Device.snmp_reachable,
+            )
+            .filter(Device.snmp_community_id.is_not(None))
+            .all()
+        )
+        since = datetime.now(timezone.utc) - timedelta(seconds=VOLATILITY_HALF_LIFE)
+        churn = _port_churn_counts(db, since)
+    finally:
+        db.close()
+    poll_scheduler.sync_devices({r.id: bool(r.priority) for r in rows}, churn)
+    for r in rows:
+        poll_scheduler.seed_state(r.id, r.uptime_seconds, r.snmp_reachable)
+    _last_poll_refresh = datetime.now(timezone.utc)
+
+
+async def poll_due_device_status() -> None:
+    """Poll the devices the adaptive scheduler marks as due."""
+    now = datetime.now(timezone.utc)
+    if _last_poll_refresh is None or (
+        now - _last_poll_refresh
+    ).total_seconds() >= SNMP_POLL_REFRESH:
+        refresh_poll_schedule()
+    due = poll_scheduler.due()
+    if not due:
+        return
+    db = SessionLocal()
+    try:
+        devices = (
+            db.query(Device)
+            .options(selectinload(Device.snmp_community))
+            .filter(Device.id.in_(due))
+            .all()
+        )
+        sem = asyncio.Semaphore(SNMP_POLL_CONCURRENCY)
+
+        async def _poll(dev: Device) -> None:
+            async with sem:
+                await _poll_device_snmp_status(dev)
+            poll_scheduler.record_result(
+                dev.id, dev.uptime_seconds, bool(dev.snmp_reachable)
+            )
+
+        await asyncio.gather(*(_poll(dev) for dev in devices))
+        db.commit()
+    finally:
+        db.close()
 
 
 async def send_site_summaries():
@@ -262,11 +358,13 @@ def start_config_scheduler() -> None:
     )
 
     scheduler.add_job(
-        poll_all_device_status,
+        poll_due_device_status,
         trigger="interval",
-        minutes=30,
+        seconds=SNMP_POLL_TICK,
         id="snmp_status_poll",
         replace_existing=True,
+        coalesce=True,
+        max_instances=1,
     )
 
 
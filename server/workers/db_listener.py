@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+
+from core.utils import db_notify
+from core.utils.db_session import engine
+from core.utils.ip_banning import BAN_CHANNEL, ban_cache
+from core.utils.tunables import TUNABLE_CHANNEL, tunable_cache
+
+DB_LISTEN_RETRY = float(os.environ.get("DB_LISTEN_RETRY", "5"))
+
+# Channel -> cache dropped when another process notifies on it
+CHANNELS = {
+    TUNABLE_CHANNEL: tunable_cache.invalidate,
+    BAN_CHANNEL: ban_cache.invalidate,
+}
+
+
+def _connect():
+    """Open a dedicated autocommit connection listening on every channel."""
+    conn = engine.raw_connection()
+    # Keep the LISTEN connection out of the pool
+    conn.detach()
+    dbapi = conn.driver_connection
+    dbapi.autocommit = True
+    with dbapi.cursor() as cur:
+        for channel in CHANNELS:
+            cur.execute(f"LISTEN {channel}")
+    return conn, dbapi
+
+
+def _drain(dbapi) -> set[str]:
+    """Read pending notifications; return channels changed by other processes."""
+    dbapi.poll()
+    changed = set()
+    own = db_notify.SENDER_ID
+    while dbapi.notifies:
+        note = dbapi.notifies.pop(0)
+        if note.payload != own:
+            changed.add(note.channel)
+    return changed
+
+
+def _invalidate(channels) -> None:
+    for channel in channels:
+        handler = CHANNELS.get(channel)
+        if handler:
+            handler()
+
+
+async def _listen_loop() -> None:
+    log = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            conn, dbapi = await asyncio.to_thread(_connect)
+        except Exception as exc:
+            log.warning("Database listener could not connect: %s", exc)
+            await asyncio.sleep(DB_LISTEN_RETRY)
+            continue
+        # Changes made while nobody was listening were missed
+        _invalidate(CHANNELS)
+        ready = asyncio.Event()
+        fileno = dbapi.fileno()
+        loop.add_reader(fileno, ready.set)
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                _invalidate(_drain(dbapi))
+        except Exception as exc:
+            log.warning("Database listener connection lost: %s", exc)
+        finally:
+            loop.remove_reader(fileno)
+            conn.close()
+        await asyncio.sleep(DB_LISTEN_RETRY)
+
+
+_listen_task: asyncio.Task | None = None
+
+
+def start_db_listener() -> None:
+    global _listen_task
+    if engine is None or engine.dialect.name != "postgresql":
+        return
+    if engine.dialect.driver != "psycopg2":
+        logging.getLogger(__name__).warning(
+            "Database listener needs psycopg2; cached tunables and bans fall back to their TTLs"
+        )
+        return
+    _listen_task = asyncio.create_task(_listen_loop())
+
+
+async def stop_db_listener() -> None:
+    global _listen_task
+    if _listen_task:
+        _listen_task.cancel()
+        try:
+            await _listen_task
+        except asyncio.CancelledError:
+            pass
+        _listen_task = None
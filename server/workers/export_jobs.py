@@ -0,0 +1,237 @@
+"""Background export jobs.
+
+Exports run in a ``ProcessPoolExecutor`` so building large files never blocks
+the event loop.  Finished files are cached on disk keyed by the export spec
+and a data version token and evicted after ``EXPORT_CACHE_TTL`` seconds.
+Large PDFs are split into row chunks rendered in parallel and merged.
+
+Job state lives in small JSON files next to the cache so any web worker can
+report progress for a job started by another.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from server.utils import exports
+
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "2"))
+EXPORT_CACHE_DIR = os.environ.get(
+    "EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "masterip-exports")
+)
+EXPORT_CACHE_TTL = int(os.environ.get("EXPORT_CACHE_TTL", "3600"))
+EXPORT_PDF_CHUNK_ROWS = int(os.environ.get("EXPORT_PDF_CHUNK_ROWS", "1000"))
+
+EXPORT_KINDS = {
+    "csv": ("inventory.csv", "text/csv"),
+    "xlsx": (
+        "inventory.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "pdf": ("inventory.pdf", "application/pdf"),
+    "zip": ("config-snapshot.zip", "application/zip"),
+}
+
+_pool: ProcessPoolExecutor | None = None
+_tasks: set[asyncio.Task] = set()
+
+
+def _init_worker() -> None:
+    # Connections are per process; never reuse ones opened by the parent.
+    from core.utils.db_session import engine
+
+    if engine is not None:
+        engine.dispose(close=False)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=EXPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _pool
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(EXPORT_CACHE_DIR, "jobs", f"{job_id}.json")
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def load_job(job_id: str) -> dict | None:
+    """Return the stored state of ``job_id`` or ``None``."""
+    if not job_id.replace("-", "").isalnum():
+        return None
+    try:
+        with open(_job_path(job_id)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def update_job(job_id: str, **fields) -> dict:
+    job = load_job(job_id) or {}
+    job.update(fields)
+    job["updated"] = time.time()
+    _write_json(_job_path(job_id), job)
+    return job
+
+
+def cache_key(kind: str, spec: dict, version: str) -> str:
+    payload = json.dumps({"kind": kind, "spec": spec, "version": version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def result_path(key: str, kind: str) -> str:
+    return os.path.join(EXPORT_CACHE_DIR, f"{key}.{kind}")
+
+
+def evict_expired(now: float | None = None) -> int:
+    """Delete cached results and finished job files older than the TTL."""
+    now = now or time.time()
+    removed = 0
+    jobs_dir = os.path.join(EXPORT_CACHE_DIR, "jobs")
+    for folder in (EXPORT_CACHE_DIR, jobs_dir):
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                if not os.path.isfile(path) or now - os.path.getmtime(path) <= EXPORT_CACHE_TTL:
+                    continue
+                # Queued and running jobs only touch their file on progress
+                if folder == jobs_dir and name.endswith(".json"):
+                    job = load_job(name[: -len(".json")]) or {}
+                    if job.get("status") == "running":
+                        continue
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+# -- functions executed in worker processes ---------------------------------
+
+
+def _run_export(job_id: str, kind: str, spec: dict, path: str) -> None:
+    exports.write_export(kind, spec, path, lambda done: update_job(job_id, progress=done))
+
+
+def _run_pdf_chunk(spec: dict, path: str, offset: int, limit: int) -> int:
+    return exports.write_inventory_pdf(spec, path, offset, limit, title_page=offset == 0)
+
+
+def _run_merge(paths: list[str], path: str) -> None:
+    exports.merge_pdfs(paths, path)
+    for part in paths:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+
+
+# -- job orchestration in the web process -----------------------------------
+
+
+def _version_and_total(kind: str, spec: dict) -> tuple[str, int | None]:
+    version = exports.data_version(kind, spec)
+    total = exports.count_devices(spec) if kind != "zip" else None
+    return version, total
+
+
+async def _run_pdf(job_id: str, spec: dict, path: str, total: int) -> None:
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if exports.PdfWriter is None or total <= EXPORT_PDF_CHUNK_ROWS:
+        await loop.run_in_executor(pool, _run_pdf_chunk, spec, path, 0, total)
+        return
+    offsets = list(range(0, total, EXPORT_PDF_CHUNK_ROWS))
+    parts = [f"{path}.{i}" for i in range(len(offsets))]
+    futures = [
+        loop.run_in_executor(pool, _run_pdf_chunk, spec, part, offset, EXPORT_PDF_CHUNK_ROWS)
+        for part, offset in zip(parts, offsets)
+    ]
+    done = 0
+    for fut in asyncio.as_completed(futures):
+        done += await fut
+        update_job(job_id, progress=done)
+    await loop.run_in_executor(pool, _run_merge, parts, path)
+
+
+async def _run_job(job_id: str, kind: str, spec: dict, path: str, total: int | None) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        if kind == "pdf":
+            await _run_pdf(job_id, spec, path, total or 0)
+        else:
+            await loop.run_in_executor(_get_pool(), _run_export, job_id, kind, spec, path)
+        progress = total if total is not None else (load_job(job_id) or {}).get("progress")
+        update_job(job_id, status="done", progress=progress)
+    except Exception as exc:
+        update_job(job_id, status="error", error=str(exc))
+
+
+async def submit_export(kind: str, spec: dict, user_id: int) -> dict:
+    """Start an export job, or finish it immediately from the cache."""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind {kind}")
+    os.makedirs(os.path.join(EXPORT_CACHE_DIR, "jobs"), exist_ok=True)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, evict_expired)
+    version, total = await loop.run_in_executor(None, _version_and_total, kind, spec)
+    key = cache_key(kind, spec, version)
+    path = result_path(key, kind)
+    job_id = uuid.uuid4().hex
+    job = update_job(
+        job_id,
+        id=job_id,
+        kind=kind,
+        user_id=user_id,
+        path=path,
+        total=total,
+        progress=0,
+        status="running",
+        error=None,
+        created=time.time(),
+    )
+    if os.path.exists(path):
+        return update_job(job_id, status="done", progress=total, cached=True)
+    task = asyncio.create_task(_run_job(job_id, kind, spec, path, total))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+async def wait_for_job(job_id: str, poll: float = 0.5) -> dict:
+    """Wait until ``job_id`` has finished and return its final state."""
+    while True:
+        job = load_job(job_id)
+        if job is None or job.get("status") != "running":
+            return job
+        await asyncio.sleep(poll)
+
+
+async def stop_export_jobs() -> None:
+    global _pool
+    for task in list(_tasks):
+        task.cancel()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -8,34 +8,21 @@ import httpx
 
 from core.utils.db_session import SessionLocal
 from core.models.models import SystemTunable
+from core.utils.tunables import get_bool, get_tunable
 
 HEARTBEAT_INTERVAL = int(os.environ.get("HEARTBEAT_INTERVAL", "300"))
 
 
 def _get_config() -> tuple[str, str, str, bool]:
-    db = SessionLocal()
-    try:
-        url = os.environ.get("CLOUD_BASE_URL")
-        if not url:
-            row = db.query(SystemTunable).filter(SystemTunable.name == "Cloud Base URL").first()
-            url = row.value if row else ""
-        site_id = os.environ.get("SITE_ID")
-        if not site_id:
-            row = db.query(SystemTunable).filter(SystemTunable.name == "Cloud Site ID").first()
-            site_id = row.value if row else ""
-        api_key = os.environ.get("SYNC_API_KEY")
-        if not api_key:
-            row = db.query(SystemTunable).filter(SystemTunable.name == "Cloud API Key").first()
-            api_key = row.value if row else ""
-        enabled_env = os.environ.get("ENABLE_CLOUD_SYNC")
-        if enabled_env is None:
-            row = db.query(SystemTunable).filter(SystemTunable.name == "Enable Cloud Sync").first()
-            enabled = row and str(row.value).lower() in {"true", "1", "yes"}
-        else:
-            enabled = enabled_env == "1"
-        return url, site_id, api_key, enabled
-    finally:
-        db.close()
+    url = os.environ.get("CLOUD_BASE_URL") or get_tunable("Cloud Base URL", "")
+    site_id = os.environ.get("SITE_ID") or get_tunable("Cloud Site ID", "")
+    api_key = os.environ.get("SYNC_API_KEY") or get_tunable("Cloud API Key", "")
+    enabled_env = os.environ.get("ENABLE_CLOUD_SYNC")
+    if enabled_env is None:
+        enabled = get_bool("Enable Cloud Sync")
+    else:
+        enabled = enabled_env == "1"
+    return url, site_id, api_key, enabled
 
 
 def _update_last_contact(db) -> None:
@@ -120,9 +107,4 @@ def _git(cmd: list[str]) -> str:
 
 
 def _app_version() -> str:
-    db = SessionLocal()
-    try:
-        row = db.query(SystemTunable).filter(SystemTunable.name == "App Version").first()
-        return row.value if row else "unknown"
-    finally:
-        db.close()
+    return get_tunable("App Version", "unknown")
@@ -0,0 +1,149 @@
+"""Background device import jobs.
+
+Uploads are copied to ``IMPORT_UPLOAD_DIR`` in chunks and parsed from disk
+by :mod:`modules.inventory.importer` in a worker thread, so the request that
+starts an import returns immediately.  Job state, including progress and
+per-row errors, is kept in a JSON file next to the upload so any web worker
+can report it.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from core.models.models import ImportLog, User
+from core.utils.db_session import SessionLocal, reset_pk_sequence
+from modules.inventory.importer import DeviceImporter, count_rows, iter_mapped_rows
+from modules.inventory.models import Device
+
+IMPORT_UPLOAD_DIR = os.environ.get(
+    "IMPORT_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "masterip-imports")
+)
+# Uploads and job files are removed after a day
+IMPORT_JOB_TTL = 24 * 3600
+
+_tasks: set[asyncio.Task] = set()
+
+
+def _path(token: str, suffix: str) -> str:
+    return os.path.join(IMPORT_UPLOAD_DIR, f"{token}.{suffix}")
+
+
+def upload_path(token: str) -> str:
+    return _path(token, "upload")
+
+
+def load_job(token: str) -> dict | None:
+    """Return the stored state of import ``token`` or ``None``."""
+    if not token or not token.isalnum():
+        return None
+    try:
+        with open(_path(token, "json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def update_job(token: str, **fields) -> dict:
+    job = load_job(token) or {}
+    job.update(fields)
+    job["updated"] = time.time()
+    path = _path(token, "json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(job, fh)
+    os.replace(tmp, path)
+    return job
+
+
+def evict_expired(now: float | None = None) -> int:
+    """Delete uploads and job files older than ``IMPORT_JOB_TTL``."""
+    now = now or time.time()
+    removed = 0
+    try:
+        names = os.listdir(IMPORT_UPLOAD_DIR)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(IMPORT_UPLOAD_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > IMPORT_JOB_TTL:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def save_upload(fileobj, filename: str, user_id: int) -> dict:
+    """Copy an uploaded file to disk and register a job for it."""
+    os.makedirs(IMPORT_UPLOAD_DIR, exist_ok=True)
+    evict_expired()
+    token = uuid.uuid4().hex
+    with open(upload_path(token), "wb") as fh:
+        shutil.copyfileobj(fileobj, fh, 1024 * 1024)
+    return update_job(
+        token,
+        id=token,
+        user_id=user_id,
+        filename=filename or "upload",
+        total=count_rows(upload_path(token), filename or ""),
+        status="uploaded",
+        created=time.time(),
+    )
+
+
+def run_import(token: str, mapping: dict, site_id: int | None, action: str) -> dict:
+    """Import an uploaded file, recording progress in the job file."""
+    job = load_job(token)
+    db = SessionLocal()
+    try:
+        user = db.get(User, job["user_id"])
+        reset_pk_sequence(db, Device)
+        importer = DeviceImporter(db, user, site_id=site_id, action=action)
+        rows = iter_mapped_rows(upload_path(token), job["filename"], mapping)
+        result = importer.run(
+            rows, lambda r: update_job(token, progress=r.processed, result=r.as_dict())
+        )
+        db.add(
+            ImportLog(
+                user_id=user.id,
+                file_name=job["filename"],
+                device_count=result.added + result.updated,
+                site_id=site_id,
+                notes=f"{result.added} added, {result.updated} updated, "
+                f"{result.skipped} skipped, {len(result.errors)} errors",
+                success=not result.errors,
+            )
+        )
+        db.commit()
+        return update_job(
+            token, status="done", progress=result.processed, result=result.as_dict()
+        )
+    except Exception as exc:
+        db.rollback()
+        return update_job(token, status="error", error=str(exc))
+    finally:
+        db.close()
+        try:
+            os.remove(upload_path(token))
+        except OSError:
+            pass
+
+
+async def submit_import(token: str, mapping: dict, site_id: int | None, action: str) -> dict:
+    """Start importing ``token`` in a worker thread."""
+    job = update_job(token, status="running", progress=0, result=None, error=None)
+    task = asyncio.create_task(asyncio.to_thread(run_import, token, mapping, site_id, action))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+async def stop_import_jobs() -> None:
+    for task in list(_tasks):
+        task.cancel()
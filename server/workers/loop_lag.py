@@ -0,0 +1,69 @@
+"""Measure how late the event loop wakes up from a short sleep.
+
+Any sync work done inside an ``async def`` handler shows up here as lag, so
+the numbers are a direct check on handlers that block the loop.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.5"))
+LOOP_LAG_WARN_MS = float(os.environ.get("LOOP_LAG_WARN_MS", "200"))
+LOOP_LAG_SAMPLES = 600
+
+_samples: deque[float] = deque(maxlen=LOOP_LAG_SAMPLES)
+
+
+def record_lag(lag_ms: float) -> None:
+    _samples.append(lag_ms)
+
+
+def last_lag_ms() -> float:
+    return _samples[-1] if _samples else 0.0
+
+
+def loop_lag_stats() -> dict[str, float]:
+    """Summary of the recent lag samples in milliseconds."""
+    if not _samples:
+        return {"samples": 0, "last_ms": 0.0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(_samples)
+    return {
+        "samples": len(ordered),
+        "last_ms": round(_samples[-1], 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def _lag_loop() -> None:
+    log = logging.getLogger(__name__)
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag_ms = max(0.0, (time.perf_counter() - start - LOOP_LAG_INTERVAL) * 1000)
+        record_lag(lag_ms)
+        if lag_ms > LOOP_LAG_WARN_MS:
+            log.warning("Event loop blocked for %.0f ms", lag_ms)
+
+
+_lag_task: asyncio.Task | None = None
+
+
+def start_loop_lag_monitor() -> None:
+    global _lag_task
+    _lag_task = asyncio.create_task(_lag_loop())
+
+
+async def stop_loop_lag_monitor() -> None:
+    global _lag_task
+    if _lag_task:
+        _lag_task.cancel()
+        try:
+            await _lag_task
+        except asyncio.CancelledError:
+            pass
+        _lag_task = None
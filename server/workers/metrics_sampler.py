@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import os
+import time
+
+from core.utils.audit import audit_queue
+from core.utils.instrumentation import QUEUE_DEPTH
+from core.utils.password_hashing import password_hash_stats
+from server.utils.metric_history import metric_history
+from server.utils.system_metrics import sample_values
+
+METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "1"))
+
+# Cumulative counters recorded as per-second rates
+_RATES = {
+    "net_bytes_sent": "net_sent_bytes_per_s",
+    "net_bytes_recv": "net_recv_bytes_per_s",
+}
+_previous: dict[str, tuple[float, float]] = {}
+
+
+def sample_once(now: float | None = None) -> dict[str, float]:
+    now = time.time() if now is None else now
+    values = sample_values()
+    for counter, rate in _RATES.items():
+        value = values.pop(counter, None)
+        if value is None:
+            continue
+        last = _previous.get(counter)
+        _previous[counter] = (now, value)
+        if last and now > last[0] and value >= last[1]:
+            values[rate] = (value - last[1]) / (now - last[0])
+    metric_history.record(now, values)
+    QUEUE_DEPTH.labels("audit").set(len(audit_queue))
+    QUEUE_DEPTH.labels("password_hash").set(password_hash_stats()["waiting"])
+    return values
+
+
+async def _sample_loop() -> None:
+    log = logging.getLogger(__name__)
+    while True:
+        try:
+            sample_once()
+        except Exception as exc:  # pragma: no cover - keep sampling
+            log.warning("Metrics sample failed: %s", exc)
+        await asyncio.sleep(METRICS_SAMPLE_INTERVAL)
+
+
+_sample_task: asyncio.Task | None = None
+
+
+def start_metrics_sampler() -> None:
+    global _sample_task
+    _sample_task = asyncio.create_task(_sample_loop())
+
+
+async def stop_metrics_sampler() -> None:
+    global _sample_task
+    if _sample_task:
+        _sample_task.cancel()
+        try:
+            await _sample_task
+        except asyncio.CancelledError:
+            pass
+        _sample_task = None
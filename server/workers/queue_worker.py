@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 import asyncssh
 import os
 
-from core.utils.ssh import build_conn_kwargs
+from core.utils.ssh import build_conn_kwargs, ssh_connect
 from core.utils.device_detect import detect_ssh_platform
 from core.utils.db_session import SessionLocal
 from core.models.models import ConfigBackup
@@ -25,7 +25,7 @@ async def run_push_queue_once():
             continue
         conn_kwargs = build_conn_kwargs(cred)
         try:
-            async with asyncssh.connect(device.ip, **conn_kwargs) as conn:
+            async with ssh_connect(device.ip, **conn_kwargs) as conn:
                 await detect_ssh_platform(db, device, conn)
                 _, session = await conn.create_session(asyncssh.SSHClientProcess)
                 for line in backup.config_text.splitlines():
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import os
+
+from core.utils.db_session import SessionLocal
+from core.utils.site_auth import flush_site_auth
+
+SITE_AUTH_FLUSH_INTERVAL = int(os.environ.get("SITE_AUTH_FLUSH_INTERVAL", "60"))
+
+
+def _flush_once() -> int:
+    db = SessionLocal()
+    try:
+        return flush_site_auth(db)
+    finally:
+        db.close()
+
+
+async def _flush_loop() -> None:
+    log = logging.getLogger(__name__)
+    while True:
+        await asyncio.sleep(SITE_AUTH_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(_flush_once)
+        except Exception as exc:
+            log.error("Site auth flush failed: %s", exc)
+
+
+_flush_task: asyncio.Task | None = None
+
+
+def start_site_auth_log() -> None:
+    global _flush_task
+    _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_site_auth_log() -> None:
+    global _flush_task
+    if _flush_task:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+        # Write counts collected since the last interval
+        try:
+            await asyncio.to_thread(_flush_once)
+        except Exception as exc:
+            logging.getLogger(__name__).error("Site auth flush failed: %s", exc)
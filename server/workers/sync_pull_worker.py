@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import time
 from datetime import datetime, timezone
 from typing import Any, Set
 
@@ -15,6 +16,8 @@ from core.models import models as model_module
 from modules.inventory import models as inventory_models  # noqa: F401
 from core.utils.versioning import apply_update
 from .cloud_sync import _get_sync_config, ensure_schema
+from .asset_sync import pull_assets
+from core.utils.assets import referenced_assets
 from core.utils.audit import log_audit
 from core.utils.sync_logging import log_sync_attempt
 from core.utils.schema import (
@@ -30,6 +33,7 @@ from server.workers import sync_push_worker
 from core.utils.deletion import soft_delete
 from core.utils.serialization import to_jsonable
 from core.utils import timestamp
+from core.utils.instrumentation import SYNC_RECORDS, SYNC_SECONDS
 
 
 def make_json_safe(val: Any) -> Any:
@@ -212,6 +216,8 @@ async def _fetch_with_retry(
 
 async def pull_once(log: logging.Logger) -> None:
     db = SessionLocal()
+    start = time.perf_counter()
+    outcome = "error"
     try:
         since = _load_last_sync(db)
         msg = f"\U0001f4c5 Pulling records updated since: {since}"
@@ -245,6 +251,7 @@ async def pull_once(log: logging.Logger) -> None:
             grouped.setdefault(m, []).append(rec)
         for model_name, payload in grouped.items():
             print(f"[⬇️] Pulled {len(payload)} records from cloud for model '{model_name}'")
+            SYNC_RECORDS.labels("pull", model_name).inc(len(payload))
         model_map = {
             cls.__tablename__: cls for cls in model_module.Base.__subclasses__()
         }
@@ -432,15 +439,21 @@ async def pull_once(log: logging.Logger) -> None:
                         "Failed to insert %s id %s: %s", model_name, record_id, exc
                     )
                     print(f"[❌] Sync pull error for model '{model_name}': {exc}")
+        try:
+            await pull_assets(base, referenced_assets(grouped), log, site_id, api_key)
+        except Exception as exc:
+            log.warning("Asset pull failed: %s", exc)
         _update_last_sync(db, len(data), conflicts_total)
         log_sync_attempt(db, "pull", len(data), conflicts_total)
         set_tunable(db, "Last Sync Pull Error", "")
         print(f"[✅] Sync pull completed with {len(data)} applied and {conflicts_total} conflicts.")
+        outcome = "ok"
     except Exception as exc:
         log_sync_attempt(db, "pull", 0, 0, str(exc))
         set_tunable(db, "Last Sync Pull Error", str(exc))
         log.error("Pull failed: %s", exc)
     finally:
+        SYNC_SECONDS.labels("pull", outcome).observe(time.perf_counter() - start)
         db.close()
 
 
@@ -1,11 +1,12 @@
 import asyncio
 import logging
 import os
+import time
 import uuid
 from datetime import datetime, timezone
 from typing import Any
 
-from core.utils.serialization import to_jsonable
+from core.utils.serialization import column_extractor
 
 import httpx
 from sqlalchemy import inspect, or_
@@ -16,10 +17,13 @@ from core.models.models import SystemTunable
 from core.models import models as model_module
 from modules.inventory import models as inventory_models  # noqa: F401
 from .cloud_sync import _request_with_retry, _get_sync_config, ensure_schema
+from .asset_sync import push_assets
+from core.utils.assets import referenced_assets
 from core.utils.audit import log_audit
 from core.utils.sync_logging import log_sync_attempt
 from core.utils.schema import log_schema_issues, log_sync_error, validate_db_schema
 from core.utils import timestamp
+from core.utils.instrumentation import SYNC_RECORDS, SYNC_SECONDS
 from server.utils.cloud import set_tunable
 
 SYNC_PUSH_INTERVAL = int(os.environ.get("SYNC_PUSH_INTERVAL", "60"))
@@ -27,11 +31,7 @@ SYNC_PUSH_INTERVAL = int(os.environ.get("SYNC_PUSH_INTERVAL", "60"))
 
 def _serialize(obj: Any) -> dict[str, Any]:
     """Return a JSON serializable representation of ``obj``."""
-    insp = inspect(obj)
-    data = {}
-    for c in insp.mapper.column_attrs:
-        val = getattr(obj, c.key)
-        data[c.key] = to_jsonable(val)
+    data = column_extractor(inspect(obj).mapper.class_)(obj)
 
     # When a record is marked deleted only send minimal identifying fields
     deleted = data.get("deleted_at")
@@ -125,6 +125,8 @@ async def push_once(log: logging.Logger) -> None:
         log.error("Schema mismatch detected; aborting push")
         return
     db = SessionLocal()
+    start = time.perf_counter()
+    outcome = "error"
     try:
         since = _load_last_sync(db)
         msg = f"\U0001f4c5 Pushing records updated since: {since}"
@@ -206,8 +208,17 @@ async def push_once(log: logging.Logger) -> None:
         print(msg)
         log_audit(db, None, "debug", details=msg)
         if not total_records:
+            outcome = "ok"
             return
 
+        # Files first so rows never reference an asset the cloud lacks
+        try:
+            await push_assets(
+                base, referenced_assets(records_by_model), log, site_id, api_key
+            )
+        except Exception as exc:
+            log.warning("Asset push failed: %s", exc)
+
         payload = records_by_model
         result = await _request_with_retry(
             "POST", push_url, payload, log, site_id, api_key
@@ -247,11 +258,15 @@ async def push_once(log: logging.Logger) -> None:
             )
         log_sync_attempt(db, "push", total_records, conflicts)
         set_tunable(db, "Last Sync Push Error", "")
+        for table, recs in records_by_model.items():
+            SYNC_RECORDS.labels("push", table).inc(len(recs))
+        outcome = "ok"
     except Exception as exc:
         log_sync_attempt(db, "push", 0, 0, str(exc))
         set_tunable(db, "Last Sync Push Error", str(exc))
         log.error("Push failed: %s", exc)
     finally:
+        SYNC_SECONDS.labels("push", outcome).observe(time.perf_counter() - start)
         db.close()
 
 
@@ -5,6 +5,7 @@ from syslog_rfc5424_parser import SyslogMessage
 import syslogmp
 
 from core.utils.db_session import SessionLocal
+from core.utils.instrumentation import INGEST_MESSAGES, INGEST_SECONDS, timed
 
 SYSLOG_PORT = int(os.environ.get("SYSLOG_PORT", "514"))
 
@@ -14,6 +15,7 @@ _syslog_running = False
 
 class _SyslogProtocol(asyncio.DatagramProtocol):
     def datagram_received(self, data, addr):
+        INGEST_MESSAGES.labels("syslog").inc()
         try:
             text = data.decode().strip()
         except Exception:
@@ -39,23 +41,24 @@ class _SyslogProtocol(asyncio.DatagramProtocol):
             except Exception:
                 pass
 
-        db = SessionLocal()
         from core.models.models import SyslogEntry
         from modules.inventory.models import Device
 
-        device = db.query(Device).filter(Device.ip == addr[0]).first()
-        log = SyslogEntry(
-            timestamp=timestamp,
-            source_ip=addr[0],
-            severity=severity,
-            facility=facility,
-            message=message,
-            device_id=device.id if device else None,
-            site_id=device.site_id if device else None,
-        )
-        db.add(log)
-        db.commit()
-        db.close()
+        with timed(INGEST_SECONDS, kind="syslog"):
+            db = SessionLocal()
+            device = db.query(Device).filter(Device.ip == addr[0]).first()
+            log = SyslogEntry(
+                timestamp=timestamp,
+                source_ip=addr[0],
+                severity=severity,
+                facility=facility,
+                message=message,
+                device_id=device.id if device else None,
+                site_id=device.site_id if device else None,
+            )
+            db.add(log)
+            db.commit()
+            db.close()
 
 
 async def start_syslog_listener():
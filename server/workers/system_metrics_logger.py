@@ -1,27 +1,69 @@
+"""Persist per-minute metric aggregates from the in-memory history.
+
+Every ``METRICS_INTERVAL`` seconds the 1-minute points recorded since the
+previous write are stored as one ``SystemMetric`` row.  Workers take a
+transaction-scoped advisory lock and skip the write when another worker has
+stored a row within the interval, so there is one row per interval however
+many workers run.
+"""
+
 import asyncio
+import logging
 import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
 
 from core.utils.db_session import SessionLocal
 from core.models.models import SystemMetric
-from server.utils.system_metrics import gather_metrics
+from server.utils.metric_history import metric_history
 
 METRICS_INTERVAL = int(os.environ.get("METRICS_INTERVAL", "60"))
 
+# Arbitrary key for pg_advisory_xact_lock
+_LOCK_KEY = 0x6D657472
+_last_written: float | None = None
 
-async def log_metrics_once() -> None:
+
+def _write(points: dict, now: datetime) -> bool:
     db = SessionLocal()
     try:
-        data = gather_metrics()
-        db.add(SystemMetric(data=data))
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        latest = db.execute(select(func.max(SystemMetric.timestamp))).scalar()
+        if latest is not None and latest > now - timedelta(seconds=METRICS_INTERVAL / 2):
+            db.rollback()
+            return False
+        db.add(SystemMetric(timestamp=now, data={"resolution": 60, "metrics": points}))
         db.commit()
+        return True
     finally:
         db.close()
 
 
+async def log_metrics_once() -> None:
+    global _last_written
+    points = {
+        name: [[round(v, 3) for v in point] for point in series]
+        for name, series in metric_history.points(60, since=_last_written).items()
+        if series
+    }
+    if not points:
+        return
+    newest = max(series[-1][0] for series in points.values())
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    await asyncio.to_thread(_write, points, now)
+    # Points another worker already stored are not retried either
+    _last_written = newest
+
+
 async def _metrics_loop() -> None:
     while True:
-        await log_metrics_once()
         await asyncio.sleep(METRICS_INTERVAL)
+        try:
+            await log_metrics_once()
+        except Exception as exc:
+            logging.getLogger(__name__).warning("Could not store metrics: %s", exc)
 
 
 _metrics_task: asyncio.Task | None = None
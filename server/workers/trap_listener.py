@@ -5,6 +5,7 @@ from aiosnmp import SnmpV2TrapServer
 from aiosnmp.snmp import SnmpMessage
 
 from core.utils.db_session import SessionLocal
+from core.utils.instrumentation import INGEST_MESSAGES, INGEST_SECONDS, timed
 
 TRAP_PORT = int(os.environ.get("SNMP_TRAP_PORT", "162"))
 
@@ -17,6 +18,7 @@ async def _trap_handler(host, port, message):
     from core.models.models import SNMPTrapLog
     from modules.inventory.models import Device
 
+    INGEST_MESSAGES.labels("trap").inc()
     trap_oid = None
     parts = []
     for vb in message.data.varbinds:
@@ -35,19 +37,20 @@ async def _trap_handler(host, port, message):
         raw = SnmpMessage(message.version, message.community, message.data).encode()
         text = raw.hex()
 
-    db = SessionLocal()
-    device = db.query(Device).filter(Device.ip == host).first()
-    log = SNMPTrapLog(
-        timestamp=datetime.now(timezone.utc),
-        source_ip=host,
-        trap_oid=trap_oid,
-        message=text,
-        device_id=device.id if device else None,
-        site_id=device.site_id if device else None,
-    )
-    db.add(log)
-    db.commit()
-    db.close()
+    with timed(INGEST_SECONDS, kind="trap"):
+        db = SessionLocal()
+        device = db.query(Device).filter(Device.ip == host).first()
+        log = SNMPTrapLog(
+            timestamp=datetime.now(timezone.utc),
+            source_ip=host,
+            trap_oid=trap_oid,
+            message=text,
+            device_id=device.id if device else None,
+            site_id=device.site_id if device else None,
+        )
+        db.add(log)
+        db.commit()
+        db.close()
 
 
 async def start_trap_listener():
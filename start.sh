@@ -44,6 +44,9 @@ if [ "${AUTO_SEED:-1}" != "0" ] && [ "${AUTO_SEED}" != "false" ]; then
     venv/bin/python seed_superuser.py
 fi
 
+# Per-worker metric files, aggregated by /metrics
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}"
+
 echo "✔ Installation complete. Starting server on port ${PORT:-8000}..."
 
 exec gunicorn server.main:app \
@@ -0,0 +1,58 @@
+from server.utils.adaptive_polling import AdaptivePollScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(budget=1.0):
+    clock = FakeClock()
+    sched = AdaptivePollScheduler(
+        budget=budget, min_interval=10, max_interval=3600, clock=clock
+    )
+    return sched, clock
+
+
+def test_priority_devices_get_shorter_intervals():
+    sched, _ = _scheduler(budget=0.1)
+    sched.sync_devices({1: True, 2: False, 3: False}, {})
+    assert sched.states[1].interval < sched.states[2].interval
+    assert sched.states[2].interval == sched.states[3].interval
+    # Sum of poll rates never exceeds the budget
+    assert sum(1 / s.interval for s in sched.states.values()) <= 0.1 + 1e-9
+
+
+def test_state_changes_raise_poll_rate():
+    sched, clock = _scheduler(budget=0.1)
+    sched.sync_devices({1: False, 2: False}, {})
+    sched.record_result(1, 5000, True)
+    sched.record_result(2, 5000, True)
+    before = sched.states[1].interval
+    clock.now += 30
+    # Uptime went backwards: the device rebooted
+    sched.record_result(1, 10, True)
+    assert sched.states[1].interval < before
+    assert sched.states[1].interval < sched.states[2].interval
+
+
+def test_port_churn_raises_weight():
+    sched, _ = _scheduler(budget=0.1)
+    sched.sync_devices({1: False, 2: False}, {2: 8})
+    assert sched.states[2].interval < sched.states[1].interval
+
+
+def test_due_respects_budget():
+    sched, clock = _scheduler(budget=1.0)
+    sched.sync_devices({i: False for i in range(100)}, {})
+    assert sched.due() == []
+    clock.now += 5
+    first = sched.due()
+    assert len(first) == 5
+    # Polled devices are not handed out again until their interval passes
+    clock.now += 5
+    second = sched.due()
+    assert not set(first) & set(second)
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import sys
 import importlib
@@ -53,8 +54,8 @@ def test_update_images_hx_redirect(tmp_path, monkeypatch):
     dtype = inv_models.DeviceType(id=1, name="Test")
     db = DummyDB(dtype)
     client = get_client(db)
-    import server.routes.ui.admin_images as admin_images
-    monkeypatch.setattr(admin_images, "STATIC_DIR", str(tmp_path))
+    from core.utils import assets
+    monkeypatch.setattr(assets, "ASSET_DIR", str(tmp_path))
 
     resp = client.post(
         "/admin/upload-image/device/1",
@@ -65,3 +66,5 @@ def test_update_images_hx_redirect(tmp_path, monkeypatch):
     assert resp.headers.get("HX-Redirect")
     assert resp.headers.get("HX-Refresh") == "true"
     assert db.committed
+    assert dtype.upload_icon == hashlib.sha256(b"data").hexdigest() + ".png"
+    assert (tmp_path / dtype.upload_icon).read_bytes() == b"data"
@@ -0,0 +1,144 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from core.utils import assets
+
+
+@pytest.fixture(autouse=True)
+def _asset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "ASSET_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _png(size=(600, 300)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_store_bytes_names_files_by_content(_asset_dir):
+    data = _png()
+    name = assets.store_bytes(data, "image/png")
+    assert name == hashlib.sha256(data).hexdigest() + ".png"
+    assert (_asset_dir / name).read_bytes() == data
+    assert assets.store_bytes(data, "image/png") == name
+    thumb = Image.open(_asset_dir / assets.thumb_name(name))
+    assert max(thumb.size) == assets.ASSET_THUMB_SIZE
+
+
+def test_only_raster_images_are_stored(_asset_dir):
+    with pytest.raises(ValueError):
+        assets.store_bytes(b"<svg xmlns='http://www.w3.org/2000/svg'/>", "image/svg+xml")
+    assert os.listdir(_asset_dir) == []
+    assert not assets.is_asset_name("a" * 64 + ".html")
+    assert not assets.is_asset_name("a" * 64 + ".svg")
+
+
+def test_corrupt_image_has_no_thumbnail(_asset_dir):
+    name = assets.store_bytes(b"not a png", "image/png")
+    assert not os.path.exists(_asset_dir / assets.thumb_name(name))
+    assert assets.asset_url(name, thumb=True) == "/assets/" + name
+
+
+def test_store_named_checks_hash():
+    data = _png()
+    name = hashlib.sha256(data).hexdigest() + ".png"
+    with pytest.raises(ValueError):
+        assets.store_named(name, b"other")
+    assets.store_named(name, data)
+    assert assets.asset_exists(name)
+
+
+def test_asset_names_cannot_escape_the_store():
+    assert not assets.is_asset_name("../../etc/passwd")
+    with pytest.raises(ValueError):
+        assets.asset_path("../x.png")
+
+
+def test_asset_url_resolves_old_values():
+    name = assets.store_bytes(_png(), "image/png")
+    assert assets.asset_url(name) == "/assets/" + name
+    assert assets.asset_url(name, thumb=True) == "/assets/" + assets.thumb_name(name)
+    assert assets.asset_url("data:image/png;base64,AA==") == "data:image/png;base64,AA=="
+    assert assets.asset_url("3_icon_a.png") == "/static/uploads/device-types/3_icon_a.png"
+    assert assets.asset_url("a.png", legacy_dir="menu-items") == "/static/uploads/menu-items/a.png"
+    assert assets.asset_url(None) == ""
+
+
+def test_decode_data_uri():
+    assert assets.decode_data_uri("data:image/png;base64,aGk=") == (b"hi", "image/png")
+    assert assets.decode_data_uri("plain.png") is None
+
+
+def test_referenced_assets_only_returns_asset_names():
+    name = "a" * 64 + ".png"
+    records = {
+        "device_types": [
+            {"upload_icon": name, "upload_image": "data:image/png;base64,AA=="},
+            {"upload_icon": None, "upload_image": "legacy.png"},
+        ],
+        "devices": [{"upload_icon": "b" * 64 + ".png"}],
+    }
+    assert assets.referenced_assets(records) == {name}
+
+
+def test_assets_are_served_as_immutable(_asset_dir):
+    name = assets.store_bytes(_png(), "image/png")
+    app = FastAPI()
+    app.mount("/assets", assets.ImmutableStaticFiles(directory=str(_asset_dir)))
+    resp = TestClient(app).get("/assets/" + name)
+    assert resp.status_code == 200
+    assert "immutable" in resp.headers["cache-control"]
+
+
+def _sync_client(monkeypatch, key):
+    from core.utils import site_auth
+    from core.utils.db_session import get_db
+    from server.routes.api import sync
+
+    monkeypatch.setattr(site_auth, "_lookup", lambda db, site_id: key)
+    app = FastAPI()
+    app.include_router(sync.router)
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def _site_key():
+    from core.utils.site_auth import _CachedKey
+
+    return _CachedKey(id=1, site_id="A", site_name="A", api_key="key", active=True)
+
+
+def test_asset_sync_rejects_unknown_sites(monkeypatch):
+    client = _sync_client(monkeypatch, None)
+    data = _png()
+    name = hashlib.sha256(data).hexdigest() + ".png"
+    headers = {"Site-ID": "nobody", "API-Key": "x"}
+    assert client.put(f"/api/v1/sync/assets/{name}", content=data, headers=headers).status_code == 401
+    assert client.get(f"/api/v1/sync/assets/{name}", headers=headers).status_code == 401
+    assert not assets.asset_exists(name)
+
+
+def test_asset_upload_checks_name_and_size(monkeypatch):
+    client = _sync_client(monkeypatch, _site_key())
+    headers = {"Site-ID": "A", "API-Key": "key"}
+    page = b"<script>alert(1)</script>"
+    html = hashlib.sha256(page).hexdigest() + ".html"
+    assert client.put(f"/api/v1/sync/assets/{html}", content=page, headers=headers).status_code == 400
+
+    monkeypatch.setattr("server.routes.api.sync.ASSET_MAX_BYTES", 10)
+    data = _png()
+    name = hashlib.sha256(data).hexdigest() + ".png"
+    resp = client.put(f"/api/v1/sync/assets/{name}", content=data, headers=headers)
+    assert resp.status_code == 413
+    assert not assets.asset_exists(name)
+
+    monkeypatch.setattr("server.routes.api.sync.ASSET_MAX_BYTES", len(data))
+    resp = client.put(f"/api/v1/sync/assets/{name}", content=data, headers=headers)
+    assert resp.status_code == 200 and assets.asset_exists(name)
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from core.utils import auth, auth_cache, db_session
+from core.utils.db_session import ThreadedSession
+from server.workers import loop_lag
+
+
+def test_threaded_session_runs_work_off_the_event_loop():
+    session = object()
+
+    def work(db, value):
+        return db, value, threading.get_ident()
+
+    async def run():
+        return threading.get_ident(), await ThreadedSession(session).run_sync(work, 3)
+
+    loop_thread, (db, value, worker_thread) = asyncio.run(run())
+    assert db is session and value == 3
+    assert worker_thread != loop_thread
+
+
+def test_fallback_dependency_wraps_the_request_session():
+    if db_session.AsyncSessionLocal is not None:
+        return
+    session = object()
+
+    async def run():
+        gen = db_session.get_async_db(session)
+        db = await gen.__anext__()
+        await gen.aclose()
+        return db
+
+    db = asyncio.run(run())
+    assert isinstance(db, ThreadedSession) and db.sync_session is session
+
+
+def test_principal_cache_miss_loads_through_run_sync(monkeypatch):
+    auth_cache.principals.clear()
+    calls = []
+
+    class _DB:
+        async def run_sync(self, fn, *args):
+            calls.append(args)
+            return fn(None, *args)
+
+    monkeypatch.setattr(auth, "principal_for_user", lambda db, user_id: SimpleNamespace(id=user_id))
+    request = SimpleNamespace(headers={}, session={"user_id": 7})
+    assert asyncio.run(auth.get_current_user(request, db=_DB())).id == 7
+    assert calls == [(None, 7)]
+
+
+def test_loop_lag_stats(monkeypatch):
+    monkeypatch.setattr(loop_lag, "_samples", loop_lag.deque(maxlen=10))
+    assert loop_lag.loop_lag_stats()["samples"] == 0
+    for lag in (1.0, 3.0, 50.0):
+        loop_lag.record_lag(lag)
+    stats = loop_lag.loop_lag_stats()
+    assert stats["samples"] == 3 and stats["max_ms"] == 50.0 and stats["last_ms"] == 50.0
+    assert stats["mean_ms"] == 18.0
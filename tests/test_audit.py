@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from modules.inventory.models import Device
+from core.models.models import AuditLog
+from core.utils import audit
+
+
+class _FakeDB:
+    def __init__(self):
+        self.added = []
+        self.commits = 0
+        self.bind = None
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        self.commits += 1
+
+    def flush(self):
+        pass
+
+
+class _FakeBind:
+    """Records the parameter lists passed to each INSERT."""
+
+    def __init__(self):
+        self.batches = []
+
+    @contextmanager
+    def begin(self):
+        bind = self
+
+        class _Conn:
+            def execute(self, stmt, params):
+                bind.batches.append(params)
+
+        yield _Conn()
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    audit.audit_queue.take(len(audit.audit_queue))
+    audit.audit_queue.bind = None
+    yield
+    audit.audit_queue.take(len(audit.audit_queue))
+    audit.audit_queue.bind = None
+
+
+USER = SimpleNamespace(id=7)
+
+
+def test_without_writer_commits_through_session():
+    db = _FakeDB()
+    audit.log_audit(db, USER, "tag_add", details="x")
+    assert [a.action_type for a in db.added] == ["tag_add"]
+    assert isinstance(db.added[0], AuditLog)
+    assert db.commits == 1
+
+
+def test_events_are_queued_while_writer_runs():
+    db = _FakeDB()
+    audit.audit_queue.bind = _FakeBind()
+    audit.log_audit(db, USER, "tag_add", details="x")
+    assert db.added == [] and db.commits == 0
+    assert len(audit.audit_queue) == 1
+
+
+def test_sync_actions_skip_the_queue():
+    db = _FakeDB()
+    db.bind = _FakeBind()
+    audit.audit_queue.bind = db.bind
+    audit.log_audit(db, USER, "reset_password", details="x")
+    assert len(audit.audit_queue) == 0
+    assert [row["action_type"] for row in db.bind.batches[0]] == ["reset_password"]
+    assert db.commits == 0
+
+
+def test_flush_writes_one_statement_per_batch(monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_BATCH_SIZE", 3)
+    bind = _FakeBind()
+    audit.audit_queue.bind = bind
+    for n in range(7):
+        audit.log_audit(_FakeDB(), USER, "tag_add", details=str(n))
+    assert audit.audit_queue.flush() == 7
+    assert [len(batch) for batch in bind.batches] == [3, 3, 1]
+    assert [row["details"] for batch in bind.batches for row in batch] == [
+        str(n) for n in range(7)
+    ]
+    assert len(audit.audit_queue) == 0
+
+
+def test_failed_flush_keeps_events():
+    class _Broken:
+        @contextmanager
+        def begin(self):
+            raise RuntimeError("down")
+            yield
+
+    audit.audit_queue.bind = _Broken()
+    audit.log_audit(_FakeDB(), USER, "tag_add")
+    with pytest.raises(RuntimeError):
+        audit.audit_queue.flush()
+    assert len(audit.audit_queue) == 1
+
+
+def test_audit_context_collapses_events():
+    db = _FakeDB()
+    with audit.audit_context(db, USER, "bulk_update", "3 devices"):
+        for _ in range(3):
+            audit.log_audit(db, USER, "tag_add")
+        audit.log_audit(db, USER, "tag_remove")
+    assert [a.action_type for a in db.added] == ["bulk_update"]
+    assert db.added[0].details == "3 devices; tag_add x3, tag_remove x1"
+
+
+def test_audit_context_writes_nothing_when_block_raises():
+    db = _FakeDB()
+    with pytest.raises(ValueError):
+        with audit.audit_context(db, USER, "bulk_update", "3 devices"):
+            audit.log_audit(db, USER, "tag_add")
+            raise ValueError("bad row")
+    assert db.added == []
+
+
+def test_audit_context_does_not_collect_sync_actions():
+    db = _FakeDB()
+    with audit.audit_context(db, USER, "bulk_update"):
+        audit.log_audit(db, USER, "unban_ip", details="1.2.3.4")
+    assert [a.action_type for a in db.added] == ["unban_ip", "bulk_update"]
+
+
+def test_device_link_is_recorded():
+    db = _FakeDB()
+    audit.audit_queue.bind = _FakeBind()
+    audit.log_audit(db, USER, "tag_add", Device(id=5))
+    assert audit.audit_queue.take(1)[0].device_id == 5
@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.models.models import User
+from core.utils import auth, auth_cache
+from core.utils.auth_cache import Principal, TTLCache
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    auth_cache.principals.clear()
+    auth_cache._key_usage.clear()
+    yield
+    auth_cache.principals.clear()
+    auth_cache._key_usage.clear()
+
+
+def _principal(user_id=5, role="editor", site_ids=(1, 2)):
+    user = User(id=user_id, email="a@example.com", role=role, theme="bw", menu_tab_colors={"admin": "#fff"})
+    return Principal.from_user(user, site_ids)
+
+
+def test_ttl_cache_expires_and_evicts_least_recent(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None and len(cache) == 1
+
+
+def test_cached_principal_needs_no_queries():
+    principal = _principal()
+    auth_cache.principals.set(("user", 5), principal)
+    request = SimpleNamespace(headers={}, session={"user_id": 5})
+    assert asyncio.run(auth.get_current_user(request, db=None)) is principal
+    assert auth.get_user_site_ids(None, principal) == [1, 2]
+    assert auth.user_in_site(None, principal, 2) and not auth.user_in_site(None, principal, 3)
+    with pytest.raises(Exception):
+        principal.role = "admin"
+    assert principal.menu_tab_colors["admin"] == "#fff"
+
+
+def test_api_key_hits_record_usage_without_writes():
+    auth_cache.principals.set(("user", 5), _principal())
+    auth_cache.principals.set(("key", auth_cache.api_key_hash("secret")), ("key-1", 5))
+    request = SimpleNamespace(headers={"Authorization": "Bearer secret"}, session={})
+    assert asyncio.run(auth.get_current_user(request, db=None)).id == 5
+    assert set(auth_cache._key_usage) == {"key-1"}
+
+
+def test_commit_drops_changed_users_and_their_keys():
+    auth_cache.principals.set(("user", 5), _principal())
+    auth_cache.principals.set(("user", 6), _principal(6))
+    auth_cache.principals.set(("key", "h5"), ("k", 5))
+    session = SimpleNamespace(info={auth_cache._PENDING_KEY: {("user", 5)}})
+    auth_cache._apply_principal_changes(session)
+    assert auth_cache.principals.get(("user", 5)) is None
+    assert auth_cache.principals.get(("key", "h5")) is None
+    assert auth_cache.principals.get(("user", 6)) is not None
+    session.info[auth_cache._PENDING_KEY] = {auth_cache._ALL}
+    auth_cache._apply_principal_changes(session)
+    assert len(auth_cache.principals) == 0
+
+
+def test_profile_routes_save_through_principal(pg_engine):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+    from starlette.middleware.sessions import SessionMiddleware
+
+    from base.routes import user_pages
+    from core.utils.db_session import get_db
+    import core.utils.database as database
+
+    database.Base.metadata.create_all(bind=pg_engine)
+    Session = sessionmaker(bind=pg_engine)
+    db = Session()
+    user = User(email="principal-routes@example.com", hashed_password="x", role="viewer")
+    db.add(user)
+    db.commit()
+    principal = Principal.from_user(user, ())
+    user_id = user.id
+    db.close()
+
+    def _db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="test")
+    app.include_router(user_pages.router)
+    app.dependency_overrides[get_db] = _db
+    app.dependency_overrides[auth.get_current_user] = lambda: principal
+    client = TestClient(app)
+
+    resp = client.post(
+        "/users/me/edit",
+        data={"email": "principal-routes2@example.com", "theme": "nord"},
+        follow_redirects=False,
+    )
+    assert resp.status_code == 302
+    resp = client.post(
+        "/users/me/ssh",
+        data={"ssh_username": "netops", "ssh_password": "pw", "ssh_port": "2222"},
+        follow_redirects=False,
+    )
+    assert resp.status_code == 302
+    resp = client.post(
+        "/users/me/prefs",
+        data={"font": "mono", "theme": "nord", "admin_color": "#123456"},
+        follow_redirects=False,
+    )
+    assert resp.status_code == 302
+
+    # Pages render the stored row, not the principal
+    resp = client.get("/users/me")
+    assert resp.status_code == 200
+    assert 'value="netops"' in resp.text
+    assert 'value="pw"' in resp.text
+    assert ">Yes<" in resp.text
+    assert client.get("/users/me/edit").status_code == 200
+
+    db = Session()
+    saved = db.get(User, user_id)
+    assert saved.email == "principal-routes2@example.com"
+    assert (saved.theme, saved.font) == ("nord", "mono")
+    assert (saved.ssh_username, saved.ssh_password, saved.ssh_port) == ("netops", "pw", 2222)
+    assert saved.menu_tab_colors["admin"] == "#123456"
+    db.delete(saved)
+    db.commit()
+    db.close()
+
+
+def test_failed_key_usage_flush_keeps_stamps(monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from core.utils.db_session import SafeSession
+
+    def _fail(self, *args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(Session, "execute", lambda self, *a, **kw: None)
+    monkeypatch.setattr(Session, "commit", _fail)
+    auth_cache.record_key_use("key-1")
+    with pytest.raises(RuntimeError):
+        auth_cache.flush_key_usage(SafeSession())
+    assert set(auth_cache._key_usage) == {"key-1"}
@@ -5,6 +5,7 @@ from unittest import mock
 
 import httpx
 
+from core.utils import tunables
 from server.utils import cloud as cloud_utils
 from server.workers import heartbeat
 
@@ -37,6 +38,15 @@ class DummyDB:
         pass
 
 
+def _use_tunables(monkeypatch, values):
+    monkeypatch.setattr(tunables, "tunable_cache", tunables.TunableCache(ttl=60))
+    monkeypatch.setattr(
+        tunables,
+        "_load",
+        lambda: [tunables.Tunable(k, v, "text", "Sync") for k, v in values.items()],
+    )
+
+
 def test_ensure_env_writable(tmp_path):
     env = tmp_path / ".env"
     assert cloud_utils.ensure_env_writable(env)
@@ -45,14 +55,14 @@ def test_ensure_env_writable(tmp_path):
     assert "TEST=1" in env.read_text()
 
 
-def test_load_sync_settings():
-    db = DummyDB({
+def test_load_sync_settings(monkeypatch):
+    _use_tunables(monkeypatch, {
         "Cloud Base URL": "http://cloud",
         "Cloud Site ID": "A",
         "Cloud API Key": "secret",
         "Enable Cloud Sync": "true",
     })
-    cfg = cloud_utils.load_sync_settings(db)
+    cfg = cloud_utils.load_sync_settings()
     assert cfg["cloud_url"] == "http://cloud"
     assert cfg["site_id"] == "A"
     assert cfg["api_key"] == "secret"
@@ -60,12 +70,15 @@ def test_load_sync_settings():
 
 
 def test_heartbeat_uses_saved_api_key(monkeypatch):
-    db = DummyDB({
+    for name in ("CLOUD_BASE_URL", "SITE_ID", "SYNC_API_KEY", "ENABLE_CLOUD_SYNC"):
+        monkeypatch.delenv(name, raising=False)
+    _use_tunables(monkeypatch, {
         "Cloud Base URL": "http://cloud",
         "Cloud Site ID": "A",
         "Cloud API Key": "secret",
         "Enable Cloud Sync": "true",
     })
+    db = DummyDB({})
     monkeypatch.setattr(heartbeat, "SessionLocal", lambda: db)
     monkeypatch.setattr(heartbeat, "_git", lambda args: "x")
     monkeypatch.setattr(heartbeat, "_app_version", lambda: "1")
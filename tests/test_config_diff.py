@@ -0,0 +1,120 @@
+import importlib
+import types
+
+from sqlalchemy.orm import sessionmaker
+
+from core.utils import config_diff
+
+
+def _load_models():
+    inv = importlib.import_module("modules.inventory.models")
+    core = importlib.import_module("core.models")
+    attrs = {name: getattr(core, name) for name in dir(core) if not name.startswith("_")}
+    attrs.update({name: getattr(inv, name) for name in dir(inv) if not name.startswith("_")})
+    return types.SimpleNamespace(**attrs)
+
+
+OLD = "\n".join(f"interface Gi1/0/{i}\n description port {i}" for i in range(1, 41))
+
+
+def test_compute_diff_counts_and_hunks():
+    new = OLD.replace("description port 5", "description uplink").replace(
+        "description port 30", "description printer"
+    )
+    new += "\nsnmp-server community public RO"
+    diff = config_diff.compute_diff(OLD, new)
+    assert diff.lines_added == 3
+    assert diff.lines_removed == 2
+    assert len(diff.hunks) == 3
+    first = diff.hunks[0]
+    assert ["-", " description port 5"] in first["lines"]
+    assert ["+", " description uplink"] in first["lines"]
+    assert first["old_start"] == 7
+
+
+def test_identical_configs_have_no_hunks():
+    diff = config_diff.compute_diff(OLD, OLD)
+    assert diff.hunks == []
+    assert diff.lines_added == diff.lines_removed == 0
+
+
+def test_hunks_round_trip_and_paging():
+    new = OLD.replace("port 1\n", "p1\n").replace("port 20", "p20").replace("port 39", "p39")
+    diff = config_diff.compute_diff(OLD, new)
+    codec, data = config_diff.encode_hunks(diff.hunks)
+    assert config_diff.decode_hunks(codec, data) == diff.hunks
+
+    page, next_offset = diff.page(0, max_lines=1)
+    assert len(page) == 1 and next_offset == 1
+    rest, next_offset = diff.page(1)
+    assert len(rest) == len(diff.hunks) - 1 and next_offset is None
+
+
+def test_diff_precomputed_on_store(pg_engine):
+    models = _load_models()
+    import core.utils.database as database
+
+    database.Base.metadata.create_all(bind=pg_engine)
+    db = sessionmaker(bind=pg_engine)()
+    site = models.Site(name="diff-site")
+    dtype = models.DeviceType(name="diff-type")
+    db.add_all([site, dtype])
+    db.flush()
+    dev = models.Device(
+        hostname="diff-dev",
+        ip="10.9.9.10",
+        manufacturer="cisco",
+        device_type_id=dtype.id,
+        site_id=site.id,
+    )
+    db.add(dev)
+    db.commit()
+
+    first = models.ConfigBackup(device_id=dev.id, source="ssh", config_text=OLD)
+    db.add(first)
+    db.commit()
+    assert first.lines_added is None
+
+    second = models.ConfigBackup(
+        device_id=dev.id, source="scheduled", config_text=OLD + "\nhostname sw2"
+    )
+    db.add(second)
+    db.commit()
+    assert second.diff_base_id == first.id
+    assert (second.lines_added, second.lines_removed) == (1, 0)
+    assert db.query(models.ConfigDiff).count() == 1
+
+    config_diff._pair_cache.clear()
+    diff = config_diff.diff_backups(db, first, second)
+    assert diff.hunks[0]["lines"][-1] == ["+", "hostname sw2"]
+
+    port = models.ConfigBackup(
+        device_id=dev.id, source="port_pull", port_name="Gi1/0/1", config_text="interface Gi1/0/1"
+    )
+    db.add(port)
+    db.commit()
+    assert port.diff_base_id is None
+    port_again = models.ConfigBackup(
+        device_id=dev.id,
+        source="port_pull",
+        port_name="Gi1/0/1",
+        config_text="interface Gi1/0/1\n shutdown",
+    )
+    db.add(port_again)
+    db.commit()
+    assert port_again.diff_base_id == port.id
+    assert (port_again.lines_added, port_again.lines_removed) == (1, 0)
+
+    # Pulls of either kind follow the last pull, skipping other sources
+    pushed = models.ConfigBackup(device_id=dev.id, source="manual_push", config_text="hostname x")
+    third = models.ConfigBackup(
+        device_id=dev.id, source="ssh", config_text=OLD + "\nhostname sw3"
+    )
+    db.add(pushed)
+    db.commit()
+    db.add(third)
+    db.commit()
+    assert pushed.diff_base_id is None
+    assert third.diff_base_id == second.id
+    assert (third.lines_added, third.lines_removed) == (1, 1)
+    db.close()
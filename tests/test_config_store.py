@@ -0,0 +1,97 @@
+import importlib
+import types
+
+from sqlalchemy.orm import sessionmaker
+
+from core.utils import config_store
+
+
+def _load_models():
+    inv = importlib.import_module("modules.inventory.models")
+    core = importlib.import_module("core.models")
+    attrs = {name: getattr(core, name) for name in dir(core) if not name.startswith("_")}
+    attrs.update({name: getattr(inv, name) for name in dir(inv) if not name.startswith("_")})
+    return types.SimpleNamespace(**attrs)
+
+
+CONFIG = """Building configuration...
+
+Current configuration : 1234 bytes
+!
+! Last configuration change at 10:01:02 UTC Mon Jan 1 2024
+!
+hostname sw1
+ntp clock-period 17179869
+interface Gi1/0/1
+ description uplink
+"""
+
+
+def test_volatile_lines_do_not_change_hash():
+    changed = CONFIG.replace("10:01:02", "11:22:33").replace("17179869", "17179870")
+    assert config_store.config_hash(CONFIG) == config_store.config_hash(changed)
+    edited = CONFIG.replace("uplink", "downlink")
+    assert config_store.config_hash(CONFIG) != config_store.config_hash(edited)
+
+
+def test_compress_round_trip():
+    codec, data = config_store.compress(CONFIG * 50)
+    assert len(data) < len(CONFIG * 50)
+    assert config_store.decompress(codec, data) == CONFIG * 50
+
+
+def test_backup_reads_text_from_blob():
+    models = _load_models()
+    codec, data = config_store.compress(CONFIG)
+    blob = models.ConfigBlob(
+        hash=config_store.config_hash(CONFIG), codec=codec, data=data, size=len(CONFIG)
+    )
+    backup = models.ConfigBackup(device_id=1, source="scheduled")
+    backup.blob = blob
+    assert backup.config_text == CONFIG
+    inline = models.ConfigBackup(device_id=1, source="ssh", config_text="hostname a")
+    assert inline.config_text == "hostname a"
+
+
+def test_unchanged_pull_only_bumps_verified(pg_engine):
+    models = _load_models()
+    import core.utils.database as database
+
+    database.Base.metadata.create_all(bind=pg_engine)
+    db = sessionmaker(bind=pg_engine)()
+    site = models.Site(name="store-site")
+    dtype = models.DeviceType(name="store-type")
+    db.add_all([site, dtype])
+    db.flush()
+    dev = models.Device(
+        hostname="store-dev",
+        ip="10.9.9.9",
+        manufacturer="cisco",
+        device_type_id=dtype.id,
+        site_id=site.id,
+    )
+    db.add(dev)
+    db.commit()
+
+    first, created = config_store.record_config_pull(db, dev.id, CONFIG, "scheduled")
+    db.commit()
+    assert created
+    again, created = config_store.record_config_pull(
+        db, dev.id, CONFIG.replace("10:01:02", "12:00:00"), "scheduled"
+    )
+    db.commit()
+    assert not created
+    assert again.id == first.id
+    assert again.last_verified_at is not None
+    assert db.query(models.ConfigBlob).count() == 1
+
+    # Manually stored backups move into the blob store on flush
+    db.add(models.ConfigBackup(device_id=dev.id, source="ssh", config_text=CONFIG))
+    db.commit()
+    assert db.query(models.ConfigBlob).count() == 1
+
+    removed = config_store.prune_backups(db, dev.id, 1)
+    db.commit()
+    assert len(removed) == 1
+    assert db.query(models.ConfigBlob).count() == 1
+    db.close()
@@ -0,0 +1,46 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.attributes import set_committed_value
+
+from core.utils import device_duplicates
+from core.utils.ip_utils import ip_to_int
+from modules.inventory.models import Device
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+
+def test_ip_to_int_normalises_padding():
+    assert ip_to_int("010.000.000.001") == ip_to_int("10.0.0.1") == 0x0A000001
+    assert ip_to_int("10.0.0.256") is None
+    assert ip_to_int("") is None
+
+
+def test_changed_keys_include_old_and_new_values():
+    device = Device()
+    for name, value in (("ip", "10.0.0.1"), ("mac", "aa:bb:cc:dd:ee:ff"), ("asset_tag", "A1")):
+        set_committed_value(device, name, value)
+    set_committed_value(device, "deleted_at", None)
+    device.ip = "10.0.0.2"
+    assert device_duplicates._changed_keys(device) == {
+        "ip": {ip_to_int("10.0.0.1"), ip_to_int("10.0.0.2")}
+    }
+    device.deleted_at = "2026-01-01"
+    assert set(device_duplicates._changed_keys(device)) == {"ip", "mac", "asset_tag"}
+
+
+def test_refresh_only_touches_given_keys():
+    conn = _RecordingConnection()
+    device_duplicates.refresh_duplicate_flags(conn, "mac", {None})
+    assert conn.statements == []
+    device_duplicates.refresh_duplicate_flags(conn, "mac", {0xAABBCCDDEEFF})
+    delete_sql, insert_sql = conn.statements
+    assert delete_sql.startswith("DELETE FROM device_duplicates")
+    assert "GROUP BY devices.canonical_mac" in insert_sql
+    assert "HAVING count(*) >" in insert_sql
+    assert "devices.canonical_mac IN" in insert_sql
+    assert "ON CONFLICT (device_id, kind) DO UPDATE" in insert_sql
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from modules.inventory.models import Device
+from server.utils import device_grid
+from server.utils.device_grid import DeviceGrid, GridQuery
+
+
+def _sql(query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip_and_validation():
+    cursor = device_grid.encode_cursor("sw-01", 42)
+    assert device_grid.decode_cursor(cursor) == ("sw-01", 42)
+    assert device_grid.decode_cursor(device_grid.encode_cursor(None, 7)) == (None, 7)
+    for bad in ("not-base64!", device_grid.encode_cursor([1], 1), "W10"):
+        with pytest.raises(ValueError):
+            device_grid.decode_cursor(bad)
+
+
+def test_unknown_sort_and_filter_columns_are_rejected():
+    with pytest.raises(ValueError):
+        DeviceGrid(Session(), GridQuery(sort="password"))
+    with pytest.raises(ValueError):
+        DeviceGrid(Session(), GridQuery(filters={"custom_secret": "x"}))
+    grid = DeviceGrid(Session(), GridQuery(sort="custom_rack", limit=10_000), ["custom_rack"])
+    assert grid.limit == device_grid.GRID_MAX_PAGE_SIZE
+
+
+def test_filters_join_only_what_is_needed():
+    db = Session()
+    query = GridQuery(
+        device_type_id=3,
+        sort="location",
+        filters={"on_lasso": "yes", "vlan": "20"},
+        search="core",
+    )
+    sql = _sql(DeviceGrid(db, query)._filtered(db.query(Device.id)))
+    assert "LEFT OUTER JOIN locations" in sql
+    assert "LEFT OUTER JOIN vlans" in sql
+    assert "ssh_credentials" not in sql
+    assert "devices.on_lasso IS true" in sql
+    assert "devices.device_type_id =" in sql
+
+
+def test_keyset_condition_handles_nulls():
+    db = Session()
+    expr = Device.hostname
+    after_value = db.query(Device.id).filter(device_grid._after(expr, "b", 5, False))
+    assert "devices.hostname > " in _sql(after_value)
+    assert "devices.hostname IS NULL" in _sql(after_value)
+    after_null = db.query(Device.id).filter(device_grid._after(expr, None, 5, True))
+    assert "devices.id < " in _sql(after_null)
+
+
+def test_serialize_device_flags_duplicates_and_personal_credentials():
+    device = SimpleNamespace(
+        id=1,
+        version=2,
+        conflict_data=None,
+        snmp_reachable=True,
+        hostname="sw1",
+        ip="10.0.0.1",
+        mac="aa:bb:cc:dd:ee:ff",
+        asset_tag="A1",
+        model=None,
+        manufacturer="Cisco",
+        detected_platform=None,
+        serial_number=None,
+        location_ref=None,
+        on_lasso=True,
+        on_r1=False,
+        device_type=SimpleNamespace(name="Switch"),
+        status=None,
+        vlan=SimpleNamespace(tag=20),
+        ssh_credential=SimpleNamespace(name="ops"),
+        ssh_profile_is_default=True,
+        snmp_community=None,
+        uptime_seconds=3600,
+        tags=[SimpleNamespace(name="core")],
+        site=None,
+    )
+    duplicates = {"ip": ["sw1", "sw9"], "mac": ["sw1", "sw2"]}
+    row = device_grid.serialize_device(device, {"custom_rack": 4}, duplicates, {"ops"})
+    assert row["cells"]["ssh_profile"] == "ops (default) (personal)"
+    assert row["cells"]["on_lasso"] == "✔" and row["cells"]["on_r1"] == ""
+    assert row["cells"]["vlan"] == "20" and row["cells"]["custom_rack"] == "4"
+    assert row["duplicates"] == {
+        "ip": ["sw1", "sw9"],
+        "mac": ["sw1", "sw2"],
+        "asset_tag": [],
+    }
+    assert row["live_config"] and row["reachable"]
@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import openpyxl
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from modules.inventory import importer
+from modules.inventory.importer import DeviceImporter, ImportLookups
+
+
+def _lookups():
+    lookups = ImportLookups.__new__(ImportLookups)
+    lookups.device_types = {"switch": 1}
+    lookups.locations = {"lab": 7, "annex": 8}
+    lookups.location_sites = {7: 5, 8: 6}
+    lookups.vlans = {"20": 3}
+    lookups.tags = {"core": 9}
+    lookups.hostnames = {"sw-existing": 100}
+    lookups.ips = {"10.0.0.100": 100}
+    lookups.device_sites = {100: 6}
+    lookups.deleted_hostnames = {"sw-gone"}
+    return lookups
+
+
+def test_csv_upload_is_streamed_with_row_numbers(tmp_path):
+    path = tmp_path / "devices.csv"
+    path.write_text("Host,Address,Type\nsw1,10.0.0.1,switch\n,,\nsw2,10.0.0.2,Switch\n")
+    assert importer.count_rows(str(path), "devices.csv") == 3
+    columns, preview = importer.read_preview(str(path), "devices.csv", limit=1)
+    assert columns == ["Host", "Address", "Type"]
+    assert preview == [["sw1", "10.0.0.1", "switch"]]
+
+    mapping = {"0": "hostname", "1": "ip", "2": "skip"}
+    rows = list(importer.iter_mapped_rows(str(path), "devices.csv", mapping))
+    assert rows == [
+        (2, {"hostname": "sw1", "ip": "10.0.0.1"}),
+        (4, {"hostname": "sw2", "ip": "10.0.0.2"}),
+    ]
+
+
+def test_xlsx_upload_uses_read_only_workbook(tmp_path):
+    path = tmp_path / "devices.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Host", "VLAN"])
+    ws.append(["sw1", 20])
+    ws.append(["sw2", None])
+    wb.save(path)
+    assert importer.count_rows(str(path), "devices.xlsx") == 2
+    rows = list(importer.iter_upload_rows(str(path), "devices.xlsx"))
+    assert rows == [["Host", "VLAN"], ["sw1", "20"], ["sw2", ""]]
+
+
+def test_validation_resolves_names_from_lookups():
+    imp = DeviceImporter(None, SimpleNamespace(id=1), site_id=5, lookups=_lookups())
+    values = imp.validate(
+        2,
+        {
+            "hostname": "sw1",
+            "ip": "010.000.000.001",
+            "device_type": "Switch",
+            "location": "LAB",
+            "vlan": "20",
+            "mac": "aabb.ccdd.eeff",
+        },
+    )
+    assert values == {
+        "hostname": "sw1",
+        "ip": "10.0.0.1",
+        "device_type_id": 1,
+        "location_id": 7,
+        "vlan_id": 3,
+        "mac": "AA:BB:CC:DD:EE:FF",
+    }
+    new = imp._new_device_values(values)
+    assert new["site_id"] == 5 and new["created_by_id"] == 1 and new["manufacturer"] == ""
+
+
+def test_location_must_belong_to_the_devices_site():
+    imp = DeviceImporter(None, SimpleNamespace(id=1), site_id=5, action="overwrite", lookups=_lookups())
+    imp.import_batch(
+        [
+            (2, {"hostname": "sw1", "ip": "10.0.0.1", "device_type": "switch", "location": "annex"}),
+            # The existing device lives in site 6, not the importing site
+            (3, {"hostname": "sw-existing", "ip": "10.0.0.100", "location": "lab"}),
+        ]
+    )
+    assert imp.result.errors == [
+        (2, "Location belongs to another site"),
+        (3, "Location belongs to another site"),
+    ]
+    imp._check_location({"location_id": 8}, imp.lookups.device_sites[100])
+
+    # Without a target site devices land in the virtual warehouse
+    imp = DeviceImporter(None, SimpleNamespace(id=1), lookups=_lookups())
+    imp.import_batch([(2, {"hostname": "sw1", "ip": "10.0.0.1", "device_type": "switch", "location": "lab"})])
+    assert imp.result.errors == [(2, "Location belongs to another site")]
+
+
+def test_invalid_and_conflicting_rows_are_reported_without_writes():
+    imp = DeviceImporter(None, SimpleNamespace(id=1), action="skip", lookups=_lookups())
+    imp.import_batch(
+        [
+            (2, {"hostname": "sw1", "ip": "10.0.0.1"}),
+            (3, {"hostname": "sw2", "ip": "bad"}),
+            (4, {"hostname": "sw3", "ip": "10.0.0.3", "device_type": "router"}),
+            (5, {"hostname": "sw-existing", "ip": "10.0.0.5", "device_type": "switch"}),
+            (6, {"hostname": "sw-gone", "ip": "10.0.0.6", "device_type": "switch"}),
+            (7, {"hostname": "sw-gone", "ip": "10.0.0.7", "device_type": "switch"}),
+            (8, {"hostname": "", "ip": "10.0.0.8"}),
+        ]
+    )
+    result = imp.result
+    assert result.processed == 7
+    assert result.skipped == 1
+    assert result.added == 0
+    assert [n for n, _msg in result.errors] == [2, 3, 4, 6, 7, 8]
+    assert result.errors[0][1] == "Missing device type"
+    assert "Duplicate hostname" in result.errors[4][1]
+
+
+def test_find_conflicts_counts_beyond_limit():
+    rows = [
+        (2, {"hostname": "sw-existing", "ip": "10.0.0.1"}),
+        (3, {"hostname": "new", "ip": "10.0.0.100"}),
+        (4, {"hostname": "other", "ip": "10.0.0.4"}),
+    ]
+    count, shown = importer.find_conflicts(_lookups(), rows, limit=1)
+    assert count == 2
+    assert shown == [{"row": 2, "hostname": "sw-existing", "ip": "10.0.0.1", "device_id": 100}]
+
+
+def test_split_tags_normalises_and_dedupes():
+    assert importer.split_tags(" Core, edge ,core,,") == ["core", "edge"]
+
+
+def test_failed_batch_is_replayed_and_tags_linked(pg_engine):
+    from datetime import datetime, timezone
+
+    from core.models.models import Site
+    from modules.inventory.models import Device, DeviceType, Tag
+    import core.utils.database as database
+
+    database.Base.metadata.create_all(bind=pg_engine)
+    db = sessionmaker(bind=pg_engine)()
+    site = Site(name="import-site")
+    dtype = DeviceType(name="import-type")
+    old_tag = Tag(name="import-legacy", deleted_at=datetime.now(timezone.utc))
+    db.add_all([site, dtype, old_tag])
+    db.commit()
+
+    imp = DeviceImporter(db, None, site_id=site.id)
+    # Created after the lookups were loaded, so only the database rejects it
+    db.add(Device(hostname="import-sw2", ip="10.8.0.99", manufacturer="", device_type_id=dtype.id, site_id=site.id))
+    db.flush()
+    imp.import_batch(
+        [
+            (2, {"hostname": "import-sw1", "ip": "10.8.0.1", "device_type": "import-type", "tags": "import-legacy,import-new"}),
+            (3, {"hostname": "import-sw2", "ip": "10.8.0.2", "device_type": "import-type"}),
+            (4, {"hostname": "import-sw3", "ip": "10.8.0.3", "device_type": "import-type", "tags": "import-new"}),
+        ]
+    )
+    db.commit()
+
+    assert imp.result.added == 2
+    assert [n for n, _msg in imp.result.errors] == [3]
+    sw1 = db.query(Device).filter_by(hostname="import-sw1").one()
+    sw3 = db.query(Device).filter_by(hostname="import-sw3").one()
+    assert sorted(t.name for t in sw1.tags) == ["import-legacy", "import-new"]
+    assert [t.name for t in sw3.tags] == ["import-new"]
+    db.refresh(old_tag)
+    assert old_tag.deleted_at is None
+    assert sw1.site_id == site.id
+    db.close()
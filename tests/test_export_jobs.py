@@ -0,0 +1,91 @@
+import os
+import time
+
+from server.utils import exports
+from server.workers import export_jobs
+
+
+def test_cache_key_depends_on_spec_and_version():
+    spec = {"site_ids": [1, 2], "columns": [["hostname", "Hostname"]], "vlan": None}
+    key = export_jobs.cache_key("csv", spec, "v1")
+    assert key == export_jobs.cache_key("csv", dict(spec), "v1")
+    assert key != export_jobs.cache_key("csv", spec, "v2")
+    assert key != export_jobs.cache_key("xlsx", spec, "v1")
+    assert key != export_jobs.cache_key("csv", {**spec, "vlan": 5}, "v1")
+
+
+def test_job_state_round_trip_and_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "EXPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "EXPORT_CACHE_TTL", 60)
+    os.makedirs(tmp_path / "jobs")
+    export_jobs.update_job("abc123", id="abc123", status="running", progress=0)
+    export_jobs.update_job("abc123", progress=10)
+    job = export_jobs.load_job("abc123")
+    assert job["status"] == "running" and job["progress"] == 10
+    assert export_jobs.load_job("../etc/passwd") is None
+
+    result = tmp_path / "deadbeef.csv"
+    result.write_text("Hostname\n")
+    assert export_jobs.evict_expired() == 0
+    assert export_jobs.evict_expired(now=time.time() + 120) == 1
+    assert not result.exists()
+    assert export_jobs.load_job("abc123")["progress"] == 10
+
+    export_jobs.update_job("abc123", status="done")
+    assert export_jobs.evict_expired(now=time.time() + 120) == 1
+    assert export_jobs.load_job("abc123") is None
+
+
+def test_merge_pdf_chunks(tmp_path):
+    from reportlab.pdfgen import canvas
+    from pypdf import PdfReader
+
+    parts = []
+    for i in range(3):
+        path = str(tmp_path / f"part{i}.pdf")
+        c = canvas.Canvas(path)
+        c.drawString(100, 700, f"chunk {i}")
+        c.showPage()
+        c.save()
+        parts.append(path)
+    out = str(tmp_path / "merged.pdf")
+    exports.merge_pdfs(parts, out)
+    assert len(PdfReader(out).pages) == 3
+
+
+def test_data_version_tracks_tag_links(pg_engine):
+    from sqlalchemy import delete, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from core.models.models import Site
+    from modules.inventory.models import Device, DeviceType, Tag, device_tags
+    import core.utils.database as database
+
+    database.Base.metadata.create_all(bind=pg_engine)
+    db = sessionmaker(bind=pg_engine)()
+    site = Site(name="export-version-site")
+    dtype = DeviceType(name="export-version-type")
+    tags = [Tag(name="export-version-a"), Tag(name="export-version-b")]
+    db.add_all([site, dtype, *tags])
+    db.flush()
+    devices = [
+        Device(hostname=f"export-version-{i}", ip=f"10.7.0.{i}", manufacturer="", device_type_id=dtype.id, site_id=site.id)
+        for i in (1, 2)
+    ]
+    db.add_all(devices)
+    db.commit()
+
+    def relink(pairs):
+        ids = [d.id for d in devices]
+        db.execute(delete(device_tags).where(device_tags.c.device_id.in_(ids)))
+        db.execute(
+            insert(device_tags),
+            [{"device_id": devices[d].id, "tag_id": tags[t].id} for d, t in pairs],
+        )
+        db.commit()
+        return exports.data_version("csv", {"site_ids": [site.id]})
+
+    first = relink([(0, 0), (1, 1)])
+    assert relink([(0, 1), (1, 0)]) != first
+    assert relink([(0, 0), (1, 1)]) == first
+    db.close()
@@ -0,0 +1,48 @@
+import io
+import zipfile
+from datetime import datetime
+
+from server.utils import export_stream
+
+
+def test_iter_zip_streams_readable_archive(monkeypatch):
+    monkeypatch.setattr(export_stream, "EXPORT_CHUNK_SIZE", 1024)
+    entries = (
+        (f"sw{i}_{i}.txt", f"hostname sw{i}\n" + "x" * 5000 + str(i), datetime(2024, 5, 1, 12, 0))
+        for i in range(20)
+    )
+    chunks = list(export_stream.iter_zip(entries))
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        names = zf.namelist()
+        assert len(names) == 20
+        assert zf.read("sw3_3.txt").decode().startswith("hostname sw3")
+        assert zf.getinfo("sw3_3.txt").date_time == (2024, 5, 1, 12, 0, 0)
+
+
+def test_iter_zip_empty_archive():
+    data = b"".join(export_stream.iter_zip([]))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == []
+
+
+def test_iter_csv_chunks_rows(monkeypatch):
+    monkeypatch.setattr(export_stream, "EXPORT_CHUNK_SIZE", 256)
+    rows = ([f"sw{i}", f"10.0.0.{i}", "Yes"] for i in range(100))
+    chunks = list(export_stream.iter_csv(["Hostname", "IP", "On R1"], rows))
+    assert len(chunks) > 1
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "Hostname,IP,On R1"
+    assert lines[-1] == "sw99,10.0.0.99,Yes"
+    assert len(lines) == 101
+
+
+def test_iter_xlsx_write_only_workbook():
+    import openpyxl
+
+    rows = ([f"sw{i}", i] for i in range(50))
+    data = b"".join(export_stream.iter_xlsx(["Hostname", "VLAN"], rows, title="Inventory"))
+    ws = openpyxl.load_workbook(io.BytesIO(data))["Inventory"]
+    values = list(ws.values)
+    assert values[0] == ("Hostname", "VLAN")
+    assert values[-1] == ("sw49", 49)
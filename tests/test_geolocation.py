@@ -0,0 +1,84 @@
+import pytest
+
+from core.models.models import LoginEvent, User
+from core.utils import db_session, geolocation
+
+
+@pytest.fixture
+def geo_csv(tmp_path, monkeypatch):
+    path = tmp_path / "geo.csv"
+    path.write_text(
+        "start_ip,end_ip,city,region,country,latitude,longitude\n"
+        "81.2.69.0,81.2.69.255,London,England,United Kingdom,51.5,-0.12\n"
+        "2001:db8::,2001:db8::ffff,Testville,,Nowhere,1,2\n"
+        "8.8.8.0,8.8.8.255,,,United States,,\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(geolocation, "GEOIP_DB_PATH", str(path))
+    monkeypatch.setattr(geolocation, "_database", None)
+    geolocation.geolocate_ip.cache_clear()
+    yield path
+    geolocation.geolocate_ip.cache_clear()
+    geolocation._database = None
+
+
+@pytest.fixture(autouse=True)
+def _no_network(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("network used")
+
+    monkeypatch.setattr(geolocation.requests, "get", fail)
+
+
+def test_csv_lookup(geo_csv):
+    assert geolocation.geolocate_ip("81.2.69.160") == (
+        "London, England, United Kingdom",
+        51.5,
+        -0.12,
+    )
+    assert geolocation.geolocate_ip("8.8.8.8") == ("United States", None, None)
+    assert geolocation.geolocate_ip("9.9.9.9") == (None, None, None)
+
+
+def test_private_and_invalid_addresses_are_not_looked_up(geo_csv):
+    for ip in ("10.1.2.3", "127.0.0.1", "192.168.0.5", "fe80::1", "testclient"):
+        assert geolocation.geolocate_ip(ip) == (None, None, None)
+    assert geolocation._database is None
+
+
+def test_results_are_cached(geo_csv):
+    geolocation.geolocate_ip("81.2.69.1")
+    geolocation.geolocate_ip("81.2.69.1")
+    assert geolocation.geolocate_ip.cache_info().hits == 1
+
+
+def test_remote_provider_only_when_enabled(geo_csv, monkeypatch):
+    assert geolocation.locate("9.9.9.9") == (None, None, None)
+    monkeypatch.setattr(geolocation, "GEOIP_REMOTE", True)
+    monkeypatch.setattr(geolocation, "geolocate_ip_remote", lambda ip: ("Remote", 1.0, 2.0))
+    assert geolocation.locate("9.9.9.9") == ("Remote", 1.0, 2.0)
+    assert geolocation.locate("81.2.69.1")[0] == "London, England, United Kingdom"
+
+
+def test_enrich_login_event_updates_event_and_user(geo_csv, monkeypatch):
+    event = LoginEvent(id=1, ip_address="81.2.69.1")
+    user = User(id=2)
+
+    class _DB:
+        committed = False
+
+        def get(self, model, pk):
+            return {LoginEvent: event, User: user}[model]
+
+        def commit(self):
+            self.committed = True
+
+        def close(self):
+            pass
+
+    db = _DB()
+    monkeypatch.setattr(db_session, "SessionLocal", lambda: db)
+    geolocation.enrich_login_event(1, "81.2.69.1", 2)
+    assert db.committed
+    assert event.location == "London, England, United Kingdom"
+    assert (user.last_location_lat, user.last_location_lon) == (51.5, -0.12)
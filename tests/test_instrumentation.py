@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.utils import instrumentation, ssh
+from server.routes.api import system as system_api
+
+
+class FakeHistogram:
+    def __init__(self):
+        self.observed = []
+        self._labels = None
+
+    def labels(self, *args, **kwargs):
+        self._labels = args or tuple(sorted(kwargs.items()))
+        return self
+
+    def observe(self, value):
+        self.observed.append((self._labels, value))
+
+
+def test_timed_records_result():
+    hist = FakeHistogram()
+    with instrumentation.timed(hist, oid="1.3"):
+        pass
+    with pytest.raises(ValueError):
+        with instrumentation.timed(hist, oid="1.3"):
+            raise ValueError
+    assert [labels for labels, _ in hist.observed] == [
+        (("oid", "1.3"), ("result", "ok")),
+        (("oid", "1.3"), ("result", "error")),
+    ]
+
+
+def test_job_label_groups_per_device_jobs():
+    assert instrumentation.job_label("config_pull_12") == "config_pull"
+    assert instrumentation.job_label("snmp_poll") == "snmp_poll"
+
+
+def test_ssh_wrappers_time_connect_and_exec(monkeypatch):
+    connect_hist, exec_hist = FakeHistogram(), FakeHistogram()
+    monkeypatch.setattr(ssh, "SSH_CONNECT_SECONDS", connect_hist)
+    monkeypatch.setattr(ssh, "SSH_EXEC_SECONDS", exec_hist)
+
+    class FakeConn:
+        closed = False
+
+        async def run(self, command, **kwargs):
+            return command
+
+        def close(self):
+            self.closed = True
+
+        async def wait_closed(self):
+            pass
+
+    conn = FakeConn()
+
+    async def fake_connect(host, **kwargs):
+        assert kwargs == {"username": "admin"}
+        return conn
+
+    monkeypatch.setattr(ssh.asyncssh, "connect", fake_connect)
+
+    async def run():
+        async with ssh.ssh_connect("10.0.0.1", username="admin") as c:
+            assert await ssh.run_command(c, "show version") == "show version"
+        assert conn.closed
+        assert await ssh.ssh_connect("10.0.0.1", username="admin") is conn
+
+    asyncio.run(run())
+    assert len(connect_hist.observed) == 2
+    assert exec_hist.observed[0][0] == (("result", "ok"),)
+
+
+def test_middleware_labels_by_route_template(monkeypatch):
+    latency, queries = FakeHistogram(), FakeHistogram()
+    monkeypatch.setattr(instrumentation, "HAS_PROMETHEUS", True)
+    monkeypatch.setattr(instrumentation, "HTTP_REQUEST_SECONDS", latency)
+    monkeypatch.setattr(instrumentation, "DB_QUERIES_PER_REQUEST", queries)
+    monkeypatch.setattr(instrumentation, "DB_SECONDS_PER_REQUEST", FakeHistogram())
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(instrumentation.MetricsMiddleware)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+    assert [labels for labels, _ in latency.observed] == [
+        ("GET", "/items/{item_id}", "200"),
+        ("GET", "/items/{item_id}", "200"),
+        ("GET", "unmatched", "404"),
+    ]
+    assert queries.observed[0] == (("/items/{item_id}",), 0)
+
+
+def test_metrics_endpoint_token_and_missing_client(monkeypatch):
+    app = FastAPI()
+    app.include_router(system_api.router)
+    client = TestClient(app)
+
+    monkeypatch.setattr(system_api, "HAS_PROMETHEUS", False)
+    assert client.get("/metrics").status_code == 503
+
+    monkeypatch.setattr(system_api, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 503
+
+
+@pytest.mark.skipif(not instrumentation.HAS_PROMETHEUS, reason="prometheus_client not installed")
+def test_metrics_endpoint_renders_openmetrics():
+    app = FastAPI()
+    app.include_router(system_api.router)
+    instrumentation.SYNC_RECORDS.labels("push", "devices").inc(3)
+    resp = TestClient(app).get("/metrics")
+    assert resp.status_code == 200
+    assert "application/openmetrics-text" in resp.headers["content-type"]
+    assert 'sync_records_total{direction="push",model="devices"}' in resp.text
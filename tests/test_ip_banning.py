@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from core.models.models import BannedIP, LoginFailureCount
+from core.utils import ip_banning
+from core.utils.ip_banning import BanCache, BanSet
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    for model in (BannedIP, LoginFailureCount):
+        model.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(ip_banning, "SessionLocal", Session)
+    monkeypatch.setattr(ip_banning, "ban_cache", BanCache(ttl=60))
+    session = Session()
+    yield session
+    session.close()
+
+
+def test_ban_set_matches_addresses_and_ranges():
+    later = datetime.utcnow() + timedelta(hours=1)
+    bans = BanSet(
+        [
+            ("198.51.100.7", later),
+            ("203.0.113.0/24", later),
+            ("2001:db8::/32", later),
+            ("192.0.2.1", datetime.utcnow() - timedelta(minutes=1)),
+            ("not-an-ip", later),
+        ]
+    )
+    assert len(bans) == 4
+    assert "198.51.100.7" in bans
+    assert "198.51.100.8" not in bans
+    assert "203.0.113.200" in bans
+    assert "2001:db8::1" in bans
+    assert "2001:db9::1" not in bans
+    assert "192.0.2.1" not in bans
+    assert "testclient" not in bans
+
+
+def test_failures_are_shared_and_ban_after_limit(db):
+    for _ in range(ip_banning.SHORT_LIMIT):
+        assert ip_banning.record_failure(db, "198.51.100.7") is False
+    assert not ip_banning.is_banned("198.51.100.7")
+    # Counters live in the database, so another worker's session sees them
+    other = ip_banning.SessionLocal()
+    assert ip_banning.record_failure(other, "198.51.100.7") is True
+    other.close()
+    assert ip_banning.is_banned("198.51.100.7")
+    ban = db.query(BannedIP).one()
+    assert ban.attempt_count == ip_banning.SHORT_LIMIT + 1
+
+
+def test_successful_login_clears_counters(db):
+    ip_banning.record_failure(db, "198.51.100.7")
+    ip_banning.clear_attempts(db, "198.51.100.7")
+    assert db.query(LoginFailureCount).count() == 0
+
+
+def test_cache_is_reloaded_after_ban_changes(db):
+    assert not ip_banning.is_banned("203.0.113.9")
+    ip_banning.ban_ip(db, "203.0.113.0/24", timedelta(hours=1), "test")
+    db.commit()
+    assert ip_banning.is_banned("203.0.113.9")
+    db.query(BannedIP).delete()
+    db.commit()
+    assert not ip_banning.is_banned("203.0.113.9")
+    with pytest.raises(ValueError):
+        ip_banning.ban_ip(db, "bogus", timedelta(hours=1), "test")
+
+
+def test_middleware_rejects_banned_clients(db):
+    ip_banning.ban_ip(db, "127.0.0.0/8", timedelta(hours=1), "t")
+    db.commit()
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/auth/login", ok), Route("/other", ok)])
+    app.add_middleware(ip_banning.BannedIPMiddleware)
+    client = TestClient(app, client=("127.0.0.1", 5000))
+    assert client.get("/auth/login").status_code == 403
+    assert client.get("/other").status_code == 200
@@ -1,4 +1,4 @@
-from core.utils.mac_utils import normalize_mac, display_mac, MAC_RE
+from core.utils.mac_utils import normalize_mac, display_mac, mac_to_int, MAC_RE
 
 
 def test_normalize_mac():
@@ -17,3 +17,9 @@ def test_mac_regex():
     assert MAC_RE.fullmatch('AA:BB:CC:DD:EE:FF')
     assert not MAC_RE.fullmatch('AA-BB-CC-DD-EE-FF')
 
+
+
+def test_mac_to_int():
+    assert mac_to_int('aa:bb:cc:dd:ee:ff') == mac_to_int('AABB.CCDD.EEFF') == 0xAABBCCDDEEFF
+    assert mac_to_int('aa:bb:cc') is None
+    assert mac_to_int(None) is None
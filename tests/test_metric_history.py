@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.models.models import SystemMetric
+from server.utils import metric_history as mh
+from server.utils import system_metrics
+from server.workers import metrics_sampler, system_metrics_logger
+
+
+def test_ring_buffer_keeps_newest_points():
+    buf = mh.RingBuffer(3)
+    for i in range(5):
+        buf.append(float(i), i, i, i)
+    assert [p[0] for p in buf.points()] == [2.0, 3.0, 4.0]
+    assert [p[0] for p in buf.points(since=3.0)] == [4.0]
+
+
+def test_coarser_resolutions_hold_aggregates():
+    history = mh.MetricHistory(resolutions=((1, 100), (10, 10)))
+    for ts in range(0, 25):
+        history.record(float(ts), {"cpu": ts, "skip": None})
+    assert history.names() == ["cpu"]
+    assert len(history.points(1)["cpu"]) == 25
+    # The bucket starting at 20 is still open
+    assert history.points(10)["cpu"] == [(0.0, 4.5, 0.0, 9.0), (10.0, 14.5, 10.0, 19.0)]
+
+
+def test_sampler_records_counter_rates(monkeypatch):
+    history = mh.MetricHistory()
+    monkeypatch.setattr(metrics_sampler, "metric_history", history)
+    monkeypatch.setattr(metrics_sampler, "_previous", {})
+    counters = iter([1000, 3000])
+    monkeypatch.setattr(
+        metrics_sampler,
+        "sample_values",
+        lambda: {"cpu_total": 5.0, "net_bytes_sent": next(counters)},
+    )
+    assert "net_sent_bytes_per_s" not in metrics_sampler.sample_once(now=100.0)
+    assert metrics_sampler.sample_once(now=102.0)["net_sent_bytes_per_s"] == 1000.0
+    assert [p[1] for p in history.points(1)["cpu_total"]] == [5.0, 5.0]
+
+
+def test_logger_writes_one_row_per_interval(monkeypatch):
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    SystemMetric.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(system_metrics_logger, "SessionLocal", Session)
+    history = mh.MetricHistory()
+    monkeypatch.setattr(system_metrics_logger, "metric_history", history)
+    monkeypatch.setattr(system_metrics_logger, "_last_written", None)
+    for ts in range(0, 130, 10):
+        history.record(float(ts), {"cpu_total": 1.0})
+
+    asyncio.run(system_metrics_logger.log_metrics_once())
+    # Nothing new since the last write
+    asyncio.run(system_metrics_logger.log_metrics_once())
+    rows = Session().query(SystemMetric).all()
+    assert len(rows) == 1
+    assert rows[0].data["metrics"]["cpu_total"] == [[0.0, 1.0, 1.0, 1.0], [60.0, 1.0, 1.0, 1.0]]
+
+    # Another worker wrote recently: skip
+    assert not system_metrics_logger._write({"x": []}, rows[0].timestamp + timedelta(seconds=1))
+
+
+def test_gunicorn_workers_are_cached(monkeypatch):
+    scans = []
+
+    def proc(pid, running=True):
+        return SimpleNamespace(
+            pid=pid,
+            info={"pid": pid, "cmdline": ["gunicorn", "server.main:app"]},
+            is_running=lambda: running,
+        )
+
+    procs = [proc(1), proc(2)]
+
+    def process_iter(attrs):
+        scans.append(1)
+        return list(procs)
+
+    monkeypatch.setattr(system_metrics, "psutil", SimpleNamespace(process_iter=process_iter))
+    monkeypatch.setattr(system_metrics, "_workers", {})
+    monkeypatch.setattr(system_metrics, "_workers_scanned", 0.0)
+    assert [p.pid for p in system_metrics._gunicorn_workers()] == [1, 2]
+    first = system_metrics._workers[1]
+    system_metrics._gunicorn_workers()
+    assert len(scans) == 1
+    procs[1] = proc(3)
+    system_metrics._workers[2].is_running = lambda: False
+    assert [p.pid for p in system_metrics._gunicorn_workers()] == [1, 3]
+    assert len(scans) == 2
+    assert system_metrics._workers[1] is first
+
+
+def test_latest_returns_newest_fine_value():
+    history = mh.MetricHistory(resolutions=((1, 3), (10, 10)))
+    assert history.latest() == {}
+    for ts in range(5):
+        history.record(float(ts), {"cpu_total": ts * 10.0})
+    assert history.latest() == {"cpu_total": 40.0}
+
+
+@pytest.mark.skipif(not system_metrics.HAS_PSUTIL, reason="psutil not installed")
+def test_gather_metrics_reuses_sampled_cpu(monkeypatch):
+    history = mh.MetricHistory()
+    history.record(1.0, {"cpu_total": 12.5, "cpu_0": 10.0, "cpu_1": 15.0})
+    monkeypatch.setattr(system_metrics, "metric_history", history)
+    monkeypatch.setattr(system_metrics, "_gunicorn_workers", lambda: [])
+
+    def _no_cpu_percent(*args, **kwargs):
+        raise AssertionError("cpu_percent must not be called")
+
+    monkeypatch.setattr(system_metrics.psutil, "cpu_percent", _no_cpu_percent)
+    metrics = system_metrics.gather_metrics()
+    assert metrics["cpu_total"] == 12.5
+    assert metrics["cpu_per_core"] == [10.0, 15.0]
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from core.utils import password_hashing as ph
+
+
+@pytest.fixture(autouse=True)
+def _fast_rounds(monkeypatch):
+    monkeypatch.setattr(ph, "BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(ph, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(ph, "_stats", ph._Stats())
+
+
+def test_verify_and_upgrade_low_cost_hash():
+    old = ph.hash_password("secret", rounds=4)
+    assert asyncio.run(ph.verify_password_async("wrong", old)) == (False, None)
+    ok, upgraded = asyncio.run(ph.verify_password_async("secret", old))
+    assert ok and ph.hash_rounds(upgraded) == 5
+    assert asyncio.run(ph.verify_password_async("secret", upgraded)) == (True, None)
+    assert asyncio.run(ph.verify_password_async("secret", "not-a-hash")) == (False, None)
+
+
+def test_concurrency_limit_and_busy_rejection(monkeypatch):
+    monkeypatch.setattr(ph, "PASSWORD_HASH_CONCURRENCY", 1)
+    monkeypatch.setattr(ph, "PASSWORD_HASH_MAX_WAITING", 2)
+    hashed = ph.hash_password("secret")
+
+    async def main():
+        jobs = [ph.verify_password_async("secret", hashed) for _ in range(4)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert sum(isinstance(r, ph.PasswordHasherBusy) for r in results) == 1
+    stats = ph.password_hash_stats()
+    assert stats["completed"] == 3
+    assert stats["rejected"] == 1
+    assert stats["waiting"] == stats["running"] == 0
+    assert stats["queue_ms_max"] > 0
+
+
+def test_process_pool(monkeypatch):
+    monkeypatch.setattr(ph, "PASSWORD_HASH_WORKERS", 1)
+    try:
+        hashed = asyncio.run(ph.hash_password_async("secret"))
+        assert asyncio.run(ph.verify_password_async("secret", hashed)) == (True, None)
+    finally:
+        ph.shutdown_password_pool()
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from modules.inventory.models import DeviceType, Tag
+from core.utils import reference_data
+from core.utils.reference_data import ReferenceCache
+
+
+class _Loader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.rows)
+
+
+def test_rows_are_cached_until_the_table_version_changes():
+    cache = ReferenceCache(ttl=60)
+    load = _Loader([(1, "Switch")])
+    assert cache.get("device_types", "device_types", load) == ((1, "Switch"),)
+    assert cache.get("device_types", "device_types", load) == ((1, "Switch"),)
+    assert load.calls == 1
+    cache.bump(["tags"])
+    cache.get("device_types", "device_types", load)
+    assert load.calls == 1
+    cache.bump(["device_types"])
+    cache.get("device_types", "device_types", load)
+    assert load.calls == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = ReferenceCache(ttl=-1)
+    load = _Loader([])
+    cache.get("tags", "tags", load)
+    cache.get("tags", "tags", load)
+    assert load.calls == 2
+
+
+def test_load_racing_a_commit_is_not_kept():
+    cache = ReferenceCache(ttl=60)
+
+    def load():
+        cache.bump(["tags"])
+        return [(1, "old")]
+
+    assert cache.get("tags", "tags", load) == ((1, "old"),)
+    fresh = _Loader([(1, "new")])
+    assert cache.get("tags", "tags", fresh) == ((1, "new"),)
+    assert fresh.calls == 1
+
+
+def test_commit_bumps_changed_tables(monkeypatch):
+    cache = ReferenceCache(ttl=60)
+    monkeypatch.setattr(reference_data, "reference_cache", cache)
+    session = SimpleNamespace(info={})
+    session.new = [Tag(name="a")]
+    session.deleted = []
+    session.dirty = []
+    reference_data._collect_reference_changes(session, None)
+    assert cache.version("tags") == 0
+    reference_data._apply_reference_changes(session)
+    assert cache.version("tags") == 1
+    assert cache.version("device_types") == 0
+    assert session.info == {}
+
+
+def test_device_types_are_loaded_without_image_columns():
+    captured = []
+
+    class _DB:
+        def execute(self, stmt):
+            captured.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(all=lambda: [])
+
+    reference_data._load(_DB(), "device_types")
+    assert "upload_icon" not in captured[0] and "upload_image" not in captured[0]
+    assert DeviceType.__tablename__ in captured[0]
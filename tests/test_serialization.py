@@ -0,0 +1,70 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import inspect
+
+from core.models import models as model_module
+from core.utils import serialization
+from core.utils.serialization import FastJSONResponse, column_extractor, dumps, to_jsonable
+from modules.inventory.models import Device
+
+
+def _device():
+    return Device(
+        id=1,
+        hostname="sw1",
+        ip="10.0.0.1",
+        created_at=datetime(2024, 1, 1, 5),
+        updated_at=datetime(2024, 1, 1, 7, tzinfo=timezone(timedelta(hours=2))),
+        conflict_data=[{"field": "ip"}],
+    )
+
+
+def test_extractor_matches_to_jsonable_walk():
+    obj = _device()
+    expected = {c.key: to_jsonable(getattr(obj, c.key)) for c in inspect(Device).column_attrs}
+    assert column_extractor(Device)(obj) == expected
+    assert expected["updated_at"] == "2024-01-01T05:00:00+00:00"
+
+
+def test_extractor_is_built_once_per_model():
+    assert column_extractor(Device) is column_extractor(Device)
+    for model in model_module.Base.__subclasses__():
+        column_extractor(model)
+
+
+def test_native_extractor_keeps_values_and_limits_fields():
+    obj = _device()
+    row = column_extractor(Device, native=True, fields=("id", "created_at"))(obj)
+    assert row == {"id": 1, "created_at": datetime(2024, 1, 1, 5)}
+
+
+def test_dumps_matches_fastapi_encoding():
+    value = {
+        1: datetime(2024, 1, 1, 5, 30),
+        "id": uuid.UUID(int=1),
+        "price": Decimal("2.50"),
+        "count": Decimal("3"),
+        "tags": {"a"},
+    }
+    assert json.loads(dumps(value)) == {
+        "1": "2024-01-01T05:30:00",
+        "id": str(uuid.UUID(int=1)),
+        "price": 2.5,
+        "count": 3,
+        "tags": ["a"],
+    }
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(serialization, "HAS_ORJSON", False)
+    assert dumps({"a": datetime(2024, 1, 1)}) == b'{"a":"2024-01-01T00:00:00"}'
+    assert serialization.loads(b'{"a":1}') == {"a": 1}
+
+
+def test_response_renders_with_dumps():
+    resp = FastJSONResponse({"when": datetime(2024, 1, 1)})
+    assert resp.body == b'{"when":"2024-01-01T00:00:00"}'
+    assert resp.media_type == "application/json"
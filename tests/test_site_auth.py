@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from core.models.models import SiteKey, SiteKeyAuthStat
+from core.utils import site_auth
+
+
+class _CountingDB:
+    def __init__(self, keys):
+        self.keys = keys
+        self.queries = 0
+        self.added = []
+        self.executed = []
+        self.commits = 0
+
+    def query(self, model):
+        self.queries += 1
+        db = self
+
+        class _Query:
+            def filter(self, expr):
+                self.site_id = expr.right.value
+                return self
+
+            def first(self):
+                return next((k for k in db.keys if k.site_id == self.site_id), None)
+
+        return _Query()
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def add_all(self, objs):
+        self.added.extend(objs)
+
+    def execute(self, stmt, params=None):
+        self.executed.append(params)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    site_auth.site_keys.clear()
+    site_auth.recorder.take()
+    yield
+    site_auth.site_keys.clear()
+    site_auth.recorder.take()
+
+
+def _request(api_key):
+    return SimpleNamespace(headers={"Site-ID": "A", "API-Key": api_key})
+
+
+def test_successful_auth_is_cached_and_not_written():
+    db = _CountingDB([SiteKey(id=1, site_id="A", site_name="Test", api_key="key", active=True)])
+    for _ in range(3):
+        key = asyncio.run(site_auth.validate_site_key(_request("key"), db))
+        assert key.site_id == "A"
+    assert db.queries == 1 and db.commits == 0 and db.added == []
+
+
+def test_failures_are_audited_immediately_and_counted():
+    db = _CountingDB([SiteKey(id=1, site_id="A", site_name="Test", api_key="key", active=True)])
+    with pytest.raises(HTTPException):
+        asyncio.run(site_auth.validate_site_key(_request("wrong"), db))
+    assert [a.action_type for a in db.added] == ["key_auth_fail"]
+    asyncio.run(site_auth.validate_site_key(_request("key"), db))
+    asyncio.run(site_auth.validate_site_key(_request("key"), db))
+
+    flush_db = _CountingDB([])
+    assert site_auth.flush_site_auth(flush_db) == 2
+    stats = {s.success: s for s in flush_db.added if isinstance(s, SiteKeyAuthStat)}
+    assert stats[True].count == 2 and stats[False].count == 1
+    assert stats[True].first_seen <= stats[True].last_seen
+    assert flush_db.executed[0][0]["key_site_id"] == "A"
+    assert site_auth.flush_site_auth(flush_db) == 0
+
+
+def test_commit_drops_edited_keys():
+    site_auth.site_keys.set("A", "cached")
+    site_auth.site_keys.set("B", "cached")
+    session = SimpleNamespace(info={site_auth._PENDING_KEY: {"A"}})
+    site_auth._apply_site_key_changes(session)
+    assert site_auth.site_keys.get("A") is None and site_auth.site_keys.get("B") == "cached"
+
+
+def test_failed_flush_keeps_counts(monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from core.utils.db_session import SafeSession
+
+    def _fail(self):
+        raise RuntimeError("db down")
+
+    # SafeSession.commit swallows errors; the flush must still see them
+    monkeypatch.setattr(Session, "commit", _fail)
+    site_auth.recorder.record("A", False)
+    with pytest.raises(RuntimeError):
+        site_auth.flush_site_auth(SafeSession())
+    counts = site_auth.recorder.take()
+    assert counts[("A", False)][0] == 1
@@ -83,3 +83,29 @@ def test_query_filters_deleted(pg_engine):
     # including deleted should return both
     res_all = db.query(models.Device).execution_options(include_deleted=True).all()
     assert len(res_all) == 2
+
+
+def test_filter_deleted_only_targets_entities_in_statement():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from core.utils import db_session
+
+    models = _load_models()
+    state = types.SimpleNamespace(
+        is_select=True,
+        execution_options={},
+        statement=select(models.Device.hostname).join(models.Device.tags),
+    )
+    db_session._filter_deleted(state)
+    sql = str(state.statement.compile(dialect=postgresql.dialect()))
+    assert "devices.deleted_at IS NULL" in sql
+    assert "tags.deleted_at IS NULL" in sql
+    assert "users.deleted_at" not in sql
+    options = db_session.soft_delete_options()
+    assert db_session.soft_delete_options() is options
+
+    state.statement = select(models.Tag.id)
+    state.execution_options = {"include_deleted": True}
+    db_session._filter_deleted(state)
+    assert "deleted_at" not in str(state.statement.compile(dialect=postgresql.dialect()))
@@ -0,0 +1,121 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from core.models.models import User
+from core.utils import auth_cache, sql_profiler
+
+
+@pytest.fixture(autouse=True)
+def _principals():
+    for user_id, role in ((1, "superadmin"), (2, "viewer")):
+        user = User(id=user_id, email=f"u{user_id}@example.com", role=role)
+        auth_cache.principals.set(("user", user_id), auth_cache.Principal.from_user(user, ()))
+    yield
+    auth_cache.principals.clear()
+
+
+def _engine():
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b')"))
+    return engine
+
+
+def test_statement_shape_collapses_values():
+    a = sql_profiler.statement_shape("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'")
+    b = sql_profiler.statement_shape("SELECT *  FROM t\nWHERE id IN (7) AND name = 'y'")
+    assert a == b == "SELECT * FROM t WHERE id IN (...) AND name = ?"
+    assert "%(id_1)s" in sql_profiler.statement_shape("SELECT 1 WHERE id = %(id_1)s")
+
+
+def _app(engine, store, monkeypatch, logged_in=True, user_id=1):
+    monkeypatch.setattr(sql_profiler, "profile_store", store)
+    app = FastAPI()
+
+    @app.get("/items")
+    def items():
+        with engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text("SELECT id FROM items"))]
+            for _ in range(3):
+                for item_id in ids:
+                    conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+        return {"ok": True}
+
+    inner = sql_profiler.SQLProfilerMiddleware(app, sample_rate=0)
+
+    async def with_session(scope, receive, send):
+        scope["session"] = {"user_id": user_id} if logged_in else {}
+        await inner(scope, receive, send)
+
+    return TestClient(with_session)
+
+
+def test_requested_profile_flags_repeated_statements(monkeypatch):
+    store = sql_profiler.ProfileStore()
+    client = _app(_engine(), store, monkeypatch)
+    client.get("/items")
+    assert store.slowest_routes() == []
+
+    client.get("/items", headers={"X-Profile": "sql"})
+    [route] = store.slowest_routes()
+    assert route["route"] == "/items"
+    assert route["max_queries"] == 7
+    assert route["flagged"] == 1
+    [offender] = store.worst_offenders()
+    assert offender.max_repeats == 6
+    assert offender.shape.startswith("SELECT name FROM items")
+    assert offender.caller.startswith("tests/test_sql_profiler.py:")
+    assert store.recent_captures() == []
+
+
+def test_profile_requires_login_and_captures_cprofile(monkeypatch):
+    store = sql_profiler.ProfileStore()
+    engine = _engine()
+    _app(engine, store, monkeypatch, logged_in=False).get("/items?_profile=cprofile")
+    assert store.slowest_routes() == []
+
+    _app(engine, store, monkeypatch).get("/items?_profile=cprofile")
+    [capture] = store.recent_captures()
+    assert capture["mode"] == "cprofile"
+    assert capture["path"] == "/items"
+    assert "function calls" in capture["output"]
+
+
+def test_profile_requires_superadmin(monkeypatch):
+    store = sql_profiler.ProfileStore()
+    client = _app(_engine(), store, monkeypatch, user_id=2)
+    client.get("/items?_profile=cprofile")
+    client.get("/items", headers={"X-Profile": "sql"})
+    assert store.slowest_routes() == []
+    assert store.recent_captures() == []
+
+
+def test_capture_records_the_profiler_that_ran(monkeypatch):
+    monkeypatch.setattr(sql_profiler, "HAS_PYINSTRUMENT", False)
+    store = sql_profiler.ProfileStore()
+    _app(_engine(), store, monkeypatch).get("/items?_profile=pyinstrument")
+    [capture] = store.recent_captures()
+    assert capture["mode"] == "cprofile"
+
+
+def test_sampling_profiles_without_header(monkeypatch):
+    store = sql_profiler.ProfileStore()
+    monkeypatch.setattr(sql_profiler, "profile_store", store)
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    client = TestClient(sql_profiler.SQLProfilerMiddleware(app, sample_rate=1.0))
+    client.get("/ping")
+    client.get("/nowhere")
+    routes = {r["route"]: r for r in store.slowest_routes()}
+    assert routes["/ping"]["requests"] == 1
+    assert routes["unmatched"]["max_queries"] == 0
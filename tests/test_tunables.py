@@ -0,0 +1,96 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from core.models.models import SystemTunable
+from core.utils import db_notify, tunables
+from core.utils.tunables import Tunable, TunableCache
+from server.workers import db_listener
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TunableCache(ttl=60)
+    monkeypatch.setattr(tunables, "tunable_cache", cache)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [
+            Tunable("Enable Cloud Sync", "Yes", "bool", "Sync"),
+            Tunable("Cloud Site ID", "site-1", "text", "Sync"),
+            Tunable("MAX_BACKUPS", "12", "int", "General"),
+        ]
+
+    monkeypatch.setattr(tunables, "_load", load)
+    cache.loads = loads
+    return cache
+
+
+def test_values_are_loaded_once(cache):
+    assert tunables.get_tunable("Cloud Site ID") == "site-1"
+    assert tunables.get_tunable("missing", "x") == "x"
+    assert tunables.get_bool("Enable Cloud Sync") is True
+    assert tunables.get_int("MAX_BACKUPS") == 12
+    assert tunables.tunable_functions() == ["General", "Sync"]
+    assert len(cache.loads) == 1
+    cache.invalidate()
+    tunables.get_tunable("Cloud Site ID")
+    assert len(cache.loads) == 2
+
+
+def test_typed_values_follow_data_type(cache):
+    assert tunables.get_value("Enable Cloud Sync") is True
+    assert tunables.get_value("MAX_BACKUPS") == 12
+    assert tunables.get_value("Cloud Site ID") == "site-1"
+    assert tunables.get_value("missing", 3) == 3
+
+
+def test_load_racing_an_invalidation_is_not_kept():
+    cache = TunableCache(ttl=60)
+
+    def load():
+        cache.invalidate()
+        return [Tunable("a", "old", "text", "x")]
+
+    assert cache.rows(load)["a"].value == "old"
+    assert cache.rows(lambda: [Tunable("a", "new", "text", "x")])["a"].value == "new"
+
+
+def test_commit_invalidates_only_after_tunable_changes(cache):
+    tunables.get_tunable("Cloud Site ID")
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+    session = SimpleNamespace(
+        info={}, new=[SystemTunable(name="x")], dirty=[], deleted=[], get_bind=lambda: bind
+    )
+    tunables._collect_tunable_changes(session, None)
+    tunables.get_tunable("Cloud Site ID")
+    assert len(cache.loads) == 1
+    tunables._apply_tunable_changes(session)
+    assert session.info == {}
+    tunables.get_tunable("Cloud Site ID")
+    assert len(cache.loads) == 2
+
+
+def test_postgres_sessions_notify_once_per_transaction():
+    executed = []
+    conn = SimpleNamespace(execute=lambda stmt, params: executed.append(params))
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    session = SimpleNamespace(info={}, get_bind=lambda: bind, connection=lambda: conn)
+    db_notify.notify(session, tunables.TUNABLE_CHANNEL)
+    db_notify.notify(session, tunables.TUNABLE_CHANNEL)
+    assert executed == [{"channel": "system_tunables", "sender": db_notify.SENDER_ID}]
+    db_notify._reset_notified(session)
+    assert session.info == {}
+
+
+def test_listener_ignores_its_own_notifications():
+    own = SimpleNamespace(channel="system_tunables", payload=db_notify.SENDER_ID)
+    # Another container's worker with the same pid
+    other = SimpleNamespace(channel="system_tunables", payload=uuid.uuid4().hex)
+    dbapi = SimpleNamespace(poll=lambda: None, notifies=[own])
+    assert db_listener._drain(dbapi) == set()
+    dbapi.notifies = [own, other]
+    assert db_listener._drain(dbapi) == {"system_tunables"}
+    assert dbapi.notifies == []
@@ -0,0 +1,126 @@
+// Virtualized device table backed by the keyset-paginated /devices/grid API.
+// Only the rows inside the scroll viewport (plus a small overscan) are in the
+// DOM; further pages are fetched as the user scrolls towards the end.
+function deviceGrid(config) {
+  return {
+    columns: config.columns,
+    rows: [],
+    cursor: null,
+    done: false,
+    loading: false,
+    error: null,
+    counts: { total: 0, complete: 0, incomplete: 0 },
+    sort: 'hostname',
+    desc: false,
+    search: '',
+    filters: {},
+    selectedIds: [],
+    rowHeight: 36,
+    overscan: 10,
+    scrollTop: 0,
+    viewportHeight: 600,
+    requestId: 0,
+    searchTimer: null,
+    init() {
+      this.loadSort()
+      const viewport = this.$refs.viewport
+      this.viewportHeight = viewport.clientHeight || 600
+      viewport.addEventListener('scroll', () => {
+        this.scrollTop = viewport.scrollTop
+        this.maybeLoadMore()
+      })
+      window.addEventListener('resize', () => { this.viewportHeight = viewport.clientHeight || 600 })
+      this.$watch('search', () => {
+        clearTimeout(this.searchTimer)
+        this.searchTimer = setTimeout(() => this.reset(), 250)
+      })
+      this.reset()
+    },
+    get first() { return Math.max(0, Math.floor(this.scrollTop / this.rowHeight) - this.overscan) },
+    get last() {
+      return Math.min(this.rows.length, Math.ceil((this.scrollTop + this.viewportHeight) / this.rowHeight) + this.overscan)
+    },
+    get visibleRows() { return this.rows.slice(this.first, this.last) },
+    get topPad() { return this.first * this.rowHeight },
+    get bottomPad() { return Math.max(0, this.rows.length - this.last) * this.rowHeight },
+    params() {
+      const params = new URLSearchParams({ sort: this.sort, desc: this.desc, limit: config.pageSize })
+      if (config.typeId !== null) params.set('type_id', config.typeId)
+      if (this.search) params.set('q', this.search)
+      if (this.cursor) params.set('cursor', this.cursor)
+      Object.entries(this.filters).forEach(([name, value]) => { if (value) params.set(`f_${name}`, value) })
+      return params
+    },
+    async fetchPage() {
+      if (this.loading || this.done) return
+      this.loading = true
+      const id = ++this.requestId
+      try {
+        const res = await fetch(`${config.url}?${this.params()}`)
+        if (id !== this.requestId) return
+        if (!res.ok) { this.error = res.statusText; this.done = true; return }
+        const page = await res.json()
+        if (id !== this.requestId) return
+        this.rows = this.rows.concat(page.rows)
+        if (page.counts) this.counts = page.counts
+        this.cursor = page.next_cursor
+        this.done = !page.next_cursor
+        this.error = null
+      } finally {
+        if (id === this.requestId) this.loading = false
+      }
+      this.maybeLoadMore()
+    },
+    maybeLoadMore() {
+      if (!this.done && !this.loading && this.last >= this.rows.length - this.overscan) this.fetchPage()
+    },
+    reset() {
+      this.requestId++
+      this.rows = []
+      this.cursor = null
+      this.done = false
+      this.loading = false
+      this.scrollTop = 0
+      this.$refs.viewport.scrollTop = 0
+      this.fetchPage()
+    },
+    sortBy(name) {
+      if (this.sort === name) {
+        this.desc = !this.desc
+      } else {
+        this.sort = name
+        this.desc = false
+      }
+      sessionStorage.setItem('device-grid-sort', JSON.stringify({ sort: this.sort, desc: this.desc }))
+      this.reset()
+    },
+    loadSort() {
+      try {
+        const saved = JSON.parse(sessionStorage.getItem('device-grid-sort') || 'null')
+        if (saved && this.columns.some(c => c.name === saved.sort)) {
+          this.sort = saved.sort
+          this.desc = saved.desc
+        }
+      } catch {}
+    },
+    sortIndicator(name) { return this.sort === name ? (this.desc ? '↓' : '↑') : '' },
+    duplicateOf(row, name) { return (row.duplicates && row.duplicates[name]) || [] },
+    toggleAll(state) { this.selectedIds = state ? this.rows.map(r => String(r.id)) : [] },
+    countText() {
+      if (!this.rows.length) return this.loading ? 'Loading…' : 'No entries'
+      return `Loaded ${this.rows.length} of ${this.counts.total} entries`
+    },
+    bulkUpdate() {
+      this.$el.action = this.$el.dataset.bulkUpdateUrl
+      this.$el.submit()
+    },
+    deleteRow(id) {
+      if (!confirm('Delete device?')) return
+      this.selectedIds = []
+      this.$nextTick(() => {
+        this.$el.action = `/devices/${id}/delete`
+        this.$el.submit()
+      })
+    },
+  }
+}